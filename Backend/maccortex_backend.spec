@@ -91,14 +91,18 @@ hiddenimports = [
     # 内部模块
     'api',
     'api.swarm_routes',
+    'api.pipeline_routes',
     'patterns',
     'patterns.registry',
+    'patterns.manifest',
+    'patterns.pipeline',
     'patterns.base',
     'patterns.extract',
     'patterns.format',
     'patterns.search',
     'patterns.summarize',
     'patterns.translate',
+    'patterns.embed',
     'orchestration',
     'orchestration.graph',
     'orchestration.swarm_graph',
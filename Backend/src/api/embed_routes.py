@@ -0,0 +1,99 @@
+"""
+MacCortex Embed API Routes
+
+批量文本嵌入：并发请求合并为更大的模型批次，重复文本命中内容哈希缓存。
+
+Routes:
+- POST /embed - 嵌入多条文本（JSON 中返回 base64 / .npy 编码的 float32 矩阵；
+  Accept: application/octet-stream 时直接返回原始 float32 字节）
+- GET /embed/stats - 合并批次与缓存命中统计
+"""
+
+import asyncio
+from typing import Any, Dict, List, Literal, Union
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+
+from retrieval.service import encode_vectors, get_embedding_service
+from utils.config import settings
+
+# ============================================================================
+# Router
+# ============================================================================
+
+router = APIRouter(prefix="/embed", tags=["embed"])
+
+
+# ============================================================================
+# Data Models
+# ============================================================================
+
+
+class EmbedRequest(BaseModel):
+    """嵌入请求"""
+    texts: List[str] = Field(..., min_length=1, description="待嵌入文本")
+    encoding: Literal["base64", "npy", "float"] = Field(
+        "base64", description="base64: 小端 float32 原始字节；npy: .npy 缓冲区；float: JSON 浮点列表"
+    )
+
+
+class EmbedResponse(BaseModel):
+    """嵌入结果"""
+    model: str = Field(..., description="嵌入函数标识（如 hashing-384、ollama:nomic-embed-text）")
+    dimension: int
+    count: int
+    dtype: str = Field("float32", description="元素类型（小端）")
+    encoding: str
+    data: Union[str, List[List[float]]] = Field(..., description="count × dimension 矩阵，行优先")
+
+
+# ============================================================================
+# API Endpoints
+# ============================================================================
+
+
+@router.post("", response_model=EmbedResponse)
+async def embed_texts(payload: EmbedRequest, request: Request):
+    """
+    批量嵌入
+
+    向量已 L2 归一化（点积即余弦相似度）。客户端还原示例：
+
+    ```python
+    np.frombuffer(base64.b64decode(data), dtype="<f4").reshape(count, dimension)
+    ```
+    """
+    if len(payload.texts) > settings.embed_max_texts:
+        raise HTTPException(status_code=400, detail=f"单次最多嵌入 {settings.embed_max_texts} 条文本")
+
+    service = await asyncio.to_thread(get_embedding_service)
+    matrix = await service.embed(payload.texts)
+
+    if "application/octet-stream" in request.headers.get("accept", ""):
+        return Response(
+            content=matrix.astype("<f4").tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                "X-Embedding-Model": service.name,
+                "X-Embedding-Dimension": str(matrix.shape[1]),
+                "X-Embedding-Count": str(matrix.shape[0]),
+                "X-Embedding-Dtype": "float32-le",
+            },
+        )
+
+    return EmbedResponse(
+        model=service.name,
+        dimension=int(matrix.shape[1]),
+        count=int(matrix.shape[0]),
+        encoding=payload.encoding,
+        data=encode_vectors(matrix, payload.encoding),
+    )
+
+
+@router.get("/stats")
+async def get_embed_stats() -> Dict[str, Any]:
+    """合并批次与缓存命中统计"""
+    service = await asyncio.to_thread(get_embedding_service)
+    return {"model": service.name, "dimension": service.dimension, **service.stats}
@@ -0,0 +1,214 @@
+"""
+MacCortex Ingest API Routes
+
+将本地目录增量导入语义索引（SearchPattern 的 semantic / hybrid 搜索查询同一索引）。
+
+Routes:
+- POST /ingest - 导入目录（JSON 报告，或 stream=true 时以 SSE 推送进度）
+- GET /ingest/{collection} - 查询集合状态（已导入文件数 / 分块数）
+"""
+
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from retrieval import Ingestor, IngestReport, get_vector_store
+
+# ============================================================================
+# Router
+# ============================================================================
+
+router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+# 同一集合同时只允许一个导入任务
+_running: set = set()
+# 进行中的导入任务（持有引用，避免任务在客户端断开后被回收）
+_tasks: set = set()
+
+
+# ============================================================================
+# Data Models
+# ============================================================================
+
+
+class IngestRequest(BaseModel):
+    """导入请求"""
+    directory: str = Field(..., description="要导入的目录（绝对路径或 ~ 开头）")
+    collection: str = Field("default", description="集合名称（SearchPattern 的 collection 参数）")
+    extensions: Optional[List[str]] = Field(None, description="扩展名白名单（默认 settings.ingest_extensions）")
+    force: bool = Field(False, description="忽略清单，重新处理全部文件")
+    stream: bool = Field(False, description="以 SSE 推送进度")
+
+
+class IngestResponse(BaseModel):
+    """导入结果"""
+    collection: str
+    root: str
+    scanned: int = Field(..., description="已遍历的文件数")
+    unchanged: int = Field(..., description="未变化（跳过）的文件数")
+    added: int
+    updated: int
+    removed: int
+    skipped: int = Field(..., description="超过大小上限的文件数")
+    chunks_upserted: int
+    chunks_deleted: int
+    errors: List[Dict[str, str]] = Field(default_factory=list)
+    elapsed_ms: float
+    done: bool
+
+
+class CollectionStatus(BaseModel):
+    """集合状态"""
+    collection: str
+    backend: str = Field(..., description="向量索引后端 (chromadb / numpy)")
+    files: int = Field(..., description="清单中的文件数")
+    chunks: int = Field(..., description="索引中的分块数")
+
+
+# ============================================================================
+# Helper Functions
+# ============================================================================
+
+
+def _open_ingestor(collection: str) -> Ingestor:
+    try:
+        return Ingestor(get_vector_store(), collection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _sse(event: str, payload: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+async def _run(ingestor: Ingestor, request: IngestRequest, progress=None) -> IngestReport:
+    """在线程池中执行导入（遍历 / 哈希 / 嵌入均为阻塞操作），结束后释放集合"""
+    try:
+        return await asyncio.to_thread(
+            ingestor.ingest, request.directory, request.extensions, progress, force=request.force
+        )
+    finally:
+        ingestor.close()
+        _running.discard(request.collection)
+
+
+def _start(ingestor: Ingestor, request: IngestRequest, progress=None) -> asyncio.Task:
+    """
+    启动导入任务
+
+    任务独立于请求运行：客户端断开（SSE 未被读取、请求被取消）时导入仍会完成，
+    并由 _run 的 finally 释放集合，不会让集合永久处于 409。
+    """
+    task = asyncio.create_task(_run(ingestor, request, progress))
+    _tasks.add(task)
+
+    def forget(done: asyncio.Task) -> None:
+        _tasks.discard(done)
+        if not done.cancelled() and done.exception() is not None:
+            logger.error(f"导入失败 ({request.collection}): {done.exception()}")
+
+    task.add_done_callback(forget)
+    return task
+
+
+# ============================================================================
+# API Endpoints
+# ============================================================================
+
+
+@router.post("", response_model=IngestResponse)
+async def ingest_directory(request: IngestRequest):
+    """
+    增量导入目录
+
+    只处理新增 / 修改 / 删除的文件（按 mtime、size、sha256 判断），
+    未变化的大目录重复导入只需一次 stat 遍历。
+
+    stream=true 时返回 SSE：
+    - event: start -> 开始
+    - event: progress -> 进度（IngestReport）
+    - event: done -> 完成（最终 IngestReport）
+    - event: error -> 错误
+    """
+    directory = os.path.abspath(os.path.expanduser(request.directory))
+    if not os.path.isdir(directory):
+        raise HTTPException(status_code=400, detail=f"目录不存在: {request.directory}")
+    if request.collection in _running:
+        raise HTTPException(status_code=409, detail=f"集合 {request.collection} 正在导入")
+
+    # 在第一次 await 之前占用集合，否则并发请求都能通过上面的检查
+    _running.add(request.collection)
+    try:
+        ingestor = await asyncio.to_thread(_open_ingestor, request.collection)
+    except BaseException:
+        _running.discard(request.collection)
+        raise
+
+    if not request.stream:
+        task = _start(ingestor, request)
+        try:
+            report = await asyncio.shield(task)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return IngestResponse(**report.to_dict())
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def on_progress(report: IngestReport) -> None:
+        # 导入线程回调：复制快照交给事件循环
+        loop.call_soon_threadsafe(queue.put_nowait, report.to_dict())
+
+    task = _start(ingestor, request, on_progress)
+
+    async def event_generator():
+        yield _sse("start", {"status": "started", "collection": request.collection, "root": directory})
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    break
+                snapshot = getter.result()
+                if snapshot["done"]:
+                    break
+                yield _sse("progress", snapshot)
+            report = await task
+            yield _sse("done", report.to_dict())
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # 禁用 Nginx 缓冲
+        },
+    )
+
+
+@router.get("/{collection}", response_model=CollectionStatus)
+async def get_collection_status(collection: str) -> CollectionStatus:
+    """查询集合的导入状态"""
+    def status() -> CollectionStatus:
+        ingestor = _open_ingestor(collection)
+        try:
+            return CollectionStatus(
+                collection=collection,
+                backend=ingestor.store.backend,
+                files=len(ingestor.manifest),
+                chunks=ingestor.store.count(collection),
+            )
+        finally:
+            ingestor.close()
+
+    return await asyncio.to_thread(status)
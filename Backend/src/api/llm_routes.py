@@ -7,6 +7,7 @@ Routes:
 - GET /llm/models - 获取可用模型列表
 - GET /llm/usage - 获取会话使用统计
 - GET /llm/usage/{session_id} - 获取特定会话的使用统计
+- GET /llm/stats - 获取各模型实时统计（EWMA 延迟、速度、错误率、成本）与熔断 / 对冲 / 缓存状态
 """
 
 from typing import Any, Dict, List, Optional
@@ -32,6 +33,15 @@ class ModelPricing(BaseModel):
     output_price_per_1m: float = Field(..., description="输出价格 ($/1M tokens)")
 
 
+class CircuitInfo(BaseModel):
+    """熔断器状态"""
+    state: str = Field(..., description="closed / half_open / open（模型与 Provider 中较差者）")
+    model_state: str = Field(..., description="模型熔断器状态")
+    provider_state: Optional[str] = Field(None, description="Provider 熔断器状态")
+    failure_rate: float = Field(..., description="模型最近调用错误率")
+    retry_in_seconds: Optional[float] = Field(None, description="熔断冷却剩余时间（秒）")
+
+
 class ModelInfo(BaseModel):
     """模型信息"""
     id: str = Field(..., description="模型 ID (如 claude-sonnet-4)")
@@ -41,6 +51,7 @@ class ModelInfo(BaseModel):
     is_available: bool = Field(..., description="是否可用 (API Key 已配置)")
     pricing: ModelPricing = Field(..., description="定价信息")
     capabilities: List[str] = Field(default_factory=list, description="模型能力标签")
+    circuit: Optional[CircuitInfo] = Field(None, description="熔断器状态")
 
 
 class ModelsResponse(BaseModel):
@@ -57,6 +68,7 @@ class AgentUsage(BaseModel):
     total_tokens: int = Field(..., description="总 Token 数")
     call_count: int = Field(..., description="调用次数")
     total_cost: str = Field(..., description="总成本 (USD)")
+    cache_hits: int = Field(0, description="响应缓存命中次数（零成本）")
 
 
 class UsageStats(BaseModel):
@@ -67,6 +79,7 @@ class UsageStats(BaseModel):
     total_cost: str = Field(..., description="总成本 (USD)")
     formatted_cost: str = Field(..., description="格式化成本 (如 $0.0234)")
     call_count: int = Field(..., description="调用次数")
+    cache_hits: int = Field(0, description="响应缓存命中次数（零成本）")
     by_agent: Dict[str, AgentUsage] = Field(default_factory=dict, description="按 Agent 分组")
     by_model: Dict[str, AgentUsage] = Field(default_factory=dict, description="按模型分组")
     by_provider: Dict[str, AgentUsage] = Field(default_factory=dict, description="按 Provider 分组")
@@ -94,11 +107,35 @@ def get_router():
     return _router_instance
 
 
+async def close_router() -> None:
+    """停止后台健康探测并写入模型统计（应用关闭时调用）"""
+    if _router_instance is not None:
+        await _router_instance.stop_health_probes()
+        _router_instance.model_stats.flush()
+
+
 # ============================================================================
 # Helper Functions
 # ============================================================================
 
 
+def _get_circuit_info(circuit: Dict[str, Any]) -> CircuitInfo:
+    """ModelRouterV2.get_circuit_state() → CircuitInfo"""
+    model = circuit["model"]
+    provider = circuit.get("provider") or {}
+    retry_in = [
+        value for value in (model.get("retry_in_seconds"), provider.get("retry_in_seconds"))
+        if value is not None
+    ]
+    return CircuitInfo(
+        state=circuit["state"],
+        model_state=model["state"],
+        provider_state=provider.get("state"),
+        failure_rate=model["failure_rate"],
+        retry_in_seconds=max(retry_in) if retry_in else None,
+    )
+
+
 def _get_model_capabilities(model_info) -> List[str]:
     """根据模型信息推断能力标签"""
     capabilities = []
@@ -128,6 +165,7 @@ async def get_models() -> ModelsResponse:
     - Provider 信息
     - 定价信息
     - 可用性状态
+    - 熔断器状态（熔断中的模型 is_available 为 false，调用时直接跳过）
     """
     model_router = get_router()
 
@@ -147,6 +185,7 @@ async def get_models() -> ModelsResponse:
                 output_price_per_1m=float(model_info.output_price_per_1m),
             ),
             capabilities=_get_model_capabilities(model_info),
+            circuit=_get_circuit_info(model_router.get_circuit_state(model_info.id)),
         ))
 
     return ModelsResponse(
@@ -183,6 +222,7 @@ async def get_usage(
             total_tokens=agent_stats.get("total_tokens", 0),
             call_count=agent_stats.get("call_count", 0),
             total_cost=agent_stats.get("total_cost", "0.000000"),
+            cache_hits=agent_stats.get("cache_hits", 0),
         )
 
     # 转换 by_model 格式
@@ -194,6 +234,7 @@ async def get_usage(
             total_tokens=model_stats.get("total_tokens", 0),
             call_count=model_stats.get("call_count", 0),
             total_cost=model_stats.get("total_cost", "0.000000"),
+            cache_hits=model_stats.get("cache_hits", 0),
         )
 
     # 转换 by_provider 格式
@@ -205,6 +246,7 @@ async def get_usage(
             total_tokens=provider_stats.get("total_tokens", 0),
             call_count=provider_stats.get("call_count", 0),
             total_cost=provider_stats.get("total_cost", "0.000000"),
+            cache_hits=provider_stats.get("cache_hits", 0),
         )
 
     return UsageResponse(
@@ -216,6 +258,7 @@ async def get_usage(
             total_cost=stats.get("total_cost", "0.000000"),
             formatted_cost=stats.get("formatted_cost", "$0.00"),
             call_count=stats.get("call_count", 0),
+            cache_hits=stats.get("cache_hits", 0),
             by_agent=by_agent,
             by_model=by_model,
             by_provider=by_provider,
@@ -223,6 +266,29 @@ async def get_usage(
     )
 
 
+@router.get("/stats")
+async def get_model_stats() -> Dict[str, Any]:
+    """
+    获取模型实时统计
+
+    - models: 每个模型的 EWMA 延迟 (ms)、输出速度 (tokens/s)、错误率、单次成本 (USD)、调用次数
+    - circuits: Provider / 模型熔断器状态
+    - hedging: 请求对冲统计与延迟分位数
+    - cache: 响应缓存条目数、命中 / 合并次数与节省的成本（启用语义缓存时含 semantic）
+    - tokenizer: 各模型家族使用的计数器（精确分词 / 估算）与估算校准比例
+
+    统计在重启后保留（LLM_STATS_PATH，默认 ~/.maccortex/llm_stats.json）。
+    """
+    model_router = get_router()
+    return {
+        "models": model_router.get_model_stats(),
+        "circuits": model_router.get_circuit_states(),
+        "hedging": model_router.get_hedge_stats(),
+        "cache": model_router.get_cache_stats(),
+        "tokenizer": model_router.tokenizer.stats(),
+    }
+
+
 @router.post("/usage/reset")
 async def reset_usage(
     session_id: Optional[str] = Query(None, description="会话 ID (可选，不指定则重置全部)")
@@ -0,0 +1,208 @@
+"""
+MacCortex Pipeline API Routes
+
+在后端依次执行多个 Pattern（如 search → summarize → translate），一次请求完成整条链路。
+
+Routes:
+- POST /pipeline - 执行流水线（JSON 结果，或 stream=true 时以 SSE 推送每一步的进度）
+- GET /pipeline/cache - 步骤结果缓存统计
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from pydantic import BaseModel, Field, field_validator
+
+from patterns.pipeline import PipelineError, PipelineRunner, PipelineStep, StepCache, StepResult
+from security.audit_logger import get_audit_logger
+from security.input_validator import get_input_validator
+from utils.config import settings
+
+# ============================================================================
+# Router
+# ============================================================================
+
+router = APIRouter(prefix="/pipeline", tags=["pipeline"])
+
+# 进程内共享的步骤结果缓存
+_step_cache = StepCache(settings.pipeline_cache_max_entries, settings.pipeline_cache_ttl)
+
+
+# ============================================================================
+# Data Models
+# ============================================================================
+
+
+class PipelineStepRequest(BaseModel):
+    """流水线步骤"""
+    pattern_id: str = Field(..., description="Pattern ID", max_length=50)
+    parameters: Dict[str, Any] = Field(default_factory=dict, description="参数字典（同 /execute 白名单）")
+    input: Literal["output", "summary", "results"] = Field(
+        "output", description="取上一步的完整输出，或其结构化结果中的 summary / results"
+    )
+    cache: bool = Field(True, description="是否使用 / 写入步骤结果缓存")
+
+
+class PipelineRequest(BaseModel):
+    """流水线执行请求"""
+    text: str = Field(..., description="第一步的输入文本", max_length=50_000)
+    steps: List[PipelineStepRequest] = Field(..., min_length=1, description="按顺序执行的步骤")
+    request_id: str = Field(default="", description="请求 ID（可选）")
+    include_intermediate: bool = Field(True, description="返回每一步的输出（否则只返回最后一步）")
+    stream: bool = Field(False, description="以 SSE 推送每一步的进度")
+
+    @field_validator("text")
+    @classmethod
+    def validate_text(cls, v: str) -> str:
+        """验证并清理输入文本（只在流水线入口验证一次）"""
+        is_valid, error, cleaned_text = get_input_validator().validate_text(v)
+        if not is_valid:
+            raise ValueError(error)
+        return cleaned_text
+
+
+class PipelineResponse(BaseModel):
+    """流水线执行结果"""
+    request_id: str
+    success: bool
+    output: Optional[str] = Field(None, description="最后一步的输出")
+    steps: List[Dict[str, Any]] = Field(default_factory=list, description="已完成步骤的结果")
+    error: Optional[str] = None
+    failed_step: Optional[int] = Field(None, description="失败步骤的序号")
+    duration: float = Field(..., description="总执行时间（秒）")
+
+
+# ============================================================================
+# Helper Functions
+# ============================================================================
+
+
+def _sse(event: str, payload: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def _validated_steps(request: PipelineRequest) -> List[PipelineStep]:
+    """执行前验证全部步骤（Pattern ID + 参数白名单），任一步无效时整条流水线不执行"""
+    if len(request.steps) > settings.pipeline_max_steps:
+        raise HTTPException(status_code=400, detail=f"步骤数超过上限 ({settings.pipeline_max_steps})")
+
+    validator = get_input_validator()
+    steps = []
+    for index, step in enumerate(request.steps):
+        is_valid, error, parameters = validator.validate_parameters(step.pattern_id, step.parameters)
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=f"步骤 {index}: {error}")
+        steps.append(PipelineStep(step.pattern_id, parameters, step.input, step.cache))
+
+    try:
+        PipelineRunner.check(steps)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return steps
+
+
+def _audit(request: PipelineRequest, step_input_length: int, result: StepResult) -> None:
+    get_audit_logger().log_pattern_execution(
+        request_id=f"{request.request_id}#{result.index}",
+        pattern_id=result.pattern_id,
+        input_length=step_input_length,
+        output_length=len(result.output),
+        duration_ms=result.duration_ms,
+        success=True,
+    )
+
+
+# ============================================================================
+# API Endpoints
+# ============================================================================
+
+
+@router.post("", response_model=PipelineResponse)
+async def run_pipeline(request: PipelineRequest, http_request: Request):
+    """
+    执行 Pattern 流水线
+
+    每一步的输出直接作为下一步的输入（或按 input 选取上一步的 summary / results）；
+    步骤结果按 (pattern_id, 参数, 输入文本) 缓存。任一步失败时后续步骤不再执行。
+
+    stream=true 时返回 SSE：
+    - event: start -> 开始（步骤列表）
+    - event: step -> 某一步完成（cached / duration_ms / 输出）
+    - event: done -> 全部完成（最后一步输出）
+    - event: error -> 某一步失败
+    """
+    steps = _validated_steps(request)
+    runner = PipelineRunner(http_request.app.state.registry, _step_cache)
+    include_output = request.include_intermediate
+    logger.info(
+        f"📥 收到流水线请求: {' → '.join(step.pattern_id for step in steps)}, request_id={request.request_id}"
+    )
+
+    if not request.stream:
+        start = time.perf_counter()
+        results: List[StepResult] = []
+        try:
+            async for result in runner.stream(request.text, steps):
+                _audit(request, len(results[-1].output) if results else len(request.text), result)
+                results.append(result)
+        except PipelineError as e:
+            return PipelineResponse(
+                request_id=request.request_id,
+                success=False,
+                steps=[result.to_dict(include_output) for result in results],
+                error=str(e),
+                failed_step=e.index,
+                duration=time.perf_counter() - start,
+            )
+        return PipelineResponse(
+            request_id=request.request_id,
+            success=True,
+            output=results[-1].output,
+            steps=[result.to_dict(include_output or result is results[-1]) for result in results],
+            duration=time.perf_counter() - start,
+        )
+
+    async def event_generator():
+        start = time.perf_counter()
+        yield _sse("start", {
+            "request_id": request.request_id,
+            "steps": [step.pattern_id for step in steps],
+        })
+        last: Optional[StepResult] = None
+        input_length = len(request.text)
+        try:
+            async for result in runner.stream(request.text, steps):
+                _audit(request, input_length, result)
+                input_length = len(result.output)
+                last = result
+                yield _sse("step", {**result.to_dict(include_output), "total": len(steps)})
+            yield _sse("done", {
+                "request_id": request.request_id,
+                "output": last.output,
+                "duration": time.perf_counter() - start,
+            })
+        except PipelineError as e:
+            yield _sse("error", {"error": str(e), "failed_step": e.index})
+        except Exception as e:
+            logger.error(f"流水线执行失败: {e}")
+            yield _sse("error", {"error": str(e)})
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # 禁用 Nginx 缓冲
+        },
+    )
+
+
+@router.get("/cache")
+async def get_pipeline_cache_stats() -> Dict[str, Any]:
+    """步骤结果缓存统计"""
+    return _step_cache.stats
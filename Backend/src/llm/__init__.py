@@ -14,6 +14,14 @@ LLM 抽象层模块
 - LLMProviderProtocol: 统一接口抽象
 - ModelRouterV2: 智能路由与 Fallback
 - UsageTracker: Token 计数与成本追踪
+- HedgePolicy / LatencyTracker: 请求对冲与模型延迟分位数
+- BreakerConfig / CircuitBreaker: 按 Provider / 模型熔断
+- ModelStatsTracker / RoutingPolicy: 模型实时统计与自适应选择
+- StreamHandle: 流式调用句柄（单次调用的使用量、TTFT、结束原因）
+- CachePolicy / ResponseCache / CacheStore: 按 Agent 启用的精确匹配响应缓存（可选 SQLite 持久化）
+- SemanticCachePolicy / SemanticCache: 按 Agent 启用的语义（嵌入相似度）缓存
+- TokenizerService: Token 计数、输出预算与调用前预估
+- ContextPolicy / ContextReport: 按 Agent 启用的上下文窗口管理（截断 / 摘要 / 丢弃旧轮次）
 - Providers: Claude, OpenAI, Ollama, DeepSeek, Gemini, MLX
 """
 
@@ -25,8 +33,22 @@ from .models import (
     ModelConfig,
     ProviderType,
 )
+from .circuit import BreakerConfig, CircuitBreaker, CircuitState
+from .context_window import (
+    ContextPolicy,
+    ContextReport,
+    ContextStrategy,
+    ContextWindowExceededError,
+)
+from .hedging import HedgePolicy, LatencyTracker
+from .model_stats import ModelStatsTracker, RoutingPolicy
 from .protocol import LLMProviderProtocol
+from .cache_store import CacheStore
+from .response_cache import CachePolicy, ResponseCache
+from .semantic_cache import SemanticCache, SemanticCachePolicy, SemanticMatch
 from .router import ModelRouterV2, create_default_router
+from .streaming import StreamHandle
+from .tokenizer import PreflightEstimate, TokenizerService, get_tokenizer
 from .usage_tracker import UsageTracker
 
 __all__ = [
@@ -44,4 +66,32 @@ __all__ = [
     "create_default_router",
     # Tracker
     "UsageTracker",
+    # Hedging
+    "HedgePolicy",
+    "LatencyTracker",
+    # Circuit Breaker
+    "BreakerConfig",
+    "CircuitBreaker",
+    "CircuitState",
+    # Adaptive Routing
+    "ModelStatsTracker",
+    "RoutingPolicy",
+    # Streaming
+    "StreamHandle",
+    # Response Cache
+    "CachePolicy",
+    "CacheStore",
+    "ResponseCache",
+    "SemanticCache",
+    "SemanticCachePolicy",
+    "SemanticMatch",
+    # Tokenizer
+    "TokenizerService",
+    "PreflightEstimate",
+    "get_tokenizer",
+    # Context window
+    "ContextPolicy",
+    "ContextReport",
+    "ContextStrategy",
+    "ContextWindowExceededError",
 ]
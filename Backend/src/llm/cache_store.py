@@ -0,0 +1,177 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Cache Store
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""
+LLM 响应缓存的磁盘存储（SQLite WAL）
+
+ResponseCache（路由器的精确匹配缓存）与 orchestration.cache.LLMCache 共用：
+每次写入只提交一行，进程崩溃不会损坏已提交的数据；打开时不加载全部条目，
+按键读取；按 last_access 做 LRU 淘汰，定期清理过期条目并回收空间。
+"""
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass
+class CacheEntry:
+    """缓存条目"""
+    response: str
+    timestamp: float
+    hit_count: int
+    model_name: str
+
+
+class CacheStore:
+    """
+    LLM 缓存的磁盘存储（SQLite WAL）
+
+    每个条目一行，last_access 记录最近使用时间（用于 LRU 淘汰）。
+    连接在首次使用时打开；clear() 删除数据库文件，之后的写入重新创建。
+    """
+
+    _SQLITE_HEADER = b"SQLite format 3\x00"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._count: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._discard_if_not_sqlite()
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            # auto_vacuum 需在建表前设置；已有数据库上无效果
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, timestamp REAL NOT NULL, "
+                "hit_count INTEGER NOT NULL, model_name TEXT NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+            conn.commit()
+            self._conn = conn
+            self._count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return self._conn
+
+    def _discard_if_not_sqlite(self) -> None:
+        """已存在的非 SQLite 文件（如旧版 JSON 缓存）移到 .bak，避免打开失败"""
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        with open(self.path, "rb") as f:
+            header = f.read(len(self._SQLITE_HEADER))
+        if header != self._SQLITE_HEADER:
+            self.path.replace(self.path.with_name(self.path.name + ".bak"))
+
+    @property
+    def count(self) -> int:
+        if self._conn is None and not self.path.exists():
+            return 0  # 不为统计创建数据库
+        self._connect()
+        return self._count
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        row = self._connect().execute(
+            "SELECT response, timestamp, hit_count, model_name FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def touch(self, key: str, hit_count: int, now: float) -> None:
+        """记录命中（更新命中次数与最近使用时间）"""
+        conn = self._connect()
+        conn.execute(
+            "UPDATE entries SET hit_count = ?, last_access = ? WHERE key = ?", (hit_count, now, key)
+        )
+        conn.commit()
+
+    def put(self, key: str, entry: CacheEntry, now: float) -> None:
+        conn = self._connect()
+        existed = conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+        conn.execute(
+            "INSERT OR REPLACE INTO entries "
+            "(key, response, timestamp, hit_count, model_name, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, entry.response, entry.timestamp, entry.hit_count, entry.model_name, now),
+        )
+        conn.commit()
+        if not existed:
+            self._count += 1
+
+    def delete(self, key: str) -> None:
+        conn = self._connect()
+        deleted = conn.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount
+        conn.commit()
+        self._count -= deleted
+
+    def evict_lru(self, keep: int) -> list:
+        """删除最久未使用的条目，保留 keep 条；返回被删除的键"""
+        conn = self._connect()
+        excess = self._count - keep
+        if excess <= 0:
+            return []
+        keys = [
+            row[0] for row in conn.execute(
+                "SELECT key FROM entries ORDER BY last_access LIMIT ?", (excess,)
+            )
+        ]
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+        conn.commit()
+        self._count -= len(keys)
+        return keys
+
+    def compact(self, expire_before: float) -> int:
+        """删除过期条目，回收空闲页并截断 WAL；返回删除条数"""
+        conn = self._connect()
+        deleted = conn.execute("DELETE FROM entries WHERE timestamp < ?", (expire_before,)).rowcount
+        conn.commit()
+        self._count -= deleted
+        conn.execute("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return deleted
+
+    def import_json(self, json_path: Path, ttl_seconds: float) -> int:
+        """导入旧版 JSON 缓存文件中未过期的条目；返回导入条数"""
+        with open(json_path, "r") as f:
+            data = json.load(f)
+        now = time.time()
+        rows = []
+        for key, entry_dict in data.get("entries", {}).items():
+            entry = CacheEntry(**entry_dict)
+            if now - entry.timestamp <= ttl_seconds:
+                rows.append((key, entry.response, entry.timestamp, entry.hit_count,
+                             entry.model_name, entry.timestamp))
+        conn = self._connect()
+        conn.executemany(
+            "INSERT OR IGNORE INTO entries "
+            "(key, response, timestamp, hit_count, model_name, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        self._count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return len(rows)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self._count = None
+
+    def destroy(self) -> None:
+        """关闭并删除数据库文件（含 WAL / SHM）"""
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            candidate = self.path.with_name(self.path.name + suffix)
+            if candidate.exists():
+                candidate.unlink()
@@ -0,0 +1,256 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Circuit Breaker
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""
+熔断器（按 Provider / 按模型）
+
+- CLOSED: 正常调用，记录最近 N 次结果；错误率或连续失败达到阈值时熔断
+- OPEN: 直接跳过（不再等待超时），冷却期结束后转为 HALF_OPEN
+- HALF_OPEN: 放行有限的试探调用；成功则恢复 CLOSED，失败则重新 OPEN
+
+健康探测成功可让 OPEN 的熔断器提前进入 HALF_OPEN。
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from threading import Lock
+from typing import Callable, Optional
+
+
+class CircuitState(str, Enum):
+    """熔断器状态"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器未放行调用"""
+
+
+@dataclass(frozen=True)
+class BreakerConfig:
+    """
+    熔断器配置
+
+    Attributes:
+        window_size: 统计错误率的最近调用数
+        min_calls: 窗口内至少有多少次调用才按错误率熔断
+        failure_rate_threshold: 错误率阈值 (0-1)
+        consecutive_failures: 连续失败次数阈值（服务宕机时快速熔断）
+        open_seconds: 熔断后的冷却时间（秒）
+        half_open_max_calls: HALF_OPEN 状态下同时放行的试探调用数
+    """
+    window_size: int = 20
+    min_calls: int = 5
+    failure_rate_threshold: float = 0.5
+    consecutive_failures: int = 3
+    open_seconds: float = 30.0
+    half_open_max_calls: int = 1
+
+    def __post_init__(self):
+        """验证配置"""
+        if self.window_size < 1 or self.min_calls < 1:
+            raise ValueError("window_size and min_calls must be positive")
+        if not 0.0 < self.failure_rate_threshold <= 1.0:
+            raise ValueError("failure_rate_threshold must be in (0, 1]")
+        if self.open_seconds < 0:
+            raise ValueError("open_seconds cannot be negative")
+
+
+class CircuitBreaker:
+    """
+    熔断器（线程安全）
+
+    Example:
+        >>> breaker = CircuitBreaker("anthropic")
+        >>> if breaker.try_acquire():
+        ...     try:
+        ...         result = await call()
+        ...         breaker.record_success()
+        ...     except Exception:
+        ...         breaker.record_failure()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: Optional[BreakerConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.config = config or BreakerConfig()
+        self._clock = clock
+        self._lock = Lock()
+        self._state = CircuitState.CLOSED
+        self._outcomes: deque = deque(maxlen=self.config.window_size)  # True = 成功
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._timeouts = 0
+        self._open_count = 0
+
+    # ------------------------------------------------------------------
+    # 状态
+    # ------------------------------------------------------------------
+
+    def _current_state(self) -> CircuitState:
+        """当前状态（调用方持有锁）；OPEN 冷却结束后转为 HALF_OPEN"""
+        if (
+            self._state is CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.config.open_seconds
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_in_flight = 0
+        return self._state
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state()
+
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = self._clock()
+        self._half_open_in_flight = 0
+        self._open_count += 1
+
+    def _close(self) -> None:
+        self._state = CircuitState.CLOSED
+        self._outcomes.clear()
+        self._consecutive_failures = 0
+        self._half_open_in_flight = 0
+
+    # ------------------------------------------------------------------
+    # 调用
+    # ------------------------------------------------------------------
+
+    def allows_request(self) -> bool:
+        """是否会放行调用（不占用 HALF_OPEN 试探名额）"""
+        with self._lock:
+            state = self._current_state()
+            if state is CircuitState.HALF_OPEN:
+                return self._half_open_in_flight < self.config.half_open_max_calls
+            return state is CircuitState.CLOSED
+
+    def needs_probe(self) -> bool:
+        """是否需要健康探测：OPEN，或 HALF_OPEN 但没有进行中的试探调用"""
+        with self._lock:
+            state = self._current_state()
+            if state is CircuitState.HALF_OPEN:
+                return self._half_open_in_flight == 0
+            return state is CircuitState.OPEN
+
+    def try_acquire(self) -> bool:
+        """开始一次调用；HALF_OPEN 时占用一个试探名额"""
+        with self._lock:
+            state = self._current_state()
+            if state is CircuitState.CLOSED:
+                return True
+            if (
+                state is CircuitState.HALF_OPEN
+                and self._half_open_in_flight < self.config.half_open_max_calls
+            ):
+                self._half_open_in_flight += 1
+                return True
+            return False
+
+    def release(self) -> None:
+        """调用被取消（无结果），归还 HALF_OPEN 试探名额"""
+        with self._lock:
+            if self._state is CircuitState.HALF_OPEN and self._half_open_in_flight:
+                self._half_open_in_flight -= 1
+
+    def record_success(self) -> None:
+        """记录成功调用"""
+        with self._lock:
+            if self._current_state() is CircuitState.HALF_OPEN:
+                self._close()
+                return
+            self._outcomes.append(True)
+            self._consecutive_failures = 0
+
+    def record_failure(self, timeout: bool = False) -> None:
+        """
+        记录失败调用
+
+        Args:
+            timeout: 是否为超时
+        """
+        with self._lock:
+            self._timeouts += int(timeout)
+            state = self._current_state()
+            if state is CircuitState.HALF_OPEN:
+                self._open()
+                return
+            if state is CircuitState.OPEN:
+                return
+
+            self._outcomes.append(False)
+            self._consecutive_failures += 1
+            if (
+                self._consecutive_failures >= self.config.consecutive_failures
+                or (
+                    len(self._outcomes) >= self.config.min_calls
+                    and self._failure_rate() >= self.config.failure_rate_threshold
+                )
+            ):
+                self._open()
+
+    def record_probe(self, healthy: bool) -> None:
+        """
+        记录健康探测结果
+
+        探测成功时 OPEN 提前转为 HALF_OPEN（由真实调用确认恢复）；探测失败按一次失败计入。
+        """
+        if not healthy:
+            self.record_failure()
+            return
+        with self._lock:
+            if self._current_state() is CircuitState.OPEN:
+                self._state = CircuitState.HALF_OPEN
+                self._half_open_in_flight = 0
+
+    def reset(self) -> None:
+        """强制恢复 CLOSED"""
+        with self._lock:
+            self._close()
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    def _failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def snapshot(self) -> dict:
+        """熔断器状态快照"""
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state is CircuitState.OPEN:
+                retry_in = round(
+                    max(0.0, self.config.open_seconds - (self._clock() - self._opened_at)), 3
+                )
+            return {
+                "state": state.value,
+                "failure_rate": round(self._failure_rate(), 3),
+                "calls": len(self._outcomes),
+                "consecutive_failures": self._consecutive_failures,
+                "timeouts": self._timeouts,
+                "open_count": self._open_count,
+                "retry_in_seconds": retry_in,
+            }
+
+    def __repr__(self) -> str:
+        return f"<CircuitBreaker {self.name} state={self.state.value}>"
@@ -0,0 +1,313 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Context Window Manager
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""
+上下文窗口管理
+
+Coder 的修复循环、Researcher 的检索内容会让消息不断变长。超过模型上下文窗口时
+Provider 会拒绝调用（白白付出一次往返）或静默截断。ContextWindowManager 在调用前
+按模型的窗口（扣除输出上限与估算余量）检查输入 Token 数，放不下时按策略依次处理，
+直到放得下为止：
+
+- TRUNCATE: 截断过长的工具输出 / 历史消息（保留开头与结尾）
+- SUMMARIZE: 用廉价模型把较早的轮次压缩为一条摘要
+- DROP_OLDEST: 丢弃最早的轮次
+
+系统消息与最后 keep_last_messages 条消息不参与上述策略（工具输出仍可截断）。
+仍放不下时（如 Coder / Researcher 的 [system, user] 两条消息）作为最后手段，
+从最长的非系统消息开始截断到剩余预算（TRUNCATE_RECENT，可用 truncate_recent 关闭）。
+处理结果以 ContextReport 附在 LLMResponse.context_report 上。
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from enum import Enum
+from typing import Awaitable, Callable, Optional
+
+from .tokenizer import TokenizerService
+
+logger = logging.getLogger(__name__)
+
+
+class ContextStrategy(str, Enum):
+    """上下文压缩策略"""
+    TRUNCATE = "truncate"
+    SUMMARIZE = "summarize"
+    DROP_OLDEST = "drop_oldest"
+    TRUNCATE_RECENT = "truncate_recent"  # 最后手段（见 ContextPolicy.truncate_recent）
+
+
+class ContextWindowExceededError(RuntimeError):
+    """按策略处理后消息仍放不进模型的上下文窗口"""
+
+
+@dataclass(frozen=True)
+class ContextPolicy:
+    """
+    上下文窗口策略
+
+    Attributes:
+        strategies: 依次尝试的策略（放得下即停止）
+        keep_last_messages: 始终保留的最后几条非系统消息
+        max_message_tokens: TRUNCATE 时单条消息保留的 Token 数
+        safety_margin: 为计数误差预留的窗口比例（估算计数时有意义）
+        summary_model_id: SUMMARIZE 使用的模型（None 表示可用模型中输入价格最低的）
+        summary_max_tokens: 摘要的输出上限
+        truncate_recent: 策略执行后仍放不下时，截断受保护的非系统消息（保留开头与结尾）
+    """
+    strategies: tuple[ContextStrategy, ...] = (ContextStrategy.TRUNCATE, ContextStrategy.DROP_OLDEST)
+    keep_last_messages: int = 2
+    max_message_tokens: int = 2000
+    safety_margin: float = 0.05
+    summary_model_id: Optional[str] = None
+    summary_max_tokens: int = 512
+    truncate_recent: bool = True
+
+    def __post_init__(self):
+        """验证策略"""
+        if not self.strategies:
+            raise ValueError("strategies must not be empty")
+        if self.keep_last_messages < 1:
+            raise ValueError("keep_last_messages must be at least 1")
+        if self.max_message_tokens < 16:
+            raise ValueError("max_message_tokens must be at least 16")
+        if not 0.0 <= self.safety_margin < 0.5:
+            raise ValueError("safety_margin must be in [0, 0.5)")
+
+
+@dataclass(frozen=True)
+class ContextReport:
+    """
+    上下文处理记录
+
+    Attributes:
+        model_id: 目标模型
+        context_window: 模型上下文窗口
+        input_budget: 可用的输入 Token 数（窗口扣除输出上限与余量）
+        original_tokens: 处理前的输入 Token 数
+        final_tokens: 处理后的输入 Token 数
+        actions: 实际生效的策略（按执行顺序）
+        truncated_messages: 被截断的消息数（含 TRUNCATE_RECENT）
+        summarized_messages: 被摘要替换的消息数
+        dropped_messages: 被丢弃的消息数
+    """
+    model_id: str
+    context_window: int
+    input_budget: int
+    original_tokens: int
+    final_tokens: int
+    actions: tuple[ContextStrategy, ...] = ()
+    truncated_messages: int = 0
+    summarized_messages: int = 0
+    dropped_messages: int = 0
+
+    def to_dict(self) -> dict:
+        """转换为字典（用于 API 响应）"""
+        return {
+            "model_id": self.model_id,
+            "context_window": self.context_window,
+            "input_budget": self.input_budget,
+            "original_tokens": self.original_tokens,
+            "final_tokens": self.final_tokens,
+            "actions": [action.value for action in self.actions],
+            "truncated_messages": self.truncated_messages,
+            "summarized_messages": self.summarized_messages,
+            "dropped_messages": self.dropped_messages,
+        }
+
+
+Summarizer = Callable[[list[dict]], Awaitable[str]]
+
+_MARKER_TOKENS = 32
+_MIN_KEPT_TOKENS = 16
+
+SUMMARY_PREFIX = "[Summary of earlier conversation]\n"
+
+
+def input_budget(context_window: int, max_output_tokens: int, safety_margin: float) -> int:
+    """可用的输入 Token 数（输出上限最多占窗口的一半）"""
+    reserved = min(max_output_tokens, context_window // 2)
+    return math.floor((context_window - reserved) * (1.0 - safety_margin))
+
+
+def _cut(content: str, tokens: int, limit: int) -> str:
+    """按字符比例保留约 limit 个 Token（开头 2/3、结尾 1/3），中间替换为截断标记"""
+    keep = int(len(content) * limit / tokens)
+    head, tail = content[: keep * 2 // 3], content[len(content) - keep // 3:] if keep // 3 else ""
+    return f"{head}\n\n[... truncated {tokens - limit} tokens ...]\n\n{tail}"
+
+
+class ContextWindowManager:
+    """
+    按策略把消息压缩进模型的输入预算
+
+    Example:
+        >>> manager = ContextWindowManager(get_tokenizer(), ContextPolicy())
+        >>> fitted, report = await manager.fit(messages, "ollama/qwen3:14b", budget=28000)
+    """
+
+    def __init__(self, tokenizer: TokenizerService, policy: ContextPolicy):
+        self._tokenizer = tokenizer
+        self._policy = policy
+
+    async def fit(
+        self,
+        messages: list[dict],
+        model_id: str,
+        budget: int,
+        context_window: int,
+        summarize: Optional[Summarizer] = None,
+    ) -> tuple[list[dict], Optional[ContextReport]]:
+        """
+        压缩消息直到输入 Token 数不超过 budget
+
+        Args:
+            messages: 原始消息（不会被修改）
+            model_id: 目标模型（决定计数器）
+            budget: 输入 Token 预算
+            context_window: 模型上下文窗口（仅用于记录）
+            summarize: 摘要函数（SUMMARIZE 策略需要；未提供时跳过该策略）
+
+        Returns:
+            tuple: (处理后的消息, 处理记录)；本来就放得下时原样返回消息与 None
+
+        Raises:
+            ContextWindowExceededError: 所有策略执行后仍放不下
+        """
+        original = self._tokenizer.count_messages(messages, model_id)
+        if original <= budget:
+            return messages, None
+
+        messages = [dict(message) for message in messages]
+        actions: list[ContextStrategy] = []
+        counts = {strategy: 0 for strategy in ContextStrategy}
+        tokens = original
+        for strategy in self._policy.strategies:
+            if strategy is ContextStrategy.TRUNCATE:
+                changed = self._truncate(messages, model_id)
+            elif strategy is ContextStrategy.SUMMARIZE:
+                if summarize is None:
+                    continue
+                changed = await self._summarize(messages, summarize)
+            else:
+                changed = self._drop_oldest(messages, model_id, budget)
+            if not changed:
+                continue
+            actions.append(strategy)
+            counts[strategy] += changed
+            tokens = self._tokenizer.count_messages(messages, model_id)
+            if tokens <= budget:
+                break
+
+        if tokens > budget and self._policy.truncate_recent:
+            changed = self._truncate_recent(messages, model_id, budget)
+            if changed:
+                actions.append(ContextStrategy.TRUNCATE_RECENT)
+                counts[ContextStrategy.TRUNCATE] += changed
+                tokens = self._tokenizer.count_messages(messages, model_id)
+
+        if tokens > budget:
+            raise ContextWindowExceededError(
+                f"Prompt (~{tokens} tokens after {', '.join(a.value for a in actions) or 'no action'}) "
+                f"exceeds input budget of {model_id} ({budget} of {context_window})"
+            )
+
+        report = ContextReport(
+            model_id=model_id,
+            context_window=context_window,
+            input_budget=budget,
+            original_tokens=original,
+            final_tokens=tokens,
+            actions=tuple(actions),
+            truncated_messages=counts[ContextStrategy.TRUNCATE],
+            summarized_messages=counts[ContextStrategy.SUMMARIZE],
+            dropped_messages=counts[ContextStrategy.DROP_OLDEST],
+        )
+        logger.info(
+            f"Context fitted for {model_id}: {original} -> {tokens} tokens "
+            f"({', '.join(a.value for a in actions)})"
+        )
+        return messages, report
+
+    def _protected(self, messages: list[dict]) -> set[int]:
+        """系统消息与最后 keep_last_messages 条非系统消息的下标"""
+        protected = {i for i, message in enumerate(messages) if message.get("role") == "system"}
+        tail = [i for i in range(len(messages)) if i not in protected]
+        protected.update(tail[-self._policy.keep_last_messages:])
+        return protected
+
+    def _truncate(self, messages: list[dict], model_id: str) -> int:
+        """截断工具输出与未受保护的过长消息（原地修改），返回截断条数"""
+        limit = self._policy.max_message_tokens
+        protected = self._protected(messages)
+        truncated = 0
+        for i, message in enumerate(messages):
+            content = message.get("content")
+            if not isinstance(content, str) or message.get("role") == "system":
+                continue
+            if i in protected and message.get("role") != "tool":
+                continue
+            tokens = self._tokenizer.count(content, model_id)
+            if tokens <= limit:
+                continue
+            message["content"] = _cut(content, tokens, limit)
+            truncated += 1
+        return truncated
+
+    def _truncate_recent(self, messages: list[dict], model_id: str, budget: int) -> int:
+        """从最长的非系统消息开始截断到剩余预算（原地修改），返回截断条数"""
+        truncated: set[int] = set()
+        for _ in range(len(messages) + 1):
+            excess = self._tokenizer.count_messages(messages, model_id) - budget
+            if excess <= 0:
+                break
+            sizes = [
+                (self._tokenizer.count(message["content"], model_id), i)
+                for i, message in enumerate(messages)
+                if message.get("role") != "system" and isinstance(message.get("content"), str)
+            ]
+            if not sizes:
+                break
+            tokens, i = max(sizes)
+            # 截断标记本身也占 Token，多留一些余量
+            limit = max(_MIN_KEPT_TOKENS, tokens - excess - _MARKER_TOKENS)
+            if limit >= tokens:
+                break
+            messages[i]["content"] = _cut(messages[i]["content"], tokens, limit)
+            truncated.add(i)
+        return len(truncated)
+
+    async def _summarize(self, messages: list[dict], summarize: Summarizer) -> int:
+        """把未受保护的消息替换为一条摘要（原地修改），返回被替换的条数"""
+        protected = self._protected(messages)
+        older = [i for i in range(len(messages)) if i not in protected]
+        if len(older) < 2:
+            return 0
+        try:
+            summary = await summarize([messages[i] for i in older])
+        except Exception as e:
+            logger.warning(f"Context summarization failed: {e}")
+            return 0
+        first = older[0]
+        for i in reversed(older):
+            del messages[i]
+        messages.insert(first, {"role": "user", "content": SUMMARY_PREFIX + summary})
+        return len(older)
+
+    def _drop_oldest(self, messages: list[dict], model_id: str, budget: int) -> int:
+        """从最早的未受保护消息开始丢弃直到放得下（原地修改），返回丢弃条数"""
+        dropped = 0
+        while self._tokenizer.count_messages(messages, model_id) > budget:
+            older = [i for i in range(len(messages)) if i not in self._protected(messages)]
+            if not older:
+                break
+            del messages[older[0]]
+            dropped += 1
+        return dropped
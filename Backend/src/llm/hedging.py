@@ -0,0 +1,173 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Request Hedging
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""
+请求对冲（Hedged Requests）
+
+主模型在其历史延迟分位数内仍未返回时，并行发起 Fallback 链中的下一个模型，
+取先成功的结果并取消另一个：
+- LatencyTracker: 按模型记录最近的成功调用延迟，提供分位数
+- HedgePolicy: 按 Agent 配置的对冲策略（分位数、最少样本、对冲次数、预算上限）
+- HedgeStats: 对冲次数、胜出次数与额外花费
+"""
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from decimal import Decimal
+from threading import Lock
+from typing import Optional
+
+
+class LatencyTracker:
+    """
+    按模型记录最近 N 次成功调用的延迟（毫秒）
+
+    Example:
+        >>> tracker = LatencyTracker(window=100)
+        >>> tracker.record("claude-sonnet-4", 820.0)
+        >>> tracker.percentile("claude-sonnet-4", 95)
+    """
+
+    def __init__(self, window: int = 200):
+        self._window = window
+        self._samples: dict[str, deque] = {}
+        self._lock = Lock()
+
+    def record(self, model_id: str, latency_ms: float) -> None:
+        """记录一次成功调用的延迟"""
+        with self._lock:
+            samples = self._samples.get(model_id)
+            if samples is None:
+                samples = self._samples[model_id] = deque(maxlen=self._window)
+            samples.append(latency_ms)
+
+    def count(self, model_id: str) -> int:
+        """已记录的样本数"""
+        with self._lock:
+            return len(self._samples.get(model_id, ()))
+
+    def percentile(self, model_id: str, q: float) -> Optional[float]:
+        """
+        延迟分位数（最近邻法）
+
+        Args:
+            model_id: 模型 ID
+            q: 分位数 (0-100)
+
+        Returns:
+            Optional[float]: 延迟（毫秒），无样本时返回 None
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(model_id, ()))
+        if not samples:
+            return None
+        rank = max(1, math.ceil(q / 100 * len(samples)))
+        return samples[min(rank, len(samples)) - 1]
+
+    def snapshot(self) -> dict[str, dict]:
+        """各模型的样本数与 p50 / p95"""
+        with self._lock:
+            model_ids = list(self._samples)
+        return {
+            model_id: {
+                "samples": self.count(model_id),
+                "p50_ms": self.percentile(model_id, 50),
+                "p95_ms": self.percentile(model_id, 95),
+            }
+            for model_id in model_ids
+        }
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """
+    对冲策略
+
+    Attributes:
+        percentile: 主模型超过该延迟分位数仍未返回时发起对冲
+        min_samples: 样本不足时使用 default_delay_ms（为 None 时不对冲）
+        default_delay_ms: 样本不足时的对冲延迟
+        min_delay_ms: 对冲延迟下限（避免过早对冲）
+        max_hedges: 单次调用最多额外发起的请求数
+        budget_usd: 对冲额外花费的累计上限（超出后不再对冲，None 表示不限）
+    """
+    percentile: float = 95.0
+    min_samples: int = 20
+    default_delay_ms: Optional[float] = None
+    min_delay_ms: float = 50.0
+    max_hedges: int = 1
+    budget_usd: Optional[float] = None
+
+    def __post_init__(self):
+        """验证策略"""
+        if not 0 < self.percentile <= 100:
+            raise ValueError("percentile must be in (0, 100]")
+        if self.max_hedges < 0:
+            raise ValueError("max_hedges cannot be negative")
+        if self.budget_usd is not None and self.budget_usd < 0:
+            raise ValueError("budget_usd cannot be negative")
+
+    def delay_ms(self, tracker: LatencyTracker, model_id: str) -> Optional[float]:
+        """
+        计算模型的对冲延迟
+
+        Returns:
+            Optional[float]: 延迟（毫秒），None 表示不对冲
+        """
+        if tracker.count(model_id) >= self.min_samples:
+            delay = tracker.percentile(model_id, self.percentile)
+        else:
+            delay = self.default_delay_ms
+        if delay is None:
+            return None
+        return max(delay, self.min_delay_ms)
+
+
+class HedgeStats:
+    """按 Agent 统计对冲次数与额外花费"""
+
+    def __init__(self):
+        self._by_agent: dict[str, dict] = {}
+        self._lock = Lock()
+
+    def _entry(self, agent_key: str) -> dict:
+        entry = self._by_agent.get(agent_key)
+        if entry is None:
+            entry = self._by_agent[agent_key] = {
+                "hedged_calls": 0,
+                "hedge_wins": 0,
+                "extra_cost": Decimal("0"),
+            }
+        return entry
+
+    def record(self, agent_key: str, hedge_won: bool, extra_cost: Decimal) -> None:
+        """记录一次发生了对冲的调用"""
+        with self._lock:
+            entry = self._entry(agent_key)
+            entry["hedged_calls"] += 1
+            entry["hedge_wins"] += int(hedge_won)
+            entry["extra_cost"] += extra_cost
+
+    def extra_cost(self, agent_key: str) -> float:
+        """对冲累计额外花费（USD）"""
+        with self._lock:
+            entry = self._by_agent.get(agent_key)
+            return float(entry["extra_cost"]) if entry else 0.0
+
+    def to_dict(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                agent_key: {**entry, "extra_cost": str(entry["extra_cost"])}
+                for agent_key, entry in self._by_agent.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._by_agent.clear()
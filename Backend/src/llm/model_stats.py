@@ -0,0 +1,295 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Model Statistics & Adaptive Routing
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""
+模型实时统计与自适应选择
+
+- ModelStatsTracker: 按模型维护 EWMA 延迟、输出速度（tokens/s）、错误率、单次成本，
+  持久化到 JSON 文件（原子替换，按间隔写入），重启后继续使用
+- RoutingPolicy: 在最大延迟 / 最大单次成本约束下为请求挑选模型
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Literal, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelStats:
+    """
+    单个模型的统计（EWMA）
+
+    Attributes:
+        calls: 调用次数（成功 + 失败）
+        errors: 失败次数
+        latency_ms: 成功调用延迟
+        tokens_per_sec: 输出 Token 速度
+        cost_usd: 单次调用成本
+        error_rate: 错误率
+        updated_at: 最后更新时间（Unix 时间戳）
+    """
+    calls: int = 0
+    errors: int = 0
+    latency_ms: Optional[float] = None
+    tokens_per_sec: Optional[float] = None
+    cost_usd: Optional[float] = None
+    error_rate: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def successes(self) -> int:
+        return self.calls - self.errors
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ModelStats":
+        fields = cls.__dataclass_fields__
+        return cls(**{key: value for key, value in data.items() if key in fields})
+
+
+def _ewma(previous: Optional[float], value: float, alpha: float) -> float:
+    return value if previous is None else alpha * value + (1 - alpha) * previous
+
+
+class ModelStatsTracker:
+    """
+    模型统计追踪器（线程安全）
+
+    Example:
+        >>> tracker = ModelStatsTracker(persist_path=Path("~/.maccortex/llm_stats.json").expanduser())
+        >>> tracker.record_success("claude-haiku", latency_ms=1800, output_tokens=240, cost_usd=0.0004)
+        >>> tracker.get("claude-haiku").latency_ms
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        persist_path: Optional[Path] = None,
+        save_interval_seconds: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        初始化追踪器
+
+        Args:
+            alpha: EWMA 平滑系数（越大越偏向最近的调用）
+            persist_path: 持久化文件（None 表示仅内存）
+            save_interval_seconds: 两次自动写入的最小间隔
+            clock: 时间函数（测试用）
+        """
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self._alpha = alpha
+        self._path = Path(persist_path) if persist_path else None
+        self._save_interval = save_interval_seconds
+        self._clock = clock
+        self._stats: dict[str, ModelStats] = {}
+        self._lock = Lock()
+        self._dirty = False
+        self._last_save = clock()
+        if self._path is not None:
+            self.load()
+
+    def _entry(self, model_id: str) -> ModelStats:
+        stats = self._stats.get(model_id)
+        if stats is None:
+            stats = self._stats[model_id] = ModelStats()
+        return stats
+
+    def record_success(
+        self,
+        model_id: str,
+        latency_ms: float,
+        output_tokens: int,
+        cost_usd: float,
+    ) -> None:
+        """记录一次成功调用"""
+        with self._lock:
+            stats = self._entry(model_id)
+            stats.calls += 1
+            stats.latency_ms = _ewma(stats.latency_ms, latency_ms, self._alpha)
+            if latency_ms > 0 and output_tokens > 0:
+                speed = output_tokens / (latency_ms / 1000)
+                stats.tokens_per_sec = _ewma(stats.tokens_per_sec, speed, self._alpha)
+            stats.cost_usd = _ewma(stats.cost_usd, cost_usd, self._alpha)
+            stats.error_rate = _ewma(stats.error_rate, 0.0, self._alpha)
+            stats.updated_at = self._clock()
+            self._dirty = True
+        self.maybe_save()
+
+    def record_failure(self, model_id: str) -> None:
+        """记录一次失败调用"""
+        with self._lock:
+            stats = self._entry(model_id)
+            stats.calls += 1
+            stats.errors += 1
+            stats.error_rate = _ewma(stats.error_rate, 1.0, self._alpha)
+            stats.updated_at = self._clock()
+            self._dirty = True
+        self.maybe_save()
+
+    def get(self, model_id: str) -> Optional[ModelStats]:
+        """获取模型统计（副本）"""
+        with self._lock:
+            stats = self._stats.get(model_id)
+            return ModelStats(**asdict(stats)) if stats else None
+
+    def snapshot(self) -> dict[str, dict]:
+        """所有模型的统计"""
+        with self._lock:
+            return {model_id: stats.to_dict() for model_id, stats in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._dirty = True
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def load(self) -> None:
+        """从持久化文件加载（文件损坏时忽略并从空统计开始）"""
+        if self._path is None or not self._path.exists():
+            return
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+            loaded = {
+                model_id: ModelStats.from_dict(entry)
+                for model_id, entry in data.get("models", {}).items()
+            }
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Failed to load model stats from {self._path}: {e}")
+            return
+        with self._lock:
+            self._stats.update(loaded)
+        logger.info(f"Loaded stats for {len(loaded)} models from {self._path}")
+
+    def save(self) -> None:
+        """写入持久化文件（临时文件 + 原子替换）"""
+        if self._path is None:
+            return
+        with self._lock:
+            payload = {
+                "alpha": self._alpha,
+                "models": {model_id: stats.to_dict() for model_id, stats in self._stats.items()},
+            }
+            self._dirty = False
+            self._last_save = self._clock()
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
+            tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning(f"Failed to save model stats to {self._path}: {e}")
+
+    def maybe_save(self) -> None:
+        """有变更且距上次写入超过间隔时写入"""
+        if self._path is None:
+            return
+        with self._lock:
+            due = self._dirty and self._clock() - self._last_save >= self._save_interval
+        if due:
+            self.save()
+
+    def flush(self) -> None:
+        """有未写入的变更时立即写入（关闭时调用）"""
+        if self._dirty:
+            self.save()
+
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    """
+    自适应选择策略
+
+    Attributes:
+        max_latency_ms: 预期延迟上限（None 表示不限）
+        max_cost_usd: 预期单次成本上限（None 表示不限）
+        max_error_rate: 错误率上限
+        objective: 满足约束的模型中优先 latency（最快）/ cost（最便宜）/ balanced
+            （延迟相对最快模型的倍数 + 成本占最贵模型的比例；免费模型不会因成本项无限占优）
+        min_samples: 成功调用少于该次数的模型视为未知（不受延迟约束，排在已知模型之后）
+    """
+    max_latency_ms: Optional[float] = None
+    max_cost_usd: Optional[float] = None
+    max_error_rate: float = 0.5
+    objective: Literal["latency", "cost", "balanced"] = "balanced"
+    min_samples: int = 3
+
+    def __post_init__(self):
+        """验证策略"""
+        if self.objective not in ("latency", "cost", "balanced"):
+            raise ValueError(f"Invalid objective: {self.objective}")
+
+    def rank(
+        self,
+        candidates: Sequence[str],
+        tracker: ModelStatsTracker,
+        estimate_cost: Optional[Callable[[str], Optional[float]]] = None,
+    ) -> list[str]:
+        """
+        按策略排序候选模型（不满足约束的模型被剔除）
+
+        Args:
+            candidates: 候选模型 ID（顺序作为并列时的次序）
+            tracker: 模型统计
+            estimate_cost: 按定价预估本次请求成本的函数（返回 None 时使用历史成本；
+                没有样本的模型只能靠它受 max_cost_usd 约束）
+
+        Returns:
+            list[str]: 排序后的模型 ID
+        """
+        known: list[tuple[str, float, float]] = []
+        unknown: list[str] = []
+
+        for model_id in candidates:
+            stats = tracker.get(model_id)
+            cost = estimate_cost(model_id) if estimate_cost else None
+            if cost is None and stats is not None:
+                cost = stats.cost_usd
+            if self.max_cost_usd is not None and cost is not None and cost > self.max_cost_usd:
+                continue
+            if stats is None or stats.successes < self.min_samples or stats.latency_ms is None:
+                if stats is None or stats.error_rate <= self.max_error_rate:
+                    unknown.append(model_id)
+                continue
+            if stats.error_rate > self.max_error_rate:
+                continue
+            if self.max_latency_ms is not None and stats.latency_ms > self.max_latency_ms:
+                continue
+            # 失败需要重试：按成功率折算预期延迟与成本
+            success_rate = max(1.0 - stats.error_rate, 1e-6)
+            known.append((model_id, stats.latency_ms / success_rate, (cost or 0.0) / success_rate))
+
+        if known:
+            min_latency = min(latency for _, latency, _ in known) or 1e-6
+            max_cost = max(cost for _, _, cost in known)
+
+            def score(item: tuple[str, float, float]) -> float:
+                _, latency, cost = item
+                if self.objective == "latency":
+                    return latency
+                if self.objective == "cost":
+                    return cost
+                return latency / min_latency + cost / max(max_cost, 1e-9)
+
+            known.sort(key=score)
+
+        return [model_id for model_id, _, _ in known] + unknown
@@ -22,7 +22,10 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from .context_window import ContextReport
 
 
 class ProviderType(str, Enum):
@@ -178,6 +181,9 @@ class LLMResponse:
         finish_reason: 结束原因（stop, length, tool_calls 等）
         raw_response: 原始响应数据（可选，用于调试）
         created_at: 响应创建时间
+        cache_hit: 是否来自响应缓存（命中时成本与 Token 为 0）
+        cache_similarity: 语义缓存命中时与缓存条目的相似度（精确匹配命中为 None）
+        context_report: 调用前为放进上下文窗口对消息做的处理（未处理时为 None）
     """
     content: str
     usage: TokenUsage
@@ -188,6 +194,9 @@ class LLMResponse:
     finish_reason: str = "stop"
     raw_response: Optional[Any] = None
     created_at: datetime = field(default_factory=datetime.now)
+    cache_hit: bool = False
+    cache_similarity: Optional[float] = None
+    context_report: Optional["ContextReport"] = None
 
     def to_dict(self) -> dict:
         """转换为字典（用于 API 响应）"""
@@ -209,6 +218,9 @@ class LLMResponse:
             "latency_ms": self.latency_ms,
             "finish_reason": self.finish_reason,
             "created_at": self.created_at.isoformat(),
+            "cache_hit": self.cache_hit,
+            "cache_similarity": self.cache_similarity,
+            "context_report": self.context_report.to_dict() if self.context_report else None,
         }
 
 
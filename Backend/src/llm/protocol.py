@@ -27,6 +27,7 @@ from .models import (
     ProviderType,
     TokenUsage,
 )
+from .streaming import StreamHandle
 
 
 class LLMProviderProtocol(ABC):
@@ -132,6 +133,7 @@ class LLMProviderProtocol(ABC):
         model_id: str,
         messages: list[dict],
         config: Optional[ModelConfig] = None,
+        handle: Optional[StreamHandle] = None,
     ) -> AsyncIterator[str]:
         """
         流式调用 LLM 生成响应
@@ -140,12 +142,14 @@ class LLMProviderProtocol(ABC):
             model_id: 模型标识符
             messages: 消息列表
             config: 模型配置
+            handle: 本次调用的句柄
 
         Yields:
             str: 响应内容片段
 
         Note:
-            流式调用结束后，应调用 get_last_usage() 获取 Token 使用量
+            流结束时应通过 handle.report_usage() / handle.report_finish_reason()
+            上报本次调用的 Token 使用量与结束原因（每次调用独立，并发安全）
         """
         ...
 
@@ -276,7 +280,11 @@ class BaseLLMProvider(LLMProviderProtocol):
         return float(model.input_price_per_1m), float(model.output_price_per_1m)
 
     def get_last_usage(self) -> Optional[TokenUsage]:
-        """获取最后一次调用的 Token 使用量（用于流式调用后）"""
+        """
+        获取该 Provider 最后一次调用的 Token 使用量
+
+        仅为兼容保留：并发调用会互相覆盖，流式调用请读取 StreamHandle.usage。
+        """
         return self._last_usage
 
     def _validate_model(self, model_id: str) -> ModelInfo:
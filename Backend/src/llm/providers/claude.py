@@ -30,6 +30,7 @@ from ..models import (
     TokenUsage,
 )
 from ..protocol import BaseLLMProvider
+from ..streaming import StreamHandle
 
 logger = logging.getLogger(__name__)
 
@@ -258,6 +259,7 @@ class ClaudeProvider(BaseLLMProvider):
         model_id: str,
         messages: list[dict],
         config: Optional[ModelConfig] = None,
+        handle: Optional[StreamHandle] = None,
     ) -> AsyncIterator[str]:
         """
         流式调用 Claude API
@@ -266,6 +268,7 @@ class ClaudeProvider(BaseLLMProvider):
             model_id: 模型 ID
             messages: 消息列表
             config: 模型配置
+            handle: 本次调用的句柄（流结束时写入使用量与结束原因）
 
         Yields:
             str: 响应内容片段
@@ -296,6 +299,7 @@ class ClaudeProvider(BaseLLMProvider):
 
         total_input_tokens = 0
         total_output_tokens = 0
+        stop_reason = None
 
         async with client.messages.stream(**kwargs) as stream:
             async for text in stream.text_stream:
@@ -305,12 +309,17 @@ class ClaudeProvider(BaseLLMProvider):
             final_message = await stream.get_final_message()
             total_input_tokens = final_message.usage.input_tokens
             total_output_tokens = final_message.usage.output_tokens
+            stop_reason = final_message.stop_reason
 
-        self._last_usage = TokenUsage(
+        usage = TokenUsage(
             input_tokens=total_input_tokens,
             output_tokens=total_output_tokens,
             total_tokens=total_input_tokens + total_output_tokens,
         )
+        self._last_usage = usage
+        if handle is not None:
+            handle.report_usage(usage)
+            handle.report_finish_reason(stop_reason)
 
     def _get_api_model_id(self, model_id: str) -> str:
         """将内部模型 ID 转换为 API 模型 ID"""
@@ -34,6 +34,7 @@ from ..models import (
     TokenUsage,
 )
 from ..protocol import BaseLLMProvider
+from ..streaming import StreamHandle
 
 logger = logging.getLogger(__name__)
 
@@ -285,6 +286,7 @@ class GeminiProvider(BaseLLMProvider):
         model_id: str,
         messages: list[dict],
         config: Optional[ModelConfig] = None,
+        handle: Optional[StreamHandle] = None,
     ) -> AsyncIterator[str]:
         """
         流式调用 Gemini API
@@ -293,6 +295,7 @@ class GeminiProvider(BaseLLMProvider):
             model_id: 模型 ID
             messages: 消息列表
             config: 模型配置
+            handle: 本次调用的句柄（流结束时写入使用量与结束原因）
 
         Yields:
             str: 响应内容片段
@@ -328,21 +331,30 @@ class GeminiProvider(BaseLLMProvider):
 
         total_input_tokens = 0
         total_output_tokens = 0
+        finish_reason = None
 
         for chunk in response:
             if chunk.text:
                 yield chunk.text
 
-            # 最后一个 chunk 包含使用量
+            # 最后一个 chunk 包含使用量与结束原因
             if hasattr(chunk, "usage_metadata") and chunk.usage_metadata:
                 total_input_tokens = chunk.usage_metadata.prompt_token_count
                 total_output_tokens = chunk.usage_metadata.candidates_token_count
+            candidates = getattr(chunk, "candidates", None)
+            if candidates and getattr(candidates[0], "finish_reason", None):
+                reason = candidates[0].finish_reason
+                finish_reason = getattr(reason, "name", str(reason)).lower()
 
-        self._last_usage = TokenUsage(
+        usage = TokenUsage(
             input_tokens=total_input_tokens,
             output_tokens=total_output_tokens,
             total_tokens=total_input_tokens + total_output_tokens,
         )
+        self._last_usage = usage
+        if handle is not None:
+            handle.report_usage(usage)
+            handle.report_finish_reason(finish_reason)
 
     async def health_check(self) -> bool:
         """健康检查"""
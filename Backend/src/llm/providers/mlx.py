@@ -37,6 +37,7 @@ from ..models import (
     TokenUsage,
 )
 from ..protocol import BaseLLMProvider
+from ..streaming import StreamHandle
 
 logger = logging.getLogger(__name__)
 
@@ -297,6 +298,7 @@ class MLXProvider(BaseLLMProvider):
         model_id: str,
         messages: list[dict],
         config: Optional[ModelConfig] = None,
+        handle: Optional[StreamHandle] = None,
     ) -> AsyncIterator[str]:
         """
         流式调用 MLX 模型
@@ -305,6 +307,7 @@ class MLXProvider(BaseLLMProvider):
             model_id: 模型 ID
             messages: 消息列表
             config: 模型配置
+            handle: 本次调用的句柄（流结束时写入使用量与结束原因）
 
         Yields:
             str: 响应内容片段
@@ -369,11 +372,17 @@ class MLXProvider(BaseLLMProvider):
 
             thread.join()
 
-            self._last_usage = TokenUsage(
+            usage = TokenUsage(
                 input_tokens=input_tokens,
                 output_tokens=output_tokens,
                 total_tokens=input_tokens + output_tokens,
             )
+            self._last_usage = usage
+            if handle is not None:
+                handle.report_usage(usage)
+                handle.report_finish_reason(
+                    "length" if output_tokens >= config.max_tokens else "stop"
+                )
 
         except ImportError as e:
             raise ImportError(
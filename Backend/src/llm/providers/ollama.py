@@ -37,6 +37,7 @@ from ..models import (
     TokenUsage,
 )
 from ..protocol import BaseLLMProvider
+from ..streaming import StreamHandle
 
 logger = logging.getLogger(__name__)
 
@@ -173,7 +174,8 @@ class OllamaProvider(BaseLLMProvider):
         try:
             loop = asyncio.get_event_loop()
             if loop.is_running():
-                # 在异步上下文中，返回缓存状态或默认 True
+                # 在异步上下文中不阻塞检查：是否调用由路由器的熔断器决定
+                # （若按最近一次探测结果拦截，HALF_OPEN 的试探调用永远不会发生）
                 return True
             return loop.run_until_complete(self._check_availability())
         except RuntimeError:
@@ -276,6 +278,7 @@ class OllamaProvider(BaseLLMProvider):
         model_id: str,
         messages: list[dict],
         config: Optional[ModelConfig] = None,
+        handle: Optional[StreamHandle] = None,
     ) -> AsyncIterator[str]:
         """
         流式调用 Ollama API
@@ -284,6 +287,7 @@ class OllamaProvider(BaseLLMProvider):
             model_id: 模型 ID
             messages: 消息列表
             config: 模型配置
+            handle: 本次调用的句柄（流结束时写入使用量与结束原因）
 
         Yields:
             str: 响应内容片段
@@ -303,6 +307,7 @@ class OllamaProvider(BaseLLMProvider):
 
         total_input_tokens = 0
         total_output_tokens = 0
+        done_reason = None
 
         client = await self._ensure_client()
 
@@ -327,12 +332,17 @@ class OllamaProvider(BaseLLMProvider):
                 if data.get("done"):
                     total_input_tokens = data.get("prompt_eval_count", 0)
                     total_output_tokens = data.get("eval_count", 0)
+                    done_reason = data.get("done_reason")
 
-        self._last_usage = TokenUsage(
+        usage = TokenUsage(
             input_tokens=total_input_tokens,
             output_tokens=total_output_tokens,
             total_tokens=total_input_tokens + total_output_tokens,
         )
+        self._last_usage = usage
+        if handle is not None:
+            handle.report_usage(usage)
+            handle.report_finish_reason(done_reason)
 
     async def health_check(self) -> bool:
         """健康检查"""
@@ -31,6 +31,7 @@ from ..models import (
     TokenUsage,
 )
 from ..protocol import BaseLLMProvider
+from ..streaming import StreamHandle
 
 logger = logging.getLogger(__name__)
 
@@ -243,6 +244,7 @@ class OpenAIProvider(BaseLLMProvider):
         model_id: str,
         messages: list[dict],
         config: Optional[ModelConfig] = None,
+        handle: Optional[StreamHandle] = None,
     ) -> AsyncIterator[str]:
         """
         流式调用 OpenAI API
@@ -251,6 +253,7 @@ class OpenAIProvider(BaseLLMProvider):
             model_id: 模型 ID
             messages: 消息列表
             config: 模型配置
+            handle: 本次调用的句柄（流结束时写入使用量与结束原因）
 
         Yields:
             str: 响应内容片段
@@ -280,11 +283,14 @@ class OpenAIProvider(BaseLLMProvider):
         total_tokens = 0
         input_tokens = 0
         output_tokens = 0
+        finish_reason = None
 
         async with client.chat.completions.stream(**kwargs) as stream:
             async for chunk in stream:
                 if chunk.choices and chunk.choices[0].delta.content:
                     yield chunk.choices[0].delta.content
+                if chunk.choices and chunk.choices[0].finish_reason:
+                    finish_reason = chunk.choices[0].finish_reason
 
                 # 获取最终使用量
                 if chunk.usage:
@@ -292,11 +298,15 @@ class OpenAIProvider(BaseLLMProvider):
                     output_tokens = chunk.usage.completion_tokens
                     total_tokens = chunk.usage.total_tokens
 
-        self._last_usage = TokenUsage(
+        usage = TokenUsage(
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             total_tokens=total_tokens,
         )
+        self._last_usage = usage
+        if handle is not None:
+            handle.report_usage(usage)
+            handle.report_finish_reason(finish_reason)
 
     async def health_check(self) -> bool:
         """健康检查"""
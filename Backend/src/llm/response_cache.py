@@ -0,0 +1,260 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Response Cache
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""
+精确匹配响应缓存
+
+- CachePolicy: 按 Agent 配置的缓存策略（温度阈值、TTL、是否合并并发请求）
+- ResponseCache: 以 (模型 ID, 规范化消息, 影响输出的 ModelConfig 字段) 为键的 LRU 缓存；
+  可选用 CacheStore（SQLite WAL）持久化，内存中只保留热点条目，重启后仍可命中
+
+缓存命中的响应在 LLMResponse 中标记 cache_hit=True，成本与 Token 计为 0。
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from threading import Lock
+from typing import Callable, Optional
+
+from .cache_store import CacheEntry, CacheStore
+from .models import CostInfo, LLMResponse, ModelConfig, ProviderType, TokenUsage
+
+logger = logging.getLogger(__name__)
+
+# 影响输出内容的 ModelConfig 字段（timeout / retry / metadata 不影响输出，不参与键）
+CACHE_KEY_CONFIG_FIELDS = ("temperature", "max_tokens", "top_p", "top_k", "stop_sequences")
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    响应缓存策略
+
+    Attributes:
+        max_temperature: 温度高于该值的请求不缓存（输出随机性大，缓存无意义）
+        ttl_seconds: 缓存条目有效期（秒）
+        coalesce: 是否合并相同的进行中请求（只调用一次 Provider）
+    """
+    max_temperature: float = 0.3
+    ttl_seconds: float = 3600.0
+    coalesce: bool = True
+
+    def __post_init__(self):
+        """验证策略"""
+        if self.ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+
+    def allows(self, config: ModelConfig) -> bool:
+        """该配置的请求是否可缓存"""
+        return config.temperature <= self.max_temperature
+
+
+def make_cache_key(model_id: str, messages: list[dict], config: ModelConfig) -> str:
+    """
+    生成缓存键
+
+    消息按键排序序列化（忽略值为 None 的字段），与影响输出的配置字段一起取 SHA-256。
+    """
+    canonical = {
+        "model": model_id,
+        "messages": [
+            {key: value for key, value in message.items() if value is not None}
+            for message in messages
+        ],
+        "config": {name: getattr(config, name) for name in CACHE_KEY_CONFIG_FIELDS},
+    }
+    payload = json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _dump(response: LLMResponse) -> str:
+    """序列化响应（写入磁盘存储；raw_response 与 context_report 不保存）"""
+    data = response.to_dict()
+    data["usage"]["cached_tokens"] = response.usage.cached_tokens
+    del data["cost"]["formatted_total"], data["context_report"]
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _load(payload: str) -> LLMResponse:
+    """反序列化 _dump 写入的响应"""
+    data = json.loads(payload)
+    return LLMResponse(
+        content=data["content"],
+        usage=TokenUsage(**data["usage"]),
+        cost=CostInfo(**{name: Decimal(value) for name, value in data["cost"].items()}),
+        model_id=data["model_id"],
+        provider=ProviderType(data["provider"]),
+        latency_ms=data["latency_ms"],
+        finish_reason=data["finish_reason"],
+        created_at=datetime.fromisoformat(data["created_at"]),
+    )
+
+
+class ResponseCache:
+    """
+    LLM 响应 LRU 缓存（线程安全）
+
+    未提供 store 时仅在内存中缓存；提供时每次写入增量提交一行，内存中保留
+    memory_entries 条热点，未命中内存时按键从磁盘读取。磁盘读写失败只记录日志并按未命中处理。
+
+    Example:
+        >>> cache = ResponseCache(max_entries=500, store=CacheStore(Path("~/.maccortex/cache/llm_responses.sqlite3")))
+        >>> key = make_cache_key("claude-haiku", messages, ModelConfig(temperature=0.0))
+        >>> cache.put(key, response)
+        >>> cache.get(key, ttl_seconds=3600)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        clock: Callable[[], float] = time.time,
+        store: Optional[CacheStore] = None,
+        memory_entries: int = 256,
+    ):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最大条目数（超出时淘汰最久未使用的条目）
+            clock: 时间函数（测试用；持久化时须为墙钟时间）
+            store: 磁盘存储（None 则仅内存）
+            memory_entries: 持久化时内存中保留的热点条目数
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self._max_entries = max_entries
+        self._memory_entries = max_entries if store is None else max(1, min(memory_entries, max_entries))
+        self._clock = clock
+        self._store = store
+        # 键 → (响应, 写入时间, 命中次数)
+        self._entries: OrderedDict[str, tuple[LLMResponse, float, int]] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._saved_cost = Decimal("0")
+
+    def get(self, key: str, ttl_seconds: float) -> Optional[LLMResponse]:
+        """
+        读取缓存的原始响应
+
+        Args:
+            key: 缓存键
+            ttl_seconds: 有效期（按读取方策略判断是否过期）
+
+        Returns:
+            Optional[LLMResponse]: 未命中或已过期时为 None
+        """
+        with self._lock:
+            now = self._clock()
+            entry = self._entries.get(key)
+            if entry is None and self._store is not None:
+                entry = self._load_stored(key)
+            if entry is None or now - entry[1] > ttl_seconds:
+                self._misses += 1
+                return None
+            response, created, hit_count = entry
+            self._remember(key, (response, created, hit_count + 1))
+            self._hits += 1
+            self._saved_cost += response.cost.total_cost
+            if self._store is not None:
+                self._stored(self._store.touch, key, hit_count + 1, now)
+            return response
+
+    def put(self, key: str, response: LLMResponse) -> None:
+        """写入响应（命中副本不写入）"""
+        if response.cache_hit:
+            return
+        with self._lock:
+            now = self._clock()
+            self._remember(key, (response, now, 0))
+            if self._store is not None:
+                entry = CacheEntry(response=_dump(response), timestamp=now, hit_count=0, model_name=response.model_id)
+                self._stored(self._store.put, key, entry, now)
+                for evicted in self._stored(self._store.evict_lru, self._max_entries) or ():
+                    self._entries.pop(evicted, None)
+
+    def _remember(self, key: str, entry: tuple[LLMResponse, float, int]) -> None:
+        """放入内存 LRU（移到最后，超出容量时移除最早的）"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._memory_entries:
+            self._entries.popitem(last=False)
+
+    def _load_stored(self, key: str) -> Optional[tuple[LLMResponse, float, int]]:
+        """按键从磁盘读取条目（不存在或无法解析时为 None）"""
+        stored = self._stored(self._store.get, key)
+        if stored is None:
+            return None
+        try:
+            return _load(stored.response), stored.timestamp, stored.hit_count
+        except (ValueError, KeyError, TypeError, ArithmeticError) as e:
+            logger.warning(f"Discarding unreadable response cache entry: {e}")
+            self._stored(self._store.delete, key)
+            return None
+
+    def _stored(self, operation: Callable, *args):
+        """执行磁盘操作；失败时记录日志并返回 None（缓存不可用不影响调用）"""
+        try:
+            return operation(*args)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Response cache store error: {e}")
+            return None
+
+    def record_coalesced(self, response: LLMResponse) -> None:
+        """记录一次被合并的并发请求（共享进行中调用的结果）"""
+        with self._lock:
+            self._coalesced += 1
+            self._saved_cost += response.cost.total_cost
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._store is not None:
+                self._stored(self._store.destroy)
+
+    def close(self) -> None:
+        """关闭磁盘存储（之后的访问会重新打开）"""
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+
+    def _size(self) -> int:
+        """条目数（持久化时为磁盘上的条目数）"""
+        if self._store is not None:
+            count = self._stored(lambda: self._store.count)
+            if count is not None:
+                return count
+        return len(self._entries)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._size()
+
+    def stats(self) -> dict:
+        """缓存统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": self._size(),
+                "memory_entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "saved_cost": str(self._saved_cost),
+            }
@@ -15,9 +15,24 @@ ModelRouterV2 - 智能模型路由器
 - 智能 Fallback 链
 - Token 使用量追踪
 - 成本控制与预算管理
+- 请求对冲（主模型慢于其延迟分位数时并行调用下一个模型）
+- 按 Provider / 模型熔断（跳过熔断中的模型，后台健康探测）
+- 按实时统计（EWMA 延迟、速度、错误率、成本）在约束下自适应选择模型
+- 流式调用返回独立句柄（本次调用的使用量、TTFT、结束原因）
+- 按 Agent 配置的精确匹配响应缓存（合并相同的进行中请求）
+- 按 Agent 配置的语义缓存（相似说法的请求复用响应）
+- 调用前 Token 计数（预估成本、跳过上下文窗口放不下的模型）
+- 按 Agent 配置的上下文窗口管理（截断 / 摘要 / 丢弃旧轮次，使消息放进所选模型的窗口）
 """
 
+import asyncio
+import dataclasses
+import inspect
 import logging
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
 from typing import AsyncIterator, Optional
 
 from .models import (
@@ -28,7 +43,16 @@ from .models import (
     ProviderType,
     TokenUsage,
 )
+from .circuit import BreakerConfig, CircuitBreaker, CircuitOpenError, CircuitState
+from .context_window import ContextPolicy, ContextStrategy, ContextWindowManager, input_budget
+from .hedging import HedgePolicy, HedgeStats, LatencyTracker
+from .model_stats import ModelStatsTracker, RoutingPolicy
 from .protocol import LLMProviderProtocol
+from .cache_store import CacheStore
+from .response_cache import CachePolicy, ResponseCache, make_cache_key
+from .semantic_cache import SemanticCache, SemanticCachePolicy, split_query
+from .streaming import StreamHandle
+from .tokenizer import PreflightEstimate, TokenizerService, get_tokenizer
 from .usage_tracker import UsageTracker
 
 logger = logging.getLogger(__name__)
@@ -43,6 +67,11 @@ class ModelRouterV2:
     - 智能 Fallback（主模型不可用时自动切换）
     - 统一的 Token 使用量追踪
     - 成本预算控制
+    - 按 Agent 配置的请求对冲（见 set_hedge_policy）
+    - 按 Provider / 模型的熔断器（熔断中的模型直接跳过，见 start_health_probes）
+    - 自适应模型选择（见 set_routing_policy / rank_models）
+    - 按 Agent 启用的响应缓存（见 set_cache_policy / set_semantic_policy）
+    - 按 Agent 启用的上下文窗口管理（见 set_context_policy）
 
     Example:
         >>> router = ModelRouterV2()
@@ -61,6 +90,17 @@ class ModelRouterV2:
         fallback_chain: Optional[list[str]] = None,
         usage_tracker: Optional[UsageTracker] = None,
         budget_limit_usd: Optional[float] = None,
+        hedge_policies: Optional[dict[Optional[str], HedgePolicy]] = None,
+        latency_tracker: Optional[LatencyTracker] = None,
+        breaker_config: Optional[BreakerConfig] = None,
+        model_stats: Optional[ModelStatsTracker] = None,
+        routing_policies: Optional[dict[Optional[str], RoutingPolicy]] = None,
+        response_cache: Optional[ResponseCache] = None,
+        cache_policies: Optional[dict[Optional[str], CachePolicy]] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        semantic_policies: Optional[dict[Optional[str], SemanticCachePolicy]] = None,
+        tokenizer: Optional[TokenizerService] = None,
+        context_policies: Optional[dict[Optional[str], ContextPolicy]] = None,
     ):
         """
         初始化路由器
@@ -69,12 +109,45 @@ class ModelRouterV2:
             fallback_chain: 模型 Fallback 链（按优先级排序）
             usage_tracker: 使用量追踪器
             budget_limit_usd: 预算上限（USD）
+            hedge_policies: 按 Agent 名称配置的对冲策略（键 None 为默认策略，未配置则不对冲）
+            latency_tracker: 模型延迟追踪器（对冲延迟取其分位数）
+            breaker_config: 熔断器配置（Provider 与模型各一个熔断器）
+            model_stats: 模型实时统计（可持久化）
+            routing_policies: 按 Agent 名称配置的自适应选择策略（键 None 为默认策略，未配置则按静态顺序）
+            response_cache: 响应缓存存储
+            cache_policies: 按 Agent 名称配置的缓存策略（键 None 为默认策略，未配置则不缓存）
+            semantic_cache: 语义缓存（需提供嵌入函数；None 表示不启用）
+            semantic_policies: 按 Agent 名称配置的语义缓存策略（需同时提供 semantic_cache）
+            tokenizer: Token 计数服务（按实际使用量在线校准）
+            context_policies: 按 Agent 名称配置的上下文窗口策略（键 None 为默认策略，
+                未配置则不处理消息，跳过放不下的模型）
+
+        Raises:
+            ValueError: 配置了语义缓存策略但未提供 semantic_cache
         """
         self._providers: dict[ProviderType, LLMProviderProtocol] = {}
         self._model_to_provider: dict[str, ProviderType] = {}
         self._fallback_chain = fallback_chain or []
         self._usage_tracker = usage_tracker or UsageTracker()
         self._budget_limit = budget_limit_usd
+        self._hedge_policies: dict[Optional[str], HedgePolicy] = dict(hedge_policies or {})
+        self._latency_tracker = latency_tracker or LatencyTracker()
+        self._hedge_stats = HedgeStats()
+        self._breaker_config = breaker_config or BreakerConfig()
+        self._provider_breakers: dict[ProviderType, CircuitBreaker] = {}
+        self._model_breakers: dict[str, CircuitBreaker] = {}
+        self._probe_task: Optional[asyncio.Task] = None
+        self._model_stats = model_stats or ModelStatsTracker()
+        self._routing_policies: dict[Optional[str], RoutingPolicy] = dict(routing_policies or {})
+        self._response_cache = response_cache if response_cache is not None else ResponseCache()
+        self._cache_policies: dict[Optional[str], CachePolicy] = dict(cache_policies or {})
+        self._inflight: dict[str, asyncio.Future] = {}
+        if semantic_policies and semantic_cache is None:
+            raise ValueError("semantic_policies require a semantic_cache")
+        self._semantic_cache = semantic_cache
+        self._semantic_policies: dict[Optional[str], SemanticCachePolicy] = dict(semantic_policies or {})
+        self._tokenizer = tokenizer or TokenizerService()
+        self._context_policies: dict[Optional[str], ContextPolicy] = dict(context_policies or {})
 
     def register_provider(self, provider: LLMProviderProtocol) -> None:
         """
@@ -132,9 +205,13 @@ class ModelRouterV2:
         return None
 
     def is_model_available(self, model_id: str) -> bool:
-        """检查模型是否可用"""
+        """检查模型是否可用（Provider 可用且熔断器未打开）"""
         provider = self.get_provider_for_model(model_id)
-        return provider is not None and provider.is_available
+        return (
+            provider is not None
+            and provider.is_available
+            and self._circuit_allows(model_id, provider)
+        )
 
     @property
     def default_model_id(self) -> str:
@@ -157,6 +234,10 @@ class ModelRouterV2:
         config: Optional[ModelConfig] = None,
         session_id: Optional[str] = None,
         agent_name: Optional[str] = None,
+        routing_policy: Optional[RoutingPolicy] = None,
+        cache_policy: Optional[CachePolicy] = None,
+        semantic_policy: Optional[SemanticCachePolicy] = None,
+        context_policy: Optional[ContextPolicy] = None,
     ) -> LLMResponse:
         """
         调用 LLM
@@ -167,6 +248,14 @@ class ModelRouterV2:
             config: 模型配置
             session_id: 会话 ID（用于使用量追踪）
             agent_name: Agent 名称（用于分组统计）
+            routing_policy: 自适应选择策略（默认使用 Agent 的策略）；
+                给定时 model_id 与 Fallback 链按实时统计重新排序，不满足约束的模型被跳过
+            cache_policy: 响应缓存策略（默认使用 Agent 的策略，未配置则不缓存）；
+                命中时返回 cache_hit=True、成本为 0 的响应
+            semantic_policy: 语义缓存策略（默认使用 Agent 的策略，未配置则不查找）；
+                最后一条用户消息与缓存条目相似度达到阈值且通过校验时返回该条目的响应
+            context_policy: 上下文窗口策略（默认使用 Agent 的策略）；
+                消息放不进所选模型的窗口时按策略处理，处理记录见 LLMResponse.context_report
 
         Returns:
             LLMResponse: 统一响应格式
@@ -175,6 +264,171 @@ class ModelRouterV2:
             ValueError: 模型不存在
             RuntimeError: 所有 Fallback 都失败
         """
+        start = time.perf_counter()
+        effective_config = config or ModelConfig.default()
+
+        # 精确匹配缓存优先（无需嵌入调用），未命中时再查语义缓存
+        cache_policy = cache_policy or self._get_cache_policy(agent_name)
+        cache_key = None
+        if cache_policy is not None and cache_policy.allows(effective_config):
+            cache_key = make_cache_key(model_id, messages, effective_config)
+            cached = self._response_cache.get(cache_key, cache_policy.ttl_seconds)
+            if cached is not None:
+                return self._serve_cached(cached, start, session_id, agent_name)
+
+        semantic_policy = semantic_policy or self._get_semantic_policy(agent_name)
+        semantic_query = None
+        if (
+            semantic_policy is not None
+            and self._semantic_cache is not None
+            and semantic_policy.allows(effective_config)
+        ):
+            split = split_query(model_id, messages, effective_config)
+            if split is not None:
+                partition_key, query = split
+                try:
+                    vector = await self._semantic_cache.embed(query)
+                    match = self._semantic_cache.search(
+                        partition_key, vector, semantic_policy.threshold, semantic_policy.ttl_seconds
+                    )
+                    content = None
+                    if match is not None:
+                        content = await self._semantic_cache.verify(query, match, semantic_policy)
+                except Exception as e:
+                    # 嵌入服务不可用、校验回调出错等：按未命中处理，不影响正常调用
+                    logger.warning(f"Semantic cache lookup failed, treating as miss: {e}")
+                else:
+                    if content is not None:
+                        logger.info(
+                            f"Semantic cache hit for {agent_name or 'default'} "
+                            f"(similarity={match.similarity:.3f})"
+                        )
+                        return self._serve_cached(
+                            match.response, start, session_id, agent_name,
+                            content=content, similarity=match.similarity,
+                        )
+                    semantic_query = (partition_key, query, vector)
+
+        response = await self._invoke_cached(
+            cache_key, model_id, messages, config, session_id, agent_name,
+            routing_policy, context_policy,
+            coalesce=cache_key is not None and cache_policy.coalesce,
+        )
+        # 缓存按请求的模型分区：Fallback / 对冲 / 自适应选择由其他模型给出的响应不写入，
+        # 否则故障期间的替代模型响应会在整个有效期内冒充所请求的模型
+        if semantic_query is not None and response.model_id == model_id:
+            try:
+                self._semantic_cache.add(*semantic_query, response)
+            except Exception as e:
+                logger.warning(f"Semantic cache store failed: {e}")
+        return response
+
+    async def _invoke_cached(
+        self,
+        key: Optional[str],
+        model_id: str,
+        messages: list[dict],
+        config: Optional[ModelConfig],
+        session_id: Optional[str],
+        agent_name: Optional[str],
+        routing_policy: Optional[RoutingPolicy],
+        context_policy: Optional[ContextPolicy] = None,
+        coalesce: bool = False,
+    ) -> LLMResponse:
+        """
+        精确匹配缓存的写入与相同请求合并（key 为 None 表示未启用缓存，直接调用模型）
+
+        调用方已按 key 查过缓存；只有所请求的模型给出的响应才写入缓存。
+        """
+        if key is None:
+            return await self._invoke_models(
+                model_id, messages, config, session_id, agent_name, routing_policy, context_policy
+            )
+
+        start = time.perf_counter()
+        inflight = self._inflight.get(key) if coalesce else None
+        if inflight is not None:
+            try:
+                response = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # 发起请求的调用被取消：自行调用
+                return await self._invoke_cached(
+                    key, model_id, messages, config, session_id, agent_name,
+                    routing_policy, context_policy, coalesce,
+                )
+            self._response_cache.record_coalesced(response)
+            return self._serve_cached(response, start, session_id, agent_name)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        if coalesce:
+            self._inflight[key] = future
+        try:
+            response = await self._invoke_models(
+                model_id, messages, config, session_id, agent_name, routing_policy, context_policy
+            )
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 无合并请求时避免 "exception was never retrieved"
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        future.set_result(response)
+        if response.model_id == model_id:
+            self._response_cache.put(key, response)
+        else:
+            logger.debug(f"Not caching {response.model_id} response under requested {model_id}")
+        return response
+
+    def _serve_cached(
+        self,
+        response: LLMResponse,
+        start: float,
+        session_id: Optional[str],
+        agent_name: Optional[str],
+        content: Optional[str] = None,
+        similarity: Optional[float] = None,
+    ) -> LLMResponse:
+        """返回缓存响应的副本（零成本，cache_hit=True）并记录使用量"""
+        hit = dataclasses.replace(
+            response,
+            content=response.content if content is None else content,
+            usage=TokenUsage.zero(),
+            cost=CostInfo.zero(),
+            latency_ms=(time.perf_counter() - start) * 1000,
+            created_at=datetime.now(),
+            cache_hit=True,
+            cache_similarity=similarity,
+        )
+        provider = self.get_provider_for_model(hit.model_id)
+        self._usage_tracker.record_usage(
+            model_id=hit.model_id,
+            provider=provider.provider_type if provider else hit.provider,
+            usage=hit.usage,
+            cost=hit.cost,
+            session_id=session_id,
+            agent_name=agent_name,
+            latency_ms=hit.latency_ms,
+            cache_hit=True,
+        )
+        return hit
+
+    async def _invoke_models(
+        self,
+        model_id: str,
+        messages: list[dict],
+        config: Optional[ModelConfig],
+        session_id: Optional[str],
+        agent_name: Optional[str],
+        routing_policy: Optional[RoutingPolicy],
+        context_policy: Optional[ContextPolicy] = None,
+    ) -> LLMResponse:
+        """按 Fallback 链（及对冲 / 自适应策略）调用模型"""
         # 检查预算
         if self._budget_limit:
             current_cost = self._usage_tracker.get_total_cost()
@@ -190,8 +444,25 @@ class ModelRouterV2:
                 m for m in self._fallback_chain if m != model_id
             )
 
-        last_error = None
+        routing_policy = routing_policy or self._routing_policies.get(
+            agent_name, self._routing_policies.get(None)
+        )
+        if routing_policy is not None:
+            ranked = self.rank_models(routing_policy, models_to_try, messages, config)
+            if not ranked:
+                raise RuntimeError(
+                    f"No available model satisfies routing policy "
+                    f"(max_latency_ms={routing_policy.max_latency_ms}, "
+                    f"max_cost_usd={routing_policy.max_cost_usd})"
+                )
+            if ranked[0] != model_id:
+                logger.info(f"Adaptive routing: {ranked[0]} (requested: {model_id})")
+            models_to_try = ranked
+
+        # 配置了上下文策略时不预先跳过放不下的模型，调用前按各自的窗口处理消息
+        context_policy = context_policy or self._get_context_policy(agent_name)
 
+        candidates: list[tuple[str, LLMProviderProtocol]] = []
         for try_model_id in models_to_try:
             provider = self.get_provider_for_model(try_model_id)
 
@@ -203,17 +474,48 @@ class ModelRouterV2:
                 logger.warning(f"Provider not available: {provider.name}")
                 continue
 
+            if not self._circuit_allows(try_model_id, provider):
+                logger.info(f"Circuit open, skipping model: {try_model_id}")
+                continue
+
+            info = provider.get_model_info(try_model_id)
+            if info is not None and context_policy is None:
+                input_tokens = self._tokenizer.count_messages(messages, try_model_id)
+                if input_tokens >= info.context_window:
+                    logger.info(
+                        f"Prompt (~{input_tokens} tokens) exceeds context window of "
+                        f"{try_model_id} ({info.context_window}), skipping"
+                    )
+                    continue
+
+            candidates.append((try_model_id, provider))
+
+        if not candidates:
+            raise RuntimeError(
+                f"No available model among: {', '.join(models_to_try)} "
+                f"(providers unavailable, circuits open or prompt exceeds context window)"
+            )
+
+        policy_key, policy = self._get_hedge_policy(agent_name)
+        if policy is not None and policy.max_hedges > 0 and len(candidates) > 1:
+            return await self._invoke_hedged(
+                model_id, candidates, messages, config,
+                policy, policy_key, session_id, agent_name, context_policy,
+            )
+
+        last_error = None
+
+        for try_model_id, provider in candidates:
             try:
-                response = await provider.invoke(try_model_id, messages, config)
+                response = await self._call_with_context(
+                    provider, try_model_id, messages, config,
+                    context_policy, session_id, agent_name,
+                )
 
                 # 记录使用量
-                self._usage_tracker.record_usage(
-                    model_id=try_model_id,
-                    provider=provider.provider_type,
-                    usage=response.usage,
-                    cost=response.cost,
-                    session_id=session_id,
-                    agent_name=agent_name,
+                self._record_usage(
+                    try_model_id, provider, response.usage, response.cost,
+                    session_id, agent_name, latency_ms=response.latency_ms,
                 )
 
                 # 如果使用了 fallback，记录日志
@@ -238,17 +540,518 @@ class ModelRouterV2:
             f"All models failed. Last error: {last_error}"
         ) from last_error
 
-    async def stream(
+    async def _call_with_context(
+        self,
+        provider: LLMProviderProtocol,
+        model_id: str,
+        messages: list[dict],
+        config: Optional[ModelConfig],
+        context_policy: Optional[ContextPolicy],
+        session_id: Optional[str],
+        agent_name: Optional[str],
+    ) -> LLMResponse:
+        """
+        按上下文策略把消息放进该模型的窗口后调用（未配置策略时直接调用）
+
+        Raises:
+            ContextWindowExceededError: 处理后仍放不下（Fallback 到下一个模型）
+        """
+        info = provider.get_model_info(model_id)
+        if context_policy is None or info is None:
+            return await self._call_provider(provider, model_id, messages, config)
+
+        max_output_tokens = min((config or ModelConfig.default()).max_tokens, info.max_tokens)
+
+        async def summarize(older: list[dict]) -> str:
+            return await self._summarize_context(older, context_policy, session_id, agent_name)
+
+        fitted, report = await ContextWindowManager(self._tokenizer, context_policy).fit(
+            messages,
+            model_id,
+            budget=input_budget(info.context_window, max_output_tokens, context_policy.safety_margin),
+            context_window=info.context_window,
+            summarize=summarize,
+        )
+        response = await self._call_provider(provider, model_id, fitted, config)
+        if report is not None:
+            response = dataclasses.replace(response, context_report=report)
+        return response
+
+    async def _summarize_context(
+        self,
+        messages: list[dict],
+        policy: ContextPolicy,
+        session_id: Optional[str],
+        agent_name: Optional[str],
+    ) -> str:
+        """
+        用摘要模型压缩较早的轮次（使用量计入调用方 Agent）
+
+        摘要模型取 policy.summary_model_id，未指定时取可用模型中输入价格最低的；
+        对话记录超出摘要模型的输入预算时保留最近的部分。
+        """
+        summary_model_id = policy.summary_model_id
+        if summary_model_id is None:
+            available = [
+                info for info in self.get_available_models() if self.is_model_available(info.id)
+            ]
+            if not available:
+                raise RuntimeError("No model available for context summarization")
+            summary_model_id = min(available, key=lambda info: info.input_price_per_1m).id
+        provider = self.get_provider_for_model(summary_model_id)
+        info = provider.get_model_info(summary_model_id) if provider else None
+        if info is None:
+            raise ValueError(f"Unknown summary model: {summary_model_id}")
+
+        transcript = "\n\n".join(
+            f"{message.get('role', 'user')}: {message.get('content', '')}" for message in messages
+        )
+        budget = input_budget(info.context_window, policy.summary_max_tokens, policy.safety_margin) - 200
+        tokens = self._tokenizer.count(transcript, summary_model_id)
+        if tokens > budget:
+            transcript = transcript[len(transcript) - int(len(transcript) * budget / tokens):]
+
+        response = await self._call_provider(
+            provider,
+            summary_model_id,
+            [
+                {
+                    "role": "system",
+                    "content": (
+                        "Summarize the conversation below for another assistant that will continue it. "
+                        "Keep facts, decisions, file names, code identifiers, errors and open questions. "
+                        "Be concise and do not add anything that is not in the conversation."
+                    ),
+                },
+                {"role": "user", "content": transcript},
+            ],
+            ModelConfig(temperature=0.0, max_tokens=policy.summary_max_tokens),
+        )
+        self._record_usage(
+            summary_model_id, provider, response.usage, response.cost,
+            session_id, agent_name, latency_ms=response.latency_ms,
+        )
+        return response.content.strip()
+
+    async def _call_provider(
+        self,
+        provider: LLMProviderProtocol,
+        model_id: str,
+        messages: list[dict],
+        config: Optional[ModelConfig],
+    ) -> LLMResponse:
+        """
+        调用 Provider
+
+        记录成功调用的延迟（供对冲分位数使用），并把结果计入 Provider 与模型的熔断器
+        及模型实时统计。
+
+        Raises:
+            CircuitOpenError: 熔断器未放行（调用前状态已变化）
+        """
+        breakers = self._acquire_breakers(model_id, provider)
+        start = time.perf_counter()
+        try:
+            response = await provider.invoke(model_id, messages, config)
+        except asyncio.CancelledError:
+            for breaker in breakers:
+                breaker.release()
+            raise
+        except ValueError:
+            # 调用方错误（模型 ID / 消息格式），不计入熔断
+            for breaker in breakers:
+                breaker.release()
+            raise
+        except Exception as e:
+            timeout = isinstance(e, (TimeoutError, asyncio.TimeoutError))
+            for breaker in breakers:
+                breaker.record_failure(timeout=timeout)
+            self._model_stats.record_failure(model_id)
+            raise
+        for breaker in breakers:
+            breaker.record_success()
+        latency_ms = (time.perf_counter() - start) * 1000
+        self._latency_tracker.record(model_id, latency_ms)
+        if provider.provider_type != ProviderType.OLLAMA:
+            # Ollama 的 prompt_eval_count 不含 KV 缓存复用的前缀 Token，不能用于校准
+            self._tokenizer.observe(model_id, messages, response.usage.input_tokens)
+        self._model_stats.record_success(
+            model_id,
+            latency_ms=latency_ms,
+            output_tokens=response.usage.output_tokens,
+            cost_usd=float(response.cost.total_cost),
+        )
+        return response
+
+    # ------------------------------------------------------------------
+    # 自适应模型选择
+    # ------------------------------------------------------------------
+
+    def set_routing_policy(
+        self,
+        policy: Optional[RoutingPolicy],
+        agent_name: Optional[str] = None,
+    ) -> None:
+        """
+        设置自适应选择策略
+
+        Args:
+            policy: 选择策略（None 表示移除）
+            agent_name: Agent 名称（None 表示默认策略，适用于未单独配置的 Agent）
+        """
+        if policy is None:
+            self._routing_policies.pop(agent_name, None)
+        else:
+            self._routing_policies[agent_name] = policy
+
+    def rank_models(
+        self,
+        policy: RoutingPolicy,
+        candidates: Optional[list[str]] = None,
+        messages: Optional[list[dict]] = None,
+        config: Optional[ModelConfig] = None,
+    ) -> list[str]:
+        """
+        按策略与实时统计排序可用模型
+
+        样本不足的模型按目录定价预估本次请求的最高成本（输入 Token + 输出上限），
+        使 max_cost_usd 对它们同样生效；样本充足的模型使用历史平均成本。
+
+        Args:
+            policy: 选择策略
+            candidates: 候选模型（默认 Fallback 链 + 所有可用模型）
+            messages: 本次请求的消息（用于预估输入成本；未给出时只计输出上限）
+            config: 模型配置（决定输出上限）
+
+        Returns:
+            list[str]: 满足约束的可用模型，最优在前
+        """
+        if candidates is None:
+            candidates = list(self._fallback_chain)
+            candidates.extend(
+                m.id for m in self.get_available_models() if m.id not in candidates
+            )
+        available = [m for m in candidates if self.is_model_available(m)]
+
+        def catalog_cost(model_id: str) -> Optional[float]:
+            stats = self._model_stats.get(model_id)
+            if stats is not None and stats.successes >= policy.min_samples:
+                return None
+            try:
+                return float(self.preflight(model_id, messages or [], config).cost.total_cost)
+            except ValueError:
+                return None
+
+        return policy.rank(available, self._model_stats, estimate_cost=catalog_cost)
+
+    def select_model(
+        self,
+        policy: RoutingPolicy,
+        candidates: Optional[list[str]] = None,
+    ) -> Optional[str]:
+        """选择最优模型（没有满足约束的模型时返回 None）"""
+        ranked = self.rank_models(policy, candidates)
+        return ranked[0] if ranked else None
+
+    def get_model_stats(self) -> dict[str, dict]:
+        """获取各模型的实时统计（EWMA 延迟、tokens/s、错误率、单次成本）"""
+        return self._model_stats.snapshot()
+
+    # ------------------------------------------------------------------
+    # 熔断器
+    # ------------------------------------------------------------------
+
+    def get_provider_breaker(self, provider_type: ProviderType) -> CircuitBreaker:
+        """获取 Provider 的熔断器"""
+        breaker = self._provider_breakers.get(provider_type)
+        if breaker is None:
+            breaker = self._provider_breakers[provider_type] = CircuitBreaker(
+                provider_type.value, self._breaker_config
+            )
+        return breaker
+
+    def get_model_breaker(self, model_id: str) -> CircuitBreaker:
+        """获取模型的熔断器"""
+        breaker = self._model_breakers.get(model_id)
+        if breaker is None:
+            breaker = self._model_breakers[model_id] = CircuitBreaker(
+                model_id, self._breaker_config
+            )
+        return breaker
+
+    def _circuit_allows(self, model_id: str, provider: LLMProviderProtocol) -> bool:
+        return (
+            self.get_provider_breaker(provider.provider_type).allows_request()
+            and self.get_model_breaker(model_id).allows_request()
+        )
+
+    def _acquire_breakers(
+        self, model_id: str, provider: LLMProviderProtocol
+    ) -> tuple[CircuitBreaker, ...]:
+        """占用 Provider 与模型熔断器的调用名额（任一未放行时全部归还并抛出 CircuitOpenError）"""
+        acquired: list[CircuitBreaker] = []
+        for breaker in (
+            self.get_provider_breaker(provider.provider_type),
+            self.get_model_breaker(model_id),
+        ):
+            if not breaker.try_acquire():
+                for held in acquired:
+                    held.release()
+                raise CircuitOpenError(f"Circuit open for {breaker.name}")
+            acquired.append(breaker)
+        return tuple(acquired)
+
+    def get_circuit_state(self, model_id: str) -> dict:
+        """
+        获取模型的熔断状态
+
+        Returns:
+            dict: state（Provider 与模型中较差的状态）、model / provider 熔断器快照
+        """
+        model = self.get_model_breaker(model_id).snapshot()
+        provider = self.get_provider_for_model(model_id)
+        provider_snapshot = (
+            self.get_provider_breaker(provider.provider_type).snapshot() if provider else None
+        )
+        order = [CircuitState.CLOSED.value, CircuitState.HALF_OPEN.value, CircuitState.OPEN.value]
+        states = [model["state"]] + ([provider_snapshot["state"]] if provider_snapshot else [])
+        return {
+            "state": max(states, key=order.index),
+            "model": model,
+            "provider": provider_snapshot,
+        }
+
+    def get_circuit_states(self) -> dict:
+        """获取所有 Provider 与模型熔断器的快照"""
+        return {
+            "providers": {
+                provider_type.value: breaker.snapshot()
+                for provider_type, breaker in self._provider_breakers.items()
+            },
+            "models": {
+                model_id: breaker.snapshot()
+                for model_id, breaker in self._model_breakers.items()
+            },
+        }
+
+    def start_health_probes(self, interval_seconds: float = 30.0) -> asyncio.Task:
+        """
+        启动后台健康探测（需在事件循环中调用）
+
+        每隔 interval_seconds 探测熔断中的 Provider（OPEN，或 HALF_OPEN 且没有试探调用，
+        见 health_check_all）：探测成功时提前进入 HALF_OPEN，探测失败重新计入一次失败。
+        云端 Provider 的 health_check 会发送一次计费的补全请求，因此不探测 CLOSED 的 Provider。
+        """
+        if self._probe_task is not None and not self._probe_task.done():
+            return self._probe_task
+
+        async def probe_loop():
+            while True:
+                await asyncio.sleep(interval_seconds)
+                try:
+                    await self.health_check_all(open_only=True)
+                except Exception as e:
+                    logger.warning(f"Health probe round failed: {e}")
+
+        self._probe_task = asyncio.get_running_loop().create_task(probe_loop())
+        logger.info(f"Started LLM health probes (every {interval_seconds:g}s)")
+        return self._probe_task
+
+    async def stop_health_probes(self) -> None:
+        """停止后台健康探测"""
+        task, self._probe_task = self._probe_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _record_usage(
+        self,
+        model_id: str,
+        provider: LLMProviderProtocol,
+        usage: TokenUsage,
+        cost: CostInfo,
+        session_id: Optional[str],
+        agent_name: Optional[str],
+        latency_ms: Optional[float] = None,
+        ttft_ms: Optional[float] = None,
+    ) -> None:
+        self._usage_tracker.record_usage(
+            model_id=model_id,
+            provider=provider.provider_type,
+            usage=usage,
+            cost=cost,
+            session_id=session_id,
+            agent_name=agent_name,
+            latency_ms=latency_ms,
+            ttft_ms=ttft_ms,
+        )
+
+    async def _invoke_hedged(
+        self,
+        model_id: str,
+        candidates: list[tuple[str, LLMProviderProtocol]],
+        messages: list[dict],
+        config: Optional[ModelConfig],
+        policy: HedgePolicy,
+        policy_key: str,
+        session_id: Optional[str],
+        agent_name: Optional[str],
+        context_policy: Optional[ContextPolicy] = None,
+    ) -> LLMResponse:
+        """
+        对冲调用
+
+        最近发起的请求超过其模型的延迟分位数仍未返回时，并行发起链中的下一个模型
+        （最多 policy.max_hedges 次，且对冲累计额外花费未超过 policy.budget_usd）；
+        请求失败且没有其他进行中的请求时，照常 Fallback 到下一个模型。
+        取先成功的结果，取消其余请求。
+
+        被取消的请求按胜出响应的输入 Token 数估算其输入成本并计入使用量
+        （Provider 已收到完整 Prompt；输出 Token 无法得知，按 0 计）。
+        """
+        loop = asyncio.get_running_loop()
+        pending: dict[asyncio.Task, tuple[str, LLMProviderProtocol, bool]] = {}
+        next_index = 0
+        hedges = 0
+        hedge_deadline: Optional[float] = None
+        last_launched = model_id
+        last_error: Optional[Exception] = None
+
+        def launch(is_hedge: bool) -> None:
+            nonlocal next_index, hedge_deadline, last_launched
+            try_model_id, provider = candidates[next_index]
+            last_launched = try_model_id
+            next_index += 1
+            task = asyncio.ensure_future(
+                self._call_with_context(
+                    provider, try_model_id, messages, config,
+                    context_policy, session_id, agent_name,
+                )
+            )
+            pending[task] = (try_model_id, provider, is_hedge)
+            delay_ms = policy.delay_ms(self._latency_tracker, try_model_id)
+            hedge_deadline = None if delay_ms is None else loop.time() + delay_ms / 1000
+
+        def can_hedge() -> bool:
+            return (
+                next_index < len(candidates)
+                and hedges < policy.max_hedges
+                and hedge_deadline is not None
+                and (
+                    policy.budget_usd is None
+                    or self._hedge_stats.extra_cost(policy_key) < policy.budget_usd
+                )
+            )
+
+        launch(is_hedge=False)
+        try:
+            while pending:
+                timeout = max(0.0, hedge_deadline - loop.time()) if can_hedge() else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    hedges += 1
+                    logger.info(
+                        f"Hedging: {last_launched} slower than "
+                        f"p{policy.percentile:g}, also trying {candidates[next_index][0]}"
+                    )
+                    launch(is_hedge=True)
+                    continue
+
+                winner: Optional[tuple[LLMResponse, str, LLMProviderProtocol, bool]] = None
+                finished: list[tuple[LLMResponse, str, LLMProviderProtocol]] = []
+                for task in done:
+                    try_model_id, provider, is_hedge = pending.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        logger.warning(f"Model {try_model_id} failed: {last_error}")
+                        continue
+                    response = task.result()
+                    if winner is None:
+                        winner = (response, try_model_id, provider, is_hedge)
+                    else:
+                        finished.append((response, try_model_id, provider))
+
+                if winner is None:
+                    if not pending and next_index < len(candidates):
+                        launch(is_hedge=False)
+                    continue
+
+                response, try_model_id, provider, is_hedge = winner
+                self._record_usage(
+                    try_model_id, provider, response.usage, response.cost,
+                    session_id, agent_name, latency_ms=response.latency_ms,
+                )
+                extra_cost = Decimal("0")
+                for loser, loser_model_id, loser_provider in finished:
+                    self._record_usage(
+                        loser_model_id, loser_provider, loser.usage, loser.cost,
+                        session_id, agent_name, latency_ms=loser.latency_ms,
+                    )
+                    extra_cost += loser.cost.total_cost
+                for task, (loser_model_id, loser_provider, _) in pending.items():
+                    task.cancel()
+                    usage, cost = self._estimate_cancelled(
+                        loser_provider, loser_model_id, response.usage.input_tokens
+                    )
+                    self._record_usage(
+                        loser_model_id, loser_provider, usage, cost,
+                        session_id, agent_name,
+                    )
+                    extra_cost += cost.total_cost
+                await asyncio.gather(*pending, return_exceptions=True)
+                pending.clear()
+
+                if hedges:
+                    self._hedge_stats.record(policy_key, is_hedge, extra_cost)
+                if try_model_id != model_id:
+                    logger.info(
+                        f"Used {'hedged' if is_hedge else 'fallback'} model: "
+                        f"{try_model_id} (original: {model_id})"
+                    )
+                return response
+        finally:
+            for task in pending:
+                task.cancel()
+
+        # 所有模型都失败
+        raise RuntimeError(
+            f"All models failed. Last error: {last_error}"
+        ) from last_error
+
+    @staticmethod
+    def _estimate_cancelled(
+        provider: LLMProviderProtocol,
+        model_id: str,
+        input_tokens: int,
+    ) -> tuple[TokenUsage, CostInfo]:
+        """估算被取消请求的使用量（仅输入 Token）"""
+        usage = TokenUsage(input_tokens=input_tokens, output_tokens=0, total_tokens=input_tokens)
+        try:
+            return usage, provider.calculate_cost(model_id, usage)
+        except Exception as e:
+            logger.warning(f"Cannot price cancelled request for {model_id}: {e}")
+            return usage, CostInfo.zero()
+
+    def stream(
         self,
         model_id: str,
         messages: list[dict],
         config: Optional[ModelConfig] = None,
         session_id: Optional[str] = None,
         agent_name: Optional[str] = None,
-    ) -> AsyncIterator[str]:
+    ) -> StreamHandle:
         """
         流式调用 LLM
 
+        返回本次调用独立的句柄：迭代句柄得到响应片段，流结束后在句柄上读取
+        usage / cost / ttft_ms / latency_ms / finish_reason（并发调用互不影响）。
+
         Args:
             model_id: 模型 ID
             messages: 消息列表
@@ -256,8 +1059,12 @@ class ModelRouterV2:
             session_id: 会话 ID
             agent_name: Agent 名称
 
-        Yields:
-            str: 响应内容片段
+        Returns:
+            StreamHandle: 流式调用句柄
+
+        Raises:
+            ValueError: 模型不存在
+            RuntimeError: Provider 不可用
         """
         provider = self.get_provider_for_model(model_id)
         if not provider:
@@ -266,34 +1073,141 @@ class ModelRouterV2:
         if not provider.is_available:
             raise RuntimeError(f"Provider not available: {provider.name}")
 
-        async for chunk in provider.stream(model_id, messages, config):
-            yield chunk
-
-        # 记录使用量（流式结束后）
-        usage = provider.get_last_usage()
-        if usage:
-            cost = provider.calculate_cost(model_id, usage)
-            self._usage_tracker.record_usage(
-                model_id=model_id,
-                provider=provider.provider_type,
-                usage=usage,
-                cost=cost,
-                session_id=session_id,
-                agent_name=agent_name,
+        handle = StreamHandle(
+            model_id,
+            provider.provider_type,
+            on_complete=lambda h: self._complete_stream(h, provider, session_id, agent_name),
+        )
+        handle.attach(self._stream_chunks(provider, model_id, messages, config, handle))
+        return handle
+
+    async def _stream_chunks(
+        self,
+        provider: LLMProviderProtocol,
+        model_id: str,
+        messages: list[dict],
+        config: Optional[ModelConfig],
+        handle: StreamHandle,
+    ) -> AsyncIterator[str]:
+        """产出 Provider 的响应片段，并把结果计入熔断器"""
+        breakers = self._acquire_breakers(model_id, provider)
+        accepts_handle = "handle" in inspect.signature(provider.stream).parameters
+        try:
+            if accepts_handle:
+                source = provider.stream(model_id, messages, config, handle=handle)
+            else:
+                source = provider.stream(model_id, messages, config)
+            async for chunk in source:
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            # 调用方提前结束：关闭 Provider 的流（释放连接），不计入熔断
+            for breaker in breakers:
+                breaker.release()
+            await source.aclose()
+            raise
+        except ValueError:
+            for breaker in breakers:
+                breaker.release()
+            raise
+        except Exception as e:
+            timeout = isinstance(e, (TimeoutError, asyncio.TimeoutError))
+            for breaker in breakers:
+                breaker.record_failure(timeout=timeout)
+            self._model_stats.record_failure(model_id)
+            raise
+        for breaker in breakers:
+            breaker.record_success()
+
+        if not accepts_handle and handle.usage is None:
+            # 未支持句柄的 Provider：退回共享的最近使用量
+            usage = provider.get_last_usage()
+            if usage:
+                handle.report_usage(usage)
+
+    def _complete_stream(
+        self,
+        handle: StreamHandle,
+        provider: LLMProviderProtocol,
+        session_id: Optional[str],
+        agent_name: Optional[str],
+    ) -> None:
+        """流结束：计算成本，记录使用量、延迟与 TTFT"""
+        if handle.usage is None:
+            return
+        handle.cost = provider.calculate_cost(handle.model_id, handle.usage)
+        self._record_usage(
+            handle.model_id, provider, handle.usage, handle.cost,
+            session_id, agent_name,
+            latency_ms=handle.latency_ms, ttft_ms=handle.ttft_ms,
+        )
+        if handle.error is None and handle.finish_reason != "cancelled":
+            self._model_stats.record_success(
+                handle.model_id,
+                latency_ms=handle.latency_ms or 0.0,
+                output_tokens=handle.usage.output_tokens,
+                cost_usd=float(handle.cost.total_cost),
             )
 
     def estimate_cost(
         self,
         model_id: str,
-        input_tokens: int,
-        output_tokens: int,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+        messages: Optional[list[dict]] = None,
+        config: Optional[ModelConfig] = None,
     ) -> CostInfo:
-        """预估调用成本"""
+        """
+        预估调用成本
+
+        Args:
+            model_id: 模型 ID
+            input_tokens: 输入 Token 数（未给出时按 messages 计数）
+            output_tokens: 输出 Token 数（未给出时取输出上限，即最高成本）
+            messages: 消息列表
+            config: 模型配置（决定输出上限）
+
+        Raises:
+            ValueError: 模型不存在，或 input_tokens 与 messages 都未给出
+        """
         provider = self.get_provider_for_model(model_id)
         if not provider:
             raise ValueError(f"Unknown model: {model_id}")
+        if input_tokens is None or output_tokens is None:
+            if messages is None and input_tokens is None:
+                raise ValueError("Either input_tokens or messages is required")
+            estimate = self.preflight(model_id, messages or [], config)
+            input_tokens = estimate.input_tokens if input_tokens is None else input_tokens
+            output_tokens = estimate.max_output_tokens if output_tokens is None else output_tokens
         return provider.estimate_cost(model_id, input_tokens, output_tokens)
 
+    def preflight(
+        self,
+        model_id: str,
+        messages: list[dict],
+        config: Optional[ModelConfig] = None,
+    ) -> PreflightEstimate:
+        """
+        调用前预估：输入 Token 数、输出上限、是否放得进上下文窗口、最高成本
+
+        Raises:
+            ValueError: 模型不存在
+        """
+        provider = self.get_provider_for_model(model_id)
+        info = provider.get_model_info(model_id) if provider else None
+        if info is None:
+            raise ValueError(f"Unknown model: {model_id}")
+        config = config or ModelConfig.default()
+        input_tokens = self._tokenizer.count_messages(messages, model_id)
+        max_output_tokens = min(config.max_tokens, info.max_tokens)
+        return PreflightEstimate(
+            model_id=model_id,
+            input_tokens=input_tokens,
+            max_output_tokens=max_output_tokens,
+            context_window=info.context_window,
+            exact=self._tokenizer.is_exact(model_id),
+            cost=provider.estimate_cost(model_id, input_tokens, max_output_tokens),
+        )
+
     def get_usage_stats(self, session_id: Optional[str] = None) -> dict:
         """获取使用统计"""
         return self._usage_tracker.get_stats(session_id)
@@ -310,16 +1224,36 @@ class ModelRouterV2:
         """重置使用统计"""
         self._usage_tracker.reset(session_id)
 
-    async def health_check_all(self) -> dict[str, bool]:
-        """检查所有 Provider 健康状态"""
-        results = {}
-        for provider_type, provider in self._providers.items():
+    async def health_check_all(
+        self,
+        timeout_seconds: float = 10.0,
+        open_only: bool = False,
+    ) -> dict[str, bool]:
+        """
+        检查 Provider 健康状态（并发探测，结果计入 Provider 熔断器）
+
+        Args:
+            timeout_seconds: 单个 Provider 的探测超时（秒）
+            open_only: 只探测熔断中的 Provider（OPEN，或 HALF_OPEN 且没有试探调用；后台探测使用）
+        """
+
+        async def check(provider_type: ProviderType, provider: LLMProviderProtocol) -> bool:
             try:
-                is_healthy = await provider.health_check()
-                results[provider_type.value] = is_healthy
+                return bool(await asyncio.wait_for(provider.health_check(), timeout_seconds))
             except Exception as e:
                 logger.warning(f"Health check failed for {provider_type}: {e}")
-                results[provider_type.value] = False
+                return False
+
+        providers = [
+            (provider_type, provider)
+            for provider_type, provider in self._providers.items()
+            if not open_only or self.get_provider_breaker(provider_type).needs_probe()
+        ]
+        healthy = await asyncio.gather(*(check(t, p) for t, p in providers))
+        results = {}
+        for (provider_type, _), is_healthy in zip(providers, healthy):
+            self.get_provider_breaker(provider_type).record_probe(is_healthy)
+            results[provider_type.value] = is_healthy
         return results
 
     def set_fallback_chain(self, chain: list[str]) -> None:
@@ -330,6 +1264,119 @@ class ModelRouterV2:
         """设置预算上限"""
         self._budget_limit = limit_usd
 
+    def set_hedge_policy(
+        self,
+        policy: Optional[HedgePolicy],
+        agent_name: Optional[str] = None,
+    ) -> None:
+        """
+        设置对冲策略
+
+        Args:
+            policy: 对冲策略（None 表示移除）
+            agent_name: Agent 名称（None 表示默认策略，适用于未单独配置的 Agent）
+        """
+        if policy is None:
+            self._hedge_policies.pop(agent_name, None)
+        else:
+            self._hedge_policies[agent_name] = policy
+
+    def _get_hedge_policy(
+        self, agent_name: Optional[str]
+    ) -> tuple[str, Optional[HedgePolicy]]:
+        """获取 Agent 的对冲策略（返回统计键与策略；对冲预算按统计键累计）"""
+        if agent_name is not None and agent_name in self._hedge_policies:
+            return agent_name, self._hedge_policies[agent_name]
+        return "default", self._hedge_policies.get(None)
+
+    def set_cache_policy(
+        self,
+        policy: Optional[CachePolicy],
+        agent_name: Optional[str] = None,
+    ) -> None:
+        """
+        设置响应缓存策略
+
+        Args:
+            policy: 缓存策略（None 表示关闭缓存）
+            agent_name: Agent 名称（None 表示默认策略）
+        """
+        if policy is None:
+            self._cache_policies.pop(agent_name, None)
+        else:
+            self._cache_policies[agent_name] = policy
+
+    def _get_cache_policy(self, agent_name: Optional[str]) -> Optional[CachePolicy]:
+        """获取 Agent 的缓存策略（未单独配置时使用默认策略）"""
+        if agent_name in self._cache_policies:
+            return self._cache_policies[agent_name]
+        return self._cache_policies.get(None)
+
+    def set_semantic_policy(
+        self,
+        policy: Optional[SemanticCachePolicy],
+        agent_name: Optional[str] = None,
+    ) -> None:
+        """
+        设置语义缓存策略
+
+        Args:
+            policy: 语义缓存策略（None 表示关闭）
+            agent_name: Agent 名称（None 表示默认策略）
+
+        Raises:
+            ValueError: 路由器未配置 semantic_cache
+        """
+        if policy is None:
+            self._semantic_policies.pop(agent_name, None)
+            return
+        if self._semantic_cache is None:
+            raise ValueError("Semantic caching requires a semantic_cache")
+        self._semantic_policies[agent_name] = policy
+
+    def _get_semantic_policy(self, agent_name: Optional[str]) -> Optional[SemanticCachePolicy]:
+        """获取 Agent 的语义缓存策略（未单独配置时使用默认策略）"""
+        if agent_name in self._semantic_policies:
+            return self._semantic_policies[agent_name]
+        return self._semantic_policies.get(None)
+
+    def set_context_policy(
+        self,
+        policy: Optional[ContextPolicy],
+        agent_name: Optional[str] = None,
+    ) -> None:
+        """
+        设置上下文窗口策略
+
+        Args:
+            policy: 上下文窗口策略（None 表示关闭，放不下的模型直接跳过）
+            agent_name: Agent 名称（None 表示默认策略）
+        """
+        if policy is None:
+            self._context_policies.pop(agent_name, None)
+        else:
+            self._context_policies[agent_name] = policy
+
+    def _get_context_policy(self, agent_name: Optional[str]) -> Optional[ContextPolicy]:
+        """获取 Agent 的上下文窗口策略（未单独配置时使用默认策略）"""
+        if agent_name in self._context_policies:
+            return self._context_policies[agent_name]
+        return self._context_policies.get(None)
+
+    def get_cache_stats(self) -> dict:
+        """响应缓存统计（配置了语义缓存时包含 semantic）"""
+        stats = self._response_cache.stats()
+        if self._semantic_cache is not None:
+            stats["semantic"] = self._semantic_cache.stats()
+        return stats
+
+    def get_hedge_stats(self) -> dict:
+        """获取对冲统计（按策略：对冲次数、对冲胜出次数、额外花费）与各模型延迟分位数"""
+        return {
+            "by_agent": self._hedge_stats.to_dict(),
+            "latency": self._latency_tracker.snapshot(),
+        }
+
     @property
     def providers(self) -> dict[ProviderType, LLMProviderProtocol]:
         """获取所有已注册的 Provider"""
@@ -340,6 +1387,31 @@ class ModelRouterV2:
         """获取使用量追踪器"""
         return self._usage_tracker
 
+    @property
+    def response_cache(self) -> ResponseCache:
+        """响应缓存"""
+        return self._response_cache
+
+    @property
+    def semantic_cache(self) -> Optional[SemanticCache]:
+        """语义缓存（未配置时为 None）"""
+        return self._semantic_cache
+
+    @property
+    def tokenizer(self) -> TokenizerService:
+        """Token 计数服务"""
+        return self._tokenizer
+
+    @property
+    def model_stats(self) -> ModelStatsTracker:
+        """获取模型实时统计"""
+        return self._model_stats
+
+    @property
+    def latency_tracker(self) -> LatencyTracker:
+        """获取模型延迟追踪器"""
+        return self._latency_tracker
+
     def __repr__(self) -> str:
         provider_names = [p.name for p in self._providers.values()]
         return f"<ModelRouterV2 providers={provider_names}>"
@@ -400,10 +1472,101 @@ def create_default_router() -> ModelRouterV2:
     import os
     from .providers import ClaudeProvider, OpenAIProvider, OllamaProvider
 
+    # 模型实时统计持久化（重启后保留）
+    stats_path = os.getenv(
+        "LLM_STATS_PATH", str(Path.home() / ".maccortex" / "llm_stats.json")
+    )
+    # 语义缓存（可选）：LLM_SEMANTIC_CACHE_AGENTS=planner:0.92,researcher（未写阈值时使用
+    # LLM_SEMANTIC_CACHE_THRESHOLD，默认 0.9）；嵌入函数按 retrieval 的嵌入配置创建。
+    # 哈希向量化只衡量词面重合（"升序" / "降序" 排序请求相似度高于同义改写），
+    # 会返回错误答案，因此只有语义嵌入模型可用时才启用
+    semantic_agents = [
+        a.strip() for a in os.getenv("LLM_SEMANTIC_CACHE_AGENTS", "").split(",") if a.strip()
+    ]
+    semantic_cache = None
+    if semantic_agents:
+        try:
+            from retrieval.embeddings import HashingEmbedding, get_embedding_function
+
+            embedder = get_embedding_function()
+            if isinstance(embedder, HashingEmbedding):
+                logger.warning(
+                    "Semantic cache disabled: no semantic embedding model available "
+                    f"({embedder.name} only measures word overlap)"
+                )
+            else:
+                semantic_cache = SemanticCache(embedder)
+        except Exception as e:
+            logger.warning(f"Semantic cache disabled: {e}")
+    # 响应缓存（可选）：LLM_CACHE_AGENTS=planner,reviewer（"*" 表示全部 Agent）；
+    # 条目持久化到 LLM_CACHE_PATH（SQLite，重启后仍可命中；设为空字符串则仅内存）
+    cache_agents = [a.strip() for a in os.getenv("LLM_CACHE_AGENTS", "").split(",") if a.strip()]
+    cache_path = os.getenv(
+        "LLM_CACHE_PATH", str(Path.home() / ".maccortex" / "cache" / "llm_responses.sqlite3")
+    )
+    response_cache = None
+    if cache_agents and cache_path:
+        response_cache = ResponseCache(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+            store=CacheStore(Path(cache_path).expanduser()),
+        )
+
     router = ModelRouterV2(
-        fallback_chain=["claude-sonnet-4", "gpt-4o", "ollama/qwen3:14b"]
+        fallback_chain=["claude-sonnet-4", "gpt-4o", "ollama/qwen3:14b"],
+        model_stats=ModelStatsTracker(persist_path=Path(stats_path)),
+        response_cache=response_cache,
+        semantic_cache=semantic_cache,
+        tokenizer=get_tokenizer(),
     )
 
+    # 请求对冲（可选）：LLM_HEDGE_AGENTS=planner,researcher（"*" 表示全部 Agent）
+    hedge_agents = [a.strip() for a in os.getenv("LLM_HEDGE_AGENTS", "").split(",") if a.strip()]
+    if hedge_agents:
+        budget = os.getenv("LLM_HEDGE_BUDGET_USD")
+        policy = HedgePolicy(budget_usd=float(budget) if budget else None)
+        for agent_name in hedge_agents:
+            router.set_hedge_policy(policy, None if agent_name == "*" else agent_name)
+        logger.info(f"Request hedging enabled for: {', '.join(hedge_agents)}")
+
+    # 响应缓存策略
+    if cache_agents:
+        max_temperature = os.getenv("LLM_CACHE_MAX_TEMPERATURE")
+        policy = CachePolicy(
+            max_temperature=float(max_temperature) if max_temperature else CachePolicy.max_temperature
+        )
+        for agent_name in cache_agents:
+            router.set_cache_policy(policy, None if agent_name == "*" else agent_name)
+        logger.info(f"Response cache enabled for: {', '.join(cache_agents)}")
+
+    # 语义缓存策略（每个 Agent 可单独指定阈值）
+    if semantic_cache is not None:
+        default_threshold = float(
+            os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", str(SemanticCachePolicy.threshold))
+        )
+        for entry in semantic_agents:
+            agent_name, _, threshold = entry.partition(":")
+            router.set_semantic_policy(
+                SemanticCachePolicy(threshold=float(threshold) if threshold else default_threshold),
+                None if agent_name == "*" else agent_name,
+            )
+        logger.info(f"Semantic cache enabled for: {', '.join(semantic_agents)}")
+
+    # 上下文窗口管理（可选）：LLM_CONTEXT_AGENTS=coder,researcher（"*" 表示全部 Agent）；
+    # 设置 LLM_CONTEXT_SUMMARY_MODEL 时先用该模型摘要较早的轮次，再丢弃最早的轮次
+    context_agents = [a.strip() for a in os.getenv("LLM_CONTEXT_AGENTS", "").split(",") if a.strip()]
+    if context_agents:
+        summary_model = os.getenv("LLM_CONTEXT_SUMMARY_MODEL")
+        strategies = (ContextStrategy.TRUNCATE,)
+        if summary_model:
+            strategies += (ContextStrategy.SUMMARIZE,)
+        policy = ContextPolicy(
+            strategies=strategies + (ContextStrategy.DROP_OLDEST,),
+            summary_model_id=summary_model or None,
+        )
+        for agent_name in context_agents:
+            router.set_context_policy(policy, None if agent_name == "*" else agent_name)
+        logger.info(f"Context window management enabled for: {', '.join(context_agents)}")
+
     # 注册 Claude Provider
     anthropic_key = os.getenv("ANTHROPIC_API_KEY")
     if anthropic_key:
@@ -0,0 +1,273 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Semantic Cache
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""
+语义（嵌入相似度）响应缓存
+
+同一任务的不同说法（"create hello world in python" / "write a python hello world"）
+精确匹配无法命中。语义缓存对最后一条用户消息做嵌入，在本地向量索引中查找
+相似度超过阈值的最近邻并返回（或经 adapt 钩子改写）其响应。
+
+- 只在同一分区内查找：模型 ID、其余消息（系统提示词与历史轮次）、影响输出的
+  ModelConfig 字段都相同的请求才可能互相命中
+- SemanticCachePolicy: 按 Agent 配置阈值、TTL、温度上限与 verify / adapt 钩子
+- SemanticCache: 向量索引（每个分区一个 L2 归一化矩阵，点积即余弦相似度）
+
+嵌入函数与 retrieval.embeddings.EmbeddingFunction 接口一致（embed(texts) → float32 矩阵）。
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from threading import Lock
+from typing import Any, Awaitable, Callable, Optional, Union
+
+import numpy as np
+
+from .models import LLMResponse, ModelConfig
+from .response_cache import CACHE_KEY_CONFIG_FIELDS
+
+
+@dataclass(frozen=True)
+class SemanticMatch:
+    """
+    语义缓存命中
+
+    Attributes:
+        prompt: 缓存条目的用户消息
+        response: 缓存的原始响应
+        similarity: 余弦相似度
+    """
+    prompt: str
+    response: LLMResponse
+    similarity: float
+
+
+VerifyHook = Callable[[str, SemanticMatch], Union[bool, Awaitable[bool]]]
+AdaptHook = Callable[[str, SemanticMatch], Union[str, Awaitable[str]]]
+
+
+@dataclass(frozen=True)
+class SemanticCachePolicy:
+    """
+    语义缓存策略
+
+    Attributes:
+        threshold: 最低余弦相似度（取决于嵌入模型）
+        ttl_seconds: 缓存条目有效期（秒）
+        max_temperature: 温度高于该值的请求不参与语义缓存
+        verify: 命中后的校验钩子 (query, match) → bool，返回 False 时按未命中处理
+        adapt: 命中后的改写钩子 (query, match) → 新的响应内容（如替换文件名、语言）
+    """
+    threshold: float = 0.9
+    ttl_seconds: float = 86400.0
+    max_temperature: float = 0.3
+    verify: Optional[VerifyHook] = field(default=None, compare=False)
+    adapt: Optional[AdaptHook] = field(default=None, compare=False)
+
+    def __post_init__(self):
+        """验证策略"""
+        if not 0.0 < self.threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        if self.ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+
+    def allows(self, config: ModelConfig) -> bool:
+        """该配置的请求是否参与语义缓存"""
+        return config.temperature <= self.max_temperature
+
+
+async def _resolve(value: Any) -> Any:
+    return await value if inspect.isawaitable(value) else value
+
+
+def split_query(
+    model_id: str,
+    messages: list[dict],
+    config: ModelConfig,
+) -> Optional[tuple[str, str]]:
+    """
+    拆分请求为 (分区键, 用户消息)
+
+    Returns:
+        Optional[tuple[str, str]]: 最后一条消息不是文本用户消息时为 None（不参与语义缓存）
+    """
+    if not messages:
+        return None
+    last = messages[-1]
+    query = last.get("content")
+    if last.get("role") != "user" or not isinstance(query, str) or not query.strip():
+        return None
+    context = {
+        "model": model_id,
+        "messages": [
+            {key: value for key, value in message.items() if value is not None}
+            for message in messages[:-1]
+        ],
+        "config": {name: getattr(config, name) for name in CACHE_KEY_CONFIG_FIELDS},
+    }
+    payload = json.dumps(context, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest(), query
+
+
+class _Partition:
+    """单个分区的向量索引（按插入顺序，超出容量时淘汰最早的条目）"""
+
+    def __init__(self, dimension: int):
+        self.vectors = np.zeros((0, dimension), dtype=np.float32)
+        self.prompts: list[str] = []
+        self.responses: list[LLMResponse] = []
+        self.created: list[float] = []
+
+    def add(self, prompt: str, vector: np.ndarray, response: LLMResponse, now: float, limit: int) -> None:
+        self.vectors = np.vstack([self.vectors, vector[np.newaxis, :]])[-limit:]
+        self.prompts = (self.prompts + [prompt])[-limit:]
+        self.responses = (self.responses + [response])[-limit:]
+        self.created = (self.created + [now])[-limit:]
+
+    def __len__(self) -> int:
+        return len(self.prompts)
+
+
+class SemanticCache:
+    """
+    语义响应缓存（线程安全，仅内存）
+
+    Example:
+        >>> from retrieval.embeddings import get_embedding_function
+        >>> cache = SemanticCache(get_embedding_function())
+        >>> router = ModelRouterV2(semantic_cache=cache)
+        >>> router.set_semantic_policy(SemanticCachePolicy(threshold=0.92), agent_name="planner")
+    """
+
+    def __init__(
+        self,
+        embedder: Any,
+        max_entries_per_partition: int = 500,
+        max_partitions: int = 64,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化缓存
+
+        Args:
+            embedder: 嵌入函数（提供 embed(texts) → (n, dim) 的 L2 归一化矩阵）
+            max_entries_per_partition: 每个分区的最大条目数
+            max_partitions: 最大分区数（超出时淘汰最久未使用的分区）
+            clock: 时间函数（测试用）
+        """
+        self._embedder = embedder
+        self._max_entries = max_entries_per_partition
+        self._max_partitions = max_partitions
+        self._clock = clock
+        self._partitions: OrderedDict[str, _Partition] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._rejected = 0
+        self._saved_cost = Decimal("0")
+
+    async def embed(self, text: str) -> np.ndarray:
+        """嵌入查询文本（在线程中执行，嵌入服务调用不阻塞事件循环）"""
+        matrix = await asyncio.to_thread(self._embedder.embed, [text])
+        vector = np.asarray(matrix[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(
+        self,
+        partition_key: str,
+        vector: np.ndarray,
+        threshold: float,
+        ttl_seconds: float,
+    ) -> Optional[SemanticMatch]:
+        """
+        查找相似度最高且不低于阈值的未过期条目
+
+        Returns:
+            Optional[SemanticMatch]: 未命中时为 None（计为一次未命中）
+        """
+        with self._lock:
+            partition = self._partitions.get(partition_key)
+            match = None
+            if partition is not None and len(partition):
+                self._partitions.move_to_end(partition_key)
+                scores = partition.vectors @ vector
+                expired = np.asarray(partition.created) < self._clock() - ttl_seconds
+                scores[expired] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= threshold:
+                    match = SemanticMatch(
+                        prompt=partition.prompts[best],
+                        response=partition.responses[best],
+                        similarity=float(scores[best]),
+                    )
+            if match is None:
+                self._misses += 1
+            return match
+
+    async def verify(self, query: str, match: SemanticMatch, policy: SemanticCachePolicy) -> Optional[str]:
+        """
+        按策略校验并改写命中的响应
+
+        Returns:
+            Optional[str]: 返回给调用方的内容；校验未通过时为 None（计为拒绝 + 未命中）
+        """
+        if policy.verify is not None and not await _resolve(policy.verify(query, match)):
+            with self._lock:
+                self._rejected += 1
+                self._misses += 1
+            return None
+        content = match.response.content
+        if policy.adapt is not None:
+            content = await _resolve(policy.adapt(query, match))
+        with self._lock:
+            self._hits += 1
+            self._saved_cost += match.response.cost.total_cost
+        return content
+
+    def add(self, partition_key: str, prompt: str, vector: np.ndarray, response: LLMResponse) -> None:
+        """写入条目（命中副本不写入）"""
+        if response.cache_hit:
+            return
+        with self._lock:
+            partition = self._partitions.get(partition_key)
+            if partition is None:
+                partition = self._partitions[partition_key] = _Partition(vector.shape[0])
+            self._partitions.move_to_end(partition_key)
+            partition.add(prompt, vector, response, self._clock(), self._max_entries)
+            while len(self._partitions) > self._max_partitions:
+                self._partitions.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._partitions.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(partition) for partition in self._partitions.values())
+
+    def stats(self) -> dict:
+        """缓存统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": sum(len(partition) for partition in self._partitions.values()),
+                "partitions": len(self._partitions),
+                "hits": self._hits,
+                "misses": self._misses,
+                "rejected": self._rejected,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "saved_cost": str(self._saved_cost),
+            }
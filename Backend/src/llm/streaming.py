@@ -0,0 +1,162 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Stream Handle
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""
+流式调用句柄
+
+每次流式调用一个 StreamHandle：迭代得到响应片段，结束后在句柄上读取本次调用自己的
+Token 使用量、成本、总延迟、首 Token 延迟（TTFT）与结束原因。
+Provider 通过 stream(..., handle=handle) 把使用量与结束原因写入句柄，
+不再依赖 Provider 实例上共享的 _last_usage（并发流式调用会互相覆盖）。
+
+Example:
+    >>> async with router.stream("claude-sonnet-4", messages) as handle:
+    ...     async for chunk in handle:
+    ...         print(chunk, end="")
+    >>> handle.usage, handle.ttft_ms, handle.finish_reason
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Optional
+
+from .models import CostInfo, ProviderType, TokenUsage
+
+
+class StreamHandle:
+    """
+    单次流式调用的句柄
+
+    Attributes:
+        model_id: 模型 ID
+        provider: Provider 类型
+        usage: Token 使用量（Provider 在流结束时上报）
+        cost: 成本（由 Router 根据 usage 计算）
+        finish_reason: 结束原因（stop / length / cancelled / error 等）
+        ttft_ms: 首 Token 延迟（毫秒）
+        latency_ms: 总延迟（毫秒）
+        chunk_count: 已产出的片段数
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        provider: ProviderType,
+        on_complete: Optional[Callable[["StreamHandle"], None]] = None,
+    ):
+        self.model_id = model_id
+        self.provider = provider
+        self.usage: Optional[TokenUsage] = None
+        self.cost: Optional[CostInfo] = None
+        self.finish_reason: Optional[str] = None
+        self.ttft_ms: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.chunk_count = 0
+        self.error: Optional[BaseException] = None
+        self._on_complete = on_complete
+        self._source: Optional[AsyncIterator[str]] = None
+        self._started_at: Optional[float] = None
+        self._done = False
+
+    # ------------------------------------------------------------------
+    # Provider 上报
+    # ------------------------------------------------------------------
+
+    def report_usage(self, usage: TokenUsage) -> None:
+        """上报本次调用的 Token 使用量"""
+        self.usage = usage
+
+    def report_finish_reason(self, reason: Optional[str]) -> None:
+        """上报结束原因（None 时忽略）"""
+        if reason:
+            self.finish_reason = str(reason)
+
+    # ------------------------------------------------------------------
+    # 迭代
+    # ------------------------------------------------------------------
+
+    def attach(self, source: AsyncIterator[str]) -> None:
+        """绑定片段来源（由 Router 调用）"""
+        self._source = source
+
+    @property
+    def done(self) -> bool:
+        """流是否已结束（完成、出错或被关闭）"""
+        return self._done
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[str]:
+        if self._source is None:
+            raise RuntimeError("StreamHandle has no source")
+        if self._started_at is not None:
+            raise RuntimeError("StreamHandle can only be iterated once")
+        self._started_at = time.perf_counter()
+        try:
+            async for chunk in self._source:
+                if chunk and self.ttft_ms is None:
+                    self.ttft_ms = (time.perf_counter() - self._started_at) * 1000
+                self.chunk_count += 1
+                yield chunk
+        except (GeneratorExit, asyncio.CancelledError):
+            self._finish("cancelled")
+            raise
+        except Exception as e:
+            self.error = e
+            self._finish("error")
+            raise
+        self._finish("stop")
+
+    def _finish(self, reason: str) -> None:
+        """结束流：cancelled / error 覆盖 Provider 上报的结束原因，正常结束时保留上报值"""
+        if self._done:
+            return
+        self._done = True
+        if reason in ("cancelled", "error") or self.finish_reason is None:
+            self.finish_reason = reason
+        self.latency_ms = (time.perf_counter() - (self._started_at or time.perf_counter())) * 1000
+        if self._on_complete is not None:
+            self._on_complete(self)
+
+    async def aclose(self) -> None:
+        """提前结束流（关闭底层连接）"""
+        if self._source is not None and hasattr(self._source, "aclose"):
+            await self._source.aclose()
+        if not self._done and self._started_at is not None:
+            self._finish("cancelled")
+
+    async def __aenter__(self) -> "StreamHandle":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    def to_dict(self) -> dict:
+        """转换为字典（用于 API 响应）"""
+        return {
+            "model_id": self.model_id,
+            "provider": self.provider.value,
+            "usage": None if self.usage is None else {
+                "input_tokens": self.usage.input_tokens,
+                "output_tokens": self.usage.output_tokens,
+                "total_tokens": self.usage.total_tokens,
+            },
+            "cost": None if self.cost is None else str(self.cost.total_cost),
+            "finish_reason": self.finish_reason,
+            "ttft_ms": self.ttft_ms,
+            "latency_ms": self.latency_ms,
+            "chunk_count": self.chunk_count,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"<StreamHandle model={self.model_id} done={self._done} "
+            f"finish_reason={self.finish_reason}>"
+        )
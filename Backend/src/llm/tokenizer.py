@@ -0,0 +1,391 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Token Counting Service
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""
+Token 计数与调用前预估
+
+- TiktokenCounter: OpenAI 模型的精确分词（可选依赖 tiktoken，未安装时回退到估算）
+- HeuristicCounter: 按文字类别（拉丁单词、数字、CJK、其他文字、符号）与模型家族校准的估算
+- TokenizerService: 按模型选择计数器、缓存计数结果、用实际使用量在线校准估算比例，
+  提供消息计数、输出预算与调用前预估（成本、上下文窗口）
+"""
+
+import hashlib
+import logging
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from .models import CostInfo
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCounter(ABC):
+    """Token 计数器"""
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """计数器标识（参与缓存键）"""
+
+    @property
+    def exact(self) -> bool:
+        """是否为精确分词"""
+        return False
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """文本的 Token 数"""
+
+
+@dataclass(frozen=True)
+class TokenProfile:
+    """
+    估算参数（按模型家族的分词器特点校准）
+
+    Attributes:
+        name: 配置名
+        latin_chars_per_token: 拉丁字母单词每 Token 字符数
+        digits_per_token: 数字串每 Token 位数
+        other_chars_per_token: 其他文字（西里尔、阿拉伯等）每 Token 字符数
+        cjk_tokens_per_char: CJK（汉字、假名、谚文）每字 Token 数
+        symbol_tokens: 每个标点 / 符号的 Token 数
+    """
+    name: str
+    latin_chars_per_token: float = 4.0
+    digits_per_token: float = 3.0
+    other_chars_per_token: float = 2.5
+    cjk_tokens_per_char: float = 1.0
+    symbol_tokens: float = 1.0
+
+
+# 模型家族 → 估算参数（词表越大，中文与长单词越省 Token）
+PROFILES = {
+    "default": TokenProfile("default"),
+    "claude": TokenProfile("claude", latin_chars_per_token=3.5, cjk_tokens_per_char=1.1),
+    "o200k": TokenProfile("o200k", latin_chars_per_token=4.2, cjk_tokens_per_char=0.8),
+    "cl100k": TokenProfile("cl100k", latin_chars_per_token=4.0, cjk_tokens_per_char=1.3),
+    "qwen": TokenProfile("qwen", latin_chars_per_token=4.0, cjk_tokens_per_char=0.7),
+    "deepseek": TokenProfile("deepseek", latin_chars_per_token=4.0, cjk_tokens_per_char=0.7),
+    "gemini": TokenProfile("gemini", latin_chars_per_token=4.0, cjk_tokens_per_char=0.9),
+}
+
+_SEGMENT_PATTERN = re.compile(
+    r"(?P<cjk>[぀-ヿ㐀-䶿一-鿿가-힯])"
+    r"|(?P<latin>[A-Za-z]+)"
+    r"|(?P<digits>\d+)"
+    r"|(?P<word>\w+)"
+    r"|(?P<symbol>[^\w\s])"
+)
+
+
+class HeuristicCounter(TokenCounter):
+    """按文字类别估算 Token 数（不依赖分词器）"""
+
+    def __init__(self, profile: TokenProfile = PROFILES["default"]):
+        self.profile = profile
+
+    @property
+    def name(self) -> str:
+        return f"heuristic:{self.profile.name}"
+
+    def count(self, text: str) -> int:
+        profile = self.profile
+        tokens = 0.0
+        for match in _SEGMENT_PATTERN.finditer(text):
+            kind = match.lastgroup
+            length = match.end() - match.start()
+            if kind == "cjk":
+                tokens += profile.cjk_tokens_per_char
+            elif kind == "latin":
+                tokens += math.ceil(length / profile.latin_chars_per_token)
+            elif kind == "digits":
+                tokens += math.ceil(length / profile.digits_per_token)
+            elif kind == "word":
+                tokens += math.ceil(length / profile.other_chars_per_token)
+            else:
+                tokens += profile.symbol_tokens
+        return math.ceil(tokens)
+
+
+class TiktokenCounter(TokenCounter):
+    """tiktoken 精确分词"""
+
+    def __init__(self, encoding_name: str):
+        import tiktoken
+
+        self._encoding = tiktoken.get_encoding(encoding_name)
+        self._encoding_name = encoding_name
+
+    @property
+    def name(self) -> str:
+        return f"tiktoken:{self._encoding_name}"
+
+    @property
+    def exact(self) -> bool:
+        return True
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+def model_family(model_id: str) -> str:
+    """模型 ID → 分词器家族（PROFILES 的键）"""
+    model = model_id.lower()
+    if "claude" in model:
+        return "claude"
+    if model.startswith(("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")):
+        return "o200k"
+    if model.startswith(("gpt-4", "gpt-3.5")):
+        return "cl100k"
+    if "qwen" in model:
+        return "qwen"
+    if "deepseek" in model:
+        return "deepseek"
+    if "gemini" in model:
+        return "gemini"
+    return "default"
+
+
+# 每条消息的格式开销（角色标记、分隔符）与回复引导 Token
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 3
+
+
+@dataclass(frozen=True)
+class PreflightEstimate:
+    """
+    调用前预估
+
+    Attributes:
+        model_id: 模型 ID
+        input_tokens: 输入 Token 数
+        max_output_tokens: 输出 Token 上限（取配置与模型上限的较小值）
+        context_window: 模型上下文窗口
+        exact: 输入 Token 数是否来自精确分词
+        cost: 按 input_tokens + max_output_tokens 计算的最高成本
+    """
+    model_id: str
+    input_tokens: int
+    max_output_tokens: int
+    context_window: int
+    exact: bool
+    cost: CostInfo
+
+    @property
+    def fits(self) -> bool:
+        """输入与输出上限是否都在上下文窗口内"""
+        return self.input_tokens + self.max_output_tokens <= self.context_window
+
+    @property
+    def available_output_tokens(self) -> int:
+        """上下文窗口中留给输出的 Token 数"""
+        return max(0, min(self.max_output_tokens, self.context_window - self.input_tokens))
+
+    def to_dict(self) -> dict:
+        return {
+            "model_id": self.model_id,
+            "input_tokens": self.input_tokens,
+            "max_output_tokens": self.max_output_tokens,
+            "context_window": self.context_window,
+            "exact": self.exact,
+            "fits": self.fits,
+            "max_cost": str(self.cost.total_cost),
+        }
+
+
+class TokenizerService:
+    """
+    Token 计数服务（线程安全）
+
+    Example:
+        >>> tokenizer = get_tokenizer()
+        >>> tokenizer.count_messages(messages, "claude-sonnet-4")
+        >>> tokenizer.output_budget(text, "ollama/aya:8b", ratio=1.5, maximum=2048)
+    """
+
+    def __init__(self, cache_size: int = 4096, alpha: float = 0.2):
+        """
+        初始化服务
+
+        Args:
+            cache_size: 缓存的计数结果数（按计数器与文本哈希）
+            alpha: 校准比例的 EWMA 平滑系数
+        """
+        self._cache_size = cache_size
+        self._alpha = alpha
+        self._cache: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self._counters: dict[str, TokenCounter] = {}
+        self._ratios: dict[str, float] = {}
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    # ------------------------------------------------------------------
+    # 计数
+    # ------------------------------------------------------------------
+
+    def counter_for(self, model_id: Optional[str]) -> TokenCounter:
+        """选择模型的计数器（OpenAI 模型在安装 tiktoken 时使用精确分词）"""
+        family = model_family(model_id) if model_id else "default"
+        with self._lock:
+            counter = self._counters.get(family)
+        if counter is not None:
+            return counter
+        counter = HeuristicCounter(PROFILES[family])
+        if family in ("o200k", "cl100k"):
+            try:
+                counter = TiktokenCounter(f"{family}_base")
+            except Exception as e:  # 未安装或编码表不可用
+                logger.debug(f"tiktoken unavailable for {family}, using estimates: {e}")
+        with self._lock:
+            return self._counters.setdefault(family, counter)
+
+    def _raw_count(self, text: str, counter: TokenCounter) -> int:
+        """未校准的计数（带缓存）"""
+        if not text:
+            return 0
+        key = (counter.name, hashlib.sha1(text.encode("utf-8")).hexdigest())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return cached
+            self._misses += 1
+        tokens = counter.count(text)
+        with self._lock:
+            self._cache[key] = tokens
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def _calibrate(self, tokens: int, model_id: Optional[str], counter: TokenCounter) -> int:
+        if counter.exact or model_id is None:
+            return tokens
+        with self._lock:
+            ratio = self._ratios.get(model_id, 1.0)
+        return math.ceil(tokens * ratio)
+
+    def count(self, text: str, model_id: Optional[str] = None) -> int:
+        """
+        文本的 Token 数
+
+        Args:
+            text: 文本
+            model_id: 模型 ID（决定分词器；估算值按该模型的实际使用量校准）
+        """
+        counter = self.counter_for(model_id)
+        return self._calibrate(self._raw_count(text, counter), model_id, counter)
+
+    def _raw_count_messages(self, messages: list[dict], counter: TokenCounter) -> int:
+        tokens = REPLY_PRIMING_TOKENS
+        for message in messages:
+            tokens += MESSAGE_OVERHEAD_TOKENS
+            content = message.get("content")
+            if isinstance(content, str):
+                tokens += self._raw_count(content, counter)
+            elif isinstance(content, list):  # 多段内容（仅计文本段）
+                for part in content:
+                    if isinstance(part, dict) and isinstance(part.get("text"), str):
+                        tokens += self._raw_count(part["text"], counter)
+        return tokens
+
+    def count_messages(self, messages: list[dict], model_id: Optional[str] = None) -> int:
+        """消息列表的输入 Token 数（含每条消息的格式开销）"""
+        counter = self.counter_for(model_id)
+        return self._calibrate(self._raw_count_messages(messages, counter), model_id, counter)
+
+    def is_exact(self, model_id: Optional[str]) -> bool:
+        """该模型的计数是否来自精确分词"""
+        return self.counter_for(model_id).exact
+
+    # ------------------------------------------------------------------
+    # 校准
+    # ------------------------------------------------------------------
+
+    def observe(self, model_id: str, messages: list[dict], actual_input_tokens: int) -> None:
+        """
+        用实际输入 Token 数校准该模型的估算比例（精确分词的模型不校准）
+
+        比例为 EWMA(实际 / 估算)，上限 2.0；估算值过小（< 16）时忽略。
+        实际值低于估算的 80% 时也忽略：这通常是服务端复用了前缀缓存、只报告了
+        新计算的 Token，而不是分词器差异，计入会把比例持续压向下限。
+        """
+        counter = self.counter_for(model_id)
+        if counter.exact or actual_input_tokens <= 0:
+            return
+        estimated = self._raw_count_messages(messages, counter)
+        if estimated < 16 or actual_input_tokens < 0.8 * estimated:
+            return
+        sample = min(2.0, actual_input_tokens / estimated)
+        with self._lock:
+            previous = self._ratios.get(model_id)
+            self._ratios[model_id] = (
+                sample if previous is None else self._alpha * sample + (1 - self._alpha) * previous
+            )
+
+    def calibration(self) -> dict[str, float]:
+        """各模型的估算校准比例"""
+        with self._lock:
+            return {model_id: round(ratio, 4) for model_id, ratio in self._ratios.items()}
+
+    # ------------------------------------------------------------------
+    # 预算
+    # ------------------------------------------------------------------
+
+    def output_budget(
+        self,
+        text: str,
+        model_id: Optional[str] = None,
+        ratio: float = 1.0,
+        margin: float = 1.2,
+        minimum: int = 64,
+        maximum: Optional[int] = None,
+    ) -> int:
+        """
+        按输入文本估算输出 Token 上限
+
+        Args:
+            text: 决定输出长度的文本（如待翻译原文、需要改写的代码）
+            model_id: 模型 ID
+            ratio: 输出 / 输入的 Token 比例（如翻译到 CJK 语言时 > 1）
+            margin: 安全余量（避免截断）
+            minimum: 下限
+            maximum: 上限（None 表示不限）
+        """
+        budget = max(minimum, math.ceil(self.count(text, model_id) * ratio * margin))
+        return min(budget, maximum) if maximum is not None else budget
+
+    def stats(self) -> dict:
+        """计数缓存与校准统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "cache_entries": len(self._cache),
+                "cache_hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "counters": {family: counter.name for family, counter in self._counters.items()},
+                "calibration": {model_id: round(ratio, 4) for model_id, ratio in self._ratios.items()},
+            }
+
+
+_tokenizer: Optional[TokenizerService] = None
+
+
+def get_tokenizer() -> TokenizerService:
+    """获取全局 TokenizerService"""
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = TokenizerService()
+    return _tokenizer
@@ -14,6 +14,8 @@ UsageTracker - Token 使用量与成本追踪器
 - 实时 Token 计数
 - 成本累计计算
 - 按会话/Agent/模型分组统计
+- 按模型统计延迟与首 Token 延迟（TTFT）
+- 统计响应缓存命中（零成本调用）
 - 使用量导出与报告
 """
 
@@ -40,6 +42,9 @@ class UsageRecord:
     session_id: Optional[str]
     agent_name: Optional[str]
     timestamp: datetime = field(default_factory=datetime.now)
+    latency_ms: Optional[float] = None
+    ttft_ms: Optional[float] = None
+    cache_hit: bool = False
 
     def to_dict(self) -> dict:
         """转换为字典"""
@@ -59,9 +64,19 @@ class UsageRecord:
             "session_id": self.session_id,
             "agent_name": self.agent_name,
             "timestamp": self.timestamp.isoformat(),
+            "latency_ms": self.latency_ms,
+            "ttft_ms": self.ttft_ms,
+            "cache_hit": self.cache_hit,
         }
 
 
+def _percentile(values: list[float], percentile: float) -> float:
+    """最近秩分位数（values 非空）"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percentile / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
 class UsageTracker:
     """
     使用量追踪器
@@ -94,6 +109,7 @@ class UsageTracker:
         # 累计统计（避免遍历所有记录）
         self._total_usage = TokenUsage.zero()
         self._total_cost = CostInfo.zero()
+        self._cache_hits = 0
 
         # 按维度分组的累计值
         self._by_session: dict[str, dict] = {}
@@ -109,6 +125,9 @@ class UsageTracker:
         cost: CostInfo,
         session_id: Optional[str] = None,
         agent_name: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        ttft_ms: Optional[float] = None,
+        cache_hit: bool = False,
     ) -> None:
         """
         记录使用量
@@ -120,6 +139,9 @@ class UsageTracker:
             cost: 成本信息
             session_id: 会话 ID
             agent_name: Agent 名称
+            latency_ms: 调用总延迟（毫秒）
+            ttft_ms: 首 Token 延迟（毫秒，仅流式调用）
+            cache_hit: 是否为响应缓存命中（零成本）
         """
         record = UsageRecord(
             model_id=model_id,
@@ -128,6 +150,9 @@ class UsageTracker:
             cost=cost,
             session_id=session_id,
             agent_name=agent_name,
+            latency_ms=latency_ms,
+            ttft_ms=ttft_ms,
+            cache_hit=cache_hit,
         )
 
         with self._lock:
@@ -141,23 +166,24 @@ class UsageTracker:
             # 更新累计值
             self._total_usage = self._total_usage + usage
             self._total_cost = self._total_cost + cost
+            self._cache_hits += int(cache_hit)
 
             # 更新分组统计
             self._update_group_stats(
-                self._by_model, model_id, usage, cost
+                self._by_model, model_id, usage, cost, cache_hit
             )
             self._update_group_stats(
-                self._by_provider, provider, usage, cost
+                self._by_provider, provider, usage, cost, cache_hit
             )
 
             if session_id:
                 self._update_group_stats(
-                    self._by_session, session_id, usage, cost
+                    self._by_session, session_id, usage, cost, cache_hit
                 )
 
             if agent_name:
                 self._update_group_stats(
-                    self._by_agent, agent_name, usage, cost
+                    self._by_agent, agent_name, usage, cost, cache_hit
                 )
 
         logger.debug(
@@ -172,6 +198,7 @@ class UsageTracker:
         key,
         usage: TokenUsage,
         cost: CostInfo,
+        cache_hit: bool = False,
     ) -> None:
         """更新分组统计"""
         if key not in group_dict:
@@ -179,12 +206,14 @@ class UsageTracker:
                 "usage": TokenUsage.zero(),
                 "cost": CostInfo.zero(),
                 "count": 0,
+                "cache_hits": 0,
             }
 
         stats = group_dict[key]
         stats["usage"] = stats["usage"] + usage
         stats["cost"] = stats["cost"] + cost
         stats["count"] += 1
+        stats["cache_hits"] += int(cache_hit)
 
     def get_total_usage(self) -> TokenUsage:
         """获取总 Token 使用量"""
@@ -235,6 +264,7 @@ class UsageTracker:
                     "total_cost": str(session_stats["cost"].total_cost),
                     "formatted_cost": session_stats["cost"].formatted_total,
                     "call_count": session_stats["count"],
+                    "cache_hits": session_stats["cache_hits"],
                 }
 
             return {
@@ -244,9 +274,11 @@ class UsageTracker:
                 "total_cost": str(self._total_cost.total_cost),
                 "formatted_cost": self._total_cost.formatted_total,
                 "call_count": len(self._records),
+                "cache_hits": self._cache_hits,
                 "by_model": self._format_group_stats(self._by_model),
                 "by_provider": self._format_group_stats(self._by_provider),
                 "by_agent": self._format_group_stats(self._by_agent),
+                "latency_by_model": self.get_latency_stats(),
             }
 
     def _format_group_stats(self, group_dict: dict) -> dict:
@@ -260,6 +292,7 @@ class UsageTracker:
                 "output_tokens": stats["usage"].output_tokens,
                 "total_cost": str(stats["cost"].total_cost),
                 "call_count": stats["count"],
+                "cache_hits": stats["cache_hits"],
             }
         return result
 
@@ -278,6 +311,37 @@ class UsageTracker:
         with self._lock:
             return self._format_group_stats(self._by_provider)
 
+    def get_latency_stats(self) -> dict[str, dict]:
+        """
+        按模型统计保留记录中的延迟与首 Token 延迟
+
+        Returns:
+            dict[str, dict]: 模型 ID → {latency_samples, avg/p95_latency_ms,
+                ttft_samples, avg/p95_ttft_ms}（无样本时对应值为 None）
+        """
+        with self._lock:
+            latencies: dict[str, list[float]] = {}
+            ttfts: dict[str, list[float]] = {}
+            for record in self._records:
+                if record.latency_ms is not None:
+                    latencies.setdefault(record.model_id, []).append(record.latency_ms)
+                if record.ttft_ms is not None:
+                    ttfts.setdefault(record.model_id, []).append(record.ttft_ms)
+
+        result = {}
+        for model_id in sorted(latencies.keys() | ttfts.keys()):
+            latency = latencies.get(model_id, [])
+            ttft = ttfts.get(model_id, [])
+            result[model_id] = {
+                "latency_samples": len(latency),
+                "avg_latency_ms": round(sum(latency) / len(latency), 3) if latency else None,
+                "p95_latency_ms": round(_percentile(latency, 95), 3) if latency else None,
+                "ttft_samples": len(ttft),
+                "avg_ttft_ms": round(sum(ttft) / len(ttft), 3) if ttft else None,
+                "p95_ttft_ms": round(_percentile(ttft, 95), 3) if ttft else None,
+            }
+        return result
+
     def get_recent_records(
         self,
         limit: int = 100,
@@ -322,6 +386,7 @@ class UsageTracker:
                 self._records.clear()
                 self._total_usage = TokenUsage.zero()
                 self._total_cost = CostInfo.zero()
+                self._cache_hits = 0
                 self._by_session.clear()
                 self._by_model.clear()
                 self._by_agent.clear()
@@ -333,6 +398,7 @@ class UsageTracker:
         """重新计算总计（移除会话后调用）"""
         self._total_usage = TokenUsage.zero()
         self._total_cost = CostInfo.zero()
+        self._cache_hits = 0
         self._by_model.clear()
         self._by_agent.clear()
         self._by_provider.clear()
@@ -341,19 +407,20 @@ class UsageTracker:
         for record in self._records:
             self._total_usage = self._total_usage + record.usage
             self._total_cost = self._total_cost + record.cost
+            self._cache_hits += int(record.cache_hit)
             self._update_group_stats(
-                self._by_model, record.model_id, record.usage, record.cost
+                self._by_model, record.model_id, record.usage, record.cost, record.cache_hit
             )
             self._update_group_stats(
-                self._by_provider, record.provider, record.usage, record.cost
+                self._by_provider, record.provider, record.usage, record.cost, record.cache_hit
             )
             if record.agent_name:
                 self._update_group_stats(
-                    self._by_agent, record.agent_name, record.usage, record.cost
+                    self._by_agent, record.agent_name, record.usage, record.cost, record.cache_hit
                 )
             if record.session_id:
                 self._update_group_stats(
-                    self._by_session, record.session_id, record.usage, record.cost
+                    self._by_session, record.session_id, record.usage, record.cost, record.cache_hit
                 )
 
     def export_to_json(self) -> dict:
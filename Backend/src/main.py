@@ -24,6 +24,7 @@ __status__ = "Production"
 _PROJECT_ID = "MacCortex-YG-2026-0121-PROD"
 _OWNER_HASH = "8f3b5c7a9e1d2f4b6a8c0e3f5d7b9a1c3e5f7d9b"  # Hidden identifier
 
+import multiprocessing
 import os
 import sys
 import unicodedata
@@ -74,7 +75,12 @@ async def lifespan(app: FastAPI):
     await registry.initialize()
     app.state.registry = registry
 
-    logger.info(f"✅ 已加载 {len(registry.list_patterns())} 个 Pattern")
+    logger.info(f"✅ 可用 {len(registry.list_patterns())} 个 Pattern")
+
+    # LLM Provider 后台健康探测（熔断中的 Provider 恢复后提前放行试探调用）
+    if settings.llm_health_probe_interval > 0:
+        from api.llm_routes import get_router
+        get_router().start_health_probes(settings.llm_health_probe_interval)
     logger.info(f"🌐 服务地址: http://{settings.host}:{settings.port}")
 
     yield
@@ -83,6 +89,16 @@ async def lifespan(app: FastAPI):
     logger.info("👋 MacCortex Backend 关闭中...")
     await registry.cleanup()
 
+    from api.llm_routes import close_router
+    await close_router()
+
+    from retrieval import close_vector_store
+    close_vector_store()
+
+    from websearch import close_page_fetcher, close_search_service
+    close_search_service()
+    await close_page_fetcher()
+
 
 # 创建 FastAPI 应用
 app = FastAPI(
@@ -292,6 +308,18 @@ app.include_router(swarm_router)
 from api.llm_routes import router as llm_router
 app.include_router(llm_router)
 
+# Phase 5: 集成文档导入 API (增量构建语义索引)
+from api.ingest_routes import router as ingest_router
+app.include_router(ingest_router)
+
+# Phase 5: 集成嵌入 API (批量合并 + 内容哈希缓存)
+from api.embed_routes import router as embed_router
+app.include_router(embed_router)
+
+# Phase 5: 集成流水线 API (服务端串联多个 Pattern)
+from api.pipeline_routes import router as pipeline_router
+app.include_router(pipeline_router)
+
 # 启动时间（用于计算 uptime）
 startup_time = datetime.now()
 
@@ -515,8 +543,8 @@ async def execute_pattern_stream(request: PatternRequest):
     Phase 3 Week 3 Day 1 新增功能
     支持实时流式输出，客户端可逐字接收翻译结果（类似 ChatGPT 打字效果）
 
-    当前仅支持 translate pattern + aya 模式
-    其他 pattern 或模式将回退到模拟流式（分块发送）
+    当前支持 translate pattern（aya 模式真流式，其他模式回退到模拟流式）
+    以及 format pattern（CSV ↔ JSON 边转换边发送，其他组合分块发送）
 
     SSE 事件格式：
     - event: start -> 开始翻译
@@ -543,25 +571,25 @@ async def execute_pattern_stream(request: PatternRequest):
     try:
         logger.info(f"📥 收到流式请求: pattern={request.pattern_id}, request_id={request.request_id}")
 
-        # 验证：仅支持 translate pattern
-        if request.pattern_id != "translate":
+        # 验证：仅支持 translate / format pattern
+        if request.pattern_id not in ("translate", "format"):
             from fastapi.responses import JSONResponse
             return JSONResponse(
                 status_code=400,
-                content={"error": "流式输出仅支持 translate pattern"}
+                content={"error": "流式输出仅支持 translate / format pattern"}
             )
 
         registry: PatternRegistry = app.state.registry
-        pattern = registry.get_pattern(request.pattern_id)
-
-        if not pattern:
+        try:
+            pattern = await registry.load(request.pattern_id)  # Phase 5: 首次调用时加载
+        except ValueError:
             from fastapi.responses import JSONResponse
             return JSONResponse(
                 status_code=404,
                 content={"error": f"Pattern not found: {request.pattern_id}"}
             )
 
-        # 调用流式执行方法（translate.py 的 execute_stream）
+        # 调用流式执行方法（translate.py / format.py 的 execute_stream）
         return await pattern.execute_stream(request.text, request.parameters)
 
     except Exception as e:
@@ -813,4 +841,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # PyInstaller 打包后，正文提取进程池的子进程会重新执行入口，需由 freeze_support 接管
+    multiprocessing.freeze_support()
     main()
@@ -10,26 +10,19 @@ MacCortex Token Cache - LLM 响应缓存
 
 缓存策略：
 - 基于 (system_prompt_hash + user_prompt_hash) 的键值缓存
-- LRU 淘汰策略（最多保留 100 条）
-- 可选的持久化（JSON 文件）
+- LRU 淘汰策略（默认最多保留 100 条）
+- 可选的持久化（llm.cache_store.CacheStore，SQLite WAL，与路由器的 ResponseCache 共用）：
+  每次写入只提交一行，进程崩溃不会损坏已提交的数据；启动时不加载全部条目，未命中内存时按键读取；定期清理过期条目并回收空间
 """
 
 import hashlib
-import json
+import threading
 import time
 from pathlib import Path
 from typing import Optional, Dict, Any
 from collections import OrderedDict
-from dataclasses import dataclass, asdict
 
-
-@dataclass
-class CacheEntry:
-    """缓存条目"""
-    response: str
-    timestamp: float
-    hit_count: int
-    model_name: str
+from llm.cache_store import CacheEntry, CacheStore
 
 
 class LLMCache:
@@ -39,7 +32,10 @@ class LLMCache:
         self,
         max_size: int = 100,
         ttl_seconds: int = 3600 * 24 * 7,  # 默认7天过期
-        cache_file: Optional[Path] = None
+        cache_file: Optional[Path] = None,
+        memory_size: int = 256,
+        compact_every: int = 1000,
+        legacy_json_file: Optional[Path] = None,
     ):
         """
         初始化缓存
@@ -47,22 +43,29 @@ class LLMCache:
         Args:
             max_size: 最大缓存条目数
             ttl_seconds: 缓存过期时间（秒）
-            cache_file: 持久化文件路径（None 则不持久化）
+            cache_file: 持久化文件路径（SQLite 数据库；None 则不持久化）
+            memory_size: 持久化时内存中保留的热点条目数（其余条目按需从磁盘读取）
+            compact_every: 持久化时每写入多少次清理一次过期条目并回收空间
+            legacy_json_file: 旧版 JSON 缓存文件（存在时导入一次后重命名为 .migrated）
         """
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
         self.cache_file = cache_file
+        self.compact_every = compact_every
 
-        # LRU 缓存（OrderedDict 保证插入顺序）
+        # LRU 缓存（OrderedDict 保证插入顺序）；持久化时只是磁盘数据的热点子集
         self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._memory_size = max_size if cache_file is None else min(memory_size, max_size)
+        self._store = CacheStore(cache_file) if cache_file else None
+        self._lock = threading.RLock()
+        self._writes_since_compact = 0
 
         # 统计信息
         self.hits = 0
         self.misses = 0
 
-        # 从文件加载缓存
-        if cache_file and cache_file.exists():
-            self._load_from_file()
+        if self._store and legacy_json_file and Path(legacy_json_file).exists():
+            self._migrate_legacy(Path(legacy_json_file))
 
     def get(
         self,
@@ -81,24 +84,32 @@ class LLMCache:
         """
         key = self._generate_key(system_prompt, user_prompt)
 
-        if key not in self._cache:
-            self.misses += 1
-            return None
-
-        entry = self._cache[key]
-
-        # 检查是否过期
-        if time.time() - entry.timestamp > self.ttl_seconds:
-            del self._cache[key]
-            self.misses += 1
-            return None
-
-        # 命中，更新统计和 LRU 顺序
-        entry.hit_count += 1
-        self.hits += 1
-        self._cache.move_to_end(key)  # LRU：移到最后
-
-        return entry.response
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None and self._store:
+                entry = self._store.get(key)  # 按需从磁盘读取
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # 检查是否过期
+            now = time.time()
+            if now - entry.timestamp > self.ttl_seconds:
+                self._cache.pop(key, None)
+                if self._store:
+                    self._store.delete(key)
+                self.misses += 1
+                return None
+
+            # 命中，更新统计和 LRU 顺序
+            entry.hit_count += 1
+            self.hits += 1
+            self._remember(key, entry)
+            if self._store:
+                self._store.touch(key, entry.hit_count, now)
+
+            return entry.response
 
     def set(
         self,
@@ -117,102 +128,103 @@ class LLMCache:
             model_name: 模型名称
         """
         key = self._generate_key(system_prompt, user_prompt)
-
-        # 如果已存在，更新
-        if key in self._cache:
-            self._cache[key].response = response
-            self._cache[key].timestamp = time.time()
-            self._cache.move_to_end(key)
-        else:
-            # 新增条目
-            entry = CacheEntry(
-                response=response,
-                timestamp=time.time(),
-                hit_count=0,
-                model_name=model_name
-            )
-            self._cache[key] = entry
-
-            # LRU 淘汰
-            if len(self._cache) > self.max_size:
-                self._cache.popitem(last=False)  # 移除最早的
-
-        # 持久化
-        if self.cache_file:
-            self._save_to_file()
+        now = time.time()
+
+        with self._lock:
+            # 如果已存在，更新
+            entry = self._cache.get(key)
+            if entry is None and self._store:
+                entry = self._store.get(key)
+            if entry is not None:
+                entry.response = response
+                entry.timestamp = now
+            else:
+                # 新增条目
+                entry = CacheEntry(
+                    response=response,
+                    timestamp=now,
+                    hit_count=0,
+                    model_name=model_name
+                )
+            self._remember(key, entry)
+
+            if self._store:
+                # 增量写入一行，LRU 淘汰在磁盘上进行
+                self._store.put(key, entry, now)
+                for evicted in self._store.evict_lru(self.max_size):
+                    self._cache.pop(evicted, None)
+                self._writes_since_compact += 1
+                if self._writes_since_compact >= self.compact_every:
+                    self.compact()
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        """放入内存 LRU（移到最后，超出容量时移除最早的）"""
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._memory_size:
+            self._cache.popitem(last=False)
 
     def _generate_key(self, system_prompt: str, user_prompt: str) -> str:
         """生成缓存键（SHA256 哈希）"""
         combined = f"{system_prompt}||{user_prompt}"
         return hashlib.sha256(combined.encode()).hexdigest()
 
-    def _save_to_file(self):
-        """保存缓存到文件"""
-        if not self.cache_file:
-            return
-
-        data = {
-            "version": "1.0",
-            "timestamp": time.time(),
-            "stats": {
-                "hits": self.hits,
-                "misses": self.misses,
-                "size": len(self._cache)
-            },
-            "entries": {
-                key: asdict(entry) for key, entry in self._cache.items()
-            }
-        }
-
-        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.cache_file, "w") as f:
-            json.dump(data, f, indent=2)
-
-    def _load_from_file(self):
-        """从文件加载缓存"""
-        if not self.cache_file or not self.cache_file.exists():
-            return
+    def compact(self) -> int:
+        """
+        清理过期条目并回收磁盘空间
 
+        Returns:
+            删除的条目数
+        """
+        with self._lock:
+            self._writes_since_compact = 0
+            expire_before = time.time() - self.ttl_seconds
+            expired = [key for key, entry in self._cache.items() if entry.timestamp < expire_before]
+            for key in expired:
+                del self._cache[key]
+            if not self._store:
+                return len(expired)
+            return self._store.compact(expire_before)
+
+    def _migrate_legacy(self, json_path: Path):
+        """导入旧版 JSON 缓存文件"""
         try:
-            with open(self.cache_file, "r") as f:
-                data = json.load(f)
-
-            # 恢复统计信息
-            stats = data.get("stats", {})
-            self.hits = stats.get("hits", 0)
-            self.misses = stats.get("misses", 0)
-
-            # 恢复条目
-            entries = data.get("entries", {})
-            for key, entry_dict in entries.items():
-                entry = CacheEntry(**entry_dict)
-
-                # 检查是否过期
-                if time.time() - entry.timestamp <= self.ttl_seconds:
-                    self._cache[key] = entry
-
-            print(f"✅ 从缓存文件加载 {len(self._cache)} 条记录")
-
+            count = self._store.import_json(json_path, self.ttl_seconds)
+            self._store.evict_lru(self.max_size)
+            json_path.replace(json_path.with_name(json_path.name + ".migrated"))
+            print(f"✅ 从旧版缓存文件导入 {count} 条记录")
         except Exception as e:
-            print(f"⚠️  缓存文件加载失败：{e}")
+            print(f"⚠️  旧版缓存文件导入失败：{e}")
 
     def clear(self):
         """清空缓存"""
-        self._cache.clear()
-        self.hits = 0
-        self.misses = 0
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+            self._writes_since_compact = 0
 
-        if self.cache_file and self.cache_file.exists():
-            self.cache_file.unlink()
+            if self._store:
+                self._store.destroy()
+
+    def close(self):
+        """关闭磁盘存储（之后的访问会重新打开）"""
+        with self._lock:
+            if self._store:
+                self._store.close()
 
     def stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
         total_requests = self.hits + self.misses
         hit_rate = self.hits / total_requests if total_requests > 0 else 0
 
+        with self._lock:
+            size = self._store.count if self._store else len(self._cache)
+
         return {
-            "size": len(self._cache),
+            "size": size,
             "max_size": self.max_size,
+            "memory_size": len(self._cache),
             "hits": self.hits,
             "misses": self.misses,
             "hit_rate": f"{hit_rate:.1%}",
@@ -230,9 +242,10 @@ def get_global_cache() -> LLMCache:
     if _global_cache is None:
         cache_dir = Path.home() / ".maccortex" / "cache"
         _global_cache = LLMCache(
-            max_size=100,
+            max_size=10000,  # 磁盘存储按需读取，较大容量不影响启动与写入
             ttl_seconds=3600 * 24 * 7,  # 7 天
-            cache_file=cache_dir / "llm_cache.json"
+            cache_file=cache_dir / "llm_cache.sqlite3",
+            legacy_json_file=cache_dir / "llm_cache.json",
         )
     return _global_cache
 
@@ -182,17 +182,26 @@ if __name__ == "__main__":
         )
 
         # 动态 max_tokens（Output Tokens 优化）
-        # 基于子任务描述长度推断复杂度
-        desc_len = len(subtask["description"])
-        if desc_len < 40:
+        # 基于子任务描述的 Token 数推断复杂度（中英文描述按同一尺度比较）
+        from llm.tokenizer import get_tokenizer
+        tokenizer = get_tokenizer()
+        desc_tokens = tokenizer.count(subtask["description"], self.model_id)
+        if desc_tokens < 10:
             max_output_tokens = 300  # 简单任务：Hello World、单函数
-        elif desc_len > 100:
+        elif desc_tokens > 25:
             max_output_tokens = 1200  # 复杂任务：完整模块
         else:
             max_output_tokens = 600  # 中等任务：多函数、测试
 
+        # 修复迭代需要输出完整代码：上限不低于已有代码的 Token 数（加余量），避免截断
+        if feedback and previous_code:
+            max_output_tokens = max(
+                max_output_tokens,
+                tokenizer.output_budget(previous_code, self.model_id, margin=1.3, maximum=4096),
+            )
+
         # 调用 LLM 生成代码
-        print(f"[Coder] max_tokens={max_output_tokens} (描述长度: {desc_len})")
+        print(f"[Coder] max_tokens={max_output_tokens} (描述: {desc_tokens} tokens)")
 
         messages = [
             SystemMessage(content=self.system_prompt),
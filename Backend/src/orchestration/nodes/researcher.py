@@ -2,7 +2,7 @@
 MacCortex Researcher Agent
 
 调研与搜索节点，负责：
-1. 网络搜索（DuckDuckGo）
+1. 网络搜索（共享 Web 搜索服务，默认 DuckDuckGo）
 2. 文档检索（本地向量库）
 3. API 调用（GitHub、天气等）
 4. LLM 总结与结构化输出
@@ -15,11 +15,20 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 
-from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from ..state import SwarmState
+from utils.config import settings
+from websearch import (
+    NearDuplicateFilter,
+    PageFetcher,
+    SearchResult,
+    WebSearchService,
+    dedup_texts,
+    get_page_fetcher,
+    get_search_service,
+)
 
 
 class ResearcherNode:
@@ -41,7 +50,11 @@ class ResearcherNode:
         max_search_results: int = 5,
         api_keys: Optional[Dict[str, str]] = None,
         llm: Optional[Any] = None,  # 可选的 LLM 实例（用于测试）
-        search: Optional[Any] = None,  # 可选的搜索工具（用于测试）
+        search: Optional[Any] = None,  # 可选的搜索服务 / 工具（用于测试）
+        search_engine: str = "duckduckgo",
+        fetch_pages: bool = False,
+        page_fetcher: Optional[PageFetcher] = None,
+        dedup_threshold: Optional[float] = None,
         fallback_to_local: bool = True,
         using_local_model: Optional[bool] = None
     ):
@@ -55,7 +68,12 @@ class ResearcherNode:
             max_search_results: 最大搜索结果数量
             api_keys: 外部 API 密钥字典（如 GitHub、OpenWeather）
             llm: 可选的 LLM 实例（用于测试时注入 mock）
-            search: 可选的搜索工具（用于测试时注入 mock）
+            search: 可选的搜索服务（WebSearchService）或带 run(query) 的搜索工具（用于测试时注入 mock）；
+                默认使用与 SearchPattern 共享的 Web 搜索服务（共享缓存、请求合并、全局限流）
+            search_engine: Web 搜索引擎名称（WebSearchService 中已注册的引擎）
+            fetch_pages: 是否抓取前 N 条结果的网页正文，代替摘要交给 LLM 总结
+            page_fetcher: 网页抓取器（默认使用与 SearchPattern 共享的实例）
+            dedup_threshold: 总结前近似去重阈值（默认 settings.search_dedup_threshold；> 1 关闭）
             fallback_to_local: 当 API Key 缺失时是否降级到本地模型
             using_local_model: 显式指定是否使用本地模型（当注入 llm 时使用）
         """
@@ -90,8 +108,16 @@ class ResearcherNode:
         self.max_search_results = max_search_results
         self.api_keys = api_keys or {}
 
-        # DuckDuckGo 搜索工具
-        self.search = search if search is not None else DuckDuckGoSearchRun()
+        # Web 搜索（默认共享服务）
+        self.search = search if search is not None else get_search_service()
+        self.search_engine = search_engine
+        self.fetch_pages = fetch_pages
+        self._page_fetcher = page_fetcher
+        self._dedup = NearDuplicateFilter(
+            dedup_threshold if dedup_threshold is not None else settings.search_dedup_threshold,
+            settings.search_dedup_num_perm,
+        )
+        self.last_dedup: Optional[Dict[str, Any]] = None  # 最近一次 Web 搜索的去重统计
 
         # 系统提示词
         self.system_prompt = """你是一个专业的研究助手，负责调研和信息收集。
@@ -138,6 +164,7 @@ class ResearcherNode:
 
         try:
             # 1. 执行调研
+            self.last_dedup = None
             research_result = await self._perform_research(
                 query=subtask.get("description", ""),
                 search_type=subtask.get("search_type", "web"),  # web, api, local
@@ -160,6 +187,8 @@ class ResearcherNode:
                 "error_message": research_result if is_error else None,
                 "completed_at": datetime.now(timezone.utc).isoformat()
             })
+            if self.last_dedup is not None:
+                state["subtask_results"][-1]["dedup"] = self.last_dedup
 
             # 3. 更新状态
             state["current_subtask_index"] += 1
@@ -229,7 +258,17 @@ class ResearcherNode:
         """
         # 1. 执行搜索
         try:
-            search_results = await asyncio.to_thread(self.search.run, query)
+            if isinstance(self.search, WebSearchService):
+                # 与 SearchPattern 使用相同的默认语言，两者才能共享缓存与进行中的请求
+                results = await self.search.search(query, self.max_search_results, engine=self.search_engine)
+                if not results:
+                    return "搜索失败：未找到相关结果"
+                contents = await self._fetch_contents(results) if self.fetch_pages else {}
+                results = self._drop_near_duplicates(results, contents)
+                search_results = _format_search_results(results, contents)
+            else:
+                # 注入的同步搜索工具（如 LangChain Tool）
+                search_results = await asyncio.to_thread(self.search.run, query)
         except Exception as e:
             return f"搜索失败：{str(e)}"
 
@@ -241,6 +280,23 @@ class ResearcherNode:
 
         return summary
 
+    async def _fetch_contents(self, results: List[SearchResult]) -> Dict[str, str]:
+        """并发抓取前 settings.search_fetch_top_n 条结果的网页正文（url → 正文；失败的页面不返回）"""
+        if self._page_fetcher is None:
+            self._page_fetcher = get_page_fetcher()
+        urls = [result.url for result in results if result.url.startswith(("http://", "https://"))]
+        pages = await self._page_fetcher.fetch_many(urls[: settings.search_fetch_top_n])
+        return {page.url: page.text for page in pages if page.ok}
+
+    def _drop_near_duplicates(self, results: List[SearchResult], contents: Dict[str, str]) -> List[SearchResult]:
+        """去掉近似重复的结果（比较正文或摘要），统计记录在 last_dedup"""
+        texts = [contents.get(result.url) or result.snippet for result in results]
+        keep, report = dedup_texts(texts, self._dedup)
+        for duplicate in report["duplicates"]:
+            duplicate["url"] = results[duplicate["index"]].url
+        self.last_dedup = report
+        return [results[index] for index in keep]
+
     async def _api_call(self, api_name: Optional[str], params: Dict[str, Any]) -> str:
         """
         外部 API 调用
@@ -358,6 +414,15 @@ class ResearcherNode:
             return f"LLM 总结失败：{str(e)}\n\n原始内容：\n{content[:500]}..."
 
 
+def _format_search_results(results: List[SearchResult], contents: Optional[Dict[str, str]] = None) -> str:
+    """将搜索结果格式化为 LLM 总结的输入（已抓取正文的结果用正文代替摘要）"""
+    contents = contents or {}
+    return "\n\n".join(
+        f"[{result.rank}] {result.title}\n{result.url}\n{contents.get(result.url) or result.snippet}"
+        for result in results
+    )
+
+
 def create_researcher_node(
     workspace_path: Path,
     **kwargs
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+# MacCortex - Proprietary and Confidential
+
+# MacCortex EmbedPattern - 文本嵌入模式
+# Phase 5 - Local Retrieval
+# 创建时间: 2026-10-19
+#
+# 使用共享嵌入服务（retrieval.EmbeddingService）：
+# 并发请求合并为更大的模型批次，重复文本命中内容哈希缓存；
+# 输出为紧凑 float32 编码（base64 原始字节 / .npy 缓冲区），而非 JSON 浮点列表。
+# 未运行 Ollama 时使用确定性哈希向量化，离线可用。
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from .base import BasePattern
+from retrieval.service import EmbeddingService, encode_vectors, get_embedding_service
+from utils.config import settings
+
+
+class EmbedPattern(BasePattern):
+    """
+    嵌入 Pattern
+
+    - 输入文本作为一条（split_lines=True 时每个非空行一条）
+    - 输出 L2 归一化的 float32 矩阵（count × dimension）
+    """
+
+    def __init__(self, service: Optional[EmbeddingService] = None):
+        super().__init__(enable_security=False)  # 不调用生成模型，无需注入防护
+        self._service = service
+        self._mode = "uninitialized"  # uninitialized | ollama | hashing
+
+    # MARK: - BasePattern Protocol
+
+    @property
+    def pattern_id(self) -> str:
+        return "embed"
+
+    @property
+    def name(self) -> str:
+        return "Embed"
+
+    @property
+    def description(self) -> str:
+        return "文本嵌入（批量合并 + 内容哈希缓存，float32 紧凑编码）"
+
+    @property
+    def version(self) -> str:
+        return "1.0.0"
+
+    async def initialize(self):
+        """初始化共享嵌入服务"""
+        logger.info(f"🔧 初始化 {self.name} Pattern...")
+        if self._service is None:
+            self._service = await asyncio.to_thread(get_embedding_service)
+        self._mode = "ollama" if self._service.name.startswith("ollama:") else "hashing"
+        logger.info(f"✅ {self.name} Pattern 初始化完成 (嵌入: {self._service.name})")
+
+    async def execute(self, text: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        执行嵌入
+
+        Args:
+            text: 输入文本
+            parameters:
+                - encoding: "base64" | "npy" | "float" (默认: "base64")
+                - split_lines: 是否按行拆分为多条 (默认: False)
+
+        Returns:
+            {
+                "output": 编码后的矩阵（float 编码为 JSON 字符串）,
+                "metadata": {"model", "dimension", "count", "dtype", "encoding", "mode", "stats"}
+            }
+        """
+        if self._service is None:
+            await self.initialize()
+
+        encoding = parameters.get("encoding", "base64")
+        texts = self._split(text, parameters.get("split_lines", False))
+        if not texts:
+            raise ValueError("没有可嵌入的文本")
+        if len(texts) > settings.embed_max_texts:
+            raise ValueError(f"单次最多嵌入 {settings.embed_max_texts} 条文本")
+
+        matrix = await self._service.embed(texts)
+        data = encode_vectors(matrix, encoding)
+
+        return {
+            "output": json.dumps(data) if encoding == "float" else data,
+            "metadata": {
+                "model": self._service.name,
+                "dimension": int(matrix.shape[1]),
+                "count": int(matrix.shape[0]),
+                "dtype": "float32",
+                "byte_order": "little",
+                "encoding": encoding,
+                "mode": self._mode,
+                "stats": self._service.stats,
+            },
+        }
+
+    def validate(self, text: str, parameters: Dict[str, Any]) -> bool:
+        if not super().validate(text, parameters):
+            return False
+        return parameters.get("encoding", "base64") in ("base64", "npy", "float")
+
+    @staticmethod
+    def _split(text: str, split_lines: bool) -> List[str]:
+        if not split_lines:
+            return [text]
+        return [line.strip() for line in text.splitlines() if line.strip()]
+
+    async def cleanup(self):
+        """清理资源（共享嵌入服务随共享 VectorStore 释放）"""
+        self._service = None
+        logger.info(f"✅ {self.name} Pattern 清理完成")
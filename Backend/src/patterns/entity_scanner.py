@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+# MacCortex - Proprietary and Confidential
+
+"""
+MacCortex Backend - Structured Entity Scanner
+Phase 5 - ExtractPattern 规则快速路径
+创建时间: 2026-10-19
+
+确定性实体扫描器（邮箱、网址、电话、日期、金额）
+
+所有规则编译为一个带命名分组的正则，单次扫描文本即可得到全部结构化实体，
+无需调用 LLM。
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+# 可由规则确定性提取的实体类型
+STRUCTURED_TYPES = ("email", "url", "phone", "date", "amount")
+
+_MONTHS = (
+    r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?"
+    r"|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)"
+)
+
+# 交替顺序即优先级：同一位置先匹配 url/email，再匹配 date/amount，最后 phone
+_RULES = [
+    ("url", r"(?:https?://|www\.)[^\s<>\"'()（）\[\]{}，。；]+"),
+    ("email", r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}"),
+    (
+        "date",
+        r"\d{4}年\d{1,2}月\d{1,2}日"
+        r"|\d{4}[-/.]\d{1,2}[-/.]\d{1,2}(?:[T ]\d{1,2}:\d{2}(?::\d{2})?)?"
+        r"|\d{1,2}/\d{1,2}/\d{4}"
+        rf"|{_MONTHS}\.? \d{{1,2}}(?:st|nd|rd|th)?,? \d{{4}}"
+        rf"|\d{{1,2}} {_MONTHS}\.? \d{{4}}",
+    ),
+    (
+        "amount",
+        r"[$€£¥￥]\s?\d[\d,]*(?:\.\d+)?(?:\s?(?:[kKmMbB]|万|亿))?"
+        r"|\d[\d,]*(?:\.\d+)?\s?(?:万|亿)?(?:USD|EUR|GBP|CNY|RMB|JPY|美元|欧元|英镑|人民币|元)",
+    ),
+    (
+        "phone",
+        r"\+\d{1,3}[-\s]?\(?\d{1,4}\)?(?:[-\s]?\d{2,4}){2,3}"
+        r"|\(\d{3}\)\s?\d{3}-\d{4}"
+        r"|\d{3}-\d{3}-\d{4}"
+        r"|1[3-9]\d{9}"
+        r"|0\d{2,3}-\d{7,8}",
+    ),
+]
+
+_SCANNER = re.compile(
+    "|".join(f"(?P<{name}>(?<![A-Za-z0-9_@.]){pattern})" for name, pattern in _RULES)
+)
+
+# URL 末尾常见的非 URL 标点
+_URL_TRAILING = ".,;:!?"
+
+
+def scan_entities(text: str, types: Iterable[str] = STRUCTURED_TYPES) -> Dict[str, List[str]]:
+    """
+    单次扫描提取结构化实体
+
+    Args:
+        text: 输入文本
+        types: 需要的实体类型（STRUCTURED_TYPES 子集）
+
+    Returns:
+        {类型: [去重后的实体, ...]}，保持首次出现顺序
+    """
+    wanted = set(types) & set(STRUCTURED_TYPES)
+    results: Dict[str, List[str]] = {t: [] for t in wanted}
+    if not wanted:
+        return results
+
+    seen = set()
+    for match in _SCANNER.finditer(text):
+        kind = match.lastgroup
+        if kind not in wanted:
+            continue
+
+        value = match.group(kind)
+        if kind == "url":
+            value = value.rstrip(_URL_TRAILING)
+        elif kind == "phone" and sum(c.isdigit() for c in value) < 7:
+            continue
+
+        if (kind, value) in seen:
+            continue
+        seen.add((kind, value))
+        results[kind].append(value)
+
+    return results
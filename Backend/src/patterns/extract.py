@@ -7,18 +7,55 @@
 # Phase 1 - Week 2 Day 9
 # 创建时间: 2026-01-20
 # 更新时间: 2026-01-21 (Phase 1.5 - Day 3: 集成 PromptGuard)
+# 更新时间: 2026-10-19 (Phase 5: 结构化实体规则快速路径)
 #
 # 从文本中提取结构化信息（实体、关键词、联系方式、日期等）
 # Phase 1.5: 增强安全防护（Prompt Injection 检测、指令隔离、输出清理）
+# Phase 5: 邮箱/网址/电话/日期/金额走确定性扫描器，仅模糊类型调用 LLM
+# Phase 5: 长文档分块并发提取 + 跨块合并去重，Ollama 使用 JSON 约束输出
 
 import asyncio
-from typing import Any, Dict
+import json
+from typing import Any, Dict, List, Tuple
 from loguru import logger
 
 from .base import BasePattern
+from .entity_scanner import STRUCTURED_TYPES, scan_entities
 from utils.config import settings
 
 
+def split_overlapping(text: str, chunk_chars: int, overlap: int) -> List[Tuple[int, str]]:
+    """
+    将长文本切分为相互重叠的块（尽量在空白处切分）
+
+    Args:
+        text: 输入文本
+        chunk_chars: 单块最大字符数
+        overlap: 相邻块重叠字符数（避免实体被切断）
+
+    Returns:
+        [(块在原文中的起始偏移, 块文本), ...]
+    """
+    chunks: List[Tuple[int, str]] = []
+    start = 0
+
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            # 在块后半段寻找最后一个空白作为切分点
+            half = start + chunk_chars // 2
+            cut = max(text.rfind(" ", half, end), text.rfind("\n", half, end))
+            if cut > start:
+                end = cut
+
+        chunks.append((start, text[start:end]))
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+
+    return chunks
+
+
 class ExtractPattern(BasePattern):
     """
     信息提取 Pattern
@@ -128,6 +165,7 @@ class ExtractPattern(BasePattern):
             text: 输入文本
             parameters: 提取参数
                 - entity_types: 实体类型列表 (默认: ["person", "organization", "location"])
+                  email/url/phone/date/amount 由规则扫描器提取（Phase 5）
                 - extract_keywords: 是否提取关键词 (默认: true)
                 - extract_contacts: 是否提取联系方式 (默认: true)
                 - extract_dates: 是否提取日期时间 (默认: true)
@@ -156,24 +194,47 @@ class ExtractPattern(BasePattern):
                 f"严重程度={injection_result['severity']}"
             )
 
-        # ==================== Phase 1.5: 构建系统提示（不含用户输入）====================
-        system_prompt = self._build_system_prompt(
-            entity_types, extract_keywords, extract_contacts, extract_dates, custom_entities, language
-        )
-
-        # ==================== Phase 1.5: Layer 1+2 - 保护提示词 ====================
-        protected_prompt = self._protect_prompt(system_prompt, text, source=source)
+        # ==================== Phase 5: 规则快速路径 ====================
+        # 结构化类型（邮箱/网址/电话/日期/金额）由单次扫描完成，不经过模型
+        contact_types = ["email", "phone", "url"] if extract_contacts else []
+        rule_types = [t for t in STRUCTURED_TYPES if t in entity_types or t in contact_types]
+        if extract_dates and "date" not in rule_types:
+            rule_types.append("date")
+        rule_result = scan_entities(text, rule_types)
+
+        # 仅模糊类型（人名、组织、地点、关键词、自定义实体）需要 LLM
+        fuzzy_types = [t for t in entity_types if t not in STRUCTURED_TYPES]
+        needs_llm = bool(fuzzy_types or extract_keywords or custom_entities)
+
+        chunk_count = 1
+        entity_offsets: Dict[str, Dict[str, int]] = {}
+
+        if needs_llm:
+            # ==================== Phase 1.5: 构建系统提示（不含用户输入）====================
+            system_prompt = self._build_system_prompt(
+                fuzzy_types, extract_keywords, False, False, custom_entities, language
+            )
 
-        # 根据模式选择生成方法（Phase 1.5: 使用受保护的提示）
-        if self._mode == "mlx":
-            result = await self._extract_with_mlx_protected(protected_prompt)
-        elif self._mode == "ollama":
-            result = await self._extract_with_ollama_protected(protected_prompt)
+            if len(text) > settings.extract_chunk_chars:
+                # Phase 5: 长文档模式（分块并发提取 + 合并去重）
+                chunks = split_overlapping(
+                    text, settings.extract_chunk_chars, settings.extract_chunk_overlap
+                )
+                chunk_count = len(chunks)
+                result, entity_offsets = await self._extract_chunked(
+                    chunks, system_prompt, fuzzy_types, extract_keywords, custom_entities, language, source
+                )
+            else:
+                result = await self._run_extraction(
+                    text, system_prompt, fuzzy_types, extract_keywords, custom_entities, language, source
+                )
         else:
-            # Mock 模式
-            result = await self._extract_mock(
-                text, entity_types, extract_keywords, extract_contacts, extract_dates, custom_entities, language
-            )
+            logger.debug(f"  ⚡ 仅结构化类型，跳过模型: {rule_types}")
+            result = {"entities": {}, "keywords": [], "contacts": {}, "dates": []}
+
+        result = self._merge_rule_entities(
+            result, rule_result, entity_types, extract_contacts, extract_dates
+        )
 
         # 构建提取结果
         extraction_result = {
@@ -184,7 +245,6 @@ class ExtractPattern(BasePattern):
         }
 
         # 序列化为 JSON 字符串（统一输出格式）
-        import json
         output = json.dumps(extraction_result, ensure_ascii=False, indent=2)
 
         # ==================== Phase 1.5: Layer 5 - 清理输出 ====================
@@ -201,7 +261,11 @@ class ExtractPattern(BasePattern):
                 "language": language,
                 "source": source,
                 "text_length": len(text),
-                "mode": self._mode,
+                "mode": self._mode if needs_llm else "rules",
+                "rule_types": rule_types,
+                "llm_used": needs_llm,
+                "chunks": chunk_count,
+                "entity_offsets": entity_offsets,
                 # Phase 1.5: 安全元数据
                 "security": {
                     "injection_detected": injection_result["is_malicious"],
@@ -211,6 +275,139 @@ class ExtractPattern(BasePattern):
             },
         }
 
+    async def _run_extraction(
+        self,
+        text: str,
+        system_prompt: str,
+        fuzzy_types: list,
+        extract_keywords: bool,
+        custom_entities: list,
+        language: str,
+        source: str,
+    ) -> Dict[str, Any]:
+        """对一段文本执行模型提取（保护提示词 → 按模式生成 → 解析）"""
+        # ==================== Phase 1.5: Layer 1+2 - 保护提示词 ====================
+        protected_prompt = self._protect_prompt(system_prompt, text, source=source)
+
+        # 根据模式选择生成方法（Phase 1.5: 使用受保护的提示）
+        if self._mode == "mlx":
+            return await self._extract_with_mlx_protected(protected_prompt)
+        elif self._mode == "ollama":
+            return await self._extract_with_ollama_protected(protected_prompt)
+        else:
+            # Mock 模式
+            return await self._extract_mock(
+                text, fuzzy_types, extract_keywords, False, False, custom_entities, language
+            )
+
+    async def _extract_chunked(
+        self,
+        chunks: List[Tuple[int, str]],
+        system_prompt: str,
+        fuzzy_types: list,
+        extract_keywords: bool,
+        custom_entities: list,
+        language: str,
+        source: str,
+    ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, int]]]:
+        """
+        分块并发提取，并跨块合并去重
+
+        - 并发度受 extract_max_concurrency 限制（MLX 单模型串行执行）
+        - 实体按规范化文本去重，记录在原文中的首次出现偏移，并按偏移排序
+        - 关键词按出现的块数排序
+
+        Returns:
+            (合并后的提取结果, {实体类型: {实体: 原文偏移}})
+        """
+        concurrency = 1 if self._mode == "mlx" else max(1, settings.extract_max_concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def extract_one(chunk: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._run_extraction(
+                    chunk, system_prompt, fuzzy_types, extract_keywords, custom_entities, language, source
+                )
+
+        logger.info(f"  📚 长文档模式: {len(chunks)} 块, 并发度 {concurrency}")
+        chunk_results = await asyncio.gather(*(extract_one(chunk) for _, chunk in chunks))
+
+        # 跨块合并：{类型: {规范化键: (偏移, 原始文本)}}
+        merged: Dict[str, Dict[str, Tuple[int, str]]] = {}
+        keyword_stats: Dict[str, List[Any]] = {}
+
+        for (start, chunk), result in zip(chunks, chunk_results):
+            entities = result.get("entities")
+            if isinstance(entities, dict):
+                for kind, values in entities.items():
+                    if not isinstance(values, list):
+                        continue
+                    bucket = merged.setdefault(kind, {})
+                    for value in values:
+                        if not isinstance(value, str) or not value.strip():
+                            continue
+                        key = value.strip().casefold()
+                        found = chunk.find(value)
+                        offset = start + found if found >= 0 else start
+                        if key not in bucket or offset < bucket[key][0]:
+                            bucket[key] = (offset, value.strip())
+
+            keywords = result.get("keywords")
+            if isinstance(keywords, list):
+                for keyword in keywords:
+                    if not isinstance(keyword, str) or not keyword.strip():
+                        continue
+                    key = keyword.strip().casefold()
+                    stats = keyword_stats.setdefault(key, [0, start, keyword.strip()])
+                    stats[0] += 1
+
+        entities_out: Dict[str, List[str]] = {}
+        offsets_out: Dict[str, Dict[str, int]] = {}
+        for kind, bucket in merged.items():
+            ordered = sorted(bucket.values())
+            entities_out[kind] = [value for _, value in ordered]
+            offsets_out[kind] = {value: offset for offset, value in ordered}
+
+        ranked_keywords = sorted(keyword_stats.values(), key=lambda s: (-s[0], s[1]))
+        keywords_out = [s[2] for s in ranked_keywords[:10]]
+
+        return {
+            "entities": entities_out,
+            "keywords": keywords_out,
+            "contacts": {},
+            "dates": [],
+        }, offsets_out
+
+    @staticmethod
+    def _merge_rule_entities(
+        result: Dict[str, Any],
+        rule_result: Dict[str, List[str]],
+        entity_types: list,
+        extract_contacts: bool,
+        extract_dates: bool,
+    ) -> Dict[str, Any]:
+        """将规则扫描结果合并进 _parse_extraction_output 的输出结构"""
+
+        def union(existing: Any, extra: List[str]) -> List[str]:
+            items = list(existing) if isinstance(existing, list) else []
+            return items + [v for v in extra if v not in items]
+
+        entities = result.get("entities")
+        result["entities"] = entities = entities if isinstance(entities, dict) else {}
+        contacts = result.get("contacts")
+        result["contacts"] = contacts = contacts if isinstance(contacts, dict) else {}
+
+        for kind, values in rule_result.items():
+            if kind in entity_types:
+                entities[kind] = union(entities.get(kind), values)
+            if extract_contacts and kind in ("email", "phone", "url"):
+                contacts[kind] = union(contacts.get(kind), values)
+
+        if extract_dates:
+            result["dates"] = union(result.get("dates"), rule_result.get("date", []))
+
+        return result
+
     async def _extract_with_mlx(
         self,
         text: str,
@@ -484,10 +681,24 @@ Extraction tasks:
         """使用 Ollama 进行信息提取（Phase 1.5: 使用受保护的提示）"""
         logger.debug(f"  🦙 使用 Ollama 生成（受保护提示）...")
 
-        # 生成
+        # 生成（Phase 5: JSON 约束输出，解析时直接 json.loads）
         response = await self._ollama_client.generate(
-            model=settings.ollama_model, prompt=protected_prompt, options={"temperature": 0.3, "num_predict": 512}
+            model=settings.ollama_model,
+            prompt=protected_prompt,
+            format="json",
+            options={"temperature": 0.3, "num_predict": 512},
         )
 
         # 解析输出
-        return self._parse_extraction_output(response["response"])
+        return self._parse_json_output(response["response"])
+
+    def _parse_json_output(self, output: str) -> Dict[str, Any]:
+        """解析 JSON 约束输出（失败时回退到正则查找）"""
+        try:
+            data = json.loads(output)
+            if isinstance(data, dict):
+                return data
+        except (json.JSONDecodeError, TypeError):
+            pass
+
+        return self._parse_extraction_output(output)
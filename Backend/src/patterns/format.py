@@ -7,18 +7,31 @@
 # Phase 1 - Week 2 Day 9
 # 创建时间: 2026-01-20
 # 更新时间: 2026-01-21 (Phase 1.5 - Day 3: 集成 PromptGuard)
+# 更新时间: 2026-10-19 (Phase 5: CSV ↔ JSON 流式转换)
+# 更新时间: 2026-10-19 (Phase 5: 确定性转换矩阵 + 格式嗅探)
+# 更新时间: 2026-10-19 (Phase 5: 单遍 Markdown ↔ HTML 转换器)
 #
 # Phase 1.5: 增强安全防护（Prompt Injection 检测、指令隔离、输出清理）
+# Phase 5: CSV ↔ JSON 使用恒定内存的流式转换器，支持流式返回结果
+# Phase 5: XML/TOML/JSONL/表格等格式确定性转换，LLM 仅作为最后手段
 #
 # 文本格式转换（JSON ↔ YAML, Markdown ↔ HTML, CSV ↔ JSON 等）
 
 import asyncio
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 from loguru import logger
 
 from .base import BasePattern
+from . import format_converters
+from .format_converters import NoStructuredDataError, sniff_format
+from .markdown_html import html_to_markdown, markdown_to_html
+from .format_streaming import iter_csv_to_json, iter_json_to_csv, iter_text_chunks
 from utils.config import settings
 
+# 超过该长度的输入在工作线程中转换，避免阻塞事件循环
+# （须低于 InputValidator.MAX_TEXT_LENGTH，否则永远不会生效）
+_THREAD_THRESHOLD_CHARS = 32 * 1024
+
 
 class FormatPattern(BasePattern):
     """
@@ -27,9 +40,10 @@ class FormatPattern(BasePattern):
     支持多种格式之间的转换：
     - JSON ↔ YAML ↔ TOML ↔ XML
     - Markdown ↔ HTML ↔ Plain Text
-    - CSV ↔ JSON ↔ TSV
+    - CSV ↔ JSON ↔ TSV ↔ JSON Lines
+    - Markdown / HTML 表格 ↔ CSV / JSON
     - 代码美化与压缩
-    - 自定义格式转换
+    - 自定义格式转换（无确定性转换器时回退到 LLM）
     """
 
     def __init__(self):
@@ -129,7 +143,8 @@ class FormatPattern(BasePattern):
         Args:
             text: 输入文本
             parameters: 转换参数
-                - from_format: 源格式 (必填, 如 "json", "yaml", "markdown", "html", "csv")
+                - from_format: 源格式 (可选, 如 "json", "yaml", "markdown", "html", "csv";
+                  缺省或 "auto" 时自动嗅探)
                 - to_format: 目标格式 (必填, 如 "json", "yaml", "markdown", "html", "csv")
                 - prettify: 是否美化输出 (默认: true)
                 - minify: 是否压缩输出 (默认: false)
@@ -139,11 +154,11 @@ class FormatPattern(BasePattern):
             转换结果字典
         """
         # 解析参数
-        from_format = parameters.get("from_format")
+        from_format = parameters.get("from_format") or "auto"
         to_format = parameters.get("to_format")
 
-        if not from_format or not to_format:
-            raise ValueError("缺少必填参数: from_format 或 to_format")
+        if not to_format:
+            raise ValueError("缺少必填参数: to_format")
 
         prettify = parameters.get("prettify", True)
         minify = parameters.get("minify", False)
@@ -151,7 +166,9 @@ class FormatPattern(BasePattern):
 
         # 执行转换
         try:
-            converted = await self._convert_format(text, from_format, to_format, prettify, minify, options)
+            converted, info = await self._convert_with_info(
+                text, from_format, to_format, prettify, minify, options
+            )
         except Exception as e:
             logger.error(f"格式转换失败: {e}")
             raise ValueError(f"格式转换失败: {e}")
@@ -159,12 +176,15 @@ class FormatPattern(BasePattern):
         return {
             "output": converted,  # 统一输出格式
             "metadata": {
-                "from_format": from_format,
+                "from_format": info["from_format"],
                 "to_format": to_format,
                 "prettify": prettify,
                 "minify": minify,
                 "original_length": len(text),
                 "converted_length": len(converted),
+                "detected_format": info["detected_format"],
+                "converter": info["converter"],
+                "llm_fallback": info["converter"] == "llm",
                 "mode": self._mode,
             },
         }
@@ -173,13 +193,81 @@ class FormatPattern(BasePattern):
         self, text: str, from_format: str, to_format: str, prettify: bool, minify: bool, options: Dict[str, Any]
     ) -> str:
         """执行实际的格式转换"""
-        import json
-        import yaml
+        converted, _ = await self._convert_with_info(text, from_format, to_format, prettify, minify, options)
+        return converted
+
+    async def _convert_with_info(
+        self, text: str, from_format: str, to_format: str, prettify: bool, minify: bool, options: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        执行格式转换并返回转换信息
 
+        顺序：确定性转换 → （解析失败时）按嗅探格式重试 → LLM（最后手段：无确定性转换器，
+        或输入不含结构化数据，如没有表格的 Markdown 正文转 JSON）
+
+        Returns:
+            (转换结果, {"from_format", "detected_format", "converter"})
+        """
         # 标准化格式名称
-        from_format = from_format.lower()
+        from_format = (from_format or "auto").lower()
         to_format = to_format.lower()
+        detected = None
+
+        if from_format == "auto":
+            detected = sniff_format(text)
+            if detected is None:
+                raise ValueError("无法识别输入格式，请指定 from_format")
+            from_format = detected
+
+        unstructured: Optional[NoStructuredDataError] = None
+        try:
+            try:
+                converted = await self._convert_deterministic(
+                    text, from_format, to_format, prettify, minify, options
+                )
+            except ValueError as e:
+                # from_format 声明错误时，按嗅探结果重试一次
+                sniffed = sniff_format(text) if detected is None else None
+                if not sniffed or sniffed == from_format:
+                    raise
+                logger.info(f"按 {from_format} 解析失败（{e}），改用嗅探格式 {sniffed}")
+                detected = from_format = sniffed
+                converted = await self._convert_deterministic(
+                    text, from_format, to_format, prettify, minify, options
+                )
+        except NoStructuredDataError as e:
+            unstructured = e
+            converted = None
+
+        info = {"from_format": from_format, "detected_format": detected, "converter": "deterministic"}
+        if converted is not None:
+            return converted, info
+
+        # 对于不支持的转换或非结构化输入，使用 LLM（如果可用）
+        reason = unstructured or "无确定性转换器"
+        logger.warning(f"{reason}，回退到 LLM: {from_format} → {to_format}")
+        info["converter"] = "llm"
+        if self._mode == "mlx":
+            return await self._convert_with_llm_mlx(text, from_format, to_format), info
+        elif self._mode == "ollama":
+            return await self._convert_with_llm_ollama(text, from_format, to_format), info
+        elif unstructured is not None:
+            raise unstructured
+        else:
+            raise ValueError(f"不支持的格式转换: {from_format} → {to_format}")
+
+    async def _convert_deterministic(
+        self, text: str, from_format: str, to_format: str, prettify: bool, minify: bool, options: Dict[str, Any]
+    ) -> Optional[str]:
+        """
+        确定性格式转换（不需要 LLM）
+
+        Returns:
+            转换结果；格式组合无确定性转换器时返回 None
 
+        Raises:
+            ValueError: 输入无法按 from_format 解析
+        """
         # 使用标准库进行转换（不需要 LLM）
         if from_format == "json" and to_format == "yaml":
             return await self._json_to_yaml(text, prettify)
@@ -193,17 +281,16 @@ class FormatPattern(BasePattern):
         elif from_format == "html" and to_format == "markdown":
             return await self._html_to_markdown(text)
         elif from_format == "csv" and to_format == "json":
-            return await self._csv_to_json(text, options)
+            return await self._csv_to_json(text, options, prettify, minify)
         elif from_format == "json" and to_format == "csv":
             return await self._json_to_csv(text, options)
-        else:
-            # 对于不支持的转换，使用 LLM（如果可用）
-            if self._mode == "mlx":
-                return await self._convert_with_llm_mlx(text, from_format, to_format)
-            elif self._mode == "ollama":
-                return await self._convert_with_llm_ollama(text, from_format, to_format)
-            else:
-                raise ValueError(f"不支持的格式转换: {from_format} → {to_format}")
+        elif format_converters.is_supported(from_format, to_format):
+            # 通用转换矩阵：读取器 → Python 数据 → 写出器
+            args = (text, from_format, to_format, prettify, minify, options)
+            if len(text) > _THREAD_THRESHOLD_CHARS:
+                return await asyncio.to_thread(format_converters.convert, *args)
+            return format_converters.convert(*args)
+        return None
 
     async def _json_to_yaml(self, text: str, prettify: bool) -> str:
         """JSON → YAML"""
@@ -218,7 +305,10 @@ class FormatPattern(BasePattern):
         import json
         import yaml
 
-        data = yaml.safe_load(text)
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"yaml 解析失败: {e}") from e
         if minify:
             return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
         elif prettify:
@@ -243,112 +333,159 @@ class FormatPattern(BasePattern):
         try:
             import markdown
 
-            return markdown.markdown(text, extensions=["extra", "codehilite"])
+            def convert(source: str) -> str:
+                return markdown.markdown(source, extensions=["extra", "codehilite"])
         except ImportError:
-            # 如果 markdown 库未安装，使用简单转换
-            logger.warning("markdown 库未安装，使用简化转换")
-            return self._simple_markdown_to_html(text)
-
-    def _simple_markdown_to_html(self, text: str) -> str:
-        """简单的 Markdown → HTML 转换"""
-        import re
-
-        html = text
-
-        # 标题
-        html = re.sub(r"^# (.+)$", r"<h1>\1</h1>", html, flags=re.MULTILINE)
-        html = re.sub(r"^## (.+)$", r"<h2>\1</h2>", html, flags=re.MULTILINE)
-        html = re.sub(r"^### (.+)$", r"<h3>\1</h3>", html, flags=re.MULTILINE)
-
-        # 粗体和斜体
-        html = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html)
-        html = re.sub(r"\*(.+?)\*", r"<em>\1</em>", html)
-
-        # 链接
-        html = re.sub(r"\[(.+?)\]\((.+?)\)", r'<a href="\2">\1</a>', html)
-
-        # 代码块
-        html = re.sub(r"`(.+?)`", r"<code>\1</code>", html)
-
-        # 段落
-        html = re.sub(r"\n\n", r"</p><p>", html)
-        html = f"<p>{html}</p>"
-
-        return html
+            # 如果 markdown 库未安装，使用内置单遍转换器
+            logger.debug("markdown 库未安装，使用内置转换器")
+            convert = markdown_to_html
+        return await self._run_blocking(text, convert)
 
     async def _html_to_markdown(self, text: str) -> str:
         """HTML → Markdown"""
         try:
             from html2text import HTML2Text
 
-            h = HTML2Text()
-            h.ignore_links = False
-            h.ignore_images = False
-            return h.handle(text)
+            def convert(source: str) -> str:
+                h = HTML2Text()
+                h.ignore_links = False
+                h.ignore_images = False
+                return h.handle(source)
         except ImportError:
-            # 如果 html2text 库未安装，使用简单转换
-            logger.warning("html2text 库未安装，使用简化转换")
-            return self._simple_html_to_markdown(text)
-
-    def _simple_html_to_markdown(self, text: str) -> str:
-        """简单的 HTML → Markdown 转换"""
-        import re
-
-        md = text
-
-        # 标题
-        md = re.sub(r"<h1>(.+?)</h1>", r"# \1", md, flags=re.IGNORECASE)
-        md = re.sub(r"<h2>(.+?)</h2>", r"## \1", md, flags=re.IGNORECASE)
-        md = re.sub(r"<h3>(.+?)</h3>", r"### \1", md, flags=re.IGNORECASE)
-
-        # 粗体和斜体
-        md = re.sub(r"<strong>(.+?)</strong>", r"**\1**", md, flags=re.IGNORECASE)
-        md = re.sub(r"<em>(.+?)</em>", r"*\1*", md, flags=re.IGNORECASE)
+            # 如果 html2text 库未安装，使用内置单遍转换器
+            logger.debug("html2text 库未安装，使用内置转换器")
+            convert = html_to_markdown
+        return await self._run_blocking(text, convert)
+
+    async def _run_blocking(self, text: str, convert: Callable[[str], str]) -> str:
+        """执行同步转换（大输入放到工作线程，避免阻塞事件循环）"""
+        if len(text) > _THREAD_THRESHOLD_CHARS:
+            return await asyncio.to_thread(convert, text)
+        return convert(text)
+
+    def _iter_streaming(
+        self,
+        text: str,
+        from_format: str,
+        to_format: str,
+        options: Dict[str, Any],
+        prettify: bool = True,
+        minify: bool = False,
+    ) -> Optional[Iterator[str]]:
+        """获取流式转换器（不支持流式的格式组合返回 None）"""
+        delimiter = options.get("delimiter", ",")
+        chunks = iter_text_chunks(text)
+
+        if from_format == "csv" and to_format == "json":
+            indent = None if minify or not prettify else 2
+            return iter_csv_to_json(chunks, delimiter=delimiter, indent=indent)
+        if from_format == "json" and to_format == "csv":
+            return iter_json_to_csv(chunks, delimiter=delimiter)
+        return None
+
+    async def _run_streaming(self, text: str, converter: Iterator[str]) -> str:
+        """执行流式转换（大输入放到工作线程）"""
+        if len(text) > _THREAD_THRESHOLD_CHARS:
+            return await asyncio.to_thread("".join, converter)
+        return "".join(converter)
+
+    async def _csv_to_json(
+        self, text: str, options: Dict[str, Any], prettify: bool = True, minify: bool = False
+    ) -> str:
+        """CSV → JSON（Phase 5: 逐行流式转换）"""
+        converter = self._iter_streaming(text, "csv", "json", options, prettify, minify)
+        return await self._run_streaming(text, converter)
 
-        # 链接
-        md = re.sub(r'<a href="(.+?)">(.+?)</a>', r"[\2](\1)", md, flags=re.IGNORECASE)
+    async def _json_to_csv(self, text: str, options: Dict[str, Any]) -> str:
+        """JSON → CSV（Phase 5: 逐元素流式转换，表头由前 N 行推断）"""
+        converter = self._iter_streaming(text, "json", "csv", options)
+        return await self._run_streaming(text, converter)
 
-        # 代码
-        md = re.sub(r"<code>(.+?)</code>", r"`\1`", md, flags=re.IGNORECASE)
+    # MARK: - Streaming Support (Phase 5)
 
-        # 移除段落标签
-        md = re.sub(r"</?p>", "\n\n", md, flags=re.IGNORECASE)
+    async def execute_stream(self, text: str, parameters: Dict[str, Any]):
+        """
+        流式格式转换（Server-Sent Events）
 
-        # 移除其他 HTML 标签
-        md = re.sub(r"<[^>]+>", "", md)
+        CSV ↔ JSON 边转换边发送，服务端不持有完整输出；
+        其他格式组合回退到普通转换后分块发送。
 
-        return md.strip()
+        SSE 事件格式（与 translate 一致）：
+        - event: start -> 开始转换
+        - event: chunk -> 输出片段
+        - event: done -> 完成（含元数据）
+        - event: error -> 错误
 
-    async def _csv_to_json(self, text: str, options: Dict[str, Any]) -> str:
-        """CSV → JSON"""
-        import csv
+        Returns:
+            StreamingResponse（text/event-stream）
+        """
+        from fastapi.responses import StreamingResponse
+        from starlette.concurrency import iterate_in_threadpool
         import json
-        from io import StringIO
 
-        delimiter = options.get("delimiter", ",")
-        reader = csv.DictReader(StringIO(text), delimiter=delimiter)
-        data = list(reader)
-        return json.dumps(data, ensure_ascii=False, indent=2)
+        from_format = (parameters.get("from_format") or "auto").lower()
+        to_format = (parameters.get("to_format") or "").lower()
+        prettify = parameters.get("prettify", True)
+        minify = parameters.get("minify", False)
+        options = parameters.get("options", {})
 
-    async def _json_to_csv(self, text: str, options: Dict[str, Any]) -> str:
-        """JSON → CSV"""
-        import csv
-        import json
-        from io import StringIO
+        async def event_generator():
+            """SSE 事件生成器（转换器在线程池中迭代，不阻塞事件循环）"""
+            try:
+                yield "event: start\n"
+                yield f"data: {json.dumps({'status': 'started', 'input_length': len(text)})}\n\n"
 
-        data = json.loads(text)
-        if not isinstance(data, list):
-            data = [data]
+                if not to_format:
+                    raise ValueError("缺少必填参数: to_format")
 
-        output = StringIO()
-        delimiter = options.get("delimiter", ",")
+                info = {"from_format": from_format, "detected_format": None, "converter": "deterministic"}
+                if from_format == "auto":
+                    info["from_format"] = info["detected_format"] = sniff_format(text)
 
-        if data:
-            writer = csv.DictWriter(output, fieldnames=data[0].keys(), delimiter=delimiter)
-            writer.writeheader()
-            writer.writerows(data)
+                converter = self._iter_streaming(
+                    text, info["from_format"], to_format, options, prettify, minify
+                )
+                streamed = converter is not None
+                if converter is None:
+                    converted, info = await self._convert_with_info(
+                        text, from_format, to_format, prettify, minify, options
+                    )
+                    converter = iter_text_chunks(converted)
+
+                converted_length = 0
+                async for chunk in iterate_in_threadpool(converter):
+                    converted_length += len(chunk)
+                    yield "event: chunk\n"
+                    yield f"data: {json.dumps({'text': chunk}, ensure_ascii=False)}\n\n"
+
+                metadata = {
+                    "from_format": info["from_format"],
+                    "to_format": to_format,
+                    "original_length": len(text),
+                    "converted_length": converted_length,
+                    "detected_format": info["detected_format"],
+                    "converter": info["converter"],
+                    "llm_fallback": info["converter"] == "llm",
+                    "streamed": streamed,
+                    "mode": self._mode,
+                }
+                yield "event: done\n"
+                yield f"data: {json.dumps({'metadata': metadata})}\n\n"
 
-        return output.getvalue()
+            except Exception as e:
+                logger.error(f"流式格式转换错误: {e}")
+                yield "event: error\n"
+                yield f"data: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+
+        return StreamingResponse(
+            event_generator(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no",  # 禁用 Nginx 缓冲
+            },
+        )
 
     async def _convert_with_llm_mlx(self, text: str, from_format: str, to_format: str) -> str:
         """使用 MLX LLM 进行复杂格式转换"""
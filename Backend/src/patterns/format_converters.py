@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+# MacCortex - Proprietary and Confidential
+
+"""
+MacCortex Backend - Deterministic Format Converters
+Phase 5 - FormatPattern 确定性转换矩阵
+创建时间: 2026-10-19
+
+读取器（文本 → Python 数据）+ 写出器（Python 数据 → 文本）组成的转换矩阵：
+任意一对同时具备读取器和写出器的格式都能确定性转换，无需 LLM。
+
+- 树形格式：json / jsonl / yaml / toml / xml
+- 表格格式：csv / markdown（管道表格）/ html（<table>）
+
+另提供输入格式嗅探（sniff_format），用于 from_format 缺失或错误时仍走快速路径。
+"""
+
+import csv
+import html
+import io
+import json
+import re
+from datetime import date, datetime, time
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, List, Optional
+from xml.etree import ElementTree
+
+import yaml
+
+try:
+    import tomllib
+except ImportError:  # Python 3.10
+    import tomli as tomllib
+
+
+# ==================== 工具函数 ====================
+
+
+def _json_default(value: Any) -> Any:
+    """JSON 序列化兜底（TOML 日期时间等）"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _cell(value: Any) -> str:
+    """表格单元格文本（嵌套值序列化为 JSON）"""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=_json_default)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def to_rows(data: Any) -> List[Dict[str, Any]]:
+    """
+    将任意数据规范化为表格行
+
+    - 对象列表 → 原样
+    - 仅含一个键的对象（如 XML 根节点包裹）→ 递归展开
+    - 普通对象 → 单行
+    - 标量列表 → [{"value": x}, ...]
+    """
+    if isinstance(data, list):
+        if all(isinstance(item, dict) for item in data):
+            return data
+        return [item if isinstance(item, dict) else {"value": item} for item in data]
+    if isinstance(data, dict):
+        if len(data) == 1:
+            (inner,) = data.values()
+            if isinstance(inner, (list, dict)) and inner:
+                return to_rows(inner)
+        return [data]
+    return [{"value": data}]
+
+
+def _fieldnames(rows: List[Dict[str, Any]]) -> List[str]:
+    """按出现顺序合并所有行的键"""
+    names: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            names.setdefault(str(key), None)
+    return list(names)
+
+
+# ==================== 读取器 ====================
+
+
+class NoStructuredDataError(ValueError):
+    """输入可以解析，但不含可转换的结构化数据（如没有表格的 Markdown / HTML 正文）"""
+
+
+def _read_json(text: str, options: Dict[str, Any]) -> Any:
+    return json.loads(text)
+
+
+def _read_jsonl(text: str, options: Dict[str, Any]) -> Any:
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _read_yaml(text: str, options: Dict[str, Any]) -> Any:
+    return yaml.safe_load(text)
+
+
+def _read_toml(text: str, options: Dict[str, Any]) -> Any:
+    return tomllib.loads(text)
+
+
+def _xml_to_obj(element: ElementTree.Element) -> Any:
+    """XML 元素 → 对象（属性加 @ 前缀，文本为 #text，重复子元素为列表）"""
+    children = list(element)
+    text = (element.text or "").strip()
+    if not children and not element.attrib:
+        return text
+
+    obj: Dict[str, Any] = {f"@{k}": v for k, v in element.attrib.items()}
+    repeated = set()
+    for child in children:
+        value = _xml_to_obj(child)
+        if child.tag not in obj:
+            obj[child.tag] = value
+        elif child.tag in repeated:
+            obj[child.tag].append(value)
+        else:
+            obj[child.tag] = [obj[child.tag], value]
+            repeated.add(child.tag)
+
+    if text:
+        obj["#text"] = text
+    return obj
+
+
+def _read_xml(text: str, options: Dict[str, Any]) -> Any:
+    root = ElementTree.fromstring(text)
+    return {root.tag: _xml_to_obj(root)}
+
+
+def _read_csv(text: str, options: Dict[str, Any]) -> Any:
+    delimiter = options.get("delimiter", ",")
+    return list(csv.DictReader(io.StringIO(text), delimiter=delimiter))
+
+
+_MD_SEPARATOR = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+
+
+def _split_md_row(line: str) -> List[str]:
+    """拆分 Markdown 表格行（支持 \\| 转义）"""
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    cells = re.split(r"(?<!\\)\|", line)
+    return [cell.strip().replace("\\|", "|") for cell in cells]
+
+
+def _read_markdown(text: str, options: Dict[str, Any]) -> Any:
+    lines = text.splitlines()
+    for i in range(len(lines) - 1):
+        if "|" in lines[i] and "-" in lines[i + 1] and _MD_SEPARATOR.match(lines[i + 1]):
+            header = _split_md_row(lines[i])
+            rows = []
+            for line in lines[i + 2:]:
+                if "|" not in line or not line.strip():
+                    break
+                cells = _split_md_row(line)
+                rows.append({name: cells[j] if j < len(cells) else "" for j, name in enumerate(header)})
+            return rows
+    raise NoStructuredDataError("未找到 Markdown 表格")
+
+
+class _TableParser(HTMLParser):
+    """提取 HTML 文档中第一个 <table> 的单元格"""
+
+    def __init__(self):
+        super().__init__()
+        self.rows: List[List[tuple]] = []
+        self._depth = 0
+        self._done = False
+        self._cell: Optional[List[str]] = None
+        self._is_header = False
+
+    def handle_starttag(self, tag, attrs):
+        if self._done:
+            return
+        if tag == "table":
+            self._depth += 1
+        elif self._depth == 1 and tag == "tr":
+            self.rows.append([])
+        elif self._depth == 1 and tag in ("td", "th") and self.rows:
+            self._cell = []
+            self._is_header = tag == "th"
+        elif tag == "br" and self._cell is not None:
+            self._cell.append("\n")
+
+    def handle_endtag(self, tag):
+        if self._done:
+            return
+        if tag == "table":
+            self._depth -= 1
+            if self._depth == 0 and self.rows:
+                self._done = True
+        elif self._depth == 1 and tag in ("td", "th") and self._cell is not None:
+            self.rows[-1].append((" ".join("".join(self._cell).split()), self._is_header))
+            self._cell = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def _read_html(text: str, options: Dict[str, Any]) -> Any:
+    parser = _TableParser()
+    parser.feed(text)
+    parser.close()
+
+    rows = [row for row in parser.rows if row]
+    if not rows:
+        raise NoStructuredDataError("未找到 HTML 表格")
+
+    if all(is_header for _, is_header in rows[0]):
+        header = [value for value, _ in rows[0]]
+        rows = rows[1:]
+    else:
+        header = [f"column_{i + 1}" for i in range(max(len(row) for row in rows))]
+
+    return [
+        {name: row[j][0] if j < len(row) else "" for j, name in enumerate(header)}
+        for row in rows
+    ]
+
+
+# ==================== 写出器 ====================
+
+
+def _write_json(data: Any, prettify: bool, minify: bool, options: Dict[str, Any]) -> str:
+    if minify:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+    return json.dumps(data, ensure_ascii=False, indent=2 if prettify else None, default=_json_default)
+
+
+def _write_jsonl(data: Any, prettify: bool, minify: bool, options: Dict[str, Any]) -> str:
+    items = data if isinstance(data, list) else [data]
+    return "\n".join(
+        json.dumps(item, ensure_ascii=False, default=_json_default) for item in items
+    ) + "\n"
+
+
+def _write_yaml(data: Any, prettify: bool, minify: bool, options: Dict[str, Any]) -> str:
+    return yaml.safe_dump(
+        data, allow_unicode=True, default_flow_style=False if prettify else None, sort_keys=False
+    )
+
+
+_TOML_BARE_KEY = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def _toml_key(key: Any) -> str:
+    key = str(key)
+    return key if _TOML_BARE_KEY.match(key) else json.dumps(key, ensure_ascii=False)
+
+
+def _toml_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value) if value == value else "nan"
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return "[" + ", ".join(_toml_value(v) for v in value) + "]"
+    if isinstance(value, dict):
+        pairs = ", ".join(
+            f"{_toml_key(k)} = {_toml_value(v)}" for k, v in value.items() if v is not None
+        )
+        return "{" + pairs + "}"
+    if value is None:
+        return '""'  # TOML 没有 null
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+def _is_table_array(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(v, dict) for v in value)
+
+
+def _write_toml_table(lines: List[str], table: Dict[str, Any], path: List[str], header: Optional[str]):
+    scalars = [
+        (k, v) for k, v in table.items()
+        if v is not None and not isinstance(v, dict) and not _is_table_array(v)
+    ]
+    tables = [(k, v) for k, v in table.items() if isinstance(v, dict)]
+    arrays = [(k, v) for k, v in table.items() if _is_table_array(v)]
+
+    if header and (scalars or not (tables or arrays)):
+        lines.append(header)
+    for key, value in scalars:
+        lines.append(f"{_toml_key(key)} = {_toml_value(value)}")
+
+    for key, value in tables:
+        sub_path = path + [_toml_key(key)]
+        if lines:
+            lines.append("")
+        _write_toml_table(lines, value, sub_path, f"[{'.'.join(sub_path)}]")
+
+    for key, items in arrays:
+        sub_path = path + [_toml_key(key)]
+        for item in items:
+            if lines:
+                lines.append("")
+            lines.append(f"[[{'.'.join(sub_path)}]]")
+            _write_toml_table(lines, item, sub_path, None)
+
+
+def _write_toml(data: Any, prettify: bool, minify: bool, options: Dict[str, Any]) -> str:
+    if not isinstance(data, dict):
+        data = {"items": data}  # TOML 顶层必须是表
+    lines: List[str] = []
+    _write_toml_table(lines, data, [], None)
+    return "\n".join(lines) + "\n"
+
+
+_XML_INVALID = re.compile(r"[^A-Za-z0-9_.\-]")
+
+
+def _xml_tag(key: Any) -> str:
+    tag = _XML_INVALID.sub("_", str(key)) or "_"
+    return tag if re.match(r"[A-Za-z_]", tag) else f"_{tag}"
+
+
+def _build_xml(parent: ElementTree.Element, key: Any, value: Any):
+    if isinstance(value, list):
+        for item in value:
+            _build_xml(parent, key, item)
+        return
+
+    element = ElementTree.SubElement(parent, _xml_tag(key))
+    if isinstance(value, dict):
+        for k, v in value.items():
+            k = str(k)
+            if k.startswith("@"):
+                element.set(_xml_tag(k[1:]), _cell(v))
+            elif k == "#text":
+                element.text = _cell(v)
+            else:
+                _build_xml(element, k, v)
+    elif value is not None:
+        element.text = _cell(value)
+
+
+def _write_xml(data: Any, prettify: bool, minify: bool, options: Dict[str, Any]) -> str:
+    if isinstance(data, dict) and len(data) == 1 and not isinstance(next(iter(data.values())), list):
+        (key, value), = data.items()
+        wrapper = ElementTree.Element("_")
+        _build_xml(wrapper, key, value)
+        root = wrapper[0]
+    else:
+        root = ElementTree.Element(options.get("root", "root"))
+        if isinstance(data, dict):
+            for key, value in data.items():
+                _build_xml(root, key, value)
+        else:
+            _build_xml(root, "item", data)
+
+    if prettify and not minify:
+        ElementTree.indent(root)
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ElementTree.tostring(root, encoding="unicode")
+
+
+def _write_csv(data: Any, prettify: bool, minify: bool, options: Dict[str, Any]) -> str:
+    rows = to_rows(data)
+    output = io.StringIO()
+    if rows:
+        writer = csv.DictWriter(
+            output, fieldnames=_fieldnames(rows), delimiter=options.get("delimiter", ",")
+        )
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({str(k): _cell(v) for k, v in row.items()})
+    return output.getvalue()
+
+
+def _write_markdown(data: Any, prettify: bool, minify: bool, options: Dict[str, Any]) -> str:
+    rows = to_rows(data)
+    names = _fieldnames(rows)
+    if not names:
+        return ""
+
+    def md_cell(value: Any) -> str:
+        return _cell(value).replace("|", "\\|").replace("\n", "<br>")
+
+    lines = [
+        "| " + " | ".join(md_cell(n) for n in names) + " |",
+        "| " + " | ".join("---" for _ in names) + " |",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(md_cell(row.get(n)) for n in names) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def _write_html(data: Any, prettify: bool, minify: bool, options: Dict[str, Any]) -> str:
+    rows = to_rows(data)
+    names = _fieldnames(rows)
+    nl, i1, i2 = ("", "", "") if minify else ("\n", "  ", "    ")
+
+    def cells(tag: str, values: List[Any]) -> str:
+        return "".join(f"<{tag}>{html.escape(_cell(v))}</{tag}>" for v in values)
+
+    parts = [
+        "<table>",
+        f"{i1}<thead>",
+        f"{i2}<tr>{cells('th', names)}</tr>",
+        f"{i1}</thead>",
+        f"{i1}<tbody>",
+    ]
+    for row in rows:
+        parts.append(f"{i2}<tr>{cells('td', [row.get(n) for n in names])}</tr>")
+    parts += [f"{i1}</tbody>", "</table>"]
+    return nl.join(parts) + nl
+
+
+READERS: Dict[str, Callable[[str, Dict[str, Any]], Any]] = {
+    "json": _read_json,
+    "jsonl": _read_jsonl,
+    "yaml": _read_yaml,
+    "toml": _read_toml,
+    "xml": _read_xml,
+    "csv": _read_csv,
+    "markdown": _read_markdown,
+    "html": _read_html,
+}
+
+WRITERS: Dict[str, Callable[[Any, bool, bool, Dict[str, Any]], str]] = {
+    "json": _write_json,
+    "jsonl": _write_jsonl,
+    "yaml": _write_yaml,
+    "toml": _write_toml,
+    "xml": _write_xml,
+    "csv": _write_csv,
+    "markdown": _write_markdown,
+    "html": _write_html,
+}
+
+
+def is_supported(from_format: str, to_format: str) -> bool:
+    """是否存在确定性转换"""
+    return from_format in READERS and to_format in WRITERS
+
+
+def convert(
+    text: str,
+    from_format: str,
+    to_format: str,
+    prettify: bool = True,
+    minify: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    确定性格式转换（读取器 → 写出器）
+
+    Raises:
+        NoStructuredDataError: 输入不含可转换的结构化数据（调用方可回退到 LLM）
+        ValueError: 格式组合不支持，或输入无法按 from_format 解析
+    """
+    options = options or {}
+    if not is_supported(from_format, to_format):
+        raise ValueError(f"不支持的格式转换: {from_format} → {to_format}")
+
+    try:
+        data = READERS[from_format](text, options)
+    except ValueError:
+        raise
+    except Exception as e:  # yaml.YAMLError / ElementTree.ParseError / csv.Error
+        raise ValueError(f"{from_format} 解析失败: {e}") from e
+
+    return WRITERS[to_format](data, prettify, minify, options)
+
+
+# ==================== 格式嗅探 ====================
+
+_MD_TABLE = re.compile(r"^\s*\|?.*\|.*\n\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$", re.MULTILINE)
+_HTML_MARKERS = re.compile(r"<(html|body|table|div|p|span|h[1-6]|ul|ol|br)\b", re.IGNORECASE)
+_TOML_LINE = re.compile(r"^\s*(\[\[?[^\]]+\]\]?|[A-Za-z0-9_.\"'-]+\s*=\s*.+)\s*$")
+
+
+def _parses(reader: Callable[[str, Dict[str, Any]], Any], text: str) -> Any:
+    try:
+        return reader(text, {})
+    except Exception:
+        return None
+
+
+def sniff_format(text: str) -> Optional[str]:
+    """
+    嗅探输入格式
+
+    Returns:
+        READERS 中的格式名；无法识别返回 None
+    """
+    stripped = text.strip()
+    if not stripped:
+        return None
+
+    if stripped.startswith("<"):
+        if _HTML_MARKERS.search(stripped[:2048]) and not stripped.startswith("<?xml"):
+            return "html"
+        return "xml" if _parses(_read_xml, stripped) is not None else "html"
+
+    if stripped[0] in "[{\"" or stripped[0].isdigit():
+        try:
+            json.loads(stripped)
+            return "json"
+        except ValueError:
+            pass
+        lines = [line for line in stripped.splitlines() if line.strip()]
+        if len(lines) > 1 and all(line.lstrip().startswith(("{", "[")) for line in lines):
+            if _parses(_read_jsonl, stripped) is not None:
+                return "jsonl"
+
+    if _MD_TABLE.search(stripped):
+        return "markdown"
+
+    lines = [line for line in stripped.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    if lines and all(_TOML_LINE.match(line) for line in lines):
+        if _parses(_read_toml, stripped) is not None:
+            return "toml"
+
+    yaml_data = _parses(_read_yaml, stripped)
+    if isinstance(yaml_data, (dict, list)):
+        return "yaml"
+
+    sample = stripped.splitlines()[:20]
+    if len(sample) > 1:
+        for delimiter in (",", "\t", ";"):
+            counts = {line.count(delimiter) for line in sample}
+            if len(counts) == 1 and counts.pop() > 0:
+                return "csv"
+
+    if _HTML_MARKERS.search(stripped[:2048]):
+        return "html"
+    return "markdown"
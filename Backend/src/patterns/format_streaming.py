@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+# MacCortex - Proprietary and Confidential
+
+"""
+MacCortex Backend - Streaming Format Converters
+Phase 5 - FormatPattern 流式转换
+创建时间: 2026-10-19
+
+恒定内存的 CSV ↔ JSON 转换器
+
+输入和输出都是字符串块迭代器：逐行读取 CSV / 逐元素解析 JSON 数组，
+逐行写出结果，不构建完整的中间对象列表，峰值内存与输入大小无关。
+"""
+
+import csv
+import io
+import json
+import textwrap
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator, List, Optional
+
+# 输入切块 / 输出缓冲大小（字符）
+CHUNK_CHARS = 64 * 1024
+
+# JSON → CSV 表头推断采样行数
+SCHEMA_SAMPLE_ROWS = 100
+
+_JSON_WHITESPACE = " \t\r\n"
+
+
+def iter_text_chunks(text: str, chunk_chars: int = CHUNK_CHARS) -> Iterator[str]:
+    """将字符串切分为块（便于复用同一套流式转换器）"""
+    for start in range(0, len(text), chunk_chars):
+        yield text[start:start + chunk_chars]
+
+
+def _iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """将字符串块迭代器转换为行迭代器（保留行尾）"""
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).split("\n")
+        # 最后一段可能不完整，留到下一块
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if pending:
+        yield pending
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """
+    增量解析 JSON 数组，逐个产出元素
+
+    顶层为单个对象时视为只有一个元素（与旧版 _json_to_csv 行为一致）。
+
+    Raises:
+        ValueError: JSON 无效或不完整
+    """
+    decoder = json.JSONDecoder()
+    chunk_iter = iter(chunks)
+    buf, pos = "", 0
+    started = exhausted = False
+
+    def read_more() -> bool:
+        nonlocal buf, pos, exhausted
+        chunk = next(chunk_iter, None)
+        if chunk is None:
+            exhausted = True
+            return False
+        buf, pos = buf[pos:] + chunk, 0
+        return True
+
+    while True:
+        while pos < len(buf) and buf[pos] in _JSON_WHITESPACE:
+            pos += 1
+
+        if pos >= len(buf):
+            if exhausted or not read_more():
+                if started:
+                    raise ValueError("JSON 数组不完整")
+                return
+            continue
+
+        if not started:
+            if buf[pos] == "[":
+                started = True
+                pos += 1
+                continue
+            # 非数组：读取全部内容后整体解析
+            while read_more():
+                pass
+            yield json.loads(buf[pos:])
+            return
+
+        if buf[pos] == "]":
+            return
+        if buf[pos] == ",":
+            pos += 1
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            if exhausted or not read_more():
+                raise ValueError(f"JSON 解析失败: {e}") from e
+            continue
+
+        # 元素紧贴缓冲区末尾时（如数字 12|3）无法确定已结束，先读取更多
+        if end >= len(buf) and not exhausted and read_more():
+            continue
+
+        yield value
+        pos = end
+
+
+def iter_csv_to_json(
+    chunks: Iterable[str],
+    delimiter: str = ",",
+    indent: Optional[int] = 2,
+) -> Iterator[str]:
+    """
+    CSV → JSON 数组（流式）
+
+    输出与 json.dumps(list(csv.DictReader(...)), indent=indent) 一致。
+    """
+    reader = csv.reader(_iter_lines(chunks), delimiter=delimiter)
+    header = next(reader, None)
+
+    separator = ",\n" if indent is not None else ","
+    if indent is None:
+        dumps_kwargs = {"separators": (",", ":")}
+    else:
+        dumps_kwargs = {"indent": indent}
+
+    first = True
+    for row in reader:
+        if not row:
+            continue  # 与 DictReader 一致：跳过空行
+
+        # 与 DictReader 一致：缺失列为 None，多余列放在 None 键下
+        record = dict(zip(header, row))
+        if len(row) < len(header):
+            record.update((key, None) for key in header[len(row):])
+        elif len(row) > len(header):
+            record[None] = row[len(header):]
+
+        piece = json.dumps(record, ensure_ascii=False, **dumps_kwargs)
+        if indent is not None:
+            piece = textwrap.indent(piece, " " * indent)
+
+        if first:
+            yield "[\n" + piece if indent is not None else "[" + piece
+            first = False
+        else:
+            yield separator + piece
+
+    if first:
+        yield "[]"
+    else:
+        yield "\n]" if indent is not None else "]"
+
+
+def iter_json_to_csv(
+    chunks: Iterable[str],
+    delimiter: str = ",",
+    sample_rows: int = SCHEMA_SAMPLE_ROWS,
+) -> Iterator[str]:
+    """
+    JSON 数组 → CSV（流式）
+
+    表头由前 sample_rows 行的键按出现顺序合并得到；之后出现的新键会被忽略。
+
+    Raises:
+        ValueError: 元素不是 JSON 对象
+    """
+    rows = iter_json_array(chunks)
+    head = list(islice(rows, sample_rows))
+    if not head:
+        return
+
+    fieldnames: List[str] = []
+    for row in head:
+        if not isinstance(row, dict):
+            raise ValueError("JSON → CSV 要求数组元素为对象")
+        fieldnames.extend(key for key in row if key not in fieldnames)
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(
+        buffer, fieldnames=fieldnames, delimiter=delimiter, extrasaction="ignore"
+    )
+    writer.writeheader()
+
+    for row in chain(head, rows):
+        if not isinstance(row, dict):
+            raise ValueError("JSON → CSV 要求数组元素为对象")
+        writer.writerow(row)
+
+        if buffer.tell() >= CHUNK_CHARS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+# MacCortex - Proprietary and Confidential
+
+"""
+MacCortex Backend - Pattern Manifest
+Phase 5
+创建时间: 2026-10-19
+
+Pattern 清单：无需导入实现即可获得的元数据（ID、名称、描述、参数白名单）
+
+- BUILTIN_PATTERNS: 内置 Pattern
+- 插件: 通过 entry point 组 "maccortex.patterns" 发布 PatternSpec（或其列表），
+  例如 pyproject.toml 中:
+
+      [project.entry-points."maccortex.patterns"]
+      outline = "my_plugin.manifest:OUTLINE_SPEC"
+
+  entry point 指向的模块只需定义 PatternSpec，实现模块在首次执行时才导入。
+"""
+
+import importlib
+from dataclasses import dataclass, field
+from importlib.metadata import entry_points
+from typing import Any, Dict, List, Mapping, Tuple, Type
+
+from loguru import logger
+
+from security.input_validator import InputValidator
+
+ENTRY_POINT_GROUP = "maccortex.patterns"
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object"}
+
+
+@dataclass(frozen=True)
+class PatternSpec:
+    """Pattern 元数据 + 实现位置（"module:Class"）"""
+
+    pattern_id: str
+    name: str
+    description: str
+    target: str
+    version: str = "1.0.0"
+    parameters: Mapping[str, Any] = field(default_factory=dict)  # 与 InputValidator 白名单格式相同
+    streaming: bool = False  # 是否提供 execute_stream
+    # 给定其中任一参数时执行会修改服务端状态（如增量总结会话），结果不可缓存
+    stateful_parameters: Tuple[str, ...] = ()
+
+    def is_cacheable(self, parameters: Mapping[str, Any]) -> bool:
+        """相同输入与参数的结果能否复用（不修改服务端状态）"""
+        return not any(parameters.get(name) for name in self.stateful_parameters)
+
+    def load(self) -> Type:
+        """导入实现类"""
+        module_name, _, attribute = self.target.partition(":")
+        if not attribute:
+            raise ValueError(f"Pattern '{self.pattern_id}' 的 target 格式应为 'module:Class': {self.target}")
+        return getattr(importlib.import_module(module_name), attribute)
+
+    def parameter_schema(self) -> Dict[str, Dict[str, Any]]:
+        """参数白名单 → JSON 可序列化的描述（枚举值或类型）"""
+        schema = {}
+        for key, allowed in self.parameters.items():
+            if isinstance(allowed, type):
+                schema[key] = {"type": _JSON_TYPES.get(allowed, allowed.__name__)}
+            else:
+                schema[key] = {"enum": list(allowed)}
+        return schema
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.pattern_id,
+            "name": self.name,
+            "description": self.description,
+            "version": self.version,
+            "parameters": self.parameter_schema(),
+            "streaming": self.streaming,
+        }
+
+
+def _builtin(pattern_id: str, name: str, description: str, target: str, **kwargs) -> PatternSpec:
+    return PatternSpec(
+        pattern_id=pattern_id,
+        name=name,
+        description=description,
+        target=target,
+        parameters=InputValidator.ALLOWED_PARAMETERS.get(pattern_id, {}),
+        **kwargs,
+    )
+
+
+BUILTIN_PATTERNS: List[PatternSpec] = [
+    _builtin(
+        "summarize", "Summarize", "Summarize long text into concise key points",
+        "patterns.summarize:SummarizePattern", stateful_parameters=("session_id", "reset"),
+    ),
+    _builtin(
+        "extract", "Extract", "从文本中提取结构化信息（实体、关键词、联系方式等）",
+        "patterns.extract:ExtractPattern",
+    ),
+    _builtin(
+        "translate", "Translate", "多语言翻译（支持中英日韩法德西等）",
+        "patterns.translate:TranslatePattern", streaming=True,
+    ),
+    _builtin(
+        "format", "Format", "格式转换（JSON/YAML/Markdown/HTML/CSV 等）",
+        "patterns.format:FormatPattern", streaming=True,
+    ),
+    _builtin(
+        "search", "Search", "Web 搜索 + 语义搜索（本地知识库查询）",
+        "patterns.search:SearchPattern",
+    ),
+    _builtin(
+        "embed", "Embed", "文本嵌入（批量合并 + 内容哈希缓存，float32 紧凑编码）",
+        "patterns.embed:EmbedPattern",
+    ),
+]
+
+
+def discover_patterns(include_entry_points: bool = True) -> List[PatternSpec]:
+    """
+    收集 Pattern 清单（内置 + entry point 插件），不导入任何实现模块
+
+    插件与内置 Pattern ID 冲突时忽略插件并告警。
+    """
+    specs = list(BUILTIN_PATTERNS)
+    if not include_entry_points:
+        return specs
+
+    known = {spec.pattern_id for spec in specs}
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            loaded = entry_point.load()
+        except Exception as e:
+            logger.warning(f"加载 Pattern 插件清单失败 ({entry_point.name}): {e}")
+            continue
+        for spec in loaded if isinstance(loaded, (list, tuple)) else [loaded]:
+            if not isinstance(spec, PatternSpec):
+                logger.warning(f"Pattern 插件 {entry_point.name} 未提供 PatternSpec，已忽略")
+            elif spec.pattern_id in known:
+                logger.warning(f"Pattern 插件 {entry_point.name} 的 ID '{spec.pattern_id}' 已存在，已忽略")
+            else:
+                known.add(spec.pattern_id)
+                specs.append(spec)
+    return specs
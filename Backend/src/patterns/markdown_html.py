@@ -0,0 +1,756 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+# MacCortex - Proprietary and Confidential
+
+"""
+MacCortex Backend - Markdown ↔ HTML Converter
+Phase 5 - FormatPattern 单遍 Markdown / HTML 转换
+创建时间: 2026-10-19
+
+替代旧版逐条 re.sub 的简化转换（每条规则都复制一次全文，且无法处理嵌套）：
+
+- markdown_to_html: 逐行块级扫描（标题、代码围栏、引用、嵌套列表、表格、分隔线、段落）
+  + 逐字符行内扫描（代码、强调、链接、图片），强调与链接用分隔符栈配对
+- html_to_markdown: 基于 html.parser 的事件流，元素栈逐层渲染
+
+均为线性复杂度，不依赖第三方库。
+"""
+
+import html
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+# ==================== Markdown → HTML ====================
+
+_ATX_HEADING = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_FENCE = re.compile(r"^( {0,3})(`{3,}|~{3,})[ \t]*([^`\s]*)")
+_HR = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_LIST_ITEM = re.compile(r"^( *)([-*+]|\d{1,9}[.)])(?:[ \t]+|$)")
+_BLOCKQUOTE = re.compile(r"^ {0,3}> ?")
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+
+_UNSAFE_SCHEMES = ("javascript:", "vbscript:", "data:")
+
+# 行内扫描时可能开始一个标记的字符；其余字符整段跳过
+_INLINE_SPECIAL = re.compile(r"[\\\n`*_~!\[\]<]")
+_PAREN_OR_NEWLINE = re.compile(r"[()\n]")
+
+
+def _escape(text: str) -> str:
+    return html.escape(text, quote=False)
+
+
+def _safe_url(url: str) -> str:
+    """过滤危险协议（javascript: 等），返回转义后的属性值"""
+    compact = re.sub(r"[\s\x00-\x1f]", "", url).lower()
+    if compact.startswith(_UNSAFE_SCHEMES) and not compact.startswith("data:image/"):
+        url = "#"
+    return html.escape(url, quote=True)
+
+
+def _render_inline(text: str) -> str:
+    """
+    行内 Markdown → HTML（单遍扫描）
+
+    tokens 保存输出片段；强调 / 链接的开符号先作为字面文本入栈，
+    遇到匹配的闭符号时原地替换为标签，未匹配的开符号保持字面文本。
+
+    每种分隔符（*、**、_、__、~~、[、![）各有一个开符号栈，闭符号直接取对应栈顶，
+    不必向回扫描其他分隔符。开符号带递增序号；配对后序号更大（位于其内部）
+    的开符号从所有栈中弹出，每个开符号至多入栈、出栈各一次。
+    """
+    tokens: List[str] = []
+    openers: Dict[str, List[Tuple[int, int]]] = {}  # 分隔符 → [(序号, tokens 下标)]
+    seq = 0
+    n = len(text)
+    i = 0
+    plain_start = 0
+    parens: Optional[Dict[int, int]] = None  # "(" 下标 → 匹配的 ")" 下标（首次遇到 "](" 时计算）
+
+    def flush(end: int):
+        if end > plain_start:
+            tokens.append(_escape(text[plain_start:end]))
+
+    def push(delim: str):
+        nonlocal seq
+        openers.setdefault(delim, []).append((seq, len(tokens)))
+        seq += 1
+        tokens.append(delim)
+
+    def discard_from(opener_seq: int):
+        """弹出序号不小于 opener_seq 的开符号（已配对的开符号及其内部未配对的开符号）"""
+        for stack in openers.values():
+            while stack and stack[-1][0] >= opener_seq:
+                stack.pop()
+
+    while i < n:
+        ch = text[i]
+
+        if ch not in "\\\n`*_~![]<":
+            special = _INLINE_SPECIAL.search(text, i)
+            i = special.start() if special else n
+            continue
+
+        if ch == "\\" and i + 1 < n and text[i + 1] in "\\`*_{}[]()#+-.!|<>~":
+            flush(i)
+            tokens.append(_escape(text[i + 1]))
+            i += 2
+            plain_start = i
+            continue
+
+        if ch == "\\" and i + 1 < n and text[i + 1] == "\n":
+            flush(i)
+            tokens.append("<br />\n")
+            i += 2
+            plain_start = i
+            continue
+
+        if ch == "\n":
+            flush(i)
+            # 行尾两个以上空格为硬换行
+            if tokens and tokens[-1].endswith("  "):
+                tokens[-1] = tokens[-1].rstrip(" ")
+                tokens.append("<br />\n")
+            else:
+                tokens.append("\n")
+            i += 1
+            plain_start = i
+            continue
+
+        if ch == "`":
+            run = 1
+            while i + run < n and text[i + run] == "`":
+                run += 1
+            close = text.find("`" * run, i + run)
+            while close != -1 and close + run < n and text[close + run] == "`":
+                close = text.find("`" * run, close + run + 1)
+            if close != -1:
+                flush(i)
+                code = text[i + run:close].replace("\n", " ")
+                if code.startswith(" ") and code.endswith(" ") and code.strip():
+                    code = code[1:-1]
+                tokens.append(f"<code>{_escape(code)}</code>")
+                i = close + run
+                plain_start = i
+                continue
+            i += run
+            continue
+
+        if ch in "*_~":
+            run = 1
+            while i + run < n and text[i + run] == ch:
+                run += 1
+            before = text[i - 1] if i > 0 else " "
+            after = text[i + run] if i + run < n else " "
+            if ch == "_" and before.isalnum() and after.isalnum():
+                i += run  # snake_case 中的下划线不是强调
+                continue
+            if ch == "~" and run != 2:
+                i += run
+                continue
+
+            flush(i)
+            can_open = not after.isspace()
+            can_close = not before.isspace()
+            remaining = run
+            while remaining:
+                size = 2 if remaining >= 2 else 1
+                delim = ch * size
+                stack = openers.get(delim)
+                if can_close and stack:
+                    opener_seq, index = stack[-1]
+                    discard_from(opener_seq)
+                    tag = "del" if ch == "~" else ("strong" if size == 2 else "em")
+                    tokens[index] = f"<{tag}>"
+                    tokens.append(f"</{tag}>")
+                elif can_open:
+                    push(delim)
+                else:
+                    tokens.append(delim)
+                remaining -= size
+            i += run
+            plain_start = i
+            continue
+
+        if ch == "!" and i + 1 < n and text[i + 1] == "[":
+            flush(i)
+            push("![")
+            i += 2
+            plain_start = i
+            continue
+
+        if ch == "[":
+            flush(i)
+            push("[")
+            i += 1
+            plain_start = i
+            continue
+
+        if ch == "]":
+            flush(i)
+            brackets = [(openers[kind][-1], kind) for kind in ("[", "![") if openers.get(kind)]
+            end = -1
+            if brackets and i + 1 < n and text[i + 1] == "(":
+                if parens is None:
+                    parens = _match_parens(text)
+                end = parens.get(i + 1, -1)
+            if end != -1:
+                (opener_seq, index), kind = max(brackets)
+                discard_from(opener_seq)
+                target = text[i + 2:end].strip()
+                url, _, title = target.partition(" ")
+                url = url.strip("<>")
+                title = title.strip().strip("\"'")
+                title_attr = f' title="{html.escape(title)}"' if title else ""
+                if kind == "![":
+                    alt = re.sub(r"<[^>]+>", "", "".join(tokens[index + 1:]))
+                    del tokens[index:]
+                    tokens.append(f'<img src="{_safe_url(url)}" alt="{html.escape(alt, quote=True)}"{title_attr} />')
+                else:
+                    tokens[index] = f'<a href="{_safe_url(url)}"{title_attr}>'
+                    tokens.append("</a>")
+                i = end + 1
+            else:
+                tokens.append("]")
+                i += 1
+            plain_start = i
+            continue
+
+        if ch == "<":
+            end = text.find(">", i + 1)
+            candidate = text[i + 1:end] if end != -1 else ""
+            if candidate and re.match(r"^(https?://|mailto:)[^\s<>]+$", candidate):
+                flush(i)
+                href = _safe_url(candidate)
+                tokens.append(f'<a href="{href}">{_escape(candidate)}</a>')
+                i = end + 1
+                plain_start = i
+                continue
+
+        i += 1
+
+    flush(n)
+    return "".join(tokens)
+
+
+def _match_parens(text: str) -> Dict[int, int]:
+    """
+    单遍匹配同一行内的括号（允许 URL 中的成对括号）
+
+    Returns:
+        "(" 下标 → 匹配的 ")" 下标；行尾仍未闭合的 "(" 不在其中
+    """
+    matches: Dict[int, int] = {}
+    stack: List[int] = []
+    for match in _PAREN_OR_NEWLINE.finditer(text):
+        j, ch = match.start(), match.group()
+        if ch == "(":
+            stack.append(j)
+        elif ch == ")":
+            if stack:
+                matches[stack.pop()] = j
+        elif ch == "\n":
+            stack.clear()
+    return matches
+
+
+def _split_table_row(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip() for cell in re.split(r"(?<!\\)\|", line)]
+
+
+def _table_alignments(separator: str) -> List[Optional[str]]:
+    aligns = []
+    for cell in _split_table_row(separator):
+        left, right = cell.startswith(":"), cell.endswith(":")
+        aligns.append("center" if left and right else "right" if right else "left" if left else None)
+    return aligns
+
+
+class _BlockParser:
+    """块级解析器：逐行扫描，每行只被消费一次（嵌套容器按剥离前缀后的行递归）"""
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.pos = 0
+        self.out: List[str] = []
+
+    def parse(self, tight: bool = False) -> str:
+        lines, out = self.lines, self.out
+        paragraph: List[str] = []
+
+        def close_paragraph():
+            if paragraph:
+                content = _render_inline("\n".join(line.lstrip() for line in paragraph).rstrip())
+                # 紧凑列表项中的段落不加 <p>
+                out.append(content if tight else f"<p>{content}</p>")
+                paragraph.clear()
+
+        while self.pos < len(lines):
+            line = lines[self.pos]
+
+            if not line.strip():
+                close_paragraph()
+                self.pos += 1
+                continue
+
+            fence = _FENCE.match(line)
+            if fence:
+                close_paragraph()
+                self._fenced_code(fence)
+                continue
+
+            heading = _ATX_HEADING.match(line)
+            if heading:
+                close_paragraph()
+                level = len(heading.group(1))
+                out.append(f"<h{level}>{_render_inline((heading.group(2) or '').strip())}</h{level}>")
+                self.pos += 1
+                continue
+
+            if _HR.match(line):
+                close_paragraph()
+                out.append("<hr />")
+                self.pos += 1
+                continue
+
+            if _BLOCKQUOTE.match(line):
+                close_paragraph()
+                self._blockquote()
+                continue
+
+            item = _LIST_ITEM.match(line)
+            if item and (not paragraph or item.group(2) in "-*+" or item.group(2).startswith("1")):
+                close_paragraph()
+                self._list(len(item.group(1)))
+                continue
+
+            if (
+                "|" in line
+                and self.pos + 1 < len(lines)
+                and "-" in lines[self.pos + 1]
+                and _TABLE_SEPARATOR.match(lines[self.pos + 1])
+            ):
+                close_paragraph()
+                self._table()
+                continue
+
+            paragraph.append(line)
+            self.pos += 1
+
+        close_paragraph()
+        return "\n".join(out)
+
+    def _fenced_code(self, fence: "re.Match"):
+        indent, marker, info = len(fence.group(1)), fence.group(2), fence.group(3)
+        self.pos += 1
+        body: List[str] = []
+        while self.pos < len(self.lines):
+            line = self.lines[self.pos]
+            self.pos += 1
+            stripped = line.strip()
+            if stripped.startswith(marker[0] * len(marker)) and not stripped.strip(marker[0]):
+                break
+            strip = len(line) - len(line.lstrip(" "))
+            body.append(line[min(indent, strip):])
+        lang = f' class="language-{html.escape(info, quote=True)}"' if info else ""
+        code = _escape("\n".join(body))
+        self.out.append(f"<pre><code{lang}>{code}\n</code></pre>" if body else f"<pre><code{lang}></code></pre>")
+
+    def _blockquote(self):
+        inner: List[str] = []
+        while self.pos < len(self.lines):
+            line = self.lines[self.pos]
+            match = _BLOCKQUOTE.match(line)
+            if match:
+                inner.append(line[match.end():])
+            elif line.strip() and inner and inner[-1].strip():
+                inner.append(line)  # 惰性续行
+            else:
+                break
+            self.pos += 1
+        content = _BlockParser(inner).parse()
+        self.out.append(f"<blockquote>\n{content}\n</blockquote>")
+
+    def _list(self, base_indent: int):
+        first = _LIST_ITEM.match(self.lines[self.pos])
+        ordered = first.group(2)[0].isdigit()
+        tag = "ol" if ordered else "ul"
+        start = int(first.group(2)[:-1]) if ordered else 1
+        items: List[List[str]] = []
+        loose = False
+
+        while self.pos < len(self.lines):
+            line = self.lines[self.pos]
+            item = _LIST_ITEM.match(line)
+            if (
+                not item
+                or len(item.group(1)) != base_indent
+                or item.group(2)[0].isdigit() != ordered
+            ):
+                break
+
+            content_indent = item.end() if line[item.end():].strip() else len(item.group(0).rstrip()) + 1
+            body = [line[item.end():]]
+            self.pos += 1
+            blank_pending = False
+
+            while self.pos < len(self.lines):
+                line = self.lines[self.pos]
+                if not line.strip():
+                    blank_pending = True
+                    body.append("")
+                    self.pos += 1
+                    continue
+                indent = len(line) - len(line.lstrip(" "))
+                if indent >= content_indent:
+                    if blank_pending and len([b for b in body if b.strip()]) and not _LIST_ITEM.match(line[content_indent:]):
+                        loose = True
+                    body.append(line[content_indent:])
+                elif not blank_pending and indent > base_indent and _LIST_ITEM.match(line):
+                    body.append(line[min(indent, content_indent):])  # 缩进不足的子列表
+                elif not blank_pending and not _LIST_ITEM.match(line) and not _starts_block(line):
+                    body.append(line.strip())  # 惰性续行
+                else:
+                    break
+                blank_pending = False
+                self.pos += 1
+
+            while body and not body[-1].strip():
+                body.pop()
+            if blank_pending and self.pos < len(self.lines):
+                nxt = _LIST_ITEM.match(self.lines[self.pos])
+                if nxt and len(nxt.group(1)) == base_indent and nxt.group(2)[0].isdigit() == ordered:
+                    loose = True
+            items.append(body)
+
+        start_attr = f' start="{start}"' if ordered and start != 1 else ""
+        rendered = []
+        for body in items:
+            content = _BlockParser(body).parse(tight=not loose)
+            rendered.append(f"<li>{content}</li>")
+        self.out.append(f"<{tag}{start_attr}>\n" + "\n".join(rendered) + f"\n</{tag}>")
+
+    def _table(self):
+        header = _split_table_row(self.lines[self.pos])
+        aligns = _table_alignments(self.lines[self.pos + 1])
+        self.pos += 2
+
+        def cells(tag: str, row: List[str]) -> str:
+            parts = []
+            for j in range(len(header)):
+                value = row[j] if j < len(row) else ""
+                align = aligns[j] if j < len(aligns) else None
+                style = f' style="text-align: {align}"' if align else ""
+                parts.append(f"<{tag}{style}>{_render_inline(value.replace(chr(92) + '|', '|'))}</{tag}>")
+            return "<tr>" + "".join(parts) + "</tr>"
+
+        body = []
+        while self.pos < len(self.lines):
+            line = self.lines[self.pos]
+            if not line.strip() or "|" not in line:
+                break
+            body.append(cells("td", _split_table_row(line)))
+            self.pos += 1
+
+        parts = ["<table>", "<thead>", cells("th", header), "</thead>"]
+        if body:
+            parts += ["<tbody>", *body, "</tbody>"]
+        parts.append("</table>")
+        self.out.append("\n".join(parts))
+
+
+def _starts_block(line: str) -> bool:
+    return bool(
+        _FENCE.match(line) or _ATX_HEADING.match(line) or _HR.match(line) or _BLOCKQUOTE.match(line)
+    )
+
+
+def markdown_to_html(text: str) -> str:
+    """
+    Markdown → HTML
+
+    支持：ATX 标题、段落、硬换行、强调 / 粗体 / 删除线、行内代码、链接、图片、
+    自动链接、代码围栏（含语言）、引用（可嵌套）、有序 / 无序列表（可嵌套）、
+    GFM 表格（含对齐）、分隔线。原始 HTML 一律转义。
+    """
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").expandtabs(4).split("\n")
+    return _BlockParser(lines).parse()
+
+
+# ==================== HTML → Markdown ====================
+
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "header", "footer", "main", "nav", "aside",
+    "figure", "figcaption", "address", "details", "summary", "dl", "dt", "dd",
+}
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+_SKIP_TAGS = {"script", "style", "head", "title", "template", "noscript"}
+_VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "wbr", "col", "source"}
+# 遇到这些开始标签时隐式关闭同名未闭合元素
+_AUTO_CLOSE = {"li": {"li"}, "p": {"p"}, "tr": {"tr", "td", "th"}, "td": {"td", "th"}, "th": {"td", "th"}}
+_MD_ESCAPE = re.compile(r"([\\`*\[\]])")
+_HARD_BREAK = "\x00BR\x00"
+
+
+class _Frame:
+    __slots__ = ("tag", "attrs", "parts", "rows", "cells")
+
+    def __init__(self, tag: str, attrs: Dict[str, Optional[str]]):
+        self.tag = tag
+        self.attrs = attrs
+        self.parts: List[str] = []
+        self.rows: List[List[str]] = []
+        self.cells: List[str] = []
+
+
+class _MarkdownWriter(HTMLParser):
+    """HTML 事件流 → Markdown（元素栈，每个元素闭合时渲染一次并并入父元素）"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[_Frame] = [_Frame("#root", {})]
+        self.pre_depth = 0
+        self.code_depth = 0
+        self.skip_depth = 0
+
+    # ---- 事件处理 ----
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self.skip_depth:
+            if tag in _SKIP_TAGS:
+                self.skip_depth += 1
+            return
+        if tag in _SKIP_TAGS:
+            self.skip_depth = 1
+            return
+
+        if tag in _VOID_TAGS:
+            self._void(tag, attrs)
+            return
+
+        closes = _AUTO_CLOSE.get(tag)
+        if closes and self.stack[-1].tag in closes:
+            self._close_top()
+        elif tag in ("ul", "ol") and self.stack[-1].tag == "p":
+            self._close_top()
+
+        if tag == "pre":
+            self.pre_depth += 1
+        elif tag == "code":
+            self.code_depth += 1
+        self.stack.append(_Frame(tag, attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            if not self.skip_depth:
+                self._void(tag, dict(attrs))
+        else:
+            self.handle_starttag(tag, attrs)
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            if tag in _SKIP_TAGS:
+                self.skip_depth -= 1
+            return
+        if not any(frame.tag == tag for frame in self.stack[1:]):
+            return  # 多余的闭合标签
+        while self.stack[-1].tag != tag:
+            self._close_top()
+        self._close_top()
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.pre_depth:
+            self.stack[-1].parts.append(data)
+            return
+        text = re.sub(r"\s+", " ", data)
+        if self.code_depth:
+            self.stack[-1].parts.append(text)
+            return
+        if not text.strip():
+            parts = self.stack[-1].parts
+            if parts and not parts[-1].endswith((" ", "\n")):
+                parts.append(" ")
+            return
+        if not self.stack[-1].parts or self.stack[-1].parts[-1].endswith("\n"):
+            text = text.lstrip()
+        self.stack[-1].parts.append(_MD_ESCAPE.sub(r"\\\1", text))
+
+    def close(self):
+        super().close()
+        while len(self.stack) > 1:
+            self._close_top()
+
+    # ---- 渲染 ----
+
+    def _emit(self, text: str):
+        self.stack[-1].parts.append(text)
+
+    def _void(self, tag: str, attrs: Dict[str, Optional[str]]):
+        if tag == "br":
+            self._emit(_HARD_BREAK + "\n")
+        elif tag == "hr":
+            self._emit("\n\n---\n\n")
+        elif tag == "img":
+            alt = attrs.get("alt") or ""
+            src = attrs.get("src") or ""
+            self._emit(f"![{alt}]({src})")
+
+    def _close_top(self):
+        frame = self.stack.pop()
+        if frame.tag == "pre":
+            self.pre_depth -= 1
+        elif frame.tag == "code":
+            self.code_depth -= 1
+        inner = "".join(frame.parts)
+        parent = self.stack[-1]
+        rendered = self._render(frame, inner, parent)
+        if rendered:
+            parent.parts.append(rendered)
+
+    def _render(self, frame: _Frame, inner: str, parent: _Frame) -> str:
+        tag = frame.tag
+
+        if tag in _HEADINGS:
+            content = " ".join(inner.replace(_HARD_BREAK, "").split())
+            return f"\n\n{'#' * _HEADINGS[tag]} {content}\n\n" if content else ""
+
+        if tag in ("strong", "b"):
+            return f"**{inner.strip()}**" if inner.strip() else inner
+        if tag in ("em", "i"):
+            return f"*{inner.strip()}*" if inner.strip() else inner
+        if tag in ("del", "s", "strike"):
+            return f"~~{inner.strip()}~~" if inner.strip() else inner
+
+        if tag == "code":
+            if self.pre_depth:
+                # 代码围栏由外层 <pre> 渲染，这里只记录语言
+                lang = _language(frame.attrs.get("class"))
+                if lang:
+                    parent.attrs.setdefault("data-lang", lang)
+                return inner
+            fence = "``" if "`" in inner else "`"
+            return f"{fence}{inner}{fence}"
+
+        if tag == "pre":
+            lang = frame.attrs.get("data-lang") or _language(frame.attrs.get("class")) or ""
+            body = inner.strip("\n")
+            fence = "````" if "```" in body else "```"
+            return f"\n\n{fence}{lang}\n{body}\n{fence}\n\n"
+
+        if tag == "a":
+            href = frame.attrs.get("href")
+            text = inner.strip()
+            if not href:
+                return inner
+            title = frame.attrs.get("title")
+            title_part = f' "{title}"' if title else ""
+            return f"[{text}]({href}{title_part})"
+
+        if tag == "blockquote":
+            content = _tidy(inner).strip("\n")
+            quoted = "\n".join(f"> {line}" if line else ">" for line in content.split("\n"))
+            return f"\n\n{quoted}\n\n"
+
+        if tag in ("ul", "ol"):
+            return f"\n\n{inner.strip(chr(10))}\n\n" if parent.tag != "li" else f"\n{inner.strip(chr(10))}\n"
+
+        if tag == "li":
+            if parent.tag == "ol":
+                start = int(parent.attrs.get("start") or 1)
+                index = int(parent.attrs.get("data-count") or 0)
+                parent.attrs["data-count"] = str(index + 1)
+                marker = f"{start + index}. "
+            else:
+                marker = "- "
+            content = re.sub(r"\n{2,}", "\n", inner).strip("\n").lstrip(" ")
+            pad = " " * len(marker)
+            lines = content.split("\n")
+            body = "\n".join([marker + lines[0]] + [pad + line if line else "" for line in lines[1:]])
+            return f"\n{body}"
+
+        if tag in ("td", "th"):
+            cell = " ".join(inner.replace(_HARD_BREAK, " ").split()).replace("|", "\\|")
+            row = _nearest(self.stack, "tr")
+            if row is not None:
+                row.cells.append(cell)
+                return ""
+            return cell
+
+        if tag == "tr":
+            table = _nearest(self.stack, "table")
+            if table is not None and frame.cells:
+                table.rows.append(frame.cells)
+                return ""
+            return inner
+
+        if tag in ("thead", "tbody", "tfoot"):
+            return ""
+
+        if tag == "table":
+            return _markdown_table(frame.rows) if frame.rows else inner
+
+        if tag in _BLOCK_TAGS or tag in ("body", "html"):
+            content = inner.strip()
+            return f"\n\n{content}\n\n" if content else ""
+
+        return inner
+
+
+def _nearest(stack: List[_Frame], tag: str) -> Optional[_Frame]:
+    for frame in reversed(stack):
+        if frame.tag == tag:
+            return frame
+        if frame.tag == "table":
+            return None
+    return None
+
+
+def _language(css_class: Optional[str]) -> Optional[str]:
+    for name in (css_class or "").split():
+        for prefix in ("language-", "lang-"):
+            if name.startswith(prefix):
+                return name[len(prefix):]
+    return None
+
+
+def _markdown_table(rows: List[List[str]]) -> str:
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    lines = [
+        "| " + " | ".join(rows[0]) + " |",
+        "| " + " | ".join("---" for _ in range(width)) + " |",
+    ]
+    lines += ["| " + " | ".join(row) + " |" for row in rows[1:]]
+    return "\n\n" + "\n".join(lines) + "\n\n"
+
+
+def _tidy(markdown: str) -> str:
+    """去除行尾空白、压缩多余空行，并恢复硬换行"""
+    lines = [line.rstrip() for line in markdown.split("\n")]
+    text = re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+    return text.replace(_HARD_BREAK, "  ")
+
+
+def html_to_markdown(text: str) -> str:
+    """
+    HTML → Markdown
+
+    支持：标题、段落、换行、强调 / 粗体 / 删除线、行内代码、代码块（含语言）、
+    链接、图片、引用、有序 / 无序列表（可嵌套）、表格、分隔线；
+    script / style 等内容被丢弃，未知标签保留其文本。
+    """
+    writer = _MarkdownWriter()
+    writer.feed(text)
+    writer.close()
+    return _tidy("".join(writer.stack[0].parts)).strip()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+# MacCortex - Proprietary and Confidential
+
+"""
+MacCortex Backend - Pattern Pipeline
+Phase 5
+创建时间: 2026-10-19
+
+服务端 Pattern 流水线（如 search → summarize → translate）
+
+- 各步骤经 PatternRegistry 在进程内依次执行，上一步输出直接作为下一步输入
+  （不经客户端往返，也不重新序列化）
+- 步骤可选取上一步的结构化结果（Pattern 返回的 data 字段，如 search 的 summary / results）
+- 每一步的结果按 (pattern_id, 参数, 输入文本) 缓存，重复运行相同前缀时直接命中；
+  修改服务端状态的步骤（如带 session_id 的增量总结，见 PatternSpec.stateful_parameters）不缓存
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from patterns.registry import PatternRegistry
+
+# 可选取的上一步输入：完整输出，或结构化结果（data）中的字段
+STEP_INPUTS = ("output", "summary", "results")
+
+
+@dataclass
+class PipelineStep:
+    """流水线步骤"""
+
+    pattern_id: str
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    input: str = "output"  # 取上一步的哪部分作为输入（见 STEP_INPUTS）
+    cache: bool = True
+
+
+@dataclass
+class StepResult:
+    """单步执行结果"""
+
+    index: int
+    pattern_id: str
+    output: str
+    metadata: Dict[str, Any]
+    data: Optional[Dict[str, Any]]
+    cached: bool
+    duration_ms: float
+
+    def to_dict(self, include_output: bool = True) -> Dict[str, Any]:
+        result = {
+            "index": self.index,
+            "pattern_id": self.pattern_id,
+            "cached": self.cached,
+            "duration_ms": self.duration_ms,
+            "output_length": len(self.output),
+        }
+        if include_output:
+            result["output"] = self.output
+            result["metadata"] = self.metadata
+        return result
+
+
+class PipelineError(RuntimeError):
+    """某一步执行失败"""
+
+    def __init__(self, index: int, pattern_id: str, message: str):
+        super().__init__(f"步骤 {index} ({pattern_id}) 失败: {message}")
+        self.index = index
+        self.pattern_id = pattern_id
+
+
+class StepCache:
+    """
+    步骤结果缓存（LRU + TTL）
+
+    键为 (pattern_id, 参数, 输入文本) 的哈希；只缓存成功的结果。
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(pattern_id: str, parameters: Dict[str, Any], text: str) -> str:
+        payload = json.dumps([pattern_id, parameters], sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(payload.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None or (self.ttl_seconds is not None and time.time() - entry[0] > self.ttl_seconds):
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        self._entries[key] = (time.time(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+def select_input(previous: StepResult, selector: str) -> str:
+    """
+    从上一步结果中取出下一步的输入
+
+    Raises:
+        ValueError: 上一步没有对应的结构化字段
+    """
+    if selector == "output":
+        return previous.output
+    value = (previous.data or {}).get(selector)
+    if value is None:
+        raise ValueError(f"步骤 {previous.index} ({previous.pattern_id}) 的结果中没有 '{selector}'")
+    if selector == "results":
+        # 搜索结果 → 文本（优先已抓取的正文）
+        return "\n\n".join(
+            f"{item.get('title', '')}\n{item.get('content') or item.get('snippet') or ''}".strip()
+            for item in value
+        )
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+class PipelineRunner:
+    """
+    Pattern 流水线执行器
+
+    Example:
+        >>> runner = PipelineRunner(registry)
+        >>> steps = [PipelineStep("search"), PipelineStep("translate", {"target_language": "en"}, input="summary")]
+        >>> results = await runner.run("macOS 15 新特性", steps)
+        >>> results[-1].output
+    """
+
+    def __init__(self, registry: PatternRegistry, cache: Optional[StepCache] = None):
+        self.registry = registry
+        self.cache = cache if cache is not None else StepCache()
+
+    @staticmethod
+    def check(steps: Sequence[PipelineStep]) -> None:
+        """
+        执行前检查步骤定义
+
+        Raises:
+            ValueError: 步骤为空、输入选择无效，或第一步选取了结构化字段
+        """
+        if not steps:
+            raise ValueError("流水线至少需要一个步骤")
+        for index, step in enumerate(steps):
+            if step.input not in STEP_INPUTS:
+                raise ValueError(f"步骤 {index} 的 input 无效: '{step.input}'。允许值: {list(STEP_INPUTS)}")
+            if index == 0 and step.input != "output":
+                raise ValueError("第一步的输入为请求文本，input 只能为 'output'")
+
+    async def stream(self, text: str, steps: Sequence[PipelineStep]) -> AsyncIterator[StepResult]:
+        """
+        依次执行步骤，每完成一步产出一个 StepResult
+
+        Raises:
+            ValueError: 步骤定义无效
+            PipelineError: 某一步执行失败（后续步骤不再执行）
+        """
+        self.check(steps)
+        previous: Optional[StepResult] = None
+        for index, step in enumerate(steps):
+            start = time.perf_counter()
+            try:
+                step_input = text if previous is None else select_input(previous, step.input)
+                result, cached = await self._execute(step, step_input)
+            except Exception as e:
+                logger.error(f"流水线步骤 {index} ({step.pattern_id}) 失败: {e}")
+                raise PipelineError(index, step.pattern_id, str(e)) from e
+
+            previous = StepResult(
+                index=index,
+                pattern_id=step.pattern_id,
+                output=result.get("output") or "",
+                metadata=result.get("metadata") or {},
+                data=result.get("data"),
+                cached=cached,
+                duration_ms=round((time.perf_counter() - start) * 1000, 2),
+            )
+            yield previous
+
+    async def run(self, text: str, steps: Sequence[PipelineStep]) -> List[StepResult]:
+        """执行全部步骤，返回每一步的结果"""
+        return [result async for result in self.stream(text, steps)]
+
+    def _cacheable(self, step: PipelineStep) -> bool:
+        spec = self.registry.get_spec(step.pattern_id)
+        return step.cache and (spec is None or spec.is_cacheable(step.parameters))
+
+    async def _execute(self, step: PipelineStep, text: str) -> Tuple[Dict[str, Any], bool]:
+        key = None
+        if self._cacheable(step):
+            key = StepCache.key(step.pattern_id, step.parameters, text)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached, True
+
+        result = await self.registry.execute(step.pattern_id, text, step.parameters)
+        if key is not None:
+            self.cache.put(key, result)
+        return result, False
@@ -7,55 +7,78 @@
 MacCortex Backend - Pattern Registry
 Phase 1 - Week 2 Day 8-9
 创建时间: 2026-01-20
+更新时间: 2026-10-19 (Phase 5: 清单发现 + 按需加载)
 
 Pattern 注册表，管理所有 Python Pattern 实例
+
+Phase 5: 启动时只读取清单（patterns.manifest：内置 + entry point 插件），不导入实现；
+某个 Pattern 首次执行时才导入模块、创建实例并 initialize()，内存与启动开销只与实际用到的 Pattern 相关。
 """
 
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
 
 from loguru import logger
 
 from patterns.base import BasePattern
-from patterns.summarize import SummarizePattern
-from patterns.extract import ExtractPattern
-from patterns.translate import TranslatePattern
-from patterns.format import FormatPattern
-from patterns.search import SearchPattern
+from patterns.manifest import PatternSpec, discover_patterns
+from security.input_validator import get_input_validator
+from utils.config import settings
 
 
 class PatternRegistry:
     """Pattern 注册表"""
 
-    def __init__(self):
-        """初始化注册表"""
+    def __init__(self, specs: Optional[Iterable[PatternSpec]] = None):
+        """
+        初始化注册表
+
+        Args:
+            specs: Pattern 清单（默认在 initialize() 时发现内置 + 插件 Pattern）
+        """
+        self._specs: Dict[str, PatternSpec] = {}
+        self._explicit_specs = list(specs) if specs is not None else None
         self._patterns: Dict[str, BasePattern] = {}
+        self._load_locks: Dict[str, asyncio.Lock] = {}
         self._initialized = False
 
     async def initialize(self):
-        """初始化所有 Pattern"""
+        """读取 Pattern 清单（不导入实现）；settings.pattern_preload 中的 Pattern 立即加载"""
         if self._initialized:
             return
 
         logger.info("🔧 初始化 Pattern Registry...")
 
-        # 注册默认 Pattern
-        patterns = [
-            SummarizePattern(),
-            ExtractPattern(),
-            TranslatePattern(),
-            FormatPattern(),
-            SearchPattern(),
-        ]
-
-        for pattern in patterns:
-            await self._register(pattern)
+        specs = self._explicit_specs if self._explicit_specs is not None else discover_patterns()
+        for spec in specs:
+            self._add_spec(spec)
 
         self._initialized = True
-        logger.info(f"✅ 已注册 {len(self._patterns)} 个 Pattern")
+        logger.info(f"✅ 已发现 {len(self._specs)} 个 Pattern（首次执行时加载）")
+
+        for pattern_id in settings.pattern_preload:
+            try:
+                await self.load(pattern_id)
+            except (ValueError, RuntimeError) as e:
+                logger.warning(f"预加载 Pattern '{pattern_id}' 失败: {e}")
+
+    def _add_spec(self, spec: PatternSpec):
+        """
+        登记 Pattern 清单项（插件 Pattern 的参数白名单同步登记到 InputValidator）
+
+        Raises:
+            ValueError: 如果 ID 已存在
+        """
+        if spec.pattern_id in self._specs:
+            raise ValueError(f"Pattern '{spec.pattern_id}' already registered")
+
+        self._specs[spec.pattern_id] = spec
+        get_input_validator().register_pattern(spec.pattern_id, spec.parameters)
+        logger.debug(f"  ✓ 已发现: {spec.pattern_id} - {spec.name} ({spec.target})")
 
     async def _register(self, pattern: BasePattern):
         """
-        注册 Pattern
+        注册已创建的 Pattern 实例（立即初始化）
 
         Args:
             pattern: Pattern 实例
@@ -69,9 +92,57 @@ class PatternRegistry:
         # 初始化 Pattern
         await pattern.initialize()
 
+        if pattern.pattern_id not in self._specs:
+            self._add_spec(
+                PatternSpec(
+                    pattern_id=pattern.pattern_id,
+                    name=pattern.name,
+                    description=pattern.description,
+                    target=f"{type(pattern).__module__}:{type(pattern).__name__}",
+                    version=pattern.version,
+                )
+            )
         self._patterns[pattern.pattern_id] = pattern
         logger.debug(f"  ✓ 已注册: {pattern.pattern_id} - {pattern.name}")
 
+    async def load(self, pattern_id: str) -> BasePattern:
+        """
+        获取 Pattern 实例（首次调用时导入实现、创建实例并初始化；并发调用只加载一次）
+
+        Raises:
+            ValueError: Pattern 不存在
+            RuntimeError: 导入或初始化失败（下次调用会重试）
+        """
+        pattern = self._patterns.get(pattern_id)
+        if pattern is not None:
+            return pattern
+
+        spec = self._specs.get(pattern_id)
+        if spec is None:
+            available = ", ".join(self._specs.keys())
+            raise ValueError(
+                f"Pattern '{pattern_id}' not found. Available: {available}"
+            )
+
+        lock = self._load_locks.setdefault(pattern_id, asyncio.Lock())
+        async with lock:
+            pattern = self._patterns.get(pattern_id)
+            if pattern is not None:
+                return pattern
+
+            logger.info(f"📦 加载 Pattern: {pattern_id} ({spec.target})")
+            try:
+                pattern = spec.load()()
+                if pattern.pattern_id != pattern_id:
+                    raise ValueError(f"实现的 pattern_id 为 '{pattern.pattern_id}'，与清单不一致")
+                await pattern.initialize()
+            except Exception as e:
+                logger.error(f"Pattern '{pattern_id}' 加载失败: {e}")
+                raise RuntimeError(f"Pattern '{pattern_id}' failed to load: {e}") from e
+
+            self._patterns[pattern_id] = pattern
+            return pattern
+
     async def execute(
         self, pattern_id: str, text: str, parameters: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -88,16 +159,9 @@ class PatternRegistry:
 
         Raises:
             ValueError: Pattern 不存在或参数无效
-            RuntimeError: 执行失败
+            RuntimeError: 加载或执行失败
         """
-        # 检查 Pattern 是否存在
-        if pattern_id not in self._patterns:
-            available = ", ".join(self._patterns.keys())
-            raise ValueError(
-                f"Pattern '{pattern_id}' not found. Available: {available}"
-            )
-
-        pattern = self._patterns[pattern_id]
+        pattern = await self.load(pattern_id)
 
         # 验证输入
         if not pattern.validate(text, parameters):
@@ -113,16 +177,23 @@ class PatternRegistry:
 
     def list_patterns(self) -> List[Dict[str, Any]]:
         """
-        列出所有已注册的 Pattern
+        列出所有可用的 Pattern（来自清单，不触发加载）
 
         Returns:
-            List[Dict[str, Any]]: Pattern 信息列表
+            List[Dict[str, Any]]: Pattern 信息列表（含参数白名单与是否已加载）
         """
-        return [pattern.to_dict() for pattern in self._patterns.values()]
+        return [
+            {**spec.to_dict(), "loaded": pattern_id in self._patterns}
+            for pattern_id, spec in self._specs.items()
+        ]
+
+    def get_spec(self, pattern_id: str) -> PatternSpec | None:
+        """获取 Pattern 清单项（不触发加载）"""
+        return self._specs.get(pattern_id)
 
     def get_pattern(self, pattern_id: str) -> BasePattern | None:
         """
-        获取 Pattern 实例
+        获取已加载的 Pattern 实例（未加载时返回 None，需要时用 load()）
 
         Args:
             pattern_id: Pattern ID
@@ -133,7 +204,7 @@ class PatternRegistry:
         return self._patterns.get(pattern_id)
 
     async def cleanup(self):
-        """清理所有 Pattern 资源"""
+        """清理所有已加载 Pattern 的资源"""
         logger.info("🧹 清理 Pattern 资源...")
         for pattern in self._patterns.values():
             try:
@@ -142,4 +213,6 @@ class PatternRegistry:
                 logger.warning(f"清理 {pattern.pattern_id} 失败: {e}")
 
         self._patterns.clear()
+        self._specs.clear()
+        self._load_locks.clear()
         self._initialized = False
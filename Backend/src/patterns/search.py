@@ -7,19 +7,91 @@
 # Phase 1 - Week 2 Day 9
 # 创建时间: 2026-01-20
 # 更新时间: 2026-01-21 (Phase 1.5 - Day 3: 集成 PromptGuard)
+# 更新时间: 2026-10-19 (Phase 5: 有界 LRU 搜索缓存 + stale-while-revalidate)
 #
 # Phase 1.5: 增强安全防护（Prompt Injection 检测、指令隔离、输出清理）
+# Phase 5: 搜索缓存限制条数与字节数，过期结果先返回并在后台刷新
+# Phase 5: 混合搜索两路并发（各自超时），倒数排名融合（RRF）+ URL / 内容去重
+# Phase 5: 语义搜索使用持久化本地向量索引（retrieval.VectorStore）
+# Phase 5: Web 搜索经共享服务（websearch.WebSearchService）：与 ResearcherNode 共用缓存、请求合并与全局限流
+# Phase 5: fetch_pages 时并发抓取前 N 条结果的网页正文（websearch.PageFetcher），总结优先使用正文
+# Phase 5: 总结前按 MinHash 近似去重（转载副本不再重复占用提示词），去重统计见 metadata.dedup
+# Phase 5: 结果附带结构化 data（供流水线下一步直接选取 summary / results）
 #
 # Web 搜索 + 语义搜索（本地知识库查询）
 
 import asyncio
 import hashlib
+import re
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from loguru import logger
 
 from .base import BasePattern
 from utils.config import settings
+from websearch import (
+    NearDuplicateFilter,
+    PageFetcher,
+    WebSearchService,
+    dedup_results,
+    get_page_fetcher,
+    get_search_service,
+    summarize_fetch,
+)
+
+
+def _normalize_url(url: str) -> str:
+    """规范化 URL（忽略协议、www.、末尾斜杠、片段和 utm_* 跟踪参数）"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(
+        sorted((k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_"))
+    )
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+
+def _dedup_key(result: Dict[str, Any]) -> str:
+    """结果去重键：优先 URL，其次规范化后的正文"""
+    url = result.get("url") or (result.get("metadata") or {}).get("url")
+    if url:
+        return "url:" + _normalize_url(url)
+    content = result.get("content") or result.get("snippet") or result.get("title") or ""
+    normalized = re.sub(r"\s+", " ", content).strip().lower()
+    return "content:" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]], k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    倒数排名融合（Reciprocal Rank Fusion）
+
+    每条结果得分为 Σ 1 / (k + 该结果在各列表中的名次)；
+    URL 或正文相同的结果合并为一条（保留首次出现的内容，记录全部来源）。
+
+    Returns:
+        按融合得分降序排列的结果（rank 重新编号，附带 fusion_score / sources）
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    scores: Dict[str, float] = {}
+
+    for results in result_lists:
+        for position, result in enumerate(results, start=1):
+            key = _dedup_key(result)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + position)
+            if key not in fused:
+                fused[key] = {**result, "sources": [result.get("source")]}
+            elif result.get("source") not in fused[key]["sources"]:
+                fused[key]["sources"].append(result.get("source"))
+
+    ordered = sorted(fused, key=lambda key: scores[key], reverse=True)
+    return [
+        {**fused[key], "rank": rank, "fusion_score": round(scores[key], 6)}
+        for rank, key in enumerate(ordered, start=1)
+    ]
 
 
 class SearchPattern(BasePattern):
@@ -33,17 +105,27 @@ class SearchPattern(BasePattern):
     - 结果排序与过滤
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        search_service: Optional[WebSearchService] = None,
+        page_fetcher: Optional[PageFetcher] = None,
+    ):
+        """
+        Args:
+            search_service: Web 搜索服务（默认使用进程内共享实例）
+            page_fetcher: 网页抓取器（默认使用进程内共享实例）
+        """
         super().__init__()  # Phase 1.5: 初始化安全模块
         self._mlx_model = None
         self._mlx_tokenizer = None
         self._ollama_client = None
-        self._vector_db = None  # ChromaDB 客户端
+        self._vector_db = None  # 本地向量索引（retrieval.VectorStore）
         self._mode = "uninitialized"  # uninitialized | mlx | ollama | mock
 
-        # 缓存机制（Phase 2 Week 4 Day 17）
-        self._search_cache: Dict[str, tuple[List[Dict[str, Any]], float]] = {}
-        self._cache_ttl = 300  # 5 分钟 TTL
+        # Web 搜索缓存 / 合并 / 限流由共享服务负责（Phase 5）
+        self._search_service = search_service
+        self._page_fetcher = page_fetcher
+        self._dedup = NearDuplicateFilter(settings.search_dedup_threshold, settings.search_dedup_num_perm)
 
     # MARK: - BasePattern Protocol
 
@@ -127,23 +209,29 @@ class SearchPattern(BasePattern):
             raise RuntimeError("Ollama 未安装")
 
     async def _initialize_vector_db(self):
-        """初始化向量数据库（ChromaDB）"""
+        """
+        初始化向量数据库
+
+        Phase 5: 持久化索引（settings.chroma_persist_directory），
+        ChromaDB 未安装时使用纯 NumPy 索引；与文档导入共用进程内实例
+        """
         try:
-            import chromadb
+            from retrieval import get_vector_store
 
-            logger.info("  🗄️  连接 ChromaDB...")
-            self._vector_db = chromadb.Client()
-            logger.info("  ✅ ChromaDB 连接成功")
-        except ImportError:
-            logger.warning("ChromaDB 未安装，语义搜索功能不可用")
+            logger.info("  🗄️  打开本地向量索引...")
+            self._vector_db = await asyncio.to_thread(get_vector_store)
+            logger.info("  ✅ 本地向量索引就绪")
         except Exception as e:
-            logger.warning(f"ChromaDB 初始化失败: {e}")
+            logger.warning(f"向量索引初始化失败，语义搜索功能不可用: {e}")
 
     async def cleanup(self):
         """清理资源"""
         self._mlx_model = None
         self._mlx_tokenizer = None
         self._ollama_client = None
+        if self._vector_db is not None:
+            # 共享实例由 retrieval.close_vector_store() 在应用关闭时释放
+            await asyncio.to_thread(self._vector_db.persist)
         self._vector_db = None
         logger.info(f"✅ {self.name} Pattern 清理完成")
 
@@ -158,8 +246,9 @@ class SearchPattern(BasePattern):
                 - engine: 搜索引擎 ("google" | "duckduckgo" | "bing", 默认 "duckduckgo")
                 - num_results: 返回结果数量 (默认: 5)
                 - summarize: 是否总结搜索结果 (默认: true)
-                - language: 搜索语言 (默认: "zh-CN")
+                - language: 搜索语言 (默认: settings.search_language，即 "zh-CN")
                 - collection: 语义搜索的集合名称 (默认: "default")
+                - fetch_pages: 是否抓取前 N 条 Web 结果的网页正文 (默认: false)
 
         Returns:
             搜索结果字典
@@ -169,25 +258,35 @@ class SearchPattern(BasePattern):
         engine = parameters.get("engine", "duckduckgo")
         num_results = parameters.get("num_results", 5)
         summarize = parameters.get("summarize", True)
-        language = parameters.get("language", "zh-CN")
+        language = parameters.get("language") or settings.search_language
         collection = parameters.get("collection", "default")
+        fetch_pages = parameters.get("fetch_pages", False)
 
         # 执行搜索
+        cache_info: Dict[str, Any] = {"status": "bypass"}
+        legs: Optional[Dict[str, Any]] = None
         if search_type == "web":
-            results = await self._web_search(text, engine, num_results, language)
+            results = await self._web_search(text, engine, num_results, language, cache_info)
         elif search_type == "semantic":
             results = await self._semantic_search(text, collection, num_results)
         elif search_type == "hybrid":
-            web_results = await self._web_search(text, engine, num_results // 2, language)
-            semantic_results = await self._semantic_search(text, collection, num_results // 2)
-            results = web_results + semantic_results
+            results, legs = await self._hybrid_search(
+                text, engine, num_results, language, collection, cache_info
+            )
         else:
             raise ValueError(f"不支持的搜索类型: {search_type}")
 
+        # 抓取网页正文（附加到结果的 content 字段）
+        fetch_info: Optional[Dict[str, Any]] = None
+        if fetch_pages and results:
+            fetch_info = await self._attach_page_content(results[:num_results])
+
         # 总结搜索结果（如果需要）
         summary = None
+        dedup_info: Optional[Dict[str, Any]] = None
         if summarize and results:
-            summary = await self._summarize_results(text, results)
+            unique, dedup_info = dedup_results(results, dedup=self._dedup)
+            summary = await self._summarize_results(text, unique)
 
         # 序列化搜索结果为 JSON 字符串（统一输出格式）
         search_result = {
@@ -198,22 +297,99 @@ class SearchPattern(BasePattern):
         import json
         output = json.dumps(search_result, ensure_ascii=False, indent=2)
 
+        metadata = {
+            "search_type": search_type,
+            "engine": engine,
+            "num_results": num_results,
+            "query": text,
+            "total_found": len(results),
+            "cache": {"status": cache_info["status"], **self._web_service.cache.stats},
+            "mode": self._mode,
+        }
+        if legs is not None:
+            metadata["fusion"] = "rrf"
+            metadata["legs"] = legs
+        if fetch_info is not None:
+            metadata["fetch"] = fetch_info
+        if dedup_info is not None:
+            metadata["dedup"] = dedup_info
+
         return {
             "output": output,  # 统一输出格式
-            "metadata": {
-                "search_type": search_type,
-                "engine": engine,
-                "num_results": num_results,
-                "query": text,
-                "total_found": len(results),
-                "mode": self._mode,
-            },
+            "metadata": metadata,
+            "data": search_result,  # 结构化结果（流水线的下一步可直接选取 summary / results）
         }
 
-    async def _web_search(self, query: str, engine: str, num_results: int, language: str) -> List[Dict[str, Any]]:
-        """Web 搜索"""
-        if engine == "duckduckgo":
-            return await self._search_duckduckgo(query, num_results, language)
+    async def _hybrid_search(
+        self,
+        query: str,
+        engine: str,
+        num_results: int,
+        language: str,
+        collection: str,
+        cache_info: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        混合搜索（Phase 5）
+
+        Web 与语义两路并发执行、各自超时；某一路超时或失败时仍返回另一路结果。
+        两路各取 num_results 条，经 RRF 融合去重后由调用方截取前 num_results 条。
+
+        Returns:
+            (融合后的结果, 各路状态 {"web": {...}, "semantic": {...}})
+        """
+        legs: Dict[str, Any] = {}
+
+        async def run_leg(name: str, coro: Awaitable[List[Dict[str, Any]]], timeout: float):
+            start = time.perf_counter()
+            try:
+                results = await asyncio.wait_for(coro, timeout=timeout)
+                status = "ok"
+            except asyncio.TimeoutError:
+                logger.warning(f"混合搜索 {name} 超时（{timeout}s），仅使用另一路结果")
+                results, status = [], "timeout"
+            except Exception as e:
+                logger.error(f"混合搜索 {name} 失败: {type(e).__name__}: {e}")
+                results, status = [], "error"
+            legs[name] = {
+                "status": status,
+                "count": len(results),
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            }
+            return results
+
+        web_results, semantic_results = await asyncio.gather(
+            run_leg(
+                "web",
+                self._web_search(query, engine, num_results, language, cache_info),
+                settings.search_web_timeout,
+            ),
+            run_leg(
+                "semantic",
+                self._semantic_search(query, collection, num_results),
+                settings.search_semantic_timeout,
+            ),
+        )
+
+        return reciprocal_rank_fusion([web_results, semantic_results], k=settings.search_rrf_k), legs
+
+    @property
+    def _web_service(self) -> WebSearchService:
+        if self._search_service is None:
+            self._search_service = get_search_service()
+        return self._search_service
+
+    async def _web_search(
+        self,
+        query: str,
+        engine: str,
+        num_results: int,
+        language: str,
+        cache_info: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Web 搜索（cache_info 用于回传本次请求的缓存状态）"""
+        if self._web_service.has_engine(engine):
+            return await self._search_with_service(query, engine, num_results, language, cache_info)
         elif engine == "google":
             return await self._search_google(query, num_results, language)
         elif engine == "bing":
@@ -221,101 +397,61 @@ class SearchPattern(BasePattern):
         else:
             raise ValueError(f"不支持的搜索引擎: {engine}")
 
-    async def _search_duckduckgo(self, query: str, num_results: int, language: str) -> List[Dict[str, Any]]:
+    async def _search_with_service(
+        self,
+        query: str,
+        engine: str,
+        num_results: int,
+        language: str,
+        cache_info: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
         """
-        DuckDuckGo 搜索（Phase 2 Week 4 Day 17 优化）
+        经共享 Web 搜索服务搜索（DuckDuckGo 等已注册引擎）
 
-        改进：
-        1. 5 分钟缓存（减少 API 调用）
-        2. 更好的错误处理（超时、速率限制）
-        3. 语言映射扩展（支持更多语言）
-        4. 日志记录优化
+        缓存（过期结果先返回、后台刷新）、并发请求合并与全局限流均由服务完成；
+        引擎不可用或请求失败时回退到 Mock 搜索。
         """
-        # 1. 检查缓存
-        cache_key = self._generate_cache_key(query, num_results, language)
-        cached_result = self._get_from_cache(cache_key)
-        if cached_result is not None:
-            logger.debug(f"🚀 使用缓存结果: {query} ({len(cached_result)} 条)")
-            return cached_result
-
-        # 2. 执行搜索
         try:
-            from duckduckgo_search import DDGS
-
-            # 语言/区域映射（Phase 2 Week 4 Day 17 扩展）
-            region_map = {
-                "zh-CN": "cn-zh",  # 中国简体
-                "zh": "cn-zh",
-                "en-US": "us-en",  # 美国英文
-                "en": "us-en",
-                "ja-JP": "jp-jp",  # 日本
-                "ja": "jp-jp",
-                "ko-KR": "kr-kr",  # 韩国
-                "ko": "kr-kr",
-                "auto": "wt-wt",    # 全球（无地区限制）
-            }
-            region = region_map.get(language, "wt-wt")
-
-            logger.info(f"🔍 DuckDuckGo 搜索: '{query}' (region={region}, num={num_results})")
-
-            # 执行搜索（同步方法，需要在线程池中运行以避免阻塞）
-            loop = asyncio.get_event_loop()
-            results = []
-
-            def _sync_search():
-                """同步搜索函数（在线程池中运行）"""
-                nonlocal results
-                try:
-                    with DDGS() as ddgs:
-                        search_results = ddgs.text(
-                            keywords=query,
-                            region=region,
-                            max_results=num_results * 2,  # 多获取一些以防过滤后不够
-                        )
-                        for i, result in enumerate(search_results):
-                            # 过滤无效结果
-                            if not result.get("title") or not result.get("href"):
-                                continue
-
-                            results.append(
-                                {
-                                    "title": result.get("title", ""),
-                                    "url": result.get("href", ""),
-                                    "snippet": result.get("body", ""),
-                                    "source": "duckduckgo",
-                                    "rank": i + 1,
-                                }
-                            )
-
-                            # 限制结果数量
-                            if len(results) >= num_results:
-                                break
-                except Exception as e:
-                    logger.error(f"DuckDuckGo 搜索内部错误: {e}")
-                    raise
-
-            # 在线程池中执行（避免阻塞事件循环）
-            await loop.run_in_executor(None, _sync_search)
-
-            if not results:
-                logger.warning(f"DuckDuckGo 搜索无结果: '{query}'")
-                return []
-
-            logger.info(f"✅ DuckDuckGo 搜索成功: {len(results)} 条结果")
-
-            # 3. 缓存结果
-            self._save_to_cache(cache_key, results)
-
-            return results
-
+            results = await self._web_service.search(query, num_results, language, engine, cache_info)
         except ImportError:
             logger.error("duckduckgo_search 未安装（但已在 requirements.txt 中）")
             logger.info("  ⚠️  回退到 Mock 搜索")
             return await self._mock_web_search(query, num_results)
         except Exception as e:
-            logger.error(f"DuckDuckGo 搜索失败: {type(e).__name__}: {e}")
+            logger.error(f"{engine} 搜索失败: {type(e).__name__}: {e}")
             logger.info("  ⚠️  回退到 Mock 搜索")
             return await self._mock_web_search(query, num_results)
+        return [result.to_dict() for result in results]
+
+    @property
+    def _fetcher(self) -> PageFetcher:
+        if self._page_fetcher is None:
+            self._page_fetcher = get_page_fetcher()
+        return self._page_fetcher
+
+    async def _attach_page_content(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        并发抓取前 settings.search_fetch_top_n 条 Web 结果的网页正文
+
+        成功时写入结果的 content 字段（语义结果与 Mock 结果跳过）；失败的页面保留原摘要。
+
+        Returns:
+            抓取统计（fetched / cached / revalidated / failed / elapsed_ms）
+        """
+        targets = [
+            result
+            for result in results
+            if result.get("url", "").startswith(("http://", "https://"))
+            and not result.get("content")
+            and result.get("source") != "mock"
+        ][: settings.search_fetch_top_n]
+
+        start = time.perf_counter()
+        pages = await self._fetcher.fetch_many(result["url"] for result in targets)
+        for result, page in zip(targets, pages):
+            if page.ok:
+                result["content"] = page.text
+        return summarize_fetch(pages, (time.perf_counter() - start) * 1000)
 
     async def _search_google(self, query: str, num_results: int, language: str) -> List[Dict[str, Any]]:
         """Google 搜索（需要 API Key）"""
@@ -347,35 +483,31 @@ class SearchPattern(BasePattern):
     async def _semantic_search(self, query: str, collection: str, num_results: int) -> List[Dict[str, Any]]:
         """语义搜索（向量数据库）"""
         if not self._vector_db:
-            logger.warning("ChromaDB 未初始化，使用 Mock 语义搜索")
+            logger.warning("向量索引未初始化，使用 Mock 语义搜索")
             return await self._mock_semantic_search(query, num_results)
 
         try:
-            # 获取集合
-            col = self._vector_db.get_or_create_collection(name=collection)
-
-            # 查询
-            results = col.query(query_texts=[query], n_results=num_results)
+            # 查询（嵌入与检索为同步计算，放到线程池以便与 Web 搜索并发）
+            hits = await asyncio.to_thread(self._vector_db.query, collection, query, num_results)
 
             # 格式化结果
-            formatted_results = []
-            if results["documents"] and results["documents"][0]:
-                for i, (doc, metadata, distance) in enumerate(
-                    zip(results["documents"][0], results["metadatas"][0], results["distances"][0])
-                ):
-                    formatted_results.append(
-                        {
-                            "title": metadata.get("title", f"文档 {i + 1}"),
-                            "content": doc,
-                            "metadata": metadata,
-                            "similarity": 1.0 - distance,  # 转换为相似度
-                            "source": "chromadb",
-                            "rank": i + 1,
-                        }
-                    )
-
-            return formatted_results
+            return [
+                {
+                    "title": hit["metadata"].get("title", f"文档 {i + 1}"),
+                    "content": hit["document"],
+                    "metadata": hit["metadata"],
+                    "similarity": 1.0 - hit["distance"],  # 转换为相似度
+                    "source": self._vector_db.backend,
+                    "rank": i + 1,
+                }
+                for i, hit in enumerate(hits)
+            ]
         except Exception as e:
+            from retrieval import IncompatibleEmbeddingError
+
+            if isinstance(e, IncompatibleEmbeddingError):
+                # 集合的嵌入函数不可用：Mock 结果会掩盖问题，直接报错
+                raise
             logger.error(f"语义搜索失败: {e}")
             return await self._mock_semantic_search(query, num_results)
 
@@ -400,9 +532,9 @@ class SearchPattern(BasePattern):
         if not results:
             return "未找到相关结果。"
 
-        # 构建总结提示词
+        # 构建总结提示词（已抓取网页正文的结果使用正文）
         results_text = "\n\n".join(
-            [f"结果 {i + 1}: {r.get('title', '')}\n{r.get('snippet', '') or r.get('content', '')}" for i, r in enumerate(results[:5])]
+            [f"结果 {i + 1}: {r.get('title', '')}\n{r.get('content', '') or r.get('snippet', '')}" for i, r in enumerate(results[:5])]
         )
 
         prompt = f"""根据以下搜索结果，简要回答用户的问题：
@@ -436,47 +568,3 @@ class SearchPattern(BasePattern):
         else:
             # Mock 总结
             return f"根据搜索结果，关于 '{query}' 的主要信息如下：{results[0].get('title', '')}。详见搜索结果。"
-
-    # MARK: - 缓存辅助方法（Phase 2 Week 4 Day 17）
-
-    def _generate_cache_key(self, query: str, num_results: int, language: str) -> str:
-        """生成缓存键（基于查询参数的哈希）"""
-        key_string = f"{query}|{num_results}|{language}"
-        return hashlib.md5(key_string.encode("utf-8")).hexdigest()
-
-    def _get_from_cache(self, cache_key: str) -> Optional[List[Dict[str, Any]]]:
-        """从缓存获取结果（检查 TTL）"""
-        if cache_key not in self._search_cache:
-            return None
-
-        cached_results, cached_time = self._search_cache[cache_key]
-
-        # 检查是否过期（5 分钟 TTL）
-        if time.time() - cached_time > self._cache_ttl:
-            # 过期，删除缓存
-            del self._search_cache[cache_key]
-            return None
-
-        return cached_results
-
-    def _save_to_cache(self, cache_key: str, results: List[Dict[str, Any]]):
-        """保存结果到缓存"""
-        self._search_cache[cache_key] = (results, time.time())
-
-        # 清理过期缓存（限制缓存大小）
-        if len(self._search_cache) > 100:
-            self._cleanup_expired_cache()
-
-    def _cleanup_expired_cache(self):
-        """清理过期缓存条目"""
-        current_time = time.time()
-        expired_keys = [
-            key
-            for key, (_, cached_time) in self._search_cache.items()
-            if current_time - cached_time > self._cache_ttl
-        ]
-
-        for key in expired_keys:
-            del self._search_cache[key]
-
-        logger.debug(f"🧹 清理过期缓存: 删除 {len(expired_keys)} 条，剩余 {len(self._search_cache)} 条")
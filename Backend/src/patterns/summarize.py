@@ -8,18 +8,27 @@ MacCortex Backend - Summarize Pattern
 Phase 1 - Week 2 Day 8-9
 创建时间: 2026-01-20
 更新时间: 2026-01-21 (Phase 1.5 - Day 3: 集成 PromptGuard)
+更新时间: 2026-10-19 (Phase 5: 增量总结会话)
 
 文本总结 Pattern（使用 MLX 或 Ollama）
 Phase 1.5: 增强安全防护（Prompt Injection 检测、指令隔离、输出清理）
+Phase 5: 增量总结（session_id + 新增文本，成本与增量成正比）
 """
 
 import asyncio
-from typing import Any, Dict
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List
 
 from loguru import logger
 
 from utils.config import settings
 from patterns.base import BasePattern
+from patterns.summary_session import (
+    SummarySession,
+    SummarySessionStore,
+    split_into_chunks,
+)
 
 
 class SummarizePattern(BasePattern):
@@ -31,6 +40,11 @@ class SummarizePattern(BasePattern):
         self._mlx_model = None
         self._ollama_client = None
 
+        # Phase 5: 增量总结会话（持久化到本地目录）
+        self._sessions = SummarySessionStore(
+            Path(settings.summary_session_directory), max_sessions=settings.summary_max_sessions
+        )
+
     @property
     def pattern_id(self) -> str:
         return "summarize"
@@ -98,6 +112,10 @@ class SummarizePattern(BasePattern):
         if not super().validate(text, parameters):
             return False
 
+        # 增量模式：新增文本可以很短（累积到阈值后才调用模型）
+        if parameters.get("session_id"):
+            return True
+
         # 检查文本长度（词数）
         text = text.strip()
         language = parameters.get("language", "zh-CN")
@@ -143,9 +161,55 @@ class SummarizePattern(BasePattern):
             )
             # 标记为不可信输入（继续处理，但加强防护）
 
+        security = {
+            "injection_detected": injection_result["is_malicious"],
+            "injection_confidence": injection_result["confidence"],
+            "injection_severity": injection_result["severity"],
+        }
+
+        # Phase 5: 增量总结会话
+        session_id = parameters.get("session_id")
+        if session_id:
+            return await self._execute_incremental(
+                session_id,
+                text,
+                length,
+                style,
+                language,
+                source,
+                reset=parameters.get("reset", False),
+                security=security,
+            )
+
         # 构建系统提示（不含用户输入）
         system_prompt = self._build_system_prompt(length, style, language)
 
+        output = await self._summarize(system_prompt, text, length, style, language, source)
+
+        return {
+            "output": output,
+            "metadata": {
+                "length": length,
+                "style": style,
+                "language": language,
+                "source": source,
+                "original_length": len(text),
+                "summary_length": len(output),
+                # Phase 1.5: 安全元数据
+                "security": security,
+            },
+        }
+
+    async def _summarize(
+        self,
+        system_prompt: str,
+        text: str,
+        length: str,
+        style: str,
+        language: str,
+        source: str,
+    ) -> str:
+        """保护提示词 → 生成 → 清理输出"""
         # ==================== Phase 1.5: Layer 1+2 - 保护提示词 ====================
         protected_prompt = self._protect_prompt(system_prompt, text, source=source)
 
@@ -160,25 +224,128 @@ class SummarizePattern(BasePattern):
             output = await self._generate_mock(text, length, style, language)
 
         # ==================== Phase 1.5: Layer 5 - 清理输出 ====================
-        output = self._sanitize_output(output, text)
+        return self._sanitize_output(output, text)
+
+    # ==================== Phase 5: 增量总结 ====================
+
+    async def _execute_incremental(
+        self,
+        session_id: str,
+        delta: str,
+        length: str,
+        style: str,
+        language: str,
+        source: str,
+        reset: bool,
+        security: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        增量总结：仅对新增文本调用模型
+
+        流程：
+        1. 新增文本追加到会话的未处理尾部（pending_text）
+        2. 尾部不足 summary_min_delta_chars 时暂不调用模型（首次更新除外）
+        3. 尾部切块 → 逐块总结 → 与滚动总结合并为新的滚动总结
+        """
+        async with self._sessions.lock(session_id):
+            # 在副本上处理，模型调用成功后才写回存储（失败时缓存的会话保持不变，重置也不生效）
+            if reset:
+                session = SummarySession(session_id=session_id)
+            else:
+                cached = self._sessions.get(session_id)
+                session = replace(cached, chunk_summaries=list(cached.chunk_summaries))
+            session.pending_text = f"{session.pending_text}\n{delta}".strip()
+            session.total_chars += len(delta)
+
+            new_chunks: List[str] = []
+            should_process = (
+                not session.running_summary
+                or len(session.pending_text) >= settings.summary_min_delta_chars
+            )
 
-        return {
-            "output": output,
-            "metadata": {
-                "length": length,
-                "style": style,
-                "language": language,
-                "source": source,
-                "original_length": len(text),
-                "summary_length": len(output),
-                # Phase 1.5: 安全元数据
-                "security": {
-                    "injection_detected": injection_result["is_malicious"],
-                    "injection_confidence": injection_result["confidence"],
-                    "injection_severity": injection_result["severity"],
+            if should_process:
+                new_chunks = split_into_chunks(
+                    session.pending_text, settings.summary_chunk_chars
+                )
+                await self._fold_chunks(session, new_chunks, length, style, language, source)
+                session.pending_text = ""
+
+            self._sessions.save(session)
+
+            logger.info(
+                f"📝 增量总结: session={session_id}, delta={len(delta)}, "
+                f"new_chunks={len(new_chunks)}, pending={len(session.pending_text)}"
+            )
+
+            return {
+                "output": session.running_summary,
+                "metadata": {
+                    "length": length,
+                    "style": style,
+                    "language": language,
+                    "source": source,
+                    "original_length": len(delta),
+                    "summary_length": len(session.running_summary),
+                    "session": {
+                        "session_id": session_id,
+                        "total_chars": session.total_chars,
+                        "chunks_processed": session.chunks_processed,
+                        "new_chunks": len(new_chunks),
+                        "pending_chars": len(session.pending_text),
+                    },
+                    # Phase 1.5: 安全元数据
+                    "security": security,
                 },
-            },
-        }
+            }
+
+    async def _fold_chunks(
+        self,
+        session: SummarySession,
+        chunks: List[str],
+        length: str,
+        style: str,
+        language: str,
+        source: str,
+    ):
+        """逐块总结新内容，并合并进滚动总结"""
+        if not session.running_summary and len(chunks) == 1:
+            # 首次更新且只有一块：直接按目标风格总结，无需合并调用
+            system_prompt = self._build_system_prompt(length, style, language)
+            summary = await self._summarize(system_prompt, chunks[0], length, style, language, source)
+            session.chunk_summaries.append(summary)
+            session.chunks_processed += 1
+            session.running_summary = summary
+            return
+
+        chunk_prompt = self._build_system_prompt("short", "bullet", language)
+
+        new_summaries = []
+        for chunk in chunks:
+            summary = await self._summarize(chunk_prompt, chunk, "short", "bullet", language, source)
+            new_summaries.append(summary)
+
+        session.chunk_summaries.extend(new_summaries)
+        session.chunks_processed += len(new_summaries)
+
+        merge_input = "\n\n".join(
+            ([f"已有总结：\n{session.running_summary}"] if session.running_summary else [])
+            + [f"新增内容要点：\n{s}" for s in new_summaries]
+        )
+        session.running_summary = await self._summarize(
+            self._build_merge_prompt(length, style, language),
+            merge_input,
+            length,
+            style,
+            language,
+            source,
+        )
+
+    def _build_merge_prompt(self, length: str, style: str, language: str) -> str:
+        """构建滚动总结合并提示（不含用户输入）"""
+        base = self._build_system_prompt(length, style, language)
+        return base + """4. 用户提供的是"已有总结"和"新增内容要点"，请合并为一份完整的最新总结
+5. 新增内容与已有总结冲突时，以新增内容为准
+"""
 
     def _build_system_prompt(self, length: str, style: str, language: str) -> str:
         """构建系统提示（Phase 1.5: 不含用户输入）"""
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+# MacCortex - Proprietary and Confidential
+
+"""
+MacCortex Backend - Summary Session Store
+Phase 5 - 增量总结
+创建时间: 2026-10-19
+
+增量总结会话状态（滚动总结 + 分块总结 + 未处理尾部），按会话持久化。
+客户端每次只发送新增文本，SummarizePattern 只对增量部分调用模型，
+成本与增量成正比，而不是与完整历史成正比。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+# 句子边界（中英文标点 + 换行）
+_SENTENCE_END = re.compile(r"[。！？.!?\n]")
+
+
+@dataclass
+class SummarySession:
+    """增量总结会话状态"""
+
+    session_id: str
+    running_summary: str = ""
+    chunk_summaries: List[str] = field(default_factory=list)
+    pending_text: str = ""
+    total_chars: int = 0
+    chunks_processed: int = 0
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+
+def split_into_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    按段落/句子边界切分文本
+
+    优先在段落边界（空行）切分，其次句子边界，最后硬切分。
+
+    Args:
+        text: 输入文本
+        max_chars: 单块最大字符数
+
+    Returns:
+        文本块列表（不含空块）
+    """
+    chunks: List[str] = []
+    remaining = text.strip()
+
+    while len(remaining) > max_chars:
+        window = remaining[:max_chars]
+
+        cut = window.rfind("\n\n")
+        if cut < max_chars // 2:
+            # 段落边界太靠前，尝试句子边界
+            ends = [m.end() for m in _SENTENCE_END.finditer(window)]
+            cut = ends[-1] if ends and ends[-1] >= max_chars // 2 else max_chars
+
+        chunk = remaining[:cut].strip()
+        if chunk:
+            chunks.append(chunk)
+        remaining = remaining[cut:].lstrip()
+
+    if remaining:
+        chunks.append(remaining)
+
+    return chunks
+
+
+class SummarySessionStore:
+    """
+    增量总结会话存储
+
+    - 内存 LRU 缓存（最多 max_sessions 个会话）+ 每会话一个 JSON 文件（原子写入）；
+      被淘汰的会话下次访问时从磁盘加载（仅内存模式下淘汰即丢弃）
+    - 仅保留最近 max_chunk_summaries 条分块总结（更早的已折叠进滚动总结）
+    - 每会话一把 asyncio.Lock，保证同一会话的更新串行；空闲会话的锁随会话一起淘汰
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_chunk_summaries: int = 16,
+        max_sessions: int = 256,
+    ):
+        """
+        初始化存储
+
+        Args:
+            directory: 持久化目录（None 则仅保存在内存）
+            max_chunk_summaries: 每会话保留的分块总结上限
+            max_sessions: 内存中保留的会话上限
+        """
+        self.directory = directory
+        self.max_chunk_summaries = max_chunk_summaries
+        self.max_sessions = max_sessions
+
+        self._sessions: OrderedDict[str, SummarySession] = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        """获取会话锁"""
+        if session_id not in self._locks:
+            self._locks[session_id] = asyncio.Lock()
+        return self._locks[session_id]
+
+    def get(self, session_id: str) -> SummarySession:
+        """获取会话（内存 → 磁盘 → 新建）"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+            return session
+
+        session = self._load(session_id) or SummarySession(session_id=session_id)
+        self._remember(session)
+        return session
+
+    def save(self, session: SummarySession):
+        """保存会话（压缩分块总结 + 原子写入）"""
+        if len(session.chunk_summaries) > self.max_chunk_summaries:
+            session.chunk_summaries = session.chunk_summaries[-self.max_chunk_summaries:]
+
+        session.updated_at = time.time()
+        self._remember(session)
+
+        if self.directory is None:
+            return
+
+        path = self._path(session.session_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 先写临时文件再替换，崩溃时不会留下半截文件
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(asdict(session), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _remember(self, session: SummarySession):
+        """放入内存 LRU，超出上限时淘汰最久未使用的会话及其空闲锁"""
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        if len(self._locks) > self.max_sessions:
+            for session_id in [
+                sid for sid, lock in self._locks.items() if sid not in self._sessions and not lock.locked()
+            ]:
+                del self._locks[session_id]
+
+    def delete(self, session_id: str):
+        """删除会话"""
+        self._sessions.pop(session_id, None)
+        if self.directory is not None:
+            self._path(session_id).unlink(missing_ok=True)
+
+    def _path(self, session_id: str) -> Path:
+        """会话文件路径（哈希文件名，避免路径注入）"""
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+        return self.directory / f"{digest}.json"
+
+    def _load(self, session_id: str) -> Optional[SummarySession]:
+        """从磁盘加载会话"""
+        if self.directory is None:
+            return None
+
+        path = self._path(session_id)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return SummarySession(**data)
+        except Exception as e:
+            logger.warning(f"总结会话加载失败，重新开始: {session_id} ({e})")
+            return None
@@ -349,7 +349,7 @@ class TranslatePattern(BasePattern):
             prompt=prompt,
             options={
                 "temperature": 0.3,  # 低温度确保翻译准确性
-                "num_predict": min(len(text) * 3, 2048),  # 动态 token 限制
+                "num_predict": self._num_predict(text, aya_model),  # 按原文 Token 数确定输出上限
                 "top_p": 0.9,
                 "repeat_penalty": 1.1,  # 避免重复
             }
@@ -532,6 +532,20 @@ IMPORTANT:
 
         return prompt
 
+    @staticmethod
+    def _num_predict(text: str, model: str) -> int:
+        """
+        翻译输出 Token 上限
+
+        译文 Token 数与原文相当，跨文字体系（如英文 → 中文）时可能多出约一半；
+        按原文 Token 数 × 1.5 × 安全余量计算，避免长文被截断、短文过度预留。
+        """
+        from llm.tokenizer import get_tokenizer
+
+        return get_tokenizer().output_budget(
+            text, f"ollama/{model}", ratio=1.5, minimum=64, maximum=2048
+        )
+
     def _build_aya_prompt(
         self,
         text: str,
@@ -805,7 +819,7 @@ Rules:
             stream=True,  # 启用流式
             options={
                 "temperature": 0.3,
-                "num_predict": min(len(text) * 3, 2048),
+                "num_predict": self._num_predict(text, aya_model),
                 "top_p": 0.9,
                 "repeat_penalty": 1.1,
             }
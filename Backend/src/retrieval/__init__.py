@@ -0,0 +1,59 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Local Retrieval
+# Phase 5 - Local Retrieval
+# Created: 2026-10-19
+#
+
+"""
+本地检索模块
+
+- EmbeddingFunction / HashingEmbedding / OllamaEmbedding: 可插拔嵌入函数
+- EmbeddingCache / CachedEmbedder: 按内容哈希缓存的分批嵌入
+- EmbeddingService: 合并并发请求的批量嵌入服务（紧凑 float32 编码）
+- VectorStore: 持久化向量索引（ChromaDB，或纯 NumPy 回退）
+- Ingestor: 增量文档导入（流式遍历 → 文本提取 → 按 token 分块 → 分批嵌入 → upsert）
+"""
+
+from .embeddings import (
+    CachedEmbedder,
+    EmbeddingCache,
+    EmbeddingFunction,
+    HashingEmbedding,
+    OllamaEmbedding,
+    embedding_function_for,
+    get_embedding_function,
+)
+from .ingest import IngestReport, Ingestor, chunk_text, estimate_tokens, extract_text, iter_files
+from .service import EmbeddingService, decode_vectors, encode_vectors, get_embedding_service
+from .store import IncompatibleEmbeddingError, VectorStore, close_vector_store, get_vector_store
+
+__all__ = [
+    # Embeddings
+    "EmbeddingFunction",
+    "HashingEmbedding",
+    "OllamaEmbedding",
+    "get_embedding_function",
+    "embedding_function_for",
+    "EmbeddingCache",
+    "CachedEmbedder",
+    # Service
+    "EmbeddingService",
+    "get_embedding_service",
+    "encode_vectors",
+    "decode_vectors",
+    # Store
+    "VectorStore",
+    "IncompatibleEmbeddingError",
+    "get_vector_store",
+    "close_vector_store",
+    # Ingest
+    "Ingestor",
+    "IngestReport",
+    "iter_files",
+    "extract_text",
+    "estimate_tokens",
+    "chunk_text",
+]
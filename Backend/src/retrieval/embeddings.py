@@ -0,0 +1,319 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Embedding Functions & Cache
+# Phase 5 - Local Retrieval
+# Created: 2026-10-19
+#
+
+"""
+嵌入函数与嵌入缓存
+
+- EmbeddingFunction: 可插拔嵌入函数（批量接口，返回 float32 矩阵）
+- HashingEmbedding: 确定性哈希向量化（离线可用，无需模型服务）
+- OllamaEmbedding: Ollama 本地嵌入模型
+- EmbeddingCache: 磁盘嵌入缓存（SQLite，按内容哈希索引）
+- CachedEmbedder: 缓存 + 分批嵌入，未变化的文本永不重复嵌入
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from utils.config import settings
+
+
+class EmbeddingFunction(ABC):
+    """
+    嵌入函数协议 (Abstract Base Class)
+
+    实现方只需提供名称、维度和批量嵌入；
+    name 参与缓存键与集合校验，不同模型 / 参数必须使用不同名称。
+    """
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """嵌入函数标识（如 "hashing-384"、"ollama:nomic-embed-text"）"""
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """向量维度"""
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        批量嵌入
+
+        Returns:
+            形状为 (len(texts), dimension) 的 float32 矩阵（L2 归一化）
+        """
+
+
+# CJK 字符逐字切分，其余按单词切分
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+|[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+
+class HashingEmbedding(EmbeddingFunction):
+    """
+    确定性哈希向量化（feature hashing）
+
+    特征：单词、单词的字符三元组、CJK 单字与相邻二元组；
+    CRC32 决定桶位与符号，词频取对数后 L2 归一化。
+    结果与进程、平台无关，适合离线环境与测试。
+    """
+
+    def __init__(self, dimension: int = 384):
+        self._dimension = dimension
+
+    @property
+    def name(self) -> str:
+        return f"hashing-{self._dimension}"
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    @staticmethod
+    def _features(text: str) -> List[str]:
+        features = []
+        previous_cjk = None
+        for token in _TOKEN_PATTERN.findall(text.lower()):
+            if len(token) == 1 and ord(token) > 0x2FFF:
+                features.append(token)
+                if previous_cjk:
+                    features.append(previous_cjk + token)
+                previous_cjk = token
+                continue
+            previous_cjk = None
+            features.append(token)
+            padded = f"#{token}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed_one(self, text: str) -> np.ndarray:
+        features = self._features(text)
+        vector = np.zeros(self._dimension, dtype=np.float32)
+        if not features:
+            return vector
+
+        encoded = [feature.encode("utf-8") for feature in features]
+        buckets = np.fromiter((zlib.crc32(f) % self._dimension for f in encoded), dtype=np.int64, count=len(encoded))
+        signs = np.fromiter(
+            (1.0 if zlib.crc32(f, 0x9E3779B9) & 1 else -1.0 for f in encoded), dtype=np.float32, count=len(encoded)
+        )
+        vector = np.bincount(buckets, weights=signs, minlength=self._dimension).astype(np.float32)
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+        return np.stack([self.embed_one(text) for text in texts])
+
+
+class OllamaEmbedding(EmbeddingFunction):
+    """Ollama 本地嵌入模型（/api/embed 批量接口）"""
+
+    def __init__(self, model: str, host: Optional[str] = None, dimension: Optional[int] = None):
+        import ollama
+
+        self._model = model
+        self._client = ollama.Client(host=host or settings.ollama_host)
+        self._dimension = dimension or len(self._embed_raw(["dimension probe"])[0])
+
+    @property
+    def name(self) -> str:
+        return f"ollama:{self._model}"
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _embed_raw(self, texts: List[str]) -> List[List[float]]:
+        response = self._client.embed(model=self._model, input=texts)
+        return response["embeddings"]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+        matrix = np.asarray(self._embed_raw(texts), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+def get_embedding_function(backend: Optional[str] = None) -> EmbeddingFunction:
+    """
+    按配置创建嵌入函数
+
+    Args:
+        backend: "auto" | "ollama" | "hashing"（默认读取 settings.embedding_backend）；
+            auto 优先使用 Ollama，不可用时回退到哈希向量化
+    """
+    backend = (backend or settings.embedding_backend).lower()
+    if backend in ("auto", "ollama"):
+        try:
+            function = OllamaEmbedding(settings.embedding_model)
+            logger.info(f"  ✅ 嵌入函数: {function.name} (dim={function.dimension})")
+            return function
+        except Exception as e:
+            if backend == "ollama":
+                raise RuntimeError(f"Ollama 嵌入模型不可用: {e}")
+            logger.warning(f"Ollama 嵌入模型不可用，回退到哈希向量化: {e}")
+    elif backend != "hashing":
+        raise ValueError(f"不支持的嵌入后端: {backend}")
+    return HashingEmbedding(settings.embedding_dimension)
+
+
+def embedding_function_for(name: str) -> EmbeddingFunction:
+    """
+    按名称重建嵌入函数（集合记录的 EmbeddingFunction.name）
+
+    Raises:
+        ValueError: 名称不是内置嵌入函数
+        Exception: 嵌入模型不可用（如 Ollama 未启动）
+    """
+    if name.startswith("ollama:"):
+        return OllamaEmbedding(name[len("ollama:"):])
+    match = re.fullmatch(r"hashing-(\d+)", name)
+    if match:
+        return HashingEmbedding(int(match.group(1)))
+    raise ValueError(f"未知的嵌入函数: {name}")
+
+
+def content_key(function_name: str, text: str) -> str:
+    """嵌入缓存键：嵌入函数名 + 文本内容的 SHA256"""
+    return hashlib.sha256(f"{function_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    磁盘嵌入缓存（SQLite WAL）
+
+    每条记录为 (内容哈希, float32 向量字节)；增量写入，进程崩溃不会损坏已提交的数据。
+    """
+
+    _QUERY_CHUNK = 500  # SQLite 参数个数限制
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self._path = os.path.join(directory, "embeddings.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """批量读取（不存在的键不出现在结果中）"""
+        keys = list(keys)
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), self._QUERY_CHUNK):
+                chunk = keys[start:start + self._QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """批量写入（单个事务）"""
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbedder:
+    """
+    带缓存的分批嵌入器
+
+    - 同一批内重复文本只嵌入一次
+    - 命中磁盘缓存的文本不再调用嵌入函数
+    - 未命中的文本按 batch_size 分批调用嵌入函数
+    """
+
+    def __init__(
+        self,
+        function: EmbeddingFunction,
+        cache: Optional[EmbeddingCache] = None,
+        batch_size: int = 64,
+    ):
+        self.function = function
+        self.cache = cache
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    @property
+    def name(self) -> str:
+        return self.function.name
+
+    @property
+    def dimension(self) -> int:
+        return self.function.dimension
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        批量嵌入
+
+        Returns:
+            形状为 (len(texts), dimension) 的 float32 矩阵
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        keys = [content_key(self.name, text) for text in texts]
+        unique: Dict[str, str] = dict(zip(keys, texts))
+        vectors = self.cache.get_many(unique) if self.cache is not None else {}
+        missing = [key for key in unique if key not in vectors]
+
+        for start in range(0, len(missing), self.batch_size):
+            batch_keys = missing[start:start + self.batch_size]
+            matrix = self.function.embed([unique[key] for key in batch_keys])
+            fresh = dict(zip(batch_keys, matrix))
+            vectors.update(fresh)
+            if self.cache is not None:
+                self.cache.put_many(fresh)
+            with self._lock:
+                self.batches += 1
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(unique) - len(missing)
+
+        return np.stack([vectors[key] for key in keys]).astype(np.float32, copy=False)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "batches": self.batches}
@@ -0,0 +1,498 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Incremental Document Ingestion
+# Phase 5 - Local Retrieval
+# Created: 2026-10-19
+#
+
+"""
+增量文档导入
+
+流式遍历目录 → 文本提取 → 按 token 分块 → 分批嵌入 → upsert 到 VectorStore。
+
+每个集合维护一份 SQLite 清单（路径 → mtime_ns / size / sha256 / 分块 id）：
+- mtime 与 size 均未变化：直接跳过，不读取文件
+- 仅元数据变化但内容哈希相同：只更新清单
+- 内容变化：重新分块并 upsert，删除多出来的旧分块
+- 清单中存在但目录中已消失的文件：删除其全部分块
+
+因此对大目录的重复导入只需一次 stat 遍历，耗时与改动文件数成正比。
+
+用法（CLI）:
+    python -m retrieval.ingest ~/Documents/notes --collection notes
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from .store import VectorStore, _check_collection_name
+from utils.config import settings
+
+# 遍历时忽略的目录（隐藏目录另行跳过）
+_SKIP_DIRS = {"node_modules", "__pycache__", "venv", "site-packages", "build", "dist"}
+
+_HTML_EXTENSIONS = {".html", ".htm"}
+
+
+# MARK: - 遍历与提取
+
+
+def iter_files(
+    root: str,
+    extensions: Optional[Sequence[str]] = None,
+) -> Iterator[Tuple[str, os.stat_result]]:
+    """
+    流式遍历目录（os.scandir，深度优先，不预先收集文件列表）
+
+    Args:
+        root: 根目录
+        extensions: 允许的扩展名（小写，含点号）；None 表示 settings.ingest_extensions
+
+    Yields:
+        (绝对路径, stat 结果)；跳过隐藏文件 / 目录与符号链接
+    """
+    allowed = {ext.lower() for ext in (extensions or settings.ingest_extensions)}
+    stack = [os.path.abspath(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                subdirectories = []
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in _SKIP_DIRS:
+                                subdirectories.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            if os.path.splitext(entry.name)[1].lower() in allowed:
+                                yield entry.path, entry.stat(follow_symlinks=False)
+                    except OSError as e:
+                        logger.warning(f"无法读取 {entry.path}: {e}")
+                stack.extend(sorted(subdirectories, reverse=True))
+        except OSError as e:
+            logger.warning(f"无法遍历目录 {directory}: {e}")
+
+
+def extract_text(path: str, data: Optional[bytes] = None) -> str:
+    """
+    提取文件纯文本
+
+    - HTML: 转为 Markdown（保留标题 / 列表 / 表格结构）
+    - PDF: 需要 pypdf（可选依赖）
+    - 其余: 按 UTF-8 解码（无法解码的字节替换为 U+FFFD）
+
+    Args:
+        data: 已读取的文件内容（避免重复读取）
+
+    Raises:
+        ValueError: 无法提取（如未安装 pypdf）
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise ValueError("PDF 提取需要安装 pypdf")
+        import io
+
+        reader = PdfReader(io.BytesIO(data) if data is not None else path)
+        return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+    if data is None:
+        with open(path, "rb") as f:
+            data = f.read()
+    text = data.decode("utf-8", errors="replace").lstrip("\ufeff")
+    if extension in _HTML_EXTENSIONS:
+        from patterns.markdown_html import html_to_markdown
+
+        text = html_to_markdown(text)
+    return text
+
+
+# MARK: - 分块
+
+
+# 估算用 token：CJK 单字、单词、单个标点
+_TOKEN_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]|\w+|[^\w\s]")
+_PARAGRAPH_PATTERN = re.compile(r"\S.*?(?=\n[ \t]*\n|\Z)", re.DOTALL)
+_SENTENCE_PATTERN = re.compile(r"[^.!?。！？\n]*(?:[.!?。！？]+|\n|$)\s*")
+
+
+def _word_tokens(word: str) -> int:
+    # 常见 BPE 分词器中英文约 4 字符 / token；CJK 与标点各计 1
+    return max(1, (len(word) + 3) // 4)
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本 token 数（不依赖具体分词器）"""
+    return sum(_word_tokens(token) for token in _TOKEN_PATTERN.findall(text))
+
+
+def _hard_spans(text: str, start: int, end: int, max_tokens: int) -> List[Tuple[int, int, int]]:
+    """超长句子按 token 预算硬切"""
+    spans = []
+    span_start, tokens = start, 0
+    for match in _TOKEN_PATTERN.finditer(text, start, end):
+        cost = _word_tokens(match.group())
+        if tokens and tokens + cost > max_tokens:
+            spans.append((span_start, match.start(), tokens))
+            span_start, tokens = match.start(), 0
+        tokens += cost
+    if tokens:
+        spans.append((span_start, end, tokens))
+    return spans
+
+
+def _units(text: str, max_tokens: int) -> List[Tuple[int, int, int]]:
+    """切分为不超过 max_tokens 的单元 (start, end, tokens)：段落 → 句子 → 硬切"""
+    units = []
+    for paragraph in _PARAGRAPH_PATTERN.finditer(text):
+        tokens = estimate_tokens(paragraph.group())
+        if tokens <= max_tokens:
+            units.append((paragraph.start(), paragraph.end(), tokens))
+            continue
+        for sentence in _SENTENCE_PATTERN.finditer(text, paragraph.start(), paragraph.end()):
+            if not sentence.group().strip():
+                continue
+            tokens = estimate_tokens(sentence.group())
+            if tokens <= max_tokens:
+                units.append((sentence.start(), sentence.end(), tokens))
+            else:
+                units.extend(_hard_spans(text, sentence.start(), sentence.end(), max_tokens))
+    return units
+
+
+def chunk_text(text: str, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> List[str]:
+    """
+    按 token 预算分块
+
+    优先在段落边界切分，段落过长时退到句子边界，句子过长时硬切；
+    相邻分块之间重叠约 overlap_tokens 个 token 的完整单元。分块是原文的连续片段。
+
+    Args:
+        max_tokens: 每块 token 上限（默认 settings.ingest_chunk_tokens）
+        overlap_tokens: 重叠 token 数（默认 settings.ingest_chunk_overlap_tokens）
+    """
+    max_tokens = max_tokens or settings.ingest_chunk_tokens
+    overlap_tokens = settings.ingest_chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    units = _units(text, max_tokens)
+    chunks = []
+    first = 0
+    while first < len(units):
+        last, tokens = first, units[first][2]
+        while last + 1 < len(units) and tokens + units[last + 1][2] <= max_tokens:
+            last += 1
+            tokens += units[last][2]
+        chunks.append(text[units[first][0]:units[last][1]].strip())
+        if last + 1 >= len(units):
+            break
+
+        # 下一块从末尾若干单元开始（总量不超过 overlap_tokens，且必须前进）
+        next_first, carried = last + 1, 0
+        while next_first - 1 > first and carried + units[next_first - 1][2] <= overlap_tokens:
+            next_first -= 1
+            carried += units[next_first][2]
+        first = next_first
+    return chunks
+
+
+# MARK: - 清单
+
+
+@dataclass
+class FileRecord:
+    """清单中的单个文件"""
+
+    mtime_ns: int
+    size: int
+    sha256: str
+    chunk_ids: List[str]
+
+
+class IngestManifest:
+    """
+    导入清单（SQLite WAL，每个集合一个文件）
+
+    在一次导入的全部分块写入并落盘后单事务提交；
+    中途失败或崩溃时清单保持原样，下次导入会重新处理这些文件。
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "sha256 TEXT NOT NULL, chunk_ids TEXT NOT NULL, ingested_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, root: str) -> Dict[str, FileRecord]:
+        """读取 root 目录下的全部记录"""
+        prefix = os.path.join(root, "")
+        rows = self._conn.execute(
+            "SELECT path, mtime_ns, size, sha256, chunk_ids FROM files WHERE substr(path, 1, ?) = ?",
+            (len(prefix), prefix),
+        ).fetchall()
+        return {path: FileRecord(mtime, size, digest, json.loads(ids)) for path, mtime, size, digest, ids in rows}
+
+    def commit(self, upserts: Dict[str, FileRecord], removed: Sequence[str]) -> None:
+        """单个事务写入本次导入的全部变化"""
+        if not upserts and not removed:
+            return
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, sha256, chunk_ids, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (path, r.mtime_ns, r.size, r.sha256, json.dumps(r.chunk_ids), now)
+                    for path, r in upserts.items()
+                ],
+            )
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# MARK: - 导入
+
+
+@dataclass
+class IngestReport:
+    """导入进度 / 结果"""
+
+    collection: str
+    root: str
+    scanned: int = 0  # 已遍历的文件
+    unchanged: int = 0  # mtime / size / 哈希未变，跳过
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    skipped: int = 0  # 超过大小上限
+    chunks_upserted: int = 0
+    chunks_deleted: int = 0
+    errors: List[Dict[str, str]] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    done: bool = False
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+ProgressCallback = Callable[[IngestReport], None]
+
+
+def _chunk_id_prefix(path: str) -> str:
+    return hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+
+
+class Ingestor:
+    """
+    增量导入器
+
+    Example:
+        >>> ingestor = Ingestor(store, "notes")
+        >>> report = ingestor.ingest("~/Documents/notes")
+        >>> report.added, report.updated, report.unchanged
+    """
+
+    def __init__(
+        self,
+        store: VectorStore,
+        collection: str = "default",
+        chunk_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_file_bytes: Optional[int] = None,
+    ):
+        """
+        Args:
+            store: 目标向量索引
+            collection: 集合名称（SearchPattern 的 collection 参数）
+            chunk_tokens: 每块 token 上限（默认 settings.ingest_chunk_tokens）
+            overlap_tokens: 分块重叠（默认 settings.ingest_chunk_overlap_tokens）
+            batch_size: 每次 upsert 的分块数（默认 settings.embedding_batch_size）
+            max_file_bytes: 超过该大小的文件跳过（默认 settings.ingest_max_file_bytes）
+        """
+        self.store = store
+        self.collection = _check_collection_name(collection)
+        self.chunk_tokens = chunk_tokens or settings.ingest_chunk_tokens
+        self.overlap_tokens = settings.ingest_chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+        self.batch_size = batch_size or settings.embedding_batch_size
+        self.max_file_bytes = max_file_bytes or settings.ingest_max_file_bytes
+        self.manifest = IngestManifest(os.path.join(store.persist_directory, "ingest", f"{collection}.sqlite3"))
+
+    def ingest(
+        self,
+        root: str,
+        extensions: Optional[Sequence[str]] = None,
+        progress: Optional[ProgressCallback] = None,
+        progress_every: int = 200,
+        force: bool = False,
+    ) -> IngestReport:
+        """
+        导入目录（同步，调用方可放入线程池）
+
+        Args:
+            root: 目录路径
+            extensions: 扩展名白名单（默认 settings.ingest_extensions）
+            progress: 进度回调，每处理 progress_every 个文件及结束时调用
+            force: 忽略清单，重新处理全部文件（嵌入缓存仍然生效）
+
+        Raises:
+            ValueError: 目录不存在
+        """
+        root = os.path.abspath(os.path.expanduser(root))
+        if not os.path.isdir(root):
+            raise ValueError(f"目录不存在: {root}")
+
+        started = time.perf_counter()
+        report = IngestReport(collection=self.collection, root=root)
+        known = self.manifest.load(root)
+        seen = set()
+        pending: Dict[str, FileRecord] = {}
+        batch: List[Tuple[str, str, Dict]] = []
+        stale_ids: List[str] = []
+
+        def flush() -> None:
+            if batch:
+                ids, documents, metadatas = zip(*batch)
+                report.chunks_upserted += self.store.upsert(
+                    self.collection, list(ids), list(documents), list(metadatas), persist=False
+                )
+                batch.clear()
+
+        try:
+            for path, stat in iter_files(root, extensions):
+                seen.add(path)
+                report.scanned += 1
+                self._process(path, stat, known.get(path), force, report, pending, batch, stale_ids)
+                if len(batch) >= self.batch_size:
+                    flush()
+                if progress and report.scanned % progress_every == 0:
+                    report.elapsed_ms = (time.perf_counter() - started) * 1000
+                    progress(report)
+            flush()
+        except BaseException:
+            # 清单不更新：下次导入会重新处理本次涉及的文件（upsert 按 id 覆盖，嵌入缓存命中）
+            self.store.persist()
+            raise
+
+        # 仅在完整遍历后才删除消失文件的分块
+        removed = [path for path in known if path not in seen]
+        for path in removed:
+            stale_ids.extend(known[path].chunk_ids)
+        report.removed = len(removed)
+        if stale_ids:
+            self.store.delete(self.collection, stale_ids, persist=False)
+            report.chunks_deleted = len(stale_ids)
+        self.store.persist()
+        self.manifest.commit(pending, removed)
+
+        report.elapsed_ms = (time.perf_counter() - started) * 1000
+        report.done = True
+        if progress:
+            progress(report)
+        logger.info(
+            f"📥 导入完成 {self.collection}: 扫描 {report.scanned}，新增 {report.added}，更新 {report.updated}，"
+            f"删除 {report.removed}，未变 {report.unchanged}，分块 {report.chunks_upserted} "
+            f"({report.elapsed_ms:.0f}ms)"
+        )
+        return report
+
+    def _process(self, path, stat, record, force, report, pending, batch, stale_ids) -> None:
+        """处理单个文件：决定跳过 / 仅更新清单 / 重新分块"""
+        if not force and record and record.mtime_ns == stat.st_mtime_ns and record.size == stat.st_size:
+            report.unchanged += 1
+            return
+        if stat.st_size > self.max_file_bytes:
+            report.skipped += 1
+            return
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()
+            if not force and record and record.sha256 == digest:
+                pending[path] = FileRecord(stat.st_mtime_ns, stat.st_size, digest, record.chunk_ids)
+                report.unchanged += 1
+                return
+            chunks = chunk_text(extract_text(path, data), self.chunk_tokens, self.overlap_tokens)
+        except (OSError, ValueError) as e:
+            report.errors.append({"path": path, "error": str(e)})
+            return
+
+        prefix = _chunk_id_prefix(path)
+        chunk_ids = [f"{prefix}:{i}" for i in range(len(chunks))]
+        title = os.path.basename(path)
+        for i, chunk in enumerate(chunks):
+            metadata = {"path": path, "title": title, "chunk": i, "source": "ingest"}
+            batch.append((chunk_ids[i], chunk, metadata))
+        if record:
+            current = set(chunk_ids)
+            stale_ids.extend(id_ for id_ in record.chunk_ids if id_ not in current)
+            report.updated += 1
+        else:
+            report.added += 1
+        pending[path] = FileRecord(stat.st_mtime_ns, stat.st_size, digest, chunk_ids)
+
+    def close(self) -> None:
+        self.manifest.close()
+
+
+# MARK: - CLI
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="增量导入本地文档到语义索引")
+    parser.add_argument("directory", help="要导入的目录")
+    parser.add_argument("--collection", default="default", help="集合名称（默认: default）")
+    parser.add_argument("--ext", action="append", help="扩展名白名单，可重复（如 --ext .md）")
+    parser.add_argument("--force", action="store_true", help="忽略清单，重新处理全部文件")
+    args = parser.parse_args(argv)
+
+    def show(report: IngestReport) -> None:
+        print(
+            f"\r扫描 {report.scanned} | 新增 {report.added} | 更新 {report.updated} | "
+            f"未变 {report.unchanged} | 分块 {report.chunks_upserted}",
+            end="",
+            file=sys.stderr,
+        )
+
+    store = VectorStore()
+    ingestor = Ingestor(store, args.collection)
+    try:
+        report = ingestor.ingest(args.directory, extensions=args.ext, progress=show, force=args.force)
+    finally:
+        ingestor.close()
+        store.close()
+    print(file=sys.stderr)
+    print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
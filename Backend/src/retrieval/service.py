@@ -0,0 +1,195 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Batched Embedding Service
+# Phase 5 - Local Retrieval
+# Created: 2026-10-19
+#
+
+"""
+批量嵌入服务
+
+- EmbeddingService: 将并发请求合并为更大的模型批次（micro-batching），
+  经 CachedEmbedder 按内容哈希去重 / 命中磁盘缓存
+- encode_vectors / decode_vectors: float32 矩阵的紧凑编码（base64 原始字节 / .npy 缓冲区）
+
+同一时间窗口（max_wait_ms）内到达的请求共享一次嵌入调用；
+单次合并的文本数不超过 max_batch_size（单个请求超过上限时独立成批）。
+"""
+
+import asyncio
+import base64
+import io
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .embeddings import CachedEmbedder
+from utils.config import settings
+
+ENCODINGS = ("base64", "npy", "float")
+
+
+def encode_vectors(matrix: np.ndarray, encoding: str = "base64") -> Any:
+    """
+    编码嵌入矩阵
+
+    Args:
+        encoding:
+            - "base64": 小端 float32 行优先原始字节的 base64（按 count × dimension 还原）
+            - "npy": NumPy .npy 缓冲区的 base64（自带 dtype / shape）
+            - "float": JSON 浮点列表（仅用于调试，体积约为 base64 的 3 倍）
+    """
+    matrix = np.ascontiguousarray(matrix, dtype="<f4")
+    if encoding == "base64":
+        return base64.b64encode(matrix.tobytes()).decode("ascii")
+    if encoding == "npy":
+        buffer = io.BytesIO()
+        np.save(buffer, matrix, allow_pickle=False)
+        return base64.b64encode(buffer.getvalue()).decode("ascii")
+    if encoding == "float":
+        return matrix.tolist()
+    raise ValueError(f"不支持的编码: {encoding}（可选: {', '.join(ENCODINGS)}）")
+
+
+def decode_vectors(data: Any, encoding: str = "base64", dimension: Optional[int] = None) -> np.ndarray:
+    """encode_vectors 的逆操作（base64 编码需要提供 dimension）"""
+    if encoding == "base64":
+        if not dimension:
+            raise ValueError("base64 编码需要 dimension")
+        return np.frombuffer(base64.b64decode(data), dtype="<f4").reshape(-1, dimension)
+    if encoding == "npy":
+        return np.load(io.BytesIO(base64.b64decode(data)), allow_pickle=False)
+    if encoding == "float":
+        return np.asarray(data, dtype=np.float32)
+    raise ValueError(f"不支持的编码: {encoding}（可选: {', '.join(ENCODINGS)}）")
+
+
+class EmbeddingService:
+    """
+    合并并发请求的嵌入服务
+
+    Example:
+        >>> service = EmbeddingService(store.embedder)
+        >>> matrix = await service.embed(["hello", "world"])
+    """
+
+    def __init__(
+        self,
+        embedder: CachedEmbedder,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+    ):
+        """
+        Args:
+            embedder: 带缓存的嵌入器
+            max_batch_size: 单次合并的最大文本数（默认 settings.embed_max_batch_size）
+            max_wait_ms: 首个请求到达后等待更多请求的时长（默认 settings.embed_max_wait_ms）
+        """
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size or settings.embed_max_batch_size
+        self.max_wait = (settings.embed_max_wait_ms if max_wait_ms is None else max_wait_ms) / 1000
+        self._queue: Deque[Tuple[List[str], asyncio.Future]] = deque()
+        self._pending_texts = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+
+    @property
+    def name(self) -> str:
+        return self.embedder.name
+
+    @property
+    def dimension(self) -> int:
+        return self.embedder.dimension
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        嵌入一组文本
+
+        Returns:
+            形状为 (len(texts), dimension) 的 float32 矩阵（L2 归一化）
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((list(texts), future))
+        self._pending_texts += len(texts)
+        self.requests += 1
+        self.texts += len(texts)
+
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+        elif self._pending_texts >= self.max_batch_size:
+            self._wakeup.set()
+        return await future
+
+    async def _run(self) -> None:
+        """合并循环：队列清空后退出，下次请求时重新启动"""
+        while self._queue:
+            if self._pending_texts < self.max_batch_size and self.max_wait > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+
+            requests = [self._queue.popleft()]
+            size = len(requests[0][0])
+            while self._queue and size + len(self._queue[0][0]) <= self.max_batch_size:
+                request = self._queue.popleft()
+                requests.append(request)
+                size += len(request[0])
+            self._pending_texts -= size
+
+            texts = [text for request_texts, _ in requests for text in request_texts]
+            self.batches += 1
+            try:
+                matrix = await asyncio.to_thread(self.embedder.embed, texts)
+            except Exception as e:
+                logger.error(f"嵌入失败: {e}")
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_texts, future in requests:
+                if not future.done():
+                    future.set_result(matrix[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "batches": self.batches,
+            "cache": self.embedder.stats,
+        }
+
+
+_shared_service: Optional[EmbeddingService] = None
+_shared_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """获取进程内共享的嵌入服务（与共享 VectorStore 使用同一嵌入器与缓存）"""
+    from .store import get_vector_store
+
+    global _shared_service
+    embedder = get_vector_store().embedder
+    with _shared_lock:
+        # 共享 VectorStore 被关闭重建后，随之换用新的嵌入器
+        if _shared_service is None or _shared_service.embedder is not embedder:
+            _shared_service = EmbeddingService(embedder)
+        return _shared_service
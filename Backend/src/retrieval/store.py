@@ -0,0 +1,447 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Persistent Vector Store
+# Phase 5 - Local Retrieval
+# Created: 2026-10-19
+#
+
+"""
+持久化本地向量索引
+
+- VectorStore: 统一入口（upsert / query / delete / count）
+- ChromaDB 可用时使用 chromadb.PersistentClient（余弦空间，向量由本模块提供）
+- 否则使用纯 NumPy 索引：每个集合一个目录（vectors.npy + records.json），原子写入
+
+嵌入统一经 CachedEmbedder 计算，两种后端共享同一份磁盘嵌入缓存。
+每个集合记录创建时使用的嵌入函数：按配置创建嵌入函数时（embedding_backend=auto 下
+Ollama 可用与否决定默认嵌入函数），已有集合始终用其记录的嵌入函数读写；记录的嵌入函数
+不可用时抛出 IncompatibleEmbeddingError，而不是用另一种向量空间查询。
+显式传入 embedding_function 时，不兼容的集合直接被拒绝。
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from .embeddings import (
+    CachedEmbedder,
+    EmbeddingCache,
+    EmbeddingFunction,
+    embedding_function_for,
+    get_embedding_function,
+)
+from utils.config import settings
+
+_COLLECTION_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,62}$")
+
+
+class IncompatibleEmbeddingError(ValueError):
+    """集合记录的嵌入函数与当前嵌入函数不同且无法使用"""
+
+
+def _check_collection_name(name: str) -> str:
+    if not _COLLECTION_NAME.match(name):
+        raise ValueError(f"无效的集合名称: {name}")
+    return name
+
+
+def _atomic_write(path: str, write) -> None:
+    """写入临时文件后 os.replace，避免崩溃时留下半个文件"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class _NumpyCollection:
+    """
+    单个 NumPy 集合（内存矩阵 + 磁盘快照）
+
+    向量存放在按倍数扩容的缓冲区中（vectors 为已用的前 len(ids) 行），
+    逐批导入时不必每批复制整个矩阵。
+    """
+
+    def __init__(self, directory: str, embedding: str, dimension: int):
+        self.directory = directory
+        self.embedding = embedding
+        self.dimension = dimension
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._buffer = np.zeros((0, dimension), dtype=np.float32)
+        self.index: Dict[str, int] = {}
+        self.dirty = False
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._buffer[: len(self.ids)]
+
+    @vectors.setter
+    def vectors(self, value: np.ndarray) -> None:
+        self._buffer = value
+
+    @classmethod
+    def load(cls, directory: str) -> "_NumpyCollection":
+        with open(os.path.join(directory, "records.json"), "r", encoding="utf-8") as f:
+            records = json.load(f)
+        collection = cls(directory, records["embedding"], records["dimension"])
+        collection.ids = records["ids"]
+        collection.documents = records["documents"]
+        collection.metadatas = records["metadatas"]
+        collection.vectors = np.load(os.path.join(directory, "vectors.npy"))
+        collection.index = {id_: i for i, id_ in enumerate(collection.ids)}
+        return collection
+
+    def save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        records = {
+            "embedding": self.embedding,
+            "dimension": self.dimension,
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+        }
+        # 先写向量再写记录：records.json 中的条目数永远不超过 vectors.npy 的行数
+        _atomic_write(os.path.join(self.directory, "vectors.npy"), lambda f: np.save(f, self.vectors))
+        _atomic_write(
+            os.path.join(self.directory, "records.json"),
+            lambda f: f.write(json.dumps(records, ensure_ascii=False).encode("utf-8")),
+        )
+        self.dirty = False
+
+    def upsert(self, ids, vectors, documents, metadatas) -> None:
+        new_rows = []
+        for id_, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+            position = self.index.get(id_)
+            if position is None:
+                self.index[id_] = len(self.ids) + len(new_rows)
+                new_rows.append((id_, vector, document, metadata))
+            else:
+                self.vectors[position] = vector
+                self.documents[position] = document
+                self.metadatas[position] = metadata
+        if new_rows:
+            size = len(self.ids)
+            needed = size + len(new_rows)
+            if needed > len(self._buffer):
+                capacity = max(needed, 2 * len(self._buffer), 64)
+                grown = np.zeros((capacity, self.dimension), dtype=np.float32)
+                grown[:size] = self._buffer[:size]
+                self._buffer = grown
+            self._buffer[size:needed] = np.stack([row[1] for row in new_rows])
+            self.ids.extend(row[0] for row in new_rows)
+            self.documents.extend(row[2] for row in new_rows)
+            self.metadatas.extend(row[3] for row in new_rows)
+        self.dirty = True
+
+    def delete(self, ids) -> int:
+        doomed = {self.index[id_] for id_ in ids if id_ in self.index}
+        if not doomed:
+            return 0
+        keep = [i for i in range(len(self.ids)) if i not in doomed]
+        self.vectors = self.vectors[keep] if keep else np.zeros((0, self.dimension), dtype=np.float32)
+        self.ids = [self.ids[i] for i in keep]
+        self.documents = [self.documents[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self.index = {id_: i for i, id_ in enumerate(self.ids)}
+        self.dirty = True
+        return len(doomed)
+
+    def query(self, vector: np.ndarray, n_results: int, where: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self.ids:
+            return []
+        scores = self.vectors @ vector
+        if where:
+            mask = np.fromiter(
+                (all(meta.get(k) == v for k, v in where.items()) for meta in self.metadatas),
+                dtype=bool,
+                count=len(self.metadatas),
+            )
+            scores = np.where(mask, scores, -np.inf)
+        k = min(n_results, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "id": self.ids[i],
+                "document": self.documents[i],
+                "metadata": self.metadatas[i],
+                "distance": float(1.0 - scores[i]),
+            }
+            for i in top
+            if np.isfinite(scores[i])
+        ]
+
+
+class VectorStore:
+    """
+    持久化向量索引
+
+    Example:
+        >>> store = VectorStore("./data/chroma")
+        >>> store.upsert("notes", ids=["a"], documents=["hello"], metadatas=[{"title": "A"}])
+        >>> store.query("notes", "hello", n_results=3)
+    """
+
+    def __init__(
+        self,
+        persist_directory: Optional[str] = None,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        backend: Optional[str] = None,
+        cache_directory: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            persist_directory: 索引根目录（默认 settings.chroma_persist_directory）
+            embedding_function: 嵌入函数（默认按 settings.embedding_backend 创建）
+            backend: "auto" | "chroma" | "numpy"（默认 settings.vector_backend）
+            cache_directory: 嵌入缓存目录（默认 settings.embedding_cache_directory）
+            batch_size: 嵌入批大小（默认 settings.embedding_batch_size）
+        """
+        self.persist_directory = persist_directory or settings.chroma_persist_directory
+        os.makedirs(self.persist_directory, exist_ok=True)
+
+        function = embedding_function or get_embedding_function()
+        cache = EmbeddingCache(cache_directory or settings.embedding_cache_directory)
+        self.embedder = CachedEmbedder(function, cache, batch_size or settings.embedding_batch_size)
+        # 按配置创建嵌入函数时，已有集合改用其记录的嵌入函数（按名称缓存，共享嵌入缓存）
+        self._follow_recorded = embedding_function is None
+        self._embedders: Dict[str, CachedEmbedder] = {function.name: self.embedder}
+
+        self._lock = threading.RLock()
+        self._collections: Dict[str, Any] = {}
+        self._chroma = None
+        backend = (backend or settings.vector_backend).lower()
+        if backend in ("auto", "chroma"):
+            try:
+                import chromadb
+
+                self._chroma = chromadb.PersistentClient(path=self.persist_directory)
+            except ImportError:
+                if backend == "chroma":
+                    raise RuntimeError("ChromaDB 未安装")
+                logger.info("ChromaDB 未安装，使用 NumPy 向量索引")
+        elif backend != "numpy":
+            raise ValueError(f"不支持的向量索引后端: {backend}")
+
+        self.backend = "chromadb" if self._chroma is not None else "numpy"
+        logger.info(f"  🗄️  向量索引: {self.backend} @ {self.persist_directory} (嵌入: {self.embedder.name})")
+
+    # MARK: - 集合
+
+    def _numpy_collection(self, name: str, create: bool) -> Optional[_NumpyCollection]:
+        collection = self._collections.get(name)
+        if collection is None:
+            directory = os.path.join(self.persist_directory, "numpy", name)
+            if os.path.exists(os.path.join(directory, "records.json")):
+                collection = _NumpyCollection.load(directory)
+            elif create:
+                collection = _NumpyCollection(directory, self.embedder.name, self.embedder.dimension)
+            else:
+                return None
+            self._collections[name] = collection
+        return collection
+
+    def _chroma_collection(self, name: str, create: bool):
+        collection = self._collections.get(name)
+        if collection is None:
+            if create:
+                metadata = {"hnsw:space": "cosine", "embedding": self.embedder.name}
+                collection = self._chroma.get_or_create_collection(name=name, metadata=metadata)
+            else:
+                # 读路径不创建集合（拼错的集合名不应留下空集合）；
+                # list_collections 在不同 ChromaDB 版本中返回集合对象或名称
+                names = {getattr(c, "name", c) for c in self._chroma.list_collections()}
+                if name not in names:
+                    return None
+                collection = self._chroma.get_collection(name=name)
+            self._collections[name] = collection
+        return collection
+
+    def _embedder_for(self, name: str) -> CachedEmbedder:
+        """集合记录的嵌入函数（新集合使用当前嵌入函数）"""
+        with self._lock:
+            if self._chroma is not None:
+                collection = self._chroma_collection(name, create=False)
+                metadata = (collection.metadata or {}) if collection is not None else {}
+                embedding = metadata.get("embedding", self.embedder.name)
+            else:
+                collection = self._numpy_collection(name, create=False)
+                embedding = collection.embedding if collection is not None else self.embedder.name
+            embedder = self._embedders.get(embedding)
+        if embedder is not None:
+            return embedder
+        if not self._follow_recorded:
+            raise IncompatibleEmbeddingError(
+                f"集合 {name} 使用嵌入函数 {embedding}，与当前 {self.embedder.name} 不兼容"
+            )
+        try:
+            function = embedding_function_for(embedding)
+        except Exception as e:
+            raise IncompatibleEmbeddingError(
+                f"集合 {name} 由嵌入函数 {embedding} 建立，但该嵌入函数当前不可用（{e}）；"
+                f"请启动对应的嵌入服务（如 Ollama）后重试，或删除该集合后用 {self.embedder.name} 重新导入"
+            ) from e
+        with self._lock:
+            embedder = self._embedders.setdefault(
+                embedding, CachedEmbedder(function, self.embedder.cache, self.embedder.batch_size)
+            )
+        logger.info(f"集合 {name} 使用其记录的嵌入函数 {embedding}")
+        return embedder
+
+    # MARK: - 读写
+
+    def upsert(
+        self,
+        collection: str,
+        ids: List[str],
+        documents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        persist: bool = True,
+    ) -> int:
+        """
+        写入或更新文档（按 id 覆盖）
+
+        Args:
+            persist: NumPy 后端是否立即落盘（批量导入时可设为 False，最后调用 persist()）
+
+        Returns:
+            写入条数
+        """
+        _check_collection_name(collection)
+        if not ids:
+            return 0
+        metadatas = metadatas or [{} for _ in ids]
+        vectors = self._embedder_for(collection).embed(documents)
+
+        with self._lock:
+            if self._chroma is not None:
+                self._chroma_collection(collection, create=True).upsert(
+                    ids=ids, embeddings=vectors.tolist(), documents=documents, metadatas=metadatas
+                )
+            else:
+                target = self._numpy_collection(collection, create=True)
+                target.upsert(ids, vectors, documents, metadatas)
+                if persist:
+                    target.save()
+        return len(ids)
+
+    def delete(self, collection: str, ids: List[str], persist: bool = True) -> int:
+        """删除文档，返回删除条数（ChromaDB 后端返回请求条数）"""
+        _check_collection_name(collection)
+        if not ids:
+            return 0
+        with self._lock:
+            if self._chroma is not None:
+                target = self._chroma_collection(collection, create=False)
+                if target is None:
+                    return 0
+                target.delete(ids=ids)
+                return len(ids)
+            target = self._numpy_collection(collection, create=False)
+            if target is None:
+                return 0
+            removed = target.delete(ids)
+            if persist and removed:
+                target.save()
+            return removed
+
+    def persist(self) -> None:
+        """将有改动的 NumPy 集合落盘（ChromaDB 自动持久化）"""
+        with self._lock:
+            for collection in self._collections.values():
+                if isinstance(collection, _NumpyCollection) and collection.dirty:
+                    collection.save()
+
+    def query(
+        self,
+        collection: str,
+        text: str,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        语义查询
+
+        Returns:
+            [{"id", "document", "metadata", "distance"}]，distance 为余弦距离（越小越相似）
+        """
+        _check_collection_name(collection)
+        vector = self._embedder_for(collection).embed([text])[0]
+
+        with self._lock:
+            if self._chroma is not None:
+                target = self._chroma_collection(collection, create=False)
+                count = target.count() if target is not None else 0
+                if count == 0:
+                    return []
+                result = target.query(
+                    query_embeddings=[vector.tolist()], n_results=min(n_results, count), where=where
+                )
+                return [
+                    {"id": id_, "document": doc, "metadata": meta or {}, "distance": float(dist)}
+                    for id_, doc, meta, dist in zip(
+                        result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]
+                    )
+                ]
+            target = self._numpy_collection(collection, create=False)
+            return target.query(vector, n_results, where) if target else []
+
+    def count(self, collection: str) -> int:
+        """集合中的文档数"""
+        _check_collection_name(collection)
+        with self._lock:
+            if self._chroma is not None:
+                target = self._chroma_collection(collection, create=False)
+                return target.count() if target is not None else 0
+            target = self._numpy_collection(collection, create=False)
+            return len(target.ids) if target else 0
+
+    def close(self) -> None:
+        """落盘并关闭嵌入缓存"""
+        self.persist()
+        if self.embedder.cache is not None:
+            self.embedder.cache.close()
+
+
+# MARK: - 进程内共享实例
+
+_shared_store: Optional[VectorStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """
+    获取进程内共享的 VectorStore（按 settings 创建）
+
+    SearchPattern 与文档导入共用同一实例，NumPy 后端的内存索引因此始终一致。
+    """
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = VectorStore()
+        return _shared_store
+
+
+def close_vector_store() -> None:
+    """落盘并释放共享实例"""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is not None:
+            _shared_store.close()
+            _shared_store = None
@@ -27,9 +27,11 @@ class InputValidator:
             "length": ["short", "medium", "long"],
             "style": ["bullet", "paragraph", "headline"],
             "language": ["zh-CN", "en-US", "ja-JP", "ko-KR", "es-ES", "fr-FR", "de-DE", "auto"],
+            "session_id": str,  # 增量总结会话 ID（任意字符串）
+            "reset": [True, False],  # 重置增量总结会话
         },
         "extract": {
-            "entity_types": ["person", "organization", "location", "date", "email", "phone", "url"],
+            "entity_types": ["person", "organization", "location", "date", "email", "phone", "url", "amount"],
             "extract_keywords": [True, False],
             "extract_contacts": [True, False],
             "extract_dates": [True, False],
@@ -52,8 +54,8 @@ class InputValidator:
             "style": ["formal", "casual", "technical"],
         },
         "format": {
-            "from_format": ["json", "yaml", "csv", "markdown", "xml", "toml"],
-            "to_format": ["json", "yaml", "csv", "markdown", "xml", "toml"],
+            "from_format": ["auto", "json", "jsonl", "yaml", "csv", "markdown", "html", "xml", "toml"],
+            "to_format": ["json", "jsonl", "yaml", "csv", "markdown", "html", "xml", "toml"],
             "prettify": [True, False],
         },
         "search": {
@@ -69,6 +71,11 @@ class InputValidator:
             ],
             "summarize": [True, False],
             "collection": str,  # 语义搜索集合名（任意字符串）
+            "fetch_pages": [True, False],  # Phase 5: 抓取结果网页正文
+        },
+        "embed": {
+            "encoding": ["base64", "npy", "float"],
+            "split_lines": [True, False],
         },
     }
 
@@ -76,7 +83,7 @@ class InputValidator:
     MAX_TEXT_LENGTH = 50_000
 
     # Pattern ID 白名单
-    ALLOWED_PATTERN_IDS = ["summarize", "extract", "translate", "format", "search"]
+    ALLOWED_PATTERN_IDS = ["summarize", "extract", "translate", "format", "search", "embed"]
 
     # 危险字符模式（可能导致注入攻击）
     DANGEROUS_PATTERNS = [
@@ -93,6 +100,17 @@ class InputValidator:
 
         logger.info("✓ InputValidator 初始化: 5 个 Pattern 白名单已加载")
 
+    def register_pattern(self, pattern_id: str, parameters: Dict[str, Any]) -> None:
+        """
+        登记 Pattern 及其参数白名单（Phase 5: 插件 Pattern 由清单提供）
+
+        内置 Pattern 已在白名单中时不做修改；登记只影响当前实例。
+        """
+        if pattern_id in self.ALLOWED_PATTERN_IDS:
+            return
+        self.ALLOWED_PATTERN_IDS = [*self.ALLOWED_PATTERN_IDS, pattern_id]
+        self.ALLOWED_PARAMETERS = {**self.ALLOWED_PARAMETERS, pattern_id: dict(parameters)}
+
     def validate_pattern_id(self, pattern_id: str) -> tuple[bool, Optional[str]]:
         """
         验证 Pattern ID
@@ -199,6 +217,15 @@ class InputValidator:
                             parameters,
                         )
                 validated_params[key] = value
+            elif isinstance(allowed_values, type):
+                # 类型约束参数（如任意字符串）
+                if not isinstance(value, allowed_values):
+                    return (
+                        False,
+                        f"参数 '{key}' 的类型无效，应为 {allowed_values.__name__}",
+                        parameters,
+                    )
+                validated_params[key] = value
             else:
                 # 单值参数验证
                 if value not in allowed_values:
@@ -5,12 +5,14 @@
 - LRU Cache（最近最少使用缓存）
 - 自动淘汰旧条目
 - 缓存命中率统计
+- 搜索结果缓存（Phase 5：条数 + 字节双上限，stale-while-revalidate）
 """
 
 import hashlib
+import json
 import time
 from collections import OrderedDict
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -202,3 +204,144 @@ class TranslationCache:
             f"TranslationCache(size={len(self._cache)}/{self._max_size}, "
             f"hit_rate={self.hit_rate:.1%}, hits={self._hits}, misses={self._misses})"
         )
+
+
+class SearchResultCache:
+    """
+    搜索结果缓存（LRU + stale-while-revalidate）
+
+    特性：
+    - 同时限制条数和字节数（按 JSON 序列化大小估算），超限时淘汰最久未用的条目
+    - 新鲜期内直接命中；新鲜期后、stale 期内返回旧结果并由调用方后台刷新
+    - 超过 stale 期的条目视为未命中并删除
+    - 记录命中 / 未命中 / 过期命中 / 后台刷新统计
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 8 * 1024 * 1024,
+        ttl_seconds: float = 300,
+        stale_ttl_seconds: float = 3600,
+    ):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最大缓存条数
+            max_bytes: 最大缓存字节数
+            ttl_seconds: 新鲜期（秒）
+            stale_ttl_seconds: 新鲜期之后仍可返回旧结果的时长（秒）
+        """
+        self._cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        self._stale_ttl_seconds = stale_ttl_seconds
+        self._bytes = 0
+        self._refreshing: set = set()
+
+        # 统计信息
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+
+    def lookup(self, key: str) -> Tuple[Optional[List[Dict[str, Any]]], str]:
+        """
+        查询缓存
+
+        Returns:
+            (结果, 状态)，状态为 "hit" | "stale" | "miss"
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            self._misses += 1
+            return None, "miss"
+
+        age = time.time() - entry["timestamp"]
+        if age > self._ttl_seconds + self._stale_ttl_seconds:
+            self._remove(key)
+            self._misses += 1
+            return None, "miss"
+
+        self._cache.move_to_end(key)
+        if age > self._ttl_seconds:
+            self._stale_hits += 1
+            return entry["results"], "stale"
+
+        self._hits += 1
+        return entry["results"], "hit"
+
+    def put(self, key: str, results: List[Dict[str, Any]]) -> None:
+        """存入结果（超过字节上限的单条结果不缓存）"""
+        size = len(json.dumps(results, ensure_ascii=False, default=str).encode("utf-8"))
+        if key in self._cache:
+            self._remove(key)
+        if size > self._max_bytes:
+            logger.debug(f"搜索结果过大，不缓存: key={key}, size={size}")
+            return
+
+        self._cache[key] = {"results": results, "timestamp": time.time(), "size": size}
+        self._bytes += size
+
+        while len(self._cache) > self._max_entries or self._bytes > self._max_bytes:
+            evicted_key = next(iter(self._cache))
+            self._remove(evicted_key)
+            self._evictions += 1
+
+    def begin_refresh(self, key: str) -> bool:
+        """
+        标记后台刷新开始
+
+        Returns:
+            False 表示该键已在刷新中（避免重复刷新）
+        """
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        self._refreshes += 1
+        return True
+
+    def end_refresh(self, key: str, success: bool = True) -> None:
+        """标记后台刷新结束"""
+        self._refreshing.discard(key)
+        if not success:
+            self._refresh_failures += 1
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._cache.clear()
+        self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._cache.pop(key)
+        self._bytes -= entry["size"]
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        缓存统计信息
+
+        Returns:
+            统计字典
+        """
+        lookups = self._hits + self._stale_hits + self._misses
+        return {
+            "entries": len(self._cache),
+            "max_entries": self._max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self._hits,
+            "stale_hits": self._stale_hits,
+            "misses": self._misses,
+            "refreshes": self._refreshes,
+            "refresh_failures": self._refresh_failures,
+            "evictions": self._evictions,
+            "hit_rate": (self._hits + self._stale_hits) / lookups if lookups else 0.0,
+        }
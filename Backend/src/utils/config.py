@@ -39,6 +39,83 @@ class Settings(BaseSettings):
     chroma_persist_directory: str = "./data/chroma"
     chroma_collection_name: str = "maccortex"
 
+    # 本地向量索引 / 嵌入配置
+    vector_backend: str = "auto"  # auto | chroma | numpy
+    embedding_backend: str = "auto"  # auto | ollama | hashing
+    embedding_model: str = "nomic-embed-text"  # Ollama 嵌入模型
+    embedding_dimension: int = 384  # 哈希向量化维度
+    embedding_batch_size: int = 64
+    embedding_cache_directory: str = "./data/embedding_cache"
+    embed_max_batch_size: int = 256  # 并发嵌入请求合并上限（文本数）
+    embed_max_wait_ms: float = 5.0  # 合并窗口
+    embed_max_texts: int = 2048  # 单次请求文本数上限
+
+    # 文档导入配置（增量：按 mtime / size / sha256 跳过未变化文件）
+    ingest_chunk_tokens: int = 512
+    ingest_chunk_overlap_tokens: int = 64
+    ingest_max_file_bytes: int = 5 * 1024 * 1024
+    ingest_extensions: list[str] = [
+        ".md", ".markdown", ".txt", ".rst", ".html", ".htm",
+        ".py", ".swift", ".js", ".ts", ".json", ".yaml", ".yml", ".toml", ".csv",
+    ]
+
+    # 增量总结配置
+    summary_session_directory: str = "./data/summary_sessions"
+    summary_chunk_chars: int = 4000
+    summary_min_delta_chars: int = 800
+    summary_max_sessions: int = 256  # 内存中保留的会话数（LRU；淘汰的会话仍可从磁盘加载）
+
+    # 长文档信息提取配置
+    extract_chunk_chars: int = 6000
+    extract_chunk_overlap: int = 300
+    extract_max_concurrency: int = 4
+
+    # 默认搜索语言（SearchPattern 与 ResearcherNode 共用，参与缓存 / 合并键）
+    search_language: str = "zh-CN"
+
+    # 搜索缓存配置（LRU + stale-while-revalidate）
+    search_cache_max_entries: int = 256
+    search_cache_max_bytes: int = 8 * 1024 * 1024
+    search_cache_ttl: int = 300  # 新鲜期（秒）
+    search_cache_stale_ttl: int = 3600  # 过期后仍可先返回旧结果的时长（秒）
+
+    # 混合搜索配置（两路并发，各自超时，RRF 融合）
+    search_web_timeout: float = 8.0
+    search_semantic_timeout: float = 3.0
+    search_rrf_k: int = 60
+
+    # 共享 Web 搜索服务限流（SearchPattern 与 ResearcherNode 共用）
+    search_max_concurrency: int = 2
+    search_min_interval: float = 1.0  # 相邻引擎请求的最小间隔（秒），DuckDuckGo 间隔过短会触发限速
+
+    # 搜索结果网页抓取与正文提取（连接池 + 单站并发上限 + 大小 / 时间硬上限）
+    fetch_max_connections: int = 10
+    fetch_per_host: int = 2
+    fetch_timeout: float = 5.0  # 单个页面的总时限（秒，含连接、下载）
+    fetch_max_bytes: int = 2 * 1024 * 1024  # 超出部分直接丢弃
+    fetch_extract_workers: int = 2  # 正文提取进程数（0 = 使用线程）
+    fetch_cache_max_entries: int = 512
+    fetch_cache_ttl: int = 600  # 新鲜期（秒），之后以 ETag / Last-Modified 条件请求重新验证
+    fetch_content_chars: int = 4000  # 每个页面保留的正文字符数
+    fetch_allow_private_hosts: bool = False  # 允许抓取回环 / 内网地址（含重定向目标）
+    search_fetch_top_n: int = 3  # SearchPattern 抓取前 N 条 Web 结果
+
+    # 总结前近似去重（MinHash 估计 Jaccard 相似度 ≥ 阈值视为重复；> 1 关闭）
+    search_dedup_threshold: float = 0.8
+    search_dedup_num_perm: int = 128
+
+    # Pattern 加载（默认首次执行时才导入与初始化）
+    pattern_preload: list[str] = []  # 启动时立即加载的 Pattern ID
+
+    # Pattern 流水线（/pipeline）
+    pipeline_max_steps: int = 8
+    pipeline_cache_max_entries: int = 256
+    pipeline_cache_ttl: int = 600  # 步骤结果缓存有效期（秒）
+
+    # LLM Provider 健康探测（驱动 ModelRouterV2 熔断器；只探测熔断中的 Provider，
+    # 云端 Provider 的每次探测是一次计费调用）
+    llm_health_probe_interval: float = 0.0  # 探测间隔（秒），0 = 不探测
+
     # 性能配置
     max_concurrent_requests: int = 10
     request_timeout: float = 30.0
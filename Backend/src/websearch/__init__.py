@@ -0,0 +1,65 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Shared Web Search
+# Phase 5 - Shared Web Search
+# Created: 2026-10-19
+#
+
+"""
+共享 Web 搜索模块
+
+- SearchResult: 统一的搜索结果对象
+- SearchEngine / DuckDuckGoEngine / StubEngine: 可插拔搜索引擎
+- WebSearchService: 共享缓存 + 请求合并 + 全局限流
+- PageFetcher: 搜索结果网页并发抓取 + 正文提取（ETag / Last-Modified 重新验证）
+- NearDuplicateFilter / dedup_results: 总结前的近似去重（Shingling + MinHash）
+- testing.LocalHTTPServer: 本地 HTTP 替身服务器（测试用，需显式导入）
+"""
+
+from .dedup import NearDuplicateFilter, dedup_results, dedup_texts, shingles
+from .engines import DuckDuckGoEngine, SearchEngine, SearchResult, StubEngine
+from .extract import extract_main_content
+from .fetcher import (
+    BlockedURLError,
+    FetchedPage,
+    PageCache,
+    PageFetcher,
+    close_page_fetcher,
+    get_page_fetcher,
+    summarize_fetch,
+)
+from .service import (
+    SearchRateLimiter,
+    WebSearchService,
+    close_search_service,
+    get_search_service,
+)
+
+__all__ = [
+    # Engines
+    "SearchResult",
+    "SearchEngine",
+    "DuckDuckGoEngine",
+    "StubEngine",
+    # Service
+    "SearchRateLimiter",
+    "WebSearchService",
+    "get_search_service",
+    "close_search_service",
+    # Page fetch
+    "BlockedURLError",
+    "FetchedPage",
+    "PageCache",
+    "PageFetcher",
+    "extract_main_content",
+    "summarize_fetch",
+    "get_page_fetcher",
+    "close_page_fetcher",
+    # Dedup
+    "NearDuplicateFilter",
+    "dedup_results",
+    "dedup_texts",
+    "shingles",
+]
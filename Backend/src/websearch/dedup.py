@@ -0,0 +1,146 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Near-Duplicate Removal
+# Phase 5 - Shared Web Search
+# Created: 2026-10-19
+#
+
+"""
+搜索结果近似去重（Shingling + MinHash）
+
+转载 / 聚合站点常带来同一篇文章的多个副本，总结前去掉它们可以省下重复的提示词 token：
+- 文本规范化后按词切分（CJK 逐字），取连续 k 个词为一个 shingle
+- MinHash 签名：num_perm 个 (a·x + b) mod p 置换，NumPy 一次计算全部置换与 shingle
+- 两两相似度 = 签名逐位相等的比例（Jaccard 相似度的无偏估计），同样以矩阵一次算出
+- 按原有顺序贪心保留：与任一已保留结果的相似度 ≥ threshold 即视为重复
+"""
+
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_WORD_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]|[^\W_]+")
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """
+    文本 → shingle 列表（小写、忽略标点与空白；不足 size 个词时整段作为一个 shingle）
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class NearDuplicateFilter:
+    """
+    MinHash 近似去重
+
+    Example:
+        >>> dedup = NearDuplicateFilter(threshold=0.8)
+        >>> keep, duplicates = dedup.filter(["A B C D", "A B C D!", "E F G H"])
+        >>> keep
+        [0, 2]
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        """
+        Args:
+            threshold: 估计 Jaccard 相似度 ≥ 该值视为重复（> 1 时不去重）
+            num_perm: MinHash 置换数（越大估计越准，误差约 1/√num_perm）
+            shingle_size: 每个 shingle 的词数
+            seed: 置换参数的随机种子（固定种子保证结果可复现）
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash 签名（num_perm 维 uint64；空文本为全最大值）"""
+        items = shingles(text, self.shingle_size)
+        if not items:
+            return np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(item.encode("utf-8")) & 0x7FFFFFFF for item in items),
+            dtype=np.uint64,
+            count=len(items),
+        )
+        # a < 2^31，hash < 2^31：乘积不会溢出 uint64
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME).min(axis=1)
+
+    def similarity_matrix(self, texts: Sequence[str]) -> np.ndarray:
+        """两两估计 Jaccard 相似度（n × n）"""
+        if not texts:
+            return np.zeros((0, 0))
+        signatures = np.stack([self.signature(text) for text in texts])
+        return (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+
+    def filter(self, texts: Sequence[str]) -> Tuple[List[int], List[Dict[str, Any]]]:
+        """
+        Returns:
+            (保留的下标, 重复项 [{"index", "duplicate_of", "similarity"}])
+        """
+        if self.threshold > 1 or len(texts) < 2:
+            return list(range(len(texts))), []
+
+        similarity = self.similarity_matrix(texts)
+        empty = [not text.strip() for text in texts]
+        keep: List[int] = []
+        duplicates: List[Dict[str, Any]] = []
+        for index in range(len(texts)):
+            # 空文本（无摘要 / 正文）不参与比较
+            candidates = [kept for kept in keep if not empty[kept]]
+            if candidates and not empty[index]:
+                scores = similarity[index, candidates]
+                best = int(scores.argmax())
+                if scores[best] >= self.threshold:
+                    duplicates.append(
+                        {"index": index, "duplicate_of": candidates[best], "similarity": round(float(scores[best]), 3)}
+                    )
+                    continue
+            keep.append(index)
+        return keep, duplicates
+
+
+def dedup_texts(texts: Sequence[str], dedup: NearDuplicateFilter) -> Tuple[List[int], Dict[str, Any]]:
+    """
+    Returns:
+        (保留的下标, 统计 {"threshold", "removed", "tokens_saved", "duplicates"})
+    """
+    from llm.tokenizer import get_tokenizer
+
+    keep, duplicates = dedup.filter(texts)
+    tokenizer = get_tokenizer()
+    report = {
+        "threshold": dedup.threshold,
+        "removed": len(duplicates),
+        "tokens_saved": sum(tokenizer.count(texts[item["index"]]) for item in duplicates),
+        "duplicates": duplicates,
+    }
+    return keep, report
+
+
+def dedup_results(
+    results: List[Dict[str, Any]],
+    threshold: float = 0.8,
+    dedup: Optional[NearDuplicateFilter] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    去掉近似重复的搜索结果（比较已抓取的正文，没有正文时比较摘要）
+
+    Returns:
+        (去重后的结果（保持原顺序）, 统计（重复项附带 url）)
+    """
+    texts = [result.get("content") or result.get("snippet") or "" for result in results]
+    keep, report = dedup_texts(texts, dedup or NearDuplicateFilter(threshold))
+    for duplicate in report["duplicates"]:
+        duplicate["url"] = results[duplicate["index"]].get("url", "")
+    return [results[index] for index in keep], report
@@ -0,0 +1,170 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Web Search Engines
+# Phase 5 - Shared Web Search
+# Created: 2026-10-19
+#
+
+"""
+Web 搜索引擎
+
+- SearchResult: 统一的搜索结果对象（SearchPattern / ResearcherNode 共用）
+- SearchEngine: 可插拔引擎接口
+- DuckDuckGoEngine: DuckDuckGo（duckduckgo_search，同步库放入线程池）
+- StubEngine: 确定性本地引擎（测试 / 离线环境），记录调用
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """单条搜索结果"""
+
+    title: str
+    url: str
+    snippet: str
+    source: str  # 引擎名称
+    rank: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResult":
+        return cls(
+            title=data.get("title", ""),
+            url=data.get("url", ""),
+            snippet=data.get("snippet", ""),
+            source=data.get("source", ""),
+            rank=int(data.get("rank", 0)),
+        )
+
+
+class SearchEngine(ABC):
+    """
+    搜索引擎协议 (Abstract Base Class)
+
+    实现方返回按相关度排序的结果；失败时抛出异常，由调用方决定降级策略。
+    """
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """引擎标识（如 "duckduckgo"）"""
+
+    @abstractmethod
+    async def search(self, query: str, num_results: int, language: str) -> List[SearchResult]:
+        """执行搜索"""
+
+
+# 语言 → DuckDuckGo 区域（Phase 2 Week 4 Day 17 扩展）
+_DUCKDUCKGO_REGIONS = {
+    "zh-CN": "cn-zh",  # 中国简体
+    "zh": "cn-zh",
+    "en-US": "us-en",  # 美国英文
+    "en": "us-en",
+    "ja-JP": "jp-jp",  # 日本
+    "ja": "jp-jp",
+    "ko-KR": "kr-kr",  # 韩国
+    "ko": "kr-kr",
+    "auto": "wt-wt",  # 全球（无地区限制）
+}
+
+
+class DuckDuckGoEngine(SearchEngine):
+    """
+    DuckDuckGo 搜索
+
+    Raises:
+        ImportError: duckduckgo_search 未安装
+    """
+
+    @property
+    def name(self) -> str:
+        return "duckduckgo"
+
+    async def search(self, query: str, num_results: int, language: str) -> List[SearchResult]:
+        from duckduckgo_search import DDGS
+
+        region = _DUCKDUCKGO_REGIONS.get(language, "wt-wt")
+        logger.info(f"🔍 DuckDuckGo 搜索: '{query}' (region={region}, num={num_results})")
+
+        def _sync_search() -> List[SearchResult]:
+            results = []
+            with DDGS() as ddgs:
+                # 多获取一些以防过滤后不够
+                for i, item in enumerate(ddgs.text(keywords=query, region=region, max_results=num_results * 2)):
+                    # 过滤无效结果
+                    if not item.get("title") or not item.get("href"):
+                        continue
+                    results.append(
+                        SearchResult(
+                            title=item.get("title", ""),
+                            url=item.get("href", ""),
+                            snippet=item.get("body", ""),
+                            source=self.name,
+                            rank=i + 1,
+                        )
+                    )
+                    if len(results) >= num_results:
+                        break
+            return results
+
+        # 同步库，放入线程池以免阻塞事件循环
+        results = await asyncio.to_thread(_sync_search)
+        if results:
+            logger.info(f"✅ DuckDuckGo 搜索成功: {len(results)} 条结果")
+        else:
+            logger.warning(f"DuckDuckGo 搜索无结果: '{query}'")
+        return results
+
+
+class StubEngine(SearchEngine):
+    """
+    确定性本地引擎（不访问网络）
+
+    Args:
+        name: 引擎名称
+        delay: 每次搜索的模拟延迟（秒）
+        results: 固定结果（query → 结果列表）；未指定的查询生成占位结果
+    """
+
+    def __init__(
+        self,
+        name: str = "stub",
+        delay: float = 0.0,
+        results: Optional[Dict[str, List[SearchResult]]] = None,
+    ):
+        self._name = name
+        self.delay = delay
+        self.results = results or {}
+        self.calls: List[str] = []
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    async def search(self, query: str, num_results: int, language: str) -> List[SearchResult]:
+        self.calls.append(query)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if query in self.results:
+            return self.results[query][:num_results]
+        return [
+            SearchResult(
+                title=f"{query} - 结果 {i + 1}",
+                url=f"https://example.com/{self._name}/{i + 1}?q={query}",
+                snippet=f"这是关于 '{query}' 的本地占位结果 {i + 1}。",
+                source=self._name,
+                rank=i + 1,
+            )
+            for i in range(num_results)
+        ]
@@ -0,0 +1,198 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Main Content Extraction
+# Phase 5 - Shared Web Search
+# Created: 2026-10-19
+#
+
+"""
+网页正文提取（纯标准库，可在进程池中运行）
+
+- 丢弃 script / style / nav / header / footer / aside / form 等非正文区域
+- 页面含 <article> 或 <main> 时只取其中内容
+- 以块级元素（段落、标题、列表项、代码块…）为单位收集文本，
+  丢弃链接文字占比过高的短块（导航条、标签云）
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+_SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+}
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "pre", "blockquote", "td", "th", "tr",
+    "h1", "h2", "h3", "h4", "h5", "h6", "dd", "dt", "figcaption", "table", "ul", "ol",
+}
+_HEADINGS = {"h1": "# ", "h2": "## ", "h3": "### ", "h4": "#### ", "h5": "##### ", "h6": "###### "}
+_CONTENT_ROOTS = ("article", "main")
+_WHITESPACE = re.compile(r"\s+")
+
+# 链接文字占比超过该值且长度较短的块视为导航
+_MAX_LINK_DENSITY = 0.5
+_SHORT_BLOCK_CHARS = 200
+
+
+class _Block:
+    __slots__ = ("prefix", "parts", "link_chars", "pre")
+
+    def __init__(self, prefix: str = "", pre: bool = False):
+        self.prefix = prefix
+        self.parts: List[str] = []
+        self.link_chars = 0
+        self.pre = pre
+
+    def text(self) -> str:
+        raw = "".join(self.parts)
+        return raw.strip("\n") if self.pre else _WHITESPACE.sub(" ", raw).strip()
+
+
+class _ContentParser(HTMLParser):
+    """单遍收集块级文本；分别记录整页与 article/main 内的块"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self._in_title = False
+        self._skip_tag: Optional[str] = None  # 当前跳过区域的起始标签
+        self._skip_depth = 0  # 区域内同名标签的嵌套层数
+        self._root_depth = 0
+        self._link_depth = 0
+        self._pre_depth = 0
+        self._block: Optional[_Block] = None
+        self._block_in_root = False
+        self.page_blocks: List[Tuple[str, int, str]] = []  # (文本, 链接字符数, 前缀)
+        self.root_blocks: List[Tuple[str, int, str]] = []
+
+    # MARK: - 块
+
+    def _flush(self) -> None:
+        block = self._block
+        self._block = None
+        if block is None:
+            return
+        text = block.text()
+        if not text:
+            return
+        entry = (text, block.link_chars, block.prefix)
+        self.page_blocks.append(entry)
+        if self._block_in_root:
+            self.root_blocks.append(entry)
+
+    def _open(self, prefix: str = "", pre: bool = False) -> None:
+        self._flush()
+        self._block = _Block(prefix, pre)
+        self._block_in_root = self._root_depth > 0
+
+    # MARK: - HTMLParser
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            if tag == "br" and self._block is not None:
+                self._block.parts.append("\n" if self._block.pre else " ")
+            return
+        # 跳过区域只按起始标签的同名标签计数：区域内隐式闭合的标签（<li>、<p>）
+        # 没有结束标签，逐个计数会让区域永远无法结束
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in _SKIP_TAGS:
+            self._skip_tag = tag
+            self._skip_depth = 1
+            return
+        if tag == "title":
+            self._in_title = True
+        elif tag in _CONTENT_ROOTS:
+            self._root_depth += 1
+        if tag == "a":
+            self._link_depth += 1
+        elif tag == "pre":
+            self._pre_depth += 1
+            self._open(pre=True)
+        elif tag in _HEADINGS:
+            self._open(_HEADINGS[tag])
+        elif tag == "li":
+            self._open("- ")
+        elif tag in _BLOCK_TAGS and not self._pre_depth:
+            self._open()
+
+    def handle_endtag(self, tag):
+        if tag in _VOID_TAGS:
+            return
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if not self._skip_depth:
+                    self._skip_tag = None
+            return
+        if tag == "title":
+            self._in_title = False
+        elif tag == "a":
+            self._link_depth = max(0, self._link_depth - 1)
+        elif tag == "pre":
+            self._pre_depth = max(0, self._pre_depth - 1)
+            self._flush()
+        elif tag in _BLOCK_TAGS and not self._pre_depth:
+            self._flush()
+        if tag in _CONTENT_ROOTS:
+            self._root_depth = max(0, self._root_depth - 1)
+
+    def handle_data(self, data):
+        if self._skip_tag is not None:
+            return
+        if self._in_title:
+            self.title += data
+            return
+        if self._block is None:
+            if not data.strip():
+                return
+            self._open()
+        self._block.parts.append(data)
+        if self._link_depth:
+            self._block.link_chars += len(data.strip())
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _keep(block: Tuple[str, int, str]) -> bool:
+    text, link_chars, _ = block
+    return not (len(text) < _SHORT_BLOCK_CHARS and link_chars > _MAX_LINK_DENSITY * len(text))
+
+
+def extract_main_content(html: str, max_chars: Optional[int] = None) -> Tuple[str, str]:
+    """
+    提取网页标题与正文
+
+    Args:
+        html: 网页源码
+        max_chars: 正文最大字符数（超出时在块边界截断）
+
+    Returns:
+        (标题, 正文)；正文为以空行分隔的文本块，标题块带 Markdown 前缀
+    """
+    parser = _ContentParser()
+    parser.feed(html)
+    parser.close()
+
+    blocks = parser.root_blocks or parser.page_blocks
+    lines: List[str] = []
+    total = 0
+    for text, _, prefix in filter(_keep, blocks):
+        line = prefix + text
+        if max_chars is not None and total + len(line) > max_chars:
+            if not lines:
+                lines.append(line[:max_chars])
+            break
+        lines.append(line)
+        total += len(line) + 2
+
+    title = _WHITESPACE.sub(" ", parser.title).strip()
+    return title, "\n\n".join(lines)
@@ -0,0 +1,492 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Search Result Page Fetcher
+# Phase 5 - Shared Web Search
+# Created: 2026-10-19
+#
+
+"""
+搜索结果网页抓取与正文提取
+
+- 连接池：共享 httpx.AsyncClient（总连接数上限），另按站点限制并发
+- 硬上限：单页总时限（连接 + 下载）与最大字节数（超出部分不读取）
+- 正文提取：extract_main_content 在进程池中运行，不占用事件循环
+- 缓存：按 URL 缓存提取后的正文；过了新鲜期以 ETag / Last-Modified 条件请求重新验证，
+  304 时直接复用缓存正文
+- 目标校验：搜索结果 URL 与每一跳重定向目标都必须解析到公网地址（拒绝回环、内网、
+  链路本地等地址），避免搜索结果把请求引向本机或内网服务；请求直接连接校验过的地址
+  （Host 头与 TLS SNI 仍为原主机名），不会被第二次 DNS 解析换成内网地址（DNS rebinding）
+"""
+
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from loguru import logger
+
+from .extract import extract_main_content
+from utils.config import settings
+
+_HTML_TYPES = ("text/html", "application/xhtml+xml")
+_TEXT_TYPES = ("text/plain",)
+_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) MacCortex/1.0"
+_MAX_REDIRECTS = 5
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class BlockedURLError(ValueError):
+    """抓取目标不是公网 http(s) 地址"""
+
+
+async def ensure_public_url(url: str) -> str:
+    """
+    校验 URL 为 http(s) 且主机的所有解析地址都是公网地址
+
+    Returns:
+        校验通过的地址（抓取时直接连接该地址，不再重新解析）
+
+    Raises:
+        BlockedURLError: 协议不支持，或主机解析到回环 / 内网 / 链路本地等非公网地址
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise BlockedURLError(f"unsupported URL: {url}")
+    try:
+        addresses = [ipaddress.ip_address(parts.hostname)]
+    except ValueError:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            parts.hostname, port, type=socket.SOCK_STREAM
+        )
+        addresses = [ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos]
+    for address in addresses:
+        if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        if not address.is_global:
+            raise BlockedURLError(f"non-public address {address} for host {parts.hostname}")
+    return str(addresses[0])
+
+
+def _pin_address(request: httpx.Request, address: str) -> httpx.Request:
+    """
+    让请求直接连接已校验的地址
+
+    Host 头在构建请求时已按原主机名设置；TLS 的 SNI 与证书校验仍使用原主机名。
+    """
+    hostname = request.url.host
+    if hostname != address:
+        request.url = request.url.copy_with(host=address)
+        request.extensions["sni_hostname"] = hostname
+    return request
+
+
+@dataclass
+class FetchedPage:
+    """单个页面的抓取结果（失败时 error 非空，text 为空）"""
+
+    url: str
+    status: int = 0
+    title: str = ""
+    text: str = ""
+    from_cache: bool = False  # 新鲜缓存，未发请求
+    revalidated: bool = False  # 条件请求返回 304，复用缓存正文
+    truncated: bool = False  # 响应超过 max_bytes，仅提取了前 max_bytes 字节
+    bytes: int = 0
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.text)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _CachedPage:
+    title: str
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    truncated: bool
+    fetched_at: float
+
+
+class PageCache:
+    """
+    提取正文缓存（按 URL，LRU）
+
+    新鲜期内直接返回；过期条目保留验证器（ETag / Last-Modified），供条件请求使用。
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _CachedPage]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def lookup(self, url: str) -> Tuple[Optional[_CachedPage], bool]:
+        """
+        Returns:
+            (缓存条目或 None, 是否仍在新鲜期内)
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            self.misses += 1
+            return None, False
+        self._entries.move_to_end(url)
+        fresh = time.time() - entry.fetched_at < self.ttl_seconds
+        if fresh:
+            self.hits += 1
+        return entry, fresh
+
+    def put(self, url: str, entry: _CachedPage) -> None:
+        self._entries[url] = entry
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def touch(self, url: str) -> None:
+        """重新验证成功：刷新新鲜期"""
+        entry = self._entries.get(url)
+        if entry is not None:
+            entry.fetched_at = time.time()
+            self.revalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+        }
+
+
+@dataclass
+class _HostSlot:
+    semaphore: asyncio.Semaphore
+    users: int = 0  # 进行中与排队中的请求数
+
+
+class PageFetcher:
+    """
+    并发网页抓取 + 正文提取
+
+    Example:
+        >>> fetcher = PageFetcher()
+        >>> pages = await fetcher.fetch_many(["https://example.com/a", "https://example.com/b"])
+        >>> pages[0].text
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        per_host: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        content_chars: Optional[int] = None,
+        extract_workers: Optional[int] = None,
+        cache: Optional[PageCache] = None,
+        allow_private_hosts: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Args:
+            max_connections: 连接池总连接数（默认 settings.fetch_max_connections）
+            per_host: 单个站点的并发请求数（默认 settings.fetch_per_host）
+            timeout: 单页总时限，秒（默认 settings.fetch_timeout）
+            max_bytes: 单页最大下载字节数（默认 settings.fetch_max_bytes）
+            content_chars: 保留的正文字符数（默认 settings.fetch_content_chars）
+            extract_workers: 正文提取进程数，0 表示使用线程（默认 settings.fetch_extract_workers）
+            cache: 正文缓存（默认按 settings.fetch_cache_* 创建）
+            allow_private_hosts: 允许抓取非公网地址（默认 settings.fetch_allow_private_hosts）
+            transport: 自定义 httpx 传输层（测试用）
+        """
+        self.max_connections = max_connections or settings.fetch_max_connections
+        self.per_host = per_host or settings.fetch_per_host
+        self.timeout = timeout if timeout is not None else settings.fetch_timeout
+        self.max_bytes = max_bytes or settings.fetch_max_bytes
+        self.content_chars = content_chars or settings.fetch_content_chars
+        self.extract_workers = extract_workers if extract_workers is not None else settings.fetch_extract_workers
+        self.cache = cache if cache is not None else PageCache(settings.fetch_cache_max_entries, settings.fetch_cache_ttl)
+        self.allow_private_hosts = (
+            allow_private_hosts if allow_private_hosts is not None else settings.fetch_allow_private_hosts
+        )
+        self._transport = transport
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, _HostSlot] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+        self.requests = 0
+        self.failed = 0
+        self.truncated = 0
+        self.bytes_downloaded = 0
+
+    # MARK: - 连接池 / 进程池
+
+    def _bind(self) -> httpx.AsyncClient:
+        """按事件循环惰性创建 HTTP 客户端与站点信号量"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._host_slots = {}
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=httpx.Timeout(self.timeout),
+                follow_redirects=False,  # 重定向在 _send 中逐跳校验后跟随
+                headers={"User-Agent": _USER_AGENT, "Accept": "text/html,application/xhtml+xml,text/plain;q=0.9"},
+                transport=self._transport,
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def _host_slot(self, url: str):
+        """占用站点并发名额；站点没有进行中的请求时移除其信号量（只保留活跃站点）"""
+        host = urlsplit(url).netloc.lower()
+        slots = self._host_slots
+        slot = slots.get(host)
+        if slot is None:
+            slot = slots[host] = _HostSlot(asyncio.Semaphore(self.per_host))
+        slot.users += 1
+        try:
+            async with slot.semaphore:
+                yield
+        finally:
+            slot.users -= 1
+            if not slot.users and slots.get(host) is slot:
+                del slots[host]
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.extract_workers <= 0:
+            return None
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.extract_workers)
+            return self._pool
+
+    async def _extract(self, html: str) -> Tuple[str, str]:
+        """在进程池中提取正文（进程池不可用时退回线程）"""
+        pool = self._executor()
+        if pool is not None:
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(pool, extract_main_content, html, self.content_chars)
+            except BrokenProcessPool:
+                logger.warning("正文提取进程池不可用，改用线程提取")
+                with self._pool_lock:
+                    self._pool = None
+                self.extract_workers = 0
+        return await asyncio.to_thread(extract_main_content, html, self.content_chars)
+
+    # MARK: - 抓取
+
+    async def fetch(self, url: str) -> FetchedPage:
+        """抓取单个页面（不抛出异常，失败信息记录在 FetchedPage.error）"""
+        start = time.perf_counter()
+        cached, fresh = self.cache.lookup(url)
+        if cached is not None and fresh:
+            return FetchedPage(
+                url=url, status=200, title=cached.title, text=cached.text,
+                from_cache=True, truncated=cached.truncated,
+            )
+
+        self.requests += 1
+        self._bind()
+        try:
+            async with self._host_slot(url):
+                page = await asyncio.wait_for(self._download(url, cached), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            page = FetchedPage(url=url, error=f"timeout after {self.timeout}s")
+        except Exception as e:
+            page = FetchedPage(url=url, error=f"{type(e).__name__}: {e}")
+
+        if page.error is not None:
+            self.failed += 1
+            logger.debug(f"页面抓取失败: {url} ({page.error})")
+        page.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        return page
+
+    async def _download(self, url: str, cached: Optional[_CachedPage]) -> FetchedPage:
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        response = await self._send(url, headers)
+        try:
+            if response.status_code == 304 and cached is not None:
+                self.cache.touch(url)
+                return FetchedPage(
+                    url=url, status=304, title=cached.title, text=cached.text,
+                    revalidated=True, truncated=cached.truncated,
+                )
+            response.raise_for_status()
+
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in _HTML_TYPES + _TEXT_TYPES:
+                return FetchedPage(url=url, status=response.status_code, error=f"unsupported content type: {content_type}")
+
+            body, truncated = await self._read_capped(response)
+            encoding = response.encoding or "utf-8"
+        finally:
+            await response.aclose()
+
+        self.bytes_downloaded += len(body)
+        if truncated:
+            self.truncated += 1
+        html = body.decode(encoding, errors="replace")
+        if content_type in _TEXT_TYPES:
+            title, text = "", html[: self.content_chars].strip()
+        else:
+            title, text = await self._extract(html)
+
+        self.cache.put(
+            url,
+            _CachedPage(
+                title=title,
+                text=text,
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+                truncated=truncated,
+                fetched_at=time.time(),
+            ),
+        )
+        return FetchedPage(
+            url=url, status=response.status_code, title=title, text=text,
+            truncated=truncated, bytes=len(body),
+        )
+
+    async def _send(self, url: str, headers: Dict[str, str]) -> httpx.Response:
+        """发起流式 GET 请求，逐跳校验并跟随重定向（调用方负责关闭响应）"""
+        client = self._bind()
+        for _ in range(_MAX_REDIRECTS + 1):
+            request = client.build_request("GET", url, headers=headers)
+            if not self.allow_private_hosts:
+                request = _pin_address(request, await ensure_public_url(url))
+            response = await client.send(request, stream=True)
+            if response.status_code not in _REDIRECT_STATUSES or "location" not in response.headers:
+                return response
+            await response.aclose()
+            # 相对跳转按原 URL（而非直连地址）解析
+            url = urljoin(url, response.headers["location"])
+        raise httpx.TooManyRedirects(f"more than {_MAX_REDIRECTS} redirects", request=response.request)
+
+    async def _read_capped(self, response: httpx.Response) -> Tuple[bytes, bool]:
+        """读取响应体，超过 max_bytes 时停止读取并丢弃剩余部分"""
+        chunks: List[bytes] = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > self.max_bytes:
+                return b"".join(chunks)[: self.max_bytes], True
+        return b"".join(chunks), False
+
+    async def fetch_many(self, urls: Iterable[str]) -> List[FetchedPage]:
+        """并发抓取多个页面（结果顺序与输入一致；重复 URL 只请求一次）"""
+        urls = list(urls)
+        unique = list(dict.fromkeys(urls))
+        pages = await asyncio.gather(*(self.fetch(url) for url in unique))
+        by_url = dict(zip(unique, pages))
+        return [by_url[url] for url in urls]
+
+    # MARK: - 生命周期
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环上的 HTTP 客户端与提取进程池"""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+        self._shutdown_pool()
+
+    def close(self) -> None:
+        """同步关闭（无法在此关闭客户端时直接丢弃，由垃圾回收释放连接）"""
+        self._client = None
+        self._loop = None
+        self._shutdown_pool()
+
+    def _shutdown_pool(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "failed": self.failed,
+            "truncated": self.truncated,
+            "bytes": self.bytes_downloaded,
+            "extract_workers": self.extract_workers,
+            "cache": self.cache.stats,
+        }
+
+
+def summarize_fetch(pages: List[FetchedPage], elapsed_ms: float) -> Dict[str, Any]:
+    """汇总一批抓取结果（用于响应元数据）"""
+    return {
+        "requested": len(pages),
+        "fetched": sum(1 for page in pages if page.ok and not page.from_cache and not page.revalidated),
+        "cached": sum(1 for page in pages if page.from_cache),
+        "revalidated": sum(1 for page in pages if page.revalidated),
+        "failed": sum(1 for page in pages if not page.ok),
+        "truncated": sum(1 for page in pages if page.truncated),
+        "elapsed_ms": round(elapsed_ms, 1),
+    }
+
+
+# MARK: - 进程内共享实例
+
+_shared_fetcher: Optional[PageFetcher] = None
+_shared_lock = threading.Lock()
+
+
+def get_page_fetcher() -> PageFetcher:
+    """获取进程内共享的页面抓取器"""
+    global _shared_fetcher
+    with _shared_lock:
+        if _shared_fetcher is None:
+            _shared_fetcher = PageFetcher()
+        return _shared_fetcher
+
+
+async def close_page_fetcher() -> None:
+    """释放共享实例"""
+    global _shared_fetcher
+    with _shared_lock:
+        fetcher, _shared_fetcher = _shared_fetcher, None
+    if fetcher is not None:
+        await fetcher.aclose()
@@ -0,0 +1,267 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Shared Web Search Service
+# Phase 5 - Shared Web Search
+# Created: 2026-10-19
+#
+
+"""
+共享 Web 搜索服务
+
+SearchPattern 与 ResearcherNode 共用同一实例：
+- 结果缓存：SearchResultCache（LRU + stale-while-revalidate），相同查询只请求一次引擎
+- 请求合并：同一键的并发未命中共享一次引擎请求
+- 全局限流：并发上限 + 相邻请求最小间隔，避免触发引擎限速
+- 可插拔引擎：按名称注册 SearchEngine，结果统一为 SearchResult
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+
+from .engines import DuckDuckGoEngine, SearchEngine, SearchResult
+from utils.cache import SearchResultCache
+from utils.config import settings
+
+
+class SearchRateLimiter:
+    """
+    全局搜索限流器
+
+    同时进行的引擎请求不超过 max_concurrency 个，且相邻两次请求的开始时间间隔不小于 min_interval。
+    异步原语按事件循环惰性创建。
+    """
+
+    def __init__(self, max_concurrency: int = 2, min_interval: float = 1.0):
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._spacing: Optional[asyncio.Lock] = None
+        self._next_start = 0.0
+        self.acquired = 0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._spacing = asyncio.Lock()
+
+    @asynccontextmanager
+    async def slot(self):
+        """占用一个请求槽位（必要时等待）"""
+        self._bind()
+        async with self._semaphore:
+            async with self._spacing:
+                wait = self._next_start - time.monotonic()
+                if wait > 0:
+                    self.throttled += 1
+                    self.waited_seconds += wait
+                    await asyncio.sleep(wait)
+                self._next_start = time.monotonic() + self.min_interval
+            self.acquired += 1
+            yield
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "min_interval": self.min_interval,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "waited_ms": round(self.waited_seconds * 1000, 1),
+        }
+
+
+class WebSearchService:
+    """
+    共享 Web 搜索服务
+
+    Example:
+        >>> service = WebSearchService([StubEngine()])
+        >>> results = await service.search("macOS", engine="stub")
+        >>> results[0].title
+    """
+
+    def __init__(
+        self,
+        engines: Iterable[SearchEngine],
+        cache: Optional[SearchResultCache] = None,
+        limiter: Optional[SearchRateLimiter] = None,
+    ):
+        """
+        Args:
+            engines: 可用引擎
+            cache: 结果缓存（默认按 settings.search_cache_* 创建）
+            limiter: 全局限流器（默认按 settings.search_max_concurrency / search_min_interval 创建）
+        """
+        self._engines: Dict[str, SearchEngine] = {}
+        for engine in engines:
+            self.register(engine)
+        self.cache = cache or SearchResultCache(
+            max_entries=settings.search_cache_max_entries,
+            max_bytes=settings.search_cache_max_bytes,
+            ttl_seconds=settings.search_cache_ttl,
+            stale_ttl_seconds=settings.search_cache_stale_ttl,
+        )
+        self.limiter = limiter or SearchRateLimiter(settings.search_max_concurrency, settings.search_min_interval)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self.engine_calls = 0
+        self.coalesced = 0
+
+    def register(self, engine: SearchEngine) -> None:
+        """注册（或替换）引擎"""
+        self._engines[engine.name] = engine
+
+    def has_engine(self, name: str) -> bool:
+        return name in self._engines
+
+    @property
+    def engines(self) -> List[str]:
+        return list(self._engines)
+
+    @staticmethod
+    def cache_key(engine: str, query: str, num_results: int, language: str) -> str:
+        """缓存 / 合并键（基于查询参数的哈希）"""
+        return hashlib.md5(f"{engine}|{query}|{num_results}|{language}".encode("utf-8")).hexdigest()
+
+    async def search(
+        self,
+        query: str,
+        num_results: int = 5,
+        language: Optional[str] = None,
+        engine: str = "duckduckgo",
+        cache_info: Optional[Dict[str, Any]] = None,
+    ) -> List[SearchResult]:
+        """
+        搜索
+
+        Args:
+            language: 搜索语言（默认 settings.search_language）
+            cache_info: 回传本次请求的缓存状态（"hit" | "stale" | "miss" | "coalesced"）
+
+        Raises:
+            ValueError: 引擎未注册
+            Exception: 引擎请求失败（缓存未命中时）
+        """
+        target = self._engines.get(engine)
+        if target is None:
+            raise ValueError(f"不支持的搜索引擎: {engine}")
+
+        language = language or settings.search_language
+        key = self.cache_key(engine, query, num_results, language)
+        cached, status = self.cache.lookup(key)
+        if cache_info is not None:
+            cache_info["status"] = status
+        if status == "hit":
+            logger.debug(f"🚀 使用缓存结果: {query} ({len(cached)} 条)")
+            return [SearchResult.from_dict(item) for item in cached]
+        if status == "stale":
+            logger.debug(f"🚀 使用过期缓存并后台刷新: {query} ({len(cached)} 条)")
+            self._schedule_refresh(target, key, query, num_results, language)
+            return [SearchResult.from_dict(item) for item in cached]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(target, key, query, num_results, language))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finish_inflight(key, done))
+        else:
+            self.coalesced += 1
+            if cache_info is not None:
+                cache_info["status"] = "coalesced"
+        # shield：单个调用方被取消不影响共享请求
+        return list(await asyncio.shield(task))
+
+    def _finish_inflight(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # 标记已读取，所有调用方都取消时不再告警
+
+    async def _fetch(
+        self, engine: SearchEngine, key: str, query: str, num_results: int, language: str
+    ) -> List[SearchResult]:
+        """限流后请求引擎，并写入缓存"""
+        async with self.limiter.slot():
+            self.engine_calls += 1
+            results = await engine.search(query, num_results, language)
+        if results:
+            self.cache.put(key, [result.to_dict() for result in results])
+        return results
+
+    def _schedule_refresh(
+        self, engine: SearchEngine, key: str, query: str, num_results: int, language: str
+    ) -> None:
+        """后台刷新过期缓存（同一键同时只刷新一次；失败时保留旧结果）"""
+        if not self.cache.begin_refresh(key):
+            return
+
+        async def _refresh():
+            success = False
+            try:
+                success = bool(await self._fetch(engine, key, query, num_results, language))
+            except Exception as e:
+                logger.warning(f"后台刷新搜索缓存失败: {type(e).__name__}: {e}")
+            finally:
+                self.cache.end_refresh(key, success)
+
+        task = asyncio.create_task(_refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def drain(self) -> None:
+        """等待后台刷新完成"""
+        if self._refresh_tasks:
+            await asyncio.gather(*self._refresh_tasks, return_exceptions=True)
+
+    def close(self) -> None:
+        """取消进行中的请求与后台刷新"""
+        for task in list(self._refresh_tasks) + list(self._inflight.values()):
+            task.cancel()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "engines": self.engines,
+            "engine_calls": self.engine_calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "limiter": self.limiter.stats,
+            "cache": self.cache.stats,
+        }
+
+
+# MARK: - 进程内共享实例
+
+_shared_service: Optional[WebSearchService] = None
+_shared_lock = threading.Lock()
+
+
+def get_search_service() -> WebSearchService:
+    """获取进程内共享的 Web 搜索服务（已注册 duckduckgo 引擎）"""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = WebSearchService([DuckDuckGoEngine()])
+        return _shared_service
+
+
+def close_search_service() -> None:
+    """释放共享实例"""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is not None:
+            _shared_service.close()
+            _shared_service = None
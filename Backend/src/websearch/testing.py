@@ -0,0 +1,186 @@
+#
+# MacCortex - Next-Generation macOS Personal Intelligence Infrastructure
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+#
+# Local HTTP Stand-in
+# Phase 5 - Shared Web Search
+# Created: 2026-10-19
+#
+
+"""
+本地 HTTP 替身服务器（测试 / 离线演示用）
+
+在后台线程中运行 ThreadingHTTPServer，返回预先注册的页面：
+- 支持 ETag / Last-Modified 条件请求（命中时返回 304）
+- 每个页面可设置响应延迟，用于测试超时与并发
+- 记录所有请求，统计同时处理中的请求数峰值
+
+Example:
+    >>> with LocalHTTPServer() as server:
+    ...     server.add_page("/a", "<html><body><p>Hello</p></body></html>")
+    ...     url = server.url("/a")
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class _Page:
+    body: bytes
+    content_type: str
+    status: int
+    delay: float
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class LocalHTTPServer:
+    """本地 HTTP 替身服务器"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._pages: Dict[str, _Page] = {}
+        self._lock = threading.Lock()
+        self.requests: List[Tuple[str, Dict[str, str]]] = []  # (path, headers)
+        self.not_modified = 0
+        self.active = 0
+        self.peak_active = 0
+
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # noqa: N802 - BaseHTTPRequestHandler 约定的方法名
+                server._handle(self)
+
+            def log_message(self, format, *args):  # 静默
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # MARK: - 页面注册
+
+    def add_page(
+        self,
+        path: str,
+        body,
+        content_type: str = "text/html; charset=utf-8",
+        status: int = 200,
+        delay: float = 0.0,
+        etag: Optional[str] = None,
+        last_modified: Optional[float] = None,
+    ) -> str:
+        """
+        注册页面
+
+        Args:
+            body: 响应体（str 按 UTF-8 编码）
+            delay: 响应前等待秒数
+            etag: ETag（如 '"v1"'）；设置后支持 If-None-Match
+            last_modified: 修改时间（Unix 时间戳）；设置后支持 If-Modified-Since
+
+        Returns:
+            页面完整 URL
+        """
+        data = body.encode("utf-8") if isinstance(body, str) else bytes(body)
+        with self._lock:
+            self._pages[path] = _Page(
+                body=data,
+                content_type=content_type,
+                status=status,
+                delay=delay,
+                etag=etag,
+                last_modified=formatdate(last_modified, usegmt=True) if last_modified is not None else None,
+            )
+        return self.url(path)
+
+    def url(self, path: str) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def count(self, path: str) -> int:
+        """某路径被请求的次数"""
+        with self._lock:
+            return sum(1 for requested, _ in self.requests if requested == path)
+
+    # MARK: - 请求处理
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        path = handler.path
+        headers = {key.lower(): value for key, value in handler.headers.items()}
+        with self._lock:
+            self.requests.append((path, headers))
+            page = self._pages.get(path)
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            if page is None:
+                self._respond(handler, 404, b"not found", "text/plain")
+                return
+            if page.delay:
+                time.sleep(page.delay)
+
+            validators = {}
+            if page.etag:
+                validators["ETag"] = page.etag
+            if page.last_modified:
+                validators["Last-Modified"] = page.last_modified
+            if (page.etag and headers.get("if-none-match") == page.etag) or (
+                page.last_modified and not page.etag and headers.get("if-modified-since") == page.last_modified
+            ):
+                with self._lock:
+                    self.not_modified += 1
+                self._respond(handler, 304, b"", None, validators)
+                return
+            self._respond(handler, page.status, page.body, page.content_type, validators)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 客户端已放弃（超时 / 超出大小上限）
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    @staticmethod
+    def _respond(
+        handler: BaseHTTPRequestHandler,
+        status: int,
+        body: bytes,
+        content_type: Optional[str],
+        extra: Optional[Dict[str, str]] = None,
+    ) -> None:
+        handler.send_response(status)
+        if content_type:
+            handler.send_header("Content-Type", content_type)
+        for key, value in (extra or {}).items():
+            handler.send_header(key, value)
+        handler.send_header("Content-Length", str(len(body)) if status != 304 else "0")
+        handler.end_headers()
+        if body and status != 304:
+            handler.wfile.write(body)
+
+    # MARK: - 生命周期
+
+    def start(self) -> "LocalHTTPServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "LocalHTTPServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
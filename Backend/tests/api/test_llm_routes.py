@@ -142,6 +142,11 @@ class TestLLMModelsEndpoint:
             mock_router.get_available_models.return_value = [mock_model]
             mock_router.is_model_available.return_value = True
             mock_router.default_model_id = "claude-sonnet-4"
+            mock_router.get_circuit_state.return_value = {
+                "state": "closed",
+                "model": {"state": "closed", "failure_rate": 0.0, "retry_in_seconds": None},
+                "provider": {"state": "closed", "failure_rate": 0.0, "retry_in_seconds": None},
+            }
             mock_get_router.return_value = mock_router
 
             client = TestClient(app)
@@ -157,6 +162,7 @@ class TestLLMModelsEndpoint:
             assert "streaming" in data["models"][0]["capabilities"]
             assert "tools" in data["models"][0]["capabilities"]
             assert "long_context" in data["models"][0]["capabilities"]
+            assert data["models"][0]["circuit"]["state"] == "closed"
 
 
 class TestLLMUsageEndpoint:
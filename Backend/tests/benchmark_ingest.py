@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+# MacCortex - Proprietary and Confidential
+
+"""
+MacCortex Backend - 增量文档导入基准测试
+创建时间: 2026-10-19
+
+10k 文件目录：
+- 首次导入（全部分块 + 嵌入）
+- 修改 10 个文件后的重复导入（只处理改动，应在数秒内完成）
+
+运行：pytest tests/benchmark_ingest.py -s
+"""
+
+import time
+
+import pytest
+
+from retrieval import HashingEmbedding, Ingestor, VectorStore
+
+FILES = 10_000
+EDITS = 10
+
+
+def make_tree(root, files: int) -> None:
+    for i in range(files):
+        directory = root / f"d{i // 500}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"note{i}.md").write_text(
+            f"# Note {i}\n\nThis note covers topic {i % 97} with some filler prose about item {i}.\n",
+            encoding="utf-8",
+        )
+
+
+@pytest.fixture(scope="module")
+def tree(tmp_path_factory):
+    root = tmp_path_factory.mktemp("bench") / "docs"
+    make_tree(root, FILES)
+    return root
+
+
+def test_reingest_after_few_edits(tree, tmp_path):
+    store = VectorStore(
+        str(tmp_path / "index"),
+        embedding_function=HashingEmbedding(),
+        backend="numpy",
+        cache_directory=str(tmp_path / "cache"),
+    )
+    ingestor = Ingestor(store, "bench")
+
+    start = time.perf_counter()
+    first = ingestor.ingest(str(tree))
+    initial = time.perf_counter() - start
+
+    for i in range(EDITS):
+        (tree / "d0" / f"note{i}.md").write_text(f"# Note {i}\n\nEdited content {i}.\n", encoding="utf-8")
+
+    start = time.perf_counter()
+    second = ingestor.ingest(str(tree))
+    incremental = time.perf_counter() - start
+
+    print(f"\n=== 增量导入 ({FILES} 文件) ===")
+    print(f"首次导入: {initial:.2f}s ({first.chunks_upserted} 分块)")
+    print(f"修改 {EDITS} 个文件后: {incremental:.2f}s (更新 {second.updated}，未变 {second.unchanged})")
+
+    assert second.updated == EDITS
+    assert second.unchanged == FILES - EDITS
+    # 验收标准：重复导入只需数秒，且远快于全量重建
+    assert incremental < 5
+    assert incremental < initial / 3
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Yu Geng. All rights reserved.
+# MacCortex - Proprietary and Confidential
+
+"""
+MacCortex Backend - Markdown ↔ HTML 转换器基准测试
+创建时间: 2026-10-19
+
+对比单遍转换器（patterns.markdown_html）与旧版逐条 re.sub 简化转换：
+- 大文档（~1MB / ~4MB）耗时
+- 线性扩展性（4 倍输入耗时 < 6 倍）
+- 旧版在列表 / 代码块 / 嵌套上的错误输出
+
+运行：pytest tests/benchmark_markdown_html.py -s
+"""
+
+import re
+import time
+
+import pytest
+
+from patterns.markdown_html import html_to_markdown, markdown_to_html
+
+
+# ==================== 旧版实现（FormatPattern 原 _simple_* 方法）====================
+
+
+def legacy_markdown_to_html(text: str) -> str:
+    html = text
+    html = re.sub(r"^# (.+)$", r"<h1>\1</h1>", html, flags=re.MULTILINE)
+    html = re.sub(r"^## (.+)$", r"<h2>\1</h2>", html, flags=re.MULTILINE)
+    html = re.sub(r"^### (.+)$", r"<h3>\1</h3>", html, flags=re.MULTILINE)
+    html = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html)
+    html = re.sub(r"\*(.+?)\*", r"<em>\1</em>", html)
+    html = re.sub(r"\[(.+?)\]\((.+?)\)", r'<a href="\2">\1</a>', html)
+    html = re.sub(r"`(.+?)`", r"<code>\1</code>", html)
+    html = re.sub(r"\n\n", r"</p><p>", html)
+    return f"<p>{html}</p>"
+
+
+def legacy_html_to_markdown(text: str) -> str:
+    md = text
+    md = re.sub(r"<h1>(.+?)</h1>", r"# \1", md, flags=re.IGNORECASE)
+    md = re.sub(r"<h2>(.+?)</h2>", r"## \1", md, flags=re.IGNORECASE)
+    md = re.sub(r"<h3>(.+?)</h3>", r"### \1", md, flags=re.IGNORECASE)
+    md = re.sub(r"<strong>(.+?)</strong>", r"**\1**", md, flags=re.IGNORECASE)
+    md = re.sub(r"<em>(.+?)</em>", r"*\1*", md, flags=re.IGNORECASE)
+    md = re.sub(r'<a href="(.+?)">(.+?)</a>', r"[\2](\1)", md, flags=re.IGNORECASE)
+    md = re.sub(r"<code>(.+?)</code>", r"`\1`", md, flags=re.IGNORECASE)
+    md = re.sub(r"</?p>", "\n\n", md, flags=re.IGNORECASE)
+    md = re.sub(r"<[^>]+>", "", md)
+    return md.strip()
+
+
+# ==================== 测试数据 ====================
+
+SECTION = """## Section {i}
+
+Paragraph with **bold**, *em*, `code` and a [link](https://example.com/{i}).
+Another line of text that goes on for a while to simulate prose content.
+
+- item one
+- item two with `code`
+  - nested item
+
+```python
+def f{i}(x):
+    return x * 2
+```
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+"""
+
+
+def make_document(sections: int) -> str:
+    return "".join(SECTION.format(i=i) for i in range(sections))
+
+
+def timed(func, arg) -> float:
+    """返回最快一次的耗时（秒）"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ==================== 基准测试 ====================
+
+
+class TestMarkdownToHtmlBenchmark:
+    """Markdown → HTML 基准"""
+
+    @pytest.mark.parametrize("sections", [4000, 16000])
+    def test_large_document(self, sections):
+        doc = make_document(sections)
+
+        new = timed(markdown_to_html, doc)
+        legacy = timed(legacy_markdown_to_html, doc)
+
+        print(f"\n=== Markdown → HTML ({len(doc) / 1e6:.1f} MB) ===")
+        print(f"single-pass: {new * 1000:.1f} ms ({len(doc) / new / 1e6:.2f} MB/s)")
+        print(f"legacy re.sub: {legacy * 1000:.1f} ms")
+
+        # 验收标准：> 0.5 MB/s
+        assert len(doc) / new > 0.5e6
+
+    def test_linear_scaling(self):
+        small = timed(markdown_to_html, make_document(2000))
+        large = timed(markdown_to_html, make_document(8000))
+
+        print(f"\n=== Markdown → HTML 扩展性: 4x 输入 → {large / small:.2f}x 耗时 ===")
+        assert large / small < 6
+
+    def test_legacy_output_is_wrong(self):
+        doc = make_document(1)
+
+        # 旧版：代码块内的 * 被当作强调，列表未生成 <ul>
+        assert "<ul>" not in legacy_markdown_to_html(doc)
+        assert "<ul>" in markdown_to_html(doc)
+        assert "<pre><code" in markdown_to_html(doc)
+
+
+class TestHtmlToMarkdownBenchmark:
+    """HTML → Markdown 基准"""
+
+    @pytest.mark.parametrize("sections", [4000, 16000])
+    def test_large_document(self, sections):
+        html = markdown_to_html(make_document(sections))
+
+        new = timed(html_to_markdown, html)
+        legacy = timed(legacy_html_to_markdown, html)
+
+        print(f"\n=== HTML → Markdown ({len(html) / 1e6:.1f} MB) ===")
+        print(f"single-pass: {new * 1000:.1f} ms ({len(html) / new / 1e6:.2f} MB/s)")
+        print(f"legacy re.sub: {legacy * 1000:.1f} ms")
+
+        # 验收标准：> 0.2 MB/s（html.parser 本身为主要开销）
+        assert len(html) / new > 0.2e6
+
+    def test_linear_scaling(self):
+        small = timed(html_to_markdown, markdown_to_html(make_document(2000)))
+        large = timed(html_to_markdown, markdown_to_html(make_document(8000)))
+
+        print(f"\n=== HTML → Markdown 扩展性: 4x 输入 → {large / small:.2f}x 耗时 ===")
+        assert large / small < 6
+
+    def test_legacy_output_is_wrong(self):
+        html = markdown_to_html(make_document(1))
+
+        # 旧版：列表与表格结构全部丢失
+        assert "- item one" not in legacy_html_to_markdown(html)
+        assert "- item one" in html_to_markdown(html)
+        assert "| a | b |" in html_to_markdown(html)
@@ -0,0 +1,134 @@
+#
+# MacCortex - LLM Test Fixtures
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""LLM 测试共用的可配置 Provider"""
+
+import asyncio
+from decimal import Decimal
+from typing import Callable, Optional
+
+from src.llm.models import LLMResponse, ModelConfig, ModelInfo, ProviderType, TokenUsage
+from src.llm.protocol import BaseLLMProvider
+from src.llm.streaming import StreamHandle
+
+# (model_id, messages, 第几次调用) → 响应内容
+Reply = Callable[[str, list[dict], int], str]
+
+
+class FakeProvider(BaseLLMProvider):
+    """
+    可配置的测试 Provider
+
+    - invoke: 等待 delay 秒后按 input_tokens / output_tokens 计费返回；fail=True 时抛出 error
+    - stream: 逐词产出最后一条消息（每词前等待 delay 秒），第 fail_after 个词时抛出异常
+    - health_check: 返回 healthy，并计数
+
+    记录 calls（调用次数）、cancelled（被取消次数）与 received（收到的模型与消息）。
+    """
+
+    def __init__(
+        self,
+        *model_ids: str,
+        provider_type: ProviderType = ProviderType.ANTHROPIC,
+        delay: float = 0.0,
+        price: str = "1",
+        output_price: Optional[str] = None,
+        input_tokens: int = 10,
+        output_tokens: int = 10,
+        reply: Optional[Reply] = None,
+        fail: bool = False,
+        error: Optional[Exception] = None,
+        context_window: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+    ):
+        super().__init__()
+        self._type = provider_type
+        self.delay = delay
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.reply = reply
+        self.fail = fail
+        self.error = error or RuntimeError("503 Service Unavailable")
+        self.fail_after: Optional[int] = None
+        self.healthy = True
+        self.calls = 0
+        self.cancelled = 0
+        self.health_checks = 0
+        self.received: list[tuple[str, list[dict]]] = []
+        for model_id in model_ids or ("m",):
+            self.add_model(model_id, price, output_price, context_window, max_tokens)
+
+    def add_model(
+        self,
+        model_id: str,
+        price: str = "1",
+        output_price: Optional[str] = None,
+        context_window: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+    ) -> None:
+        """注册模型（未指定的窗口 / 输出上限使用 ModelInfo 默认值）"""
+        limits = {"context_window": context_window, "max_tokens": max_tokens}
+        self.register_model(ModelInfo(
+            id=model_id,
+            display_name=model_id,
+            provider=self._type,
+            input_price_per_1m=Decimal(price),
+            output_price_per_1m=Decimal(output_price or price),
+            **{name: value for name, value in limits.items() if value is not None},
+        ))
+
+    @property
+    def name(self) -> str:
+        return self._type.value
+
+    @property
+    def provider_type(self) -> ProviderType:
+        return self._type
+
+    @property
+    def is_available(self) -> bool:
+        return True
+
+    async def invoke(self, model_id, messages, config: Optional[ModelConfig] = None) -> LLMResponse:
+        self.calls += 1
+        self.received.append((model_id, messages))
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise self.error
+        usage = TokenUsage(
+            input_tokens=self.input_tokens,
+            output_tokens=self.output_tokens,
+            total_tokens=self.input_tokens + self.output_tokens,
+        )
+        return LLMResponse(
+            content=self.reply(model_id, messages, self.calls) if self.reply else model_id,
+            usage=usage,
+            cost=self.calculate_cost(model_id, usage),
+            model_id=model_id,
+            provider=self._type,
+            latency_ms=self.delay * 1000 or 1.0,
+        )
+
+    async def stream(self, model_id, messages, config=None, handle: Optional[StreamHandle] = None):
+        words = messages[-1]["content"].split()
+        for index, word in enumerate(words):
+            if self.fail_after is not None and index == self.fail_after:
+                raise RuntimeError("connection reset")
+            await asyncio.sleep(self.delay)
+            yield word
+        usage = TokenUsage(input_tokens=10, output_tokens=len(words), total_tokens=10 + len(words))
+        self._last_usage = usage
+        if handle is not None:
+            handle.report_usage(usage)
+            handle.report_finish_reason("end_turn")
+
+    async def health_check(self) -> bool:
+        self.health_checks += 1
+        return self.healthy
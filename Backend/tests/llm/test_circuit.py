@@ -0,0 +1,241 @@
+#
+# MacCortex - Circuit Breaker Tests
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""熔断器与 ModelRouterV2 健康感知路由测试"""
+
+import asyncio
+
+import pytest
+
+from src.llm.circuit import BreakerConfig, CircuitBreaker, CircuitState
+from src.llm.models import ProviderType
+from src.llm.providers.ollama import OllamaProvider
+from src.llm.router import ModelRouterV2
+
+from .conftest import FakeProvider
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class TestCircuitBreaker:
+    """熔断器状态机测试"""
+
+    def test_consecutive_failures_open_circuit(self):
+        breaker = CircuitBreaker("m", BreakerConfig(consecutive_failures=3))
+
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state is CircuitState.CLOSED
+        breaker.record_failure(timeout=True)
+
+        assert breaker.state is CircuitState.OPEN
+        assert not breaker.try_acquire()
+        assert breaker.snapshot()["timeouts"] == 1
+
+    def test_failure_rate_opens_circuit(self):
+        breaker = CircuitBreaker(
+            "m", BreakerConfig(window_size=10, min_calls=4, failure_rate_threshold=0.5, consecutive_failures=99)
+        )
+
+        for success in (True, False, True, False):
+            breaker.record_success() if success else breaker.record_failure()
+
+        assert breaker.state is CircuitState.OPEN
+
+    def test_half_open_after_cooldown(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker("m", BreakerConfig(consecutive_failures=1, open_seconds=30), clock=clock)
+        breaker.record_failure()
+        assert breaker.snapshot()["retry_in_seconds"] == 30
+
+        clock.now = 30
+        assert breaker.state is CircuitState.HALF_OPEN
+        assert breaker.try_acquire()
+        assert not breaker.try_acquire()  # 只放行一个试探调用
+
+        breaker.record_success()
+        assert breaker.state is CircuitState.CLOSED
+
+    def test_half_open_failure_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker("m", BreakerConfig(consecutive_failures=1, open_seconds=30), clock=clock)
+        breaker.record_failure()
+        clock.now = 31
+        assert breaker.try_acquire()
+
+        breaker.record_failure()
+
+        assert breaker.state is CircuitState.OPEN
+        assert breaker.snapshot()["open_count"] == 2
+
+    def test_healthy_probe_moves_open_to_half_open(self):
+        breaker = CircuitBreaker("p", BreakerConfig(consecutive_failures=1, open_seconds=3600))
+        breaker.record_failure()
+
+        breaker.record_probe(healthy=True)
+
+        assert breaker.state is CircuitState.HALF_OPEN
+
+    def test_needs_probe_until_trial_call_starts(self):
+        clock = FakeClock()
+        config = BreakerConfig(consecutive_failures=1, open_seconds=30)
+        breaker = CircuitBreaker("p", config, clock=clock)
+        assert not breaker.needs_probe()
+        breaker.record_failure()
+        assert breaker.needs_probe()
+
+        clock.now = 30
+        assert breaker.needs_probe()
+        assert breaker.try_acquire()
+        assert not breaker.needs_probe()  # 试探调用进行中
+
+
+class TestHealthAwareRouting:
+    """ModelRouterV2 熔断集成测试"""
+
+    def _router(self, **config):
+        primary = FakeProvider("primary", provider_type=ProviderType.ANTHROPIC)
+        backup = FakeProvider("backup", provider_type=ProviderType.OPENAI)
+        router = ModelRouterV2(
+            fallback_chain=["primary", "backup"],
+            breaker_config=BreakerConfig(**{"consecutive_failures": 2, **config}),
+        )
+        router.register_provider(primary)
+        router.register_provider(backup)
+        return router, primary, backup
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_is_skipped(self):
+        router, primary, backup = self._router()
+        primary.fail = True
+
+        for _ in range(2):
+            assert (await router.invoke("primary", MESSAGES)).model_id == "backup"
+        assert primary.calls == 2
+
+        for _ in range(5):
+            assert (await router.invoke("primary", MESSAGES)).model_id == "backup"
+
+        assert primary.calls == 2  # 熔断后不再调用
+        assert not router.is_model_available("primary")
+        state = router.get_circuit_state("primary")
+        assert state["state"] == "open"
+        assert state["provider"]["state"] == "open"
+
+    @pytest.mark.asyncio
+    async def test_timeouts_are_counted(self):
+        router, primary, backup = self._router()
+        primary.fail, primary.error = True, TimeoutError("timed out")
+
+        await router.invoke("primary", MESSAGES)
+
+        assert router.get_circuit_state("primary")["model"]["timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_all_open_fails_fast(self):
+        router, primary, backup = self._router(consecutive_failures=1)
+        primary.fail = backup.fail = True
+        with pytest.raises(RuntimeError):
+            await router.invoke("primary", MESSAGES)
+
+        with pytest.raises(RuntimeError, match="circuits open"):
+            await router.invoke("primary", MESSAGES)
+        assert primary.calls == backup.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_probe_recovers_provider(self):
+        router, primary, backup = self._router(open_seconds=3600)
+        primary.fail = True
+        for _ in range(2):
+            await router.invoke("primary", MESSAGES)
+        assert router.get_circuit_state("primary")["state"] == "open"
+
+        primary.fail = False
+        results = await router.health_check_all()
+
+        assert results["anthropic"] is True
+        # 模型熔断器仍在冷却，Provider 已进入试探
+        assert router.get_circuit_state("primary")["provider"]["state"] == "half_open"
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_opens_provider(self):
+        router, primary, backup = self._router()
+        primary.healthy = False
+
+        await router.health_check_all()
+        await router.health_check_all()
+
+        assert router.get_provider_breaker(ProviderType.ANTHROPIC).state is CircuitState.OPEN
+        assert (await router.invoke("primary", MESSAGES)).model_id == "backup"
+        assert primary.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_background_probes_start_and_stop(self):
+        router, primary, backup = self._router(open_seconds=3600)
+        primary.fail = True
+        for _ in range(2):
+            await router.invoke("primary", MESSAGES)
+        assert router.get_provider_breaker(ProviderType.ANTHROPIC).state is CircuitState.OPEN
+        primary.fail = False
+
+        task = router.start_health_probes(interval_seconds=0.01)
+        assert router.start_health_probes(interval_seconds=0.01) is task
+        await asyncio.sleep(0.1)
+        await router.stop_health_probes()
+
+        assert task.done()
+        assert router.get_provider_breaker(ProviderType.ANTHROPIC).state is CircuitState.HALF_OPEN
+
+    @pytest.mark.asyncio
+    async def test_background_probes_skip_closed_providers(self):
+        router, primary, backup = self._router()
+
+        results = await router.health_check_all(open_only=True)
+
+        assert results == {}
+        assert primary.health_checks == backup.health_checks == 0
+
+
+class TestOllamaAvailability:
+    """OllamaProvider 是否被调用由熔断器决定"""
+
+    @pytest.mark.asyncio
+    async def test_failed_check_does_not_mark_unavailable(self):
+        provider = OllamaProvider(host="http://127.0.0.1:9")
+
+        assert await provider.health_check() is False
+        assert provider.is_available is True
+        await provider.close()
+
+    @pytest.mark.asyncio
+    async def test_half_open_provider_keeps_being_probed(self):
+        provider = OllamaProvider(host="http://127.0.0.1:9")
+        config = BreakerConfig(consecutive_failures=1, open_seconds=0.01)
+        router = ModelRouterV2(breaker_config=config)
+        router.register_provider(provider)
+        breaker = router.get_provider_breaker(ProviderType.OLLAMA)
+
+        assert await router.health_check_all(open_only=True) == {}
+        assert await router.health_check_all() == {"ollama": False}
+        assert breaker.snapshot()["state"] == "open"
+        for _ in range(3):
+            await asyncio.sleep(0.02)
+            assert breaker.state is CircuitState.HALF_OPEN
+            assert provider.is_available is True
+            # 冷却结束后没有试探调用时仍会探测（失败则重新 OPEN）
+            assert await router.health_check_all(open_only=True) == {"ollama": False}
+
+        assert breaker.snapshot()["open_count"] == 4
+        await provider.close()
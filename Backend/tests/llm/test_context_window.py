@@ -0,0 +1,244 @@
+#
+# MacCortex - Context Window Tests
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""上下文窗口管理测试"""
+
+import pytest
+
+from src.llm.context_window import (
+    SUMMARY_PREFIX,
+    ContextPolicy,
+    ContextStrategy,
+    ContextWindowExceededError,
+    ContextWindowManager,
+    input_budget,
+)
+from src.llm.models import ProviderType
+from src.llm.router import ModelRouterV2
+from src.llm.tokenizer import TokenizerService
+
+from .conftest import FakeProvider
+
+
+def _recording(provider_type: ProviderType, models: dict[str, int], fail: bool = False) -> FakeProvider:
+    """记录收到的消息的 Provider（可配置为总是失败；名称含 mini 的模型更便宜）"""
+    provider = FakeProvider(
+        *models,
+        provider_type=provider_type,
+        input_tokens=10,
+        output_tokens=5,
+        reply=lambda model_id, messages, calls: (
+            "summary of turns" if messages[0]["content"].startswith("Summarize") else "ok"
+        ),
+        fail=fail,
+        error=RuntimeError("overloaded"),
+    )
+    for model_id, context_window in models.items():
+        price = "1" if "mini" in model_id else "10"
+        provider.add_model(model_id, price, output_price="1", context_window=context_window, max_tokens=100)
+    return provider
+
+
+def _conversation(turns: int = 6, words: int = 50) -> list[dict]:
+    messages = [{"role": "system", "content": "You are a coder"}]
+    for i in range(turns):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({"role": role, "content": f"turn{i} " + "word " * words})
+    return messages
+
+
+def _manager(**policy) -> tuple[ContextWindowManager, TokenizerService]:
+    tokenizer = TokenizerService()
+    return ContextWindowManager(tokenizer, ContextPolicy(**policy)), tokenizer
+
+
+class TestContextWindowManager:
+    """压缩策略测试"""
+
+    @pytest.mark.asyncio
+    async def test_fitting_messages_are_untouched(self):
+        manager, _ = _manager()
+        messages = _conversation()
+
+        fitted, report = await manager.fit(messages, "m", budget=100_000, context_window=128_000)
+
+        assert fitted is messages
+        assert report is None
+
+    @pytest.mark.asyncio
+    async def test_truncate_tool_outputs(self):
+        manager, tokenizer = _manager(strategies=(ContextStrategy.TRUNCATE,), max_message_tokens=100)
+        messages = [
+            {"role": "user", "content": "run the tests"},
+            {"role": "tool", "content": "line\n" * 2000},
+            {"role": "user", "content": "fix the failure"},
+        ]
+
+        fitted, report = await manager.fit(messages, "m", budget=500, context_window=1000)
+
+        assert "truncated" in fitted[1]["content"]
+        assert fitted[1]["content"].startswith("line")
+        assert messages[1]["content"] == "line\n" * 2000  # 原消息未被修改
+        assert report.actions == (ContextStrategy.TRUNCATE,)
+        assert report.truncated_messages == 1
+        assert report.final_tokens == tokenizer.count_messages(fitted, "m") <= 500
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_system_and_recent_turns(self):
+        manager, tokenizer = _manager(strategies=(ContextStrategy.DROP_OLDEST,), keep_last_messages=2)
+        messages = _conversation(turns=6)
+        budget = tokenizer.count_messages(messages[:1] + messages[-3:], "m")
+
+        fitted, report = await manager.fit(messages, "m", budget=budget, context_window=10_000)
+
+        assert fitted == messages[:1] + messages[-3:]
+        assert report.dropped_messages == 3
+        assert report.original_tokens > report.final_tokens
+
+    @pytest.mark.asyncio
+    async def test_summarize_replaces_older_turns(self):
+        seen = []
+
+        async def summarize(older):
+            seen.append(older)
+            return "user asked for a parser"
+
+        manager, _ = _manager(strategies=(ContextStrategy.SUMMARIZE, ContextStrategy.DROP_OLDEST))
+        messages = _conversation(turns=6)
+
+        fitted, report = await manager.fit(messages, "m", budget=200, context_window=1000, summarize=summarize)
+
+        assert len(seen[0]) == 4
+        assert fitted[1] == {"role": "user", "content": SUMMARY_PREFIX + "user asked for a parser"}
+        assert fitted[2:] == messages[-2:]
+        assert report.actions == (ContextStrategy.SUMMARIZE,)
+        assert report.summarized_messages == 4
+
+    @pytest.mark.asyncio
+    async def test_failed_summary_falls_through_to_next_strategy(self):
+        async def summarize(older):
+            raise RuntimeError("summary model down")
+
+        manager, _ = _manager(strategies=(ContextStrategy.SUMMARIZE, ContextStrategy.DROP_OLDEST))
+
+        _, report = await manager.fit(
+            _conversation(turns=6), "m", budget=200, context_window=1000, summarize=summarize
+        )
+
+        assert report.actions == (ContextStrategy.DROP_OLDEST,)
+
+    @pytest.mark.asyncio
+    async def test_two_message_prompt_is_truncated_as_last_resort(self):
+        manager, tokenizer = _manager()
+        source = "def handler(event):\n" + "    value = compute(event)\n" * 20_000
+        messages = [
+            {"role": "system", "content": "You are a coder"},
+            {"role": "user", "content": "Fix this module:\n" + source + "\nKeep the public API."},
+        ]
+
+        fitted, report = await manager.fit(messages, "m", budget=2_000, context_window=4_000)
+
+        assert fitted[0] == messages[0]
+        assert fitted[1]["content"].startswith("Fix this module:")
+        assert fitted[1]["content"].endswith("Keep the public API.")
+        assert "truncated" in fitted[1]["content"]
+        assert report.actions == (ContextStrategy.TRUNCATE_RECENT,)
+        assert report.truncated_messages == 1
+        assert report.final_tokens == tokenizer.count_messages(fitted, "m") <= 2_000
+
+    @pytest.mark.asyncio
+    async def test_raises_when_protected_messages_do_not_fit(self):
+        manager, _ = _manager(strategies=(ContextStrategy.DROP_OLDEST,), truncate_recent=False)
+
+        with pytest.raises(ContextWindowExceededError):
+            await manager.fit(_conversation(turns=2, words=500), "m", budget=100, context_window=200)
+
+    @pytest.mark.asyncio
+    async def test_raises_when_system_prompt_does_not_fit(self):
+        manager, _ = _manager()
+        messages = [{"role": "system", "content": "rule " * 1000}, {"role": "user", "content": "hi"}]
+
+        with pytest.raises(ContextWindowExceededError):
+            await manager.fit(messages, "m", budget=100, context_window=200)
+
+    def test_input_budget_reserves_output(self):
+        assert input_budget(10_000, 1000, 0.1) == 8100
+        assert input_budget(1000, 4096, 0.0) == 500
+
+
+class TestRouterContextWindow:
+    """ModelRouterV2 上下文窗口集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_fallback_to_smaller_model_trims_messages(self):
+        primary = _recording(ProviderType.ANTHROPIC, {"claude-big": 200_000}, fail=True)
+        local = _recording(ProviderType.OLLAMA, {"ollama/small": 400})
+        router = ModelRouterV2(
+            fallback_chain=["claude-big", "ollama/small"],
+            context_policies={"coder": ContextPolicy()},
+        )
+        router.register_provider(primary)
+        router.register_provider(local)
+        messages = _conversation(turns=10)
+
+        response = await router.invoke("claude-big", messages, agent_name="coder")
+
+        assert response.model_id == "ollama/small"
+        assert primary.received[0][1] == messages
+        sent = local.received[0][1]
+        assert sent[0] == messages[0] and sent[-1] == messages[-1]
+        assert len(sent) < len(messages)
+        report = response.context_report
+        assert report.model_id == "ollama/small"
+        assert report.input_budget == input_budget(400, 100, 0.05)
+        assert report.final_tokens <= report.input_budget
+        assert response.to_dict()["context_report"]["actions"] == ["drop_oldest"]
+
+    @pytest.mark.asyncio
+    async def test_coder_style_prompt_fits_small_model(self):
+        local = _recording(ProviderType.OLLAMA, {"ollama/small": 400})
+        router = ModelRouterV2(context_policies={"coder": ContextPolicy()})
+        router.register_provider(local)
+        messages = [
+            {"role": "system", "content": "You are a coder"},
+            {"role": "user", "content": "word " * 2_000},
+        ]
+
+        response = await router.invoke("ollama/small", messages, agent_name="coder")
+
+        assert response.context_report.actions == (ContextStrategy.TRUNCATE_RECENT,)
+        assert router.tokenizer.count_messages(local.received[0][1], "ollama/small") <= input_budget(400, 100, 0.05)
+
+    @pytest.mark.asyncio
+    async def test_without_policy_small_model_is_skipped(self):
+        local = _recording(ProviderType.OLLAMA, {"ollama/small": 400})
+        router = ModelRouterV2()
+        router.register_provider(local)
+
+        with pytest.raises(RuntimeError):
+            await router.invoke("ollama/small", _conversation(turns=10), agent_name="coder")
+
+        assert local.received == []
+
+    @pytest.mark.asyncio
+    async def test_summary_uses_cheapest_model_and_is_billed(self):
+        provider = _recording(
+            ProviderType.OPENAI, {"gpt-big": 10_000, "gpt-mini": 10_000}
+        )
+        small = _recording(ProviderType.OLLAMA, {"ollama/small": 400})
+        router = ModelRouterV2()
+        router.register_provider(provider)
+        router.register_provider(small)
+        router.set_context_policy(ContextPolicy(
+            strategies=(ContextStrategy.SUMMARIZE, ContextStrategy.DROP_OLDEST),
+        ))
+
+        response = await router.invoke("ollama/small", _conversation(turns=10), agent_name="coder")
+
+        assert [model for model, _ in provider.received] == ["gpt-mini"]
+        assert small.received[0][1][1]["content"] == SUMMARY_PREFIX + "summary of turns"
+        assert response.context_report.actions == (ContextStrategy.SUMMARIZE,)
+        assert router.get_usage_stats()["by_agent"]["coder"]["call_count"] == 2
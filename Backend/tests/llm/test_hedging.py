@@ -0,0 +1,169 @@
+#
+# MacCortex - Request Hedging Tests
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""ModelRouterV2 请求对冲测试"""
+
+import asyncio
+
+import pytest
+
+from src.llm.hedging import HedgePolicy, LatencyTracker
+from src.llm.models import ProviderType
+from src.llm.router import ModelRouterV2
+
+from .conftest import FakeProvider
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def _provider(model_id: str, provider_type: ProviderType, delay: float) -> FakeProvider:
+    return FakeProvider(
+        model_id,
+        provider_type=provider_type,
+        delay=delay,
+        price="10",
+        output_price="20",
+        input_tokens=1000,
+        output_tokens=500,
+        error=ConnectionError(f"{model_id} down"),
+    )
+
+
+def _router(primary_delay: float, backup_delay: float, **policy_kwargs):
+    primary = _provider("primary", ProviderType.ANTHROPIC, primary_delay)
+    backup = _provider("backup", ProviderType.OPENAI, backup_delay)
+    router = ModelRouterV2(fallback_chain=["primary", "backup"])
+    router.register_provider(primary)
+    router.register_provider(backup)
+    policy_kwargs.setdefault("default_delay_ms", 20)
+    policy_kwargs.setdefault("min_delay_ms", 0)
+    router.set_hedge_policy(HedgePolicy(**policy_kwargs), agent_name="planner")
+    return router, primary, backup
+
+
+class TestLatencyTracker:
+    """延迟分位数测试"""
+
+    def test_percentile(self):
+        tracker = LatencyTracker(window=100)
+        for latency in range(1, 101):
+            tracker.record("m", float(latency))
+
+        assert tracker.percentile("m", 50) == 50.0
+        assert tracker.percentile("m", 95) == 95.0
+        assert tracker.percentile("unknown", 95) is None
+
+    def test_window_keeps_recent_samples(self):
+        tracker = LatencyTracker(window=3)
+        for latency in (1000.0, 1.0, 2.0, 3.0):
+            tracker.record("m", latency)
+
+        assert tracker.count("m") == 3
+        assert tracker.percentile("m", 100) == 3.0
+
+    def test_policy_delay_uses_samples_once_enough(self):
+        tracker = LatencyTracker()
+        policy = HedgePolicy(percentile=90, min_samples=5, default_delay_ms=None, min_delay_ms=10)
+
+        assert policy.delay_ms(tracker, "m") is None
+        for latency in (1.0, 2.0, 3.0, 4.0, 200.0):
+            tracker.record("m", latency)
+        assert policy.delay_ms(tracker, "m") == 200.0
+
+
+class TestHedgedInvoke:
+    """对冲调用测试"""
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged(self):
+        router, primary, backup = _router(primary_delay=1.0, backup_delay=0.01)
+
+        start = asyncio.get_running_loop().time()
+        response = await router.invoke("primary", MESSAGES, agent_name="planner")
+        elapsed = asyncio.get_running_loop().time() - start
+
+        assert response.model_id == "backup"
+        assert elapsed < 0.5
+        assert primary.cancelled == 1
+
+        # 两个请求都计入使用量：胜者为实际用量，被取消者按输入 Token 估算
+        by_model = router.usage_tracker.get_usage_by_model()
+        assert by_model["backup"]["total_tokens"] == 1500
+        assert by_model["primary"]["input_tokens"] == 1000
+        assert by_model["primary"]["output_tokens"] == 0
+        assert by_model["primary"]["total_cost"] == "0.010000"
+
+        stats = router.get_hedge_stats()["by_agent"]["planner"]
+        assert stats == {"hedged_calls": 1, "hedge_wins": 1, "extra_cost": "0.010000"}
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self):
+        router, primary, backup = _router(primary_delay=0.0, backup_delay=0.0, default_delay_ms=200)
+
+        response = await router.invoke("primary", MESSAGES, agent_name="planner")
+
+        assert response.model_id == "primary"
+        assert backup.calls == 0
+        assert router.get_hedge_stats()["by_agent"] == {}
+
+    @pytest.mark.asyncio
+    async def test_primary_wins_race(self):
+        router, primary, backup = _router(primary_delay=0.06, backup_delay=1.0)
+
+        response = await router.invoke("primary", MESSAGES, agent_name="planner")
+
+        assert response.model_id == "primary"
+        assert backup.cancelled == 1
+        assert router.get_hedge_stats()["by_agent"]["planner"]["hedge_wins"] == 0
+
+    @pytest.mark.asyncio
+    async def test_policy_is_per_agent(self):
+        router, primary, backup = _router(primary_delay=0.1, backup_delay=0.0)
+
+        response = await router.invoke("primary", MESSAGES, agent_name="coder")
+
+        assert response.model_id == "primary"
+        assert backup.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_budget_cap_stops_hedging(self):
+        router, primary, backup = _router(primary_delay=0.1, backup_delay=0.0, budget_usd=0.005)
+
+        first = await router.invoke("primary", MESSAGES, agent_name="planner")
+        second = await router.invoke("primary", MESSAGES, agent_name="planner")
+
+        assert first.model_id == "backup"
+        assert second.model_id == "primary"
+        assert backup.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_failure_falls_back_immediately(self):
+        router, primary, backup = _router(primary_delay=0.0, backup_delay=0.0, default_delay_ms=5000)
+        primary.fail = True
+
+        response = await router.invoke("primary", MESSAGES, agent_name="planner")
+
+        assert response.model_id == "backup"
+        assert router.get_hedge_stats()["by_agent"] == {}
+        assert "primary" not in router.usage_tracker.get_usage_by_model()
+
+    @pytest.mark.asyncio
+    async def test_all_failed(self):
+        router, primary, backup = _router(primary_delay=0.05, backup_delay=0.0)
+        primary.fail = backup.fail = True
+
+        with pytest.raises(RuntimeError, match="All models failed"):
+            await router.invoke("primary", MESSAGES, agent_name="planner")
+
+    @pytest.mark.asyncio
+    async def test_latency_is_recorded_per_model(self):
+        router, primary, backup = _router(primary_delay=0.0, backup_delay=0.0)
+
+        await router.invoke("primary", MESSAGES)
+
+        assert router.latency_tracker.count("primary") == 1
+        assert router.get_hedge_stats()["latency"]["primary"]["samples"] == 1
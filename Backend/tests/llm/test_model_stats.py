@@ -0,0 +1,190 @@
+#
+# MacCortex - Model Statistics Tests
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""模型实时统计与自适应选择测试"""
+
+import json
+
+import pytest
+
+from src.llm.model_stats import ModelStatsTracker, RoutingPolicy
+from src.llm.models import ProviderType
+from src.llm.router import ModelRouterV2
+
+from .conftest import FakeProvider
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def _timed(provider_type: ProviderType, model_id: str, delay: float, price: str = "1") -> FakeProvider:
+    return FakeProvider(
+        model_id, provider_type=provider_type, delay=delay, price=price, input_tokens=1000, output_tokens=100
+    )
+
+
+def _seed(tracker: ModelStatsTracker, model_id: str, latency_ms: float, cost: float, n: int = 5):
+    for _ in range(n):
+        tracker.record_success(model_id, latency_ms=latency_ms, output_tokens=100, cost_usd=cost)
+
+
+class TestModelStatsTracker:
+    """统计追踪测试"""
+
+    def test_ewma_and_speed(self):
+        tracker = ModelStatsTracker(alpha=0.5)
+        tracker.record_success("m", latency_ms=1000, output_tokens=50, cost_usd=0.01)
+        tracker.record_success("m", latency_ms=3000, output_tokens=150, cost_usd=0.03)
+
+        stats = tracker.get("m")
+        assert stats.latency_ms == 2000
+        assert stats.tokens_per_sec == 50
+        assert stats.cost_usd == pytest.approx(0.02)
+        assert stats.calls == 2
+
+    def test_error_rate(self):
+        tracker = ModelStatsTracker(alpha=0.5)
+        tracker.record_failure("m")
+        tracker.record_success("m", latency_ms=10, output_tokens=1, cost_usd=0.0)
+
+        stats = tracker.get("m")
+        assert stats.error_rate == 0.25  # 初始为 0，失败 → 0.5，成功 → 0.25
+        assert (stats.calls, stats.errors) == (2, 1)
+
+    def test_persistence_survives_restart(self, tmp_path):
+        path = tmp_path / "llm_stats.json"
+        clock = [0.0]
+        tracker = ModelStatsTracker(persist_path=path, save_interval_seconds=60, clock=lambda: clock[0])
+
+        tracker.record_success("m", latency_ms=800, output_tokens=40, cost_usd=0.002)
+        assert not path.exists()  # 未到写入间隔
+        clock[0] = 61
+        tracker.record_failure("m")
+        assert path.exists()
+
+        restored = ModelStatsTracker(persist_path=path)
+        assert restored.get("m").latency_ms == 800
+        assert restored.get("m").errors == 1
+
+    def test_flush_and_corrupt_file(self, tmp_path):
+        path = tmp_path / "llm_stats.json"
+        tracker = ModelStatsTracker(persist_path=path)
+        tracker.record_success("m", latency_ms=5, output_tokens=1, cost_usd=0.0)
+        tracker.flush()
+        assert json.loads(path.read_text())["models"]["m"]["calls"] == 1
+
+        path.write_text("{not json")
+        assert ModelStatsTracker(persist_path=path).snapshot() == {}
+
+
+class TestRoutingPolicy:
+    """选择策略测试"""
+
+    def test_latency_constraint_and_objective(self):
+        tracker = ModelStatsTracker()
+        _seed(tracker, "ollama/qwen3:14b", latency_ms=80_000, cost=0.0)
+        _seed(tracker, "claude-haiku", latency_ms=2_000, cost=0.001)
+        _seed(tracker, "claude-sonnet-4", latency_ms=6_000, cost=0.01)
+        candidates = ["ollama/qwen3:14b", "claude-sonnet-4", "claude-haiku"]
+
+        assert RoutingPolicy(max_latency_ms=10_000, objective="latency").rank(candidates, tracker) == [
+            "claude-haiku", "claude-sonnet-4"
+        ]
+        assert RoutingPolicy(objective="cost").rank(candidates, tracker)[0] == "ollama/qwen3:14b"
+        assert RoutingPolicy(max_cost_usd=0.005, max_latency_ms=10_000).rank(candidates, tracker) == [
+            "claude-haiku"
+        ]
+
+    def test_balanced_does_not_favor_free_slow_model(self):
+        tracker = ModelStatsTracker()
+        _seed(tracker, "ollama/qwen3:14b", latency_ms=80_000, cost=0.0)
+        _seed(tracker, "claude-haiku", latency_ms=2_000, cost=0.0004)
+
+        assert RoutingPolicy().rank(["ollama/qwen3:14b", "claude-haiku"], tracker) == [
+            "claude-haiku", "ollama/qwen3:14b"
+        ]
+
+    def test_balanced_prefers_cheaper_model_at_similar_latency(self):
+        tracker = ModelStatsTracker()
+        _seed(tracker, "fast-expensive", latency_ms=1_000, cost=0.1)
+        _seed(tracker, "slower-cheap", latency_ms=1_500, cost=0.001)
+
+        assert RoutingPolicy().rank(["fast-expensive", "slower-cheap"], tracker)[0] == "slower-cheap"
+
+    def test_unknown_models_rank_after_known(self):
+        tracker = ModelStatsTracker()
+        _seed(tracker, "slow", latency_ms=5_000, cost=0.0)
+
+        assert RoutingPolicy().rank(["new", "slow"], tracker) == ["slow", "new"]
+
+    def test_error_rate_excludes_model(self):
+        tracker = ModelStatsTracker(alpha=0.5)
+        _seed(tracker, "flaky", latency_ms=100, cost=0.0)
+        tracker.record_failure("flaky")
+        tracker.record_failure("flaky")
+        _seed(tracker, "steady", latency_ms=500, cost=0.0)
+
+        assert RoutingPolicy(max_error_rate=0.5).rank(["flaky", "steady"], tracker) == ["steady"]
+
+    def test_cost_estimate_overrides_history(self):
+        tracker = ModelStatsTracker()
+        _seed(tracker, "m", latency_ms=100, cost=0.0)
+
+        ranked = RoutingPolicy(max_cost_usd=0.01).rank(["m"], tracker, estimate_cost=lambda _: 0.5)
+        assert ranked == []
+
+
+class TestAdaptiveRouting:
+    """ModelRouterV2 自适应选择集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_router_learns_and_prefers_faster_model(self):
+        slow = _timed(ProviderType.OLLAMA, "local", delay=0.05, price="0")
+        fast = _timed(ProviderType.ANTHROPIC, "cloud", delay=0.0)
+        router = ModelRouterV2(fallback_chain=["local", "cloud"])
+        router.register_provider(slow)
+        router.register_provider(fast)
+        for model_id in ("local", "cloud"):
+            for _ in range(3):
+                await router.invoke(model_id, MESSAGES, agent_name="bench")
+
+        stats = router.get_model_stats()
+        assert stats["local"]["latency_ms"] > stats["cloud"]["latency_ms"]
+        assert stats["cloud"]["cost_usd"] > 0
+
+        router.set_routing_policy(RoutingPolicy(max_latency_ms=30), agent_name="planner")
+        response = await router.invoke("local", MESSAGES, agent_name="planner")
+        assert response.model_id == "cloud"
+        # 其他 Agent 仍按静态顺序
+        assert (await router.invoke("local", MESSAGES, agent_name="coder")).model_id == "local"
+
+        assert router.select_model(RoutingPolicy(objective="cost")) == "local"
+
+    @pytest.mark.asyncio
+    async def test_cost_limit_applies_to_models_without_samples(self):
+        router = ModelRouterV2(fallback_chain=["pricey", "cheap"])
+        pricey = _timed(ProviderType.ANTHROPIC, "pricey", delay=0.0, price="100")
+        cheap = _timed(ProviderType.OLLAMA, "cheap", delay=0.0, price="0")
+        router.register_provider(pricey)
+        router.register_provider(cheap)
+
+        assert router.rank_models(RoutingPolicy(max_cost_usd=0.01), messages=MESSAGES) == ["cheap"]
+        response = await router.invoke("pricey", MESSAGES, routing_policy=RoutingPolicy(max_cost_usd=0.01))
+
+        assert response.model_id == "cheap"
+        assert pricey.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_no_model_satisfies_policy(self):
+        router = ModelRouterV2()
+        provider = _timed(ProviderType.ANTHROPIC, "cloud", delay=0.0, price="100")
+        router.register_provider(provider)
+        for _ in range(3):
+            await router.invoke("cloud", MESSAGES)
+
+        with pytest.raises(RuntimeError, match="routing policy"):
+            await router.invoke("cloud", MESSAGES, routing_policy=RoutingPolicy(max_cost_usd=0.001))
+        assert provider.calls == 3
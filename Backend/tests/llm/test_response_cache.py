@@ -0,0 +1,268 @@
+#
+# MacCortex - Response Cache Tests
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""精确匹配响应缓存测试"""
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from src.llm.cache_store import CacheStore
+from src.llm.models import CostInfo, LLMResponse, ModelConfig, ProviderType, TokenUsage
+from src.llm.response_cache import CachePolicy, ResponseCache, make_cache_key
+from src.llm.router import ModelRouterV2, create_default_router
+from src.llm.semantic_cache import SemanticCache, SemanticCachePolicy
+from src.retrieval.embeddings import HashingEmbedding
+
+from .conftest import FakeProvider
+
+
+MESSAGES = [{"role": "system", "content": "plan"}, {"role": "user", "content": "build a todo app"}]
+DETERMINISTIC = ModelConfig(temperature=0.0)
+
+
+def _provider(delay: float = 0.0) -> FakeProvider:
+    """每次调用返回不同内容的 Provider（失败时抛出不可重试的错误）"""
+    return FakeProvider(
+        delay=delay,
+        input_tokens=1000,
+        output_tokens=1000,
+        reply=lambda model_id, messages, calls: f"answer {calls}",
+        error=ValueError("bad request"),
+    )
+
+
+def _router(delay: float = 0.0, **policy) -> tuple[ModelRouterV2, FakeProvider]:
+    router = ModelRouterV2(cache_policies={"planner": CachePolicy(**policy)})
+    provider = _provider(delay)
+    router.register_provider(provider)
+    return router, provider
+
+
+class TestCacheKey:
+    """缓存键测试"""
+
+    def test_key_ignores_dict_order_and_non_output_fields(self):
+        reordered = [{"content": m["content"], "role": m["role"]} for m in MESSAGES]
+        slow = ModelConfig(temperature=0.0, timeout_seconds=5, retry_count=0, metadata={"trace": "x"})
+
+        assert make_cache_key("m", MESSAGES, DETERMINISTIC) == make_cache_key("m", reordered, slow)
+
+    def test_key_covers_output_fields(self):
+        base = make_cache_key("m", MESSAGES, DETERMINISTIC)
+
+        assert base != make_cache_key("m", MESSAGES, ModelConfig(temperature=0.0, max_tokens=10))
+        assert base != make_cache_key("m", MESSAGES, ModelConfig(temperature=0.0, stop_sequences=["\n"]))
+        assert base != make_cache_key("other", MESSAGES, DETERMINISTIC)
+
+    def test_lru_and_ttl(self):
+        now = [0.0]
+        cache = ResponseCache(max_entries=2, clock=lambda: now[0])
+        response = LLMResponse(
+            content="x",
+            usage=TokenUsage.zero(),
+            cost=CostInfo.zero(),
+            model_id="m",
+            provider=ProviderType.ANTHROPIC,
+            latency_ms=1.0,
+        )
+        for key in ("a", "b", "c"):
+            cache.put(key, response)
+
+        assert cache.get("a", ttl_seconds=10) is None
+        assert cache.get("c", ttl_seconds=10) is response
+        now[0] = 11
+        assert cache.get("c", ttl_seconds=10) is None
+
+
+class TestPersistentCache:
+    """磁盘存储（CacheStore）测试"""
+
+    @pytest.mark.asyncio
+    async def test_router_hits_survive_restart(self, tmp_path):
+        path = tmp_path / "llm_responses.sqlite3"
+        provider = _provider()
+        router = ModelRouterV2(
+            cache_policies={"planner": CachePolicy()},
+            response_cache=ResponseCache(store=CacheStore(path)),
+        )
+        router.register_provider(provider)
+        first = await router.invoke("m", MESSAGES, DETERMINISTIC, agent_name="planner")
+        router.response_cache.close()
+
+        restarted = ModelRouterV2(
+            cache_policies={"planner": CachePolicy()},
+            response_cache=ResponseCache(store=CacheStore(path)),
+        )
+        restarted.register_provider(provider)
+        second = await restarted.invoke("m", MESSAGES, DETERMINISTIC, agent_name="planner")
+
+        assert provider.calls == 1
+        assert second.cache_hit and second.content == first.content
+        assert Decimal(restarted.get_cache_stats()["saved_cost"]) == first.cost.total_cost
+        assert restarted.get_cache_stats()["entries"] == 1
+
+    def test_disk_lru_and_ttl(self, tmp_path):
+        now = [0.0]
+        cache = ResponseCache(max_entries=2, clock=lambda: now[0], store=CacheStore(tmp_path / "c.sqlite3"),
+                              memory_entries=1)
+        response = LLMResponse(
+            content="x",
+            usage=TokenUsage(input_tokens=3, output_tokens=2, total_tokens=5),
+            cost=CostInfo(input_cost=Decimal("0.1"), output_cost=Decimal("0.2"), total_cost=Decimal("0.3")),
+            model_id="m",
+            provider=ProviderType.ANTHROPIC,
+            latency_ms=1.0,
+        )
+        for key in ("a", "b", "c"):
+            now[0] += 1
+            cache.put(key, response)
+
+        assert len(cache) == 2
+        assert cache.get("a", ttl_seconds=10) is None
+        loaded = cache.get("b", ttl_seconds=10)  # 不在内存中，从磁盘读取
+        assert (loaded.content, loaded.usage, loaded.cost) == (response.content, response.usage, response.cost)
+        now[0] = 20
+        assert cache.get("c", ttl_seconds=10) is None
+
+    def test_default_router_persists_cache(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LLM_CACHE_AGENTS", "planner")
+        monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm_responses.sqlite3"))
+        monkeypatch.setenv("LLM_STATS_PATH", str(tmp_path / "llm_stats.json"))
+        router = create_default_router()
+        response = LLMResponse(
+            content="x",
+            usage=TokenUsage.zero(),
+            cost=CostInfo.zero(),
+            model_id="m",
+            provider=ProviderType.ANTHROPIC,
+            latency_ms=1.0,
+        )
+
+        router.response_cache.put("a", response)
+
+        assert CacheStore(tmp_path / "llm_responses.sqlite3").get("a").model_name == "m"
+
+    def test_store_errors_are_misses(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        cache = ResponseCache(store=CacheStore(blocker / "c.sqlite3"))
+        response = LLMResponse(
+            content="x",
+            usage=TokenUsage.zero(),
+            cost=CostInfo.zero(),
+            model_id="m",
+            provider=ProviderType.ANTHROPIC,
+            latency_ms=1.0,
+        )
+
+        cache.put("a", response)  # 目录无法创建，仅保留内存条目
+
+        assert cache.get("a", ttl_seconds=10) is response
+        assert cache.get("b", ttl_seconds=10) is None
+
+
+class TestRouterCache:
+    """ModelRouterV2 响应缓存集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_hit_is_zero_cost_and_flagged(self):
+        router, provider = _router()
+
+        first = await router.invoke("m", MESSAGES, DETERMINISTIC, agent_name="planner")
+        second = await router.invoke("m", MESSAGES, DETERMINISTIC, agent_name="planner")
+
+        assert provider.calls == 1
+        assert not first.cache_hit
+        assert second.cache_hit and second.content == first.content
+        assert second.cost.total_cost == 0
+        assert second.to_dict()["cache_hit"] is True
+        stats = router.get_usage_stats()
+        assert stats["call_count"] == 2
+        assert stats["cache_hits"] == 1
+        assert stats["by_agent"]["planner"]["cache_hits"] == 1
+        assert Decimal(stats["total_cost"]) == first.cost.total_cost
+        assert Decimal(router.get_cache_stats()["saved_cost"]) == first.cost.total_cost
+
+    @pytest.mark.asyncio
+    async def test_policy_is_per_agent_and_respects_temperature(self):
+        router, provider = _router(max_temperature=0.2)
+
+        for _ in range(2):
+            await router.invoke("m", MESSAGES, DETERMINISTIC, agent_name="coder")
+        for _ in range(2):
+            await router.invoke("m", MESSAGES, ModelConfig(temperature=0.7), agent_name="planner")
+
+        assert provider.calls == 4
+        assert len(router.response_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_identical_inflight_calls_are_coalesced(self):
+        router, provider = _router(delay=0.05)
+
+        responses = await asyncio.gather(*(
+            router.invoke("m", MESSAGES, DETERMINISTIC, agent_name="planner") for _ in range(5)
+        ))
+
+        assert provider.calls == 1
+        assert sum(not r.cache_hit for r in responses) == 1
+        assert router.get_cache_stats()["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_coalesced_callers_share_failure_and_nothing_is_cached(self):
+        router, provider = _router(delay=0.02)
+        provider.fail = True
+
+        results = await asyncio.gather(
+            *(router.invoke("m", MESSAGES, DETERMINISTIC, agent_name="planner") for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert provider.calls == 1
+        assert all(isinstance(r, Exception) for r in results)
+        assert len(router.response_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_fallback_response_is_not_cached_as_requested_model(self):
+        primary = FakeProvider("m", fail=True)
+        backup = FakeProvider("backup", provider_type=ProviderType.OPENAI)
+        router = ModelRouterV2(
+            fallback_chain=["m", "backup"], cache_policies={"planner": CachePolicy()}
+        )
+        router.register_provider(primary)
+        router.register_provider(backup)
+
+        first = await router.invoke("m", MESSAGES, DETERMINISTIC, agent_name="planner")
+        primary.fail = False
+        second = await router.invoke("m", MESSAGES, DETERMINISTIC, agent_name="planner")
+
+        assert first.model_id == "backup"
+        assert not second.cache_hit and second.model_id == "m"
+        assert len(router.response_cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_exact_hit_skips_semantic_lookup(self):
+        class CountingEmbedding(HashingEmbedding):
+            calls = 0
+
+            def embed(self, texts):
+                CountingEmbedding.calls += 1
+                return super().embed(texts)
+
+        router = ModelRouterV2(
+            cache_policies={"planner": CachePolicy()},
+            semantic_cache=SemanticCache(CountingEmbedding()),
+            semantic_policies={"planner": SemanticCachePolicy()},
+        )
+        provider = _provider()
+        router.register_provider(provider)
+
+        for _ in range(3):
+            await router.invoke("m", MESSAGES, DETERMINISTIC, agent_name="planner")
+
+        assert provider.calls == 1
+        assert CountingEmbedding.calls == 1
@@ -0,0 +1,210 @@
+#
+# MacCortex - Semantic Cache Tests
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""语义（嵌入相似度）缓存测试"""
+
+import pytest
+
+from src.llm.models import ModelConfig, ProviderType
+from src.llm.router import ModelRouterV2, create_default_router
+from src.llm.semantic_cache import SemanticCache, SemanticCachePolicy, split_query
+from src.retrieval.embeddings import HashingEmbedding
+
+from .conftest import FakeProvider
+
+
+CONFIG = ModelConfig(temperature=0.2)
+
+
+def _messages(task: str, system: str = "You are a planner") -> list[dict]:
+    return [{"role": "system", "content": system}, {"role": "user", "content": task}]
+
+
+def _provider() -> FakeProvider:
+    """把用户消息原样写进响应的 Provider"""
+    return FakeProvider(
+        input_tokens=500,
+        output_tokens=500,
+        reply=lambda model_id, messages, calls: f"plan for: {messages[-1]['content']}",
+    )
+
+
+def _router(**policy) -> tuple[ModelRouterV2, FakeProvider]:
+    router = ModelRouterV2(
+        semantic_cache=SemanticCache(HashingEmbedding()),
+        semantic_policies={"planner": SemanticCachePolicy(**{"threshold": 0.8, **policy})},
+    )
+    provider = _provider()
+    router.register_provider(provider)
+    return router, provider
+
+
+class TestSplitQuery:
+    """分区与查询文本测试"""
+
+    def test_partition_depends_on_context_not_query(self):
+        first = split_query("m", _messages("write hello world"), CONFIG)
+        second = split_query("m", _messages("create hello world"), CONFIG)
+        other_system = split_query("m", _messages("write hello world", system="You are a coder"), CONFIG)
+
+        assert first[0] == second[0]
+        assert first[1] == "write hello world"
+        assert other_system[0] != first[0]
+        assert split_query("m", _messages("x"), ModelConfig(temperature=0.2, max_tokens=5))[0] != first[0]
+
+    def test_non_user_last_message_is_skipped(self):
+        assert split_query("m", [{"role": "assistant", "content": "hi"}], CONFIG) is None
+        assert split_query("m", [], CONFIG) is None
+
+
+class TestSemanticRouting:
+    """ModelRouterV2 语义缓存集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_paraphrase_hits(self):
+        router, provider = _router()
+
+        first = await router.invoke("m", _messages("create hello world in python"), CONFIG, agent_name="planner")
+        second = await router.invoke(
+            "m", _messages("Create a hello world program in Python"), CONFIG, agent_name="planner"
+        )
+
+        assert provider.calls == 1
+        assert second.cache_hit
+        assert second.content == first.content
+        assert second.cache_similarity >= 0.8
+        assert second.cost.total_cost == 0
+        assert router.get_cache_stats()["semantic"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unrelated_prompt_and_other_agents_miss(self):
+        router, provider = _router()
+
+        await router.invoke("m", _messages("create hello world in python"), CONFIG, agent_name="planner")
+        await router.invoke("m", _messages("summarize the history of rome"), CONFIG, agent_name="planner")
+        await router.invoke("m", _messages("create hello world in python"), CONFIG, agent_name="coder")
+
+        assert provider.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_verify_hook_rejects(self):
+        seen = []
+
+        async def verify(query, match):
+            seen.append((query, match.prompt))
+            return "python" in query.lower() and "python" in match.prompt.lower()
+
+        router, provider = _router(threshold=0.7, verify=verify)
+        await router.invoke("m", _messages("create hello world in python"), CONFIG, agent_name="planner")
+        await router.invoke("m", _messages("create hello world in rust"), CONFIG, agent_name="planner")
+
+        assert provider.calls == 2
+        assert seen == [("create hello world in rust", "create hello world in python")]
+        assert router.get_cache_stats()["semantic"]["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_adapt_hook_rewrites_content(self):
+        router, provider = _router(adapt=lambda query, match: match.response.content + " (adapted)")
+
+        await router.invoke("m", _messages("create hello world in python"), CONFIG, agent_name="planner")
+        hit = await router.invoke("m", _messages("create a hello world in python"), CONFIG, agent_name="planner")
+
+        assert hit.content.endswith("(adapted)")
+        assert provider.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_embedding_failure_is_a_miss(self):
+        class DownEmbedding:
+            def embed(self, texts):
+                raise ConnectionError("embedding service unavailable")
+
+        router = ModelRouterV2(
+            semantic_cache=SemanticCache(DownEmbedding()),
+            semantic_policies={"planner": SemanticCachePolicy(threshold=0.8)},
+        )
+        provider = _provider()
+        router.register_provider(provider)
+
+        for _ in range(2):
+            response = await router.invoke("m", _messages("create hello world in python"), CONFIG, agent_name="planner")
+
+        assert not response.cache_hit
+        assert provider.calls == 2
+        assert len(router.semantic_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_failing_verify_hook_is_a_miss(self):
+        def verify(query, match):
+            raise RuntimeError("verifier crashed")
+
+        router, provider = _router(verify=verify)
+        await router.invoke("m", _messages("create hello world in python"), CONFIG, agent_name="planner")
+        second = await router.invoke("m", _messages("create a hello world in python"), CONFIG, agent_name="planner")
+
+        assert not second.cache_hit
+        assert provider.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_hot_temperature_bypasses_cache(self):
+        router, provider = _router()
+        hot = ModelConfig(temperature=0.9)
+
+        for _ in range(2):
+            await router.invoke("m", _messages("create hello world in python"), hot, agent_name="planner")
+
+        assert provider.calls == 2
+        assert len(router.semantic_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_fallback_response_is_not_stored(self):
+        router, provider = _router()
+        provider.fail = True
+        backup = FakeProvider("backup", provider_type=ProviderType.OPENAI)
+        router.register_provider(backup)
+        router.set_fallback_chain(["m", "backup"])
+
+        response = await router.invoke("m", _messages("create hello world in python"), CONFIG, agent_name="planner")
+
+        assert response.model_id == "backup"
+        assert len(router.semantic_cache) == 0
+
+    def test_policy_requires_cache(self):
+        with pytest.raises(ValueError):
+            ModelRouterV2().set_semantic_policy(SemanticCachePolicy(), agent_name="planner")
+
+
+class TestDefaultRouter:
+    """create_default_router 的语义缓存配置"""
+
+    @pytest.fixture(autouse=True)
+    def _env(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LLM_SEMANTIC_CACHE_AGENTS", "planner")
+        monkeypatch.setenv("LLM_STATS_PATH", str(tmp_path / "llm_stats.json"))
+
+    def test_hashing_embedder_disables_semantic_cache(self, monkeypatch):
+        import retrieval.embeddings
+
+        hashing = retrieval.embeddings.HashingEmbedding()
+        monkeypatch.setattr(retrieval.embeddings, "get_embedding_function", lambda: hashing)
+
+        assert create_default_router().semantic_cache is None
+
+    def test_semantic_embedder_enables_semantic_cache(self, monkeypatch):
+        import retrieval.embeddings
+
+        class ModelEmbedding:
+            name = "ollama-nomic-embed-text"
+
+            def embed(self, texts):
+                return [[1.0, 0.0] for _ in texts]
+
+        embedder = ModelEmbedding()
+        monkeypatch.setattr(retrieval.embeddings, "get_embedding_function", lambda: embedder)
+
+        router = create_default_router()
+
+        assert router.semantic_cache is not None
+        assert router._get_semantic_policy("planner").threshold == SemanticCachePolicy.threshold
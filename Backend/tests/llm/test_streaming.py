@@ -0,0 +1,96 @@
+#
+# MacCortex - Stream Handle Tests
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""流式调用句柄测试"""
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from src.llm.router import ModelRouterV2
+from src.llm.streaming import StreamHandle
+
+from .conftest import FakeProvider
+
+
+def _messages(text: str) -> list[dict]:
+    return [{"role": "user", "content": text}]
+
+
+class TestStreamHandle:
+    """ModelRouterV2.stream 句柄测试"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_streams_report_own_usage(self):
+        router = ModelRouterV2()
+        router.register_provider(FakeProvider(delay=0.001, output_price="2"))
+
+        async def consume(text: str) -> StreamHandle:
+            handle = router.stream("m", _messages(text), session_id=text)
+            chunks = [chunk async for chunk in handle]
+            assert chunks == text.split()
+            return handle
+
+        short, long = await asyncio.gather(consume("a b"), consume("a b c d e f"))
+
+        assert short.usage.output_tokens == 2
+        assert long.usage.output_tokens == 6
+        assert short.finish_reason == long.finish_reason == "end_turn"
+        assert long.cost.total_cost == Decimal("22") / Decimal("1000000")
+        assert router.get_usage_stats("a b")["output_tokens"] == 2
+
+    @pytest.mark.asyncio
+    async def test_ttft_recorded_in_usage_tracker(self):
+        router = ModelRouterV2()
+        router.register_provider(FakeProvider(delay=0.01, output_price="2"))
+
+        async with router.stream("m", _messages("one two three"), agent_name="writer") as handle:
+            async for _ in handle:
+                pass
+
+        assert handle.ttft_ms >= 10
+        assert handle.latency_ms >= handle.ttft_ms
+        assert handle.chunk_count == 3
+        latency = router.get_usage_stats()["latency_by_model"]["m"]
+        assert latency["ttft_samples"] == 1
+        assert latency["avg_ttft_ms"] == pytest.approx(handle.ttft_ms, abs=1e-3)
+        record = router.usage_tracker.get_recent_records(1)[0]
+        assert record["ttft_ms"] == handle.ttft_ms
+
+    @pytest.mark.asyncio
+    async def test_early_close_is_cancelled(self):
+        router = ModelRouterV2()
+        router.register_provider(FakeProvider(output_price="2"))
+
+        async with router.stream("m", _messages("a b c d")) as handle:
+            async for chunk in handle:
+                break
+
+        assert handle.finish_reason == "cancelled"
+        assert handle.usage is None
+        assert router.get_usage_stats()["call_count"] == 0
+        assert router.get_circuit_state("m")["state"] == "closed"
+
+    @pytest.mark.asyncio
+    async def test_error_sets_finish_reason(self):
+        router = ModelRouterV2()
+        provider = FakeProvider(output_price="2")
+        provider.fail_after = 1
+        router.register_provider(provider)
+
+        handle = router.stream("m", _messages("a b c"))
+        with pytest.raises(RuntimeError, match="connection reset"):
+            async for _ in handle:
+                pass
+
+        assert handle.finish_reason == "error"
+        assert isinstance(handle.error, RuntimeError)
+        assert router.get_circuit_state("m")["model"]["consecutive_failures"] == 1
+
+    def test_unknown_model_raises_immediately(self):
+        with pytest.raises(ValueError, match="Unknown model"):
+            ModelRouterV2().stream("missing", _messages("hi"))
@@ -0,0 +1,168 @@
+#
+# MacCortex - Tokenizer Tests
+# Phase 5 - Multi-LLM Support
+# Created: 2026-10-19
+#
+
+"""Token 计数与调用前预估测试"""
+
+from decimal import Decimal
+
+import pytest
+
+from src.llm.models import ModelConfig, ProviderType
+from src.llm.router import ModelRouterV2
+from src.llm.tokenizer import (
+    PROFILES,
+    HeuristicCounter,
+    TokenizerService,
+    model_family,
+)
+
+from .conftest import FakeProvider
+
+
+def _window(provider_type: ProviderType, model_id: str, context_window: int) -> FakeProvider:
+    """上下文窗口可配置、按固定输入 Token 数返回的 Provider"""
+    return FakeProvider(
+        model_id,
+        provider_type=provider_type,
+        output_price="2",
+        input_tokens=0,
+        output_tokens=1,
+        context_window=context_window,
+        max_tokens=1000,
+    )
+
+
+class TestHeuristicCounter:
+    """按文字类别估算测试"""
+
+    def test_scripts(self):
+        counter = HeuristicCounter(PROFILES["default"])
+
+        assert counter.count("") == 0
+        assert counter.count("hello world") == 4  # 两个 5 字母单词各 2 个
+        assert counter.count("你好世界") == 4
+        assert counter.count("1234567") == 3
+        assert counter.count("a, b!") == 4
+
+    def test_profiles_differ_for_cjk(self):
+        text = "请帮我把这段文字翻译成英文" * 10
+
+        assert HeuristicCounter(PROFILES["qwen"]).count(text) < HeuristicCounter(PROFILES["cl100k"]).count(text)
+
+    def test_model_family(self):
+        assert model_family("claude-sonnet-4") == "claude"
+        assert model_family("gpt-4o-mini") == "o200k"
+        assert model_family("gpt-4-turbo") == "cl100k"
+        assert model_family("ollama/qwen3:14b") == "qwen"
+        assert model_family("ollama/aya:8b") == "default"
+
+
+class TestTokenizerService:
+    """计数服务测试"""
+
+    def test_counts_are_cached(self):
+        service = TokenizerService()
+        text = "The quick brown fox jumps over the lazy dog. " * 50
+
+        first = service.count(text, "claude-sonnet-4")
+        assert service.count(text, "claude-sonnet-4") == first
+        assert service.stats()["cache_hit_rate"] == 0.5
+
+    def test_message_overhead(self):
+        service = TokenizerService()
+        messages = [{"role": "system", "content": "hi"}, {"role": "user", "content": "hello"}]
+
+        assert service.count_messages(messages, "claude-sonnet-4") == (
+            service.count("hi", "claude-sonnet-4") + service.count("hello", "claude-sonnet-4") + 2 * 4 + 3
+        )
+
+    def test_calibration_from_actual_usage(self):
+        service = TokenizerService(alpha=1.0)
+        messages = [{"role": "user", "content": "word " * 100}]
+        estimate = service.count_messages(messages, "claude-haiku")
+
+        service.observe("claude-haiku", messages, actual_input_tokens=int(estimate * 1.5))
+
+        assert service.calibration()["claude-haiku"] == pytest.approx(1.5, abs=0.01)
+        assert service.count_messages(messages, "claude-haiku") == pytest.approx(estimate * 1.5, abs=2)
+        # 其他模型不受影响
+        assert service.count_messages(messages, "claude-sonnet-4") == estimate
+
+    def test_prefix_cache_shortfall_is_not_calibrated(self):
+        service = TokenizerService(alpha=1.0)
+        messages = [{"role": "user", "content": "word " * 100}]
+        estimate = service.count_messages(messages, "claude-haiku")
+
+        service.observe("claude-haiku", messages, actual_input_tokens=int(estimate * 0.9))
+        service.observe("claude-haiku", messages, actual_input_tokens=int(estimate * 0.1))
+
+        assert service.calibration()["claude-haiku"] == pytest.approx(0.9, abs=0.01)
+
+    def test_output_budget_bounds(self):
+        service = TokenizerService()
+
+        assert service.output_budget("hi", minimum=64) == 64
+        assert service.output_budget("word " * 10_000, maximum=2048) == 2048
+        mid = service.output_budget("word " * 100, ratio=1.5, margin=1.0, minimum=1)
+        assert mid == pytest.approx(service.count("word " * 100) * 1.5, abs=1)
+
+
+class TestRouterPreflight:
+    """ModelRouterV2 调用前预估测试"""
+
+    @pytest.mark.asyncio
+    async def test_preflight_and_estimate_cost(self):
+        router = ModelRouterV2()
+        router.register_provider(_window(ProviderType.ANTHROPIC, "claude-haiku", 10_000))
+        messages = [{"role": "user", "content": "summarize this " * 20}]
+
+        estimate = router.preflight("claude-haiku", messages, ModelConfig(max_tokens=4096))
+
+        assert estimate.input_tokens == router.tokenizer.count_messages(messages, "claude-haiku")
+        assert estimate.max_output_tokens == 1000  # 受模型输出上限约束
+        assert estimate.fits
+        cost = router.estimate_cost("claude-haiku", messages=messages, config=ModelConfig(max_tokens=500))
+        expected = (Decimal(estimate.input_tokens) * 1 + Decimal(500) * 2) / Decimal(1_000_000)
+        assert cost.total_cost == expected
+        # 兼容旧调用方式
+        assert router.estimate_cost("claude-haiku", 1000, 500).total_cost == Decimal("0.002")
+
+    @pytest.mark.asyncio
+    async def test_models_with_small_context_window_are_skipped(self):
+        small = _window(ProviderType.OLLAMA, "ollama/qwen3:1b", 50)
+        large = _window(ProviderType.ANTHROPIC, "claude-sonnet-4", 200_000)
+        router = ModelRouterV2(fallback_chain=["ollama/qwen3:1b", "claude-sonnet-4"])
+        router.register_provider(small)
+        router.register_provider(large)
+
+        response = await router.invoke("ollama/qwen3:1b", [{"role": "user", "content": "context " * 200}])
+
+        assert response.model_id == "claude-sonnet-4"
+        assert small.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_invoke_calibrates_estimates(self):
+        provider = _window(ProviderType.ANTHROPIC, "claude-haiku", 10_000)
+        router = ModelRouterV2()
+        router.register_provider(provider)
+        messages = [{"role": "user", "content": "token " * 100}]
+        provider.input_tokens = router.tokenizer.count_messages(messages, "claude-haiku") * 2
+
+        await router.invoke("claude-haiku", messages)
+
+        assert router.tokenizer.calibration()["claude-haiku"] == pytest.approx(2.0, abs=0.01)
+
+    @pytest.mark.asyncio
+    async def test_ollama_usage_is_not_calibrated(self):
+        provider = _window(ProviderType.OLLAMA, "ollama/qwen3:8b", 10_000)
+        router = ModelRouterV2()
+        router.register_provider(provider)
+        messages = [{"role": "user", "content": "token " * 100}]
+        provider.input_tokens = router.tokenizer.count_messages(messages, "ollama/qwen3:8b") * 2
+
+        await router.invoke("ollama/qwen3:8b", messages)
+
+        assert "ollama/qwen3:8b" not in router.tokenizer.calibration()
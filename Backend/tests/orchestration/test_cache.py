@@ -1,5 +1,6 @@
 """测试 LLM 缓存功能"""
 
+import json
 import pytest
 import tempfile
 import time
@@ -163,6 +164,75 @@ class TestLLMCache:
             assert not cache_file.exists()
 
 
+class TestCacheStore:
+    """测试 SQLite 持久化存储"""
+
+    def test_load_on_demand(self):
+        """测试启动时不加载全部条目，按键从磁盘读取"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_file = Path(tmpdir) / "cache.sqlite3"
+            cache1 = LLMCache(max_size=100, cache_file=cache_file)
+            for i in range(20):
+                cache1.set(f"s{i}", f"u{i}", f"r{i}")
+
+            # 未关闭也能读到已提交的写入（模拟进程崩溃）
+            cache2 = LLMCache(max_size=100, cache_file=cache_file)
+            assert cache2.stats()["memory_size"] == 0
+            assert cache2.stats()["size"] == 20
+
+            assert cache2.get("s7", "u7") == "r7"
+            assert cache2.stats()["memory_size"] == 1
+
+    def test_disk_lru_eviction(self):
+        """测试磁盘上的 LRU 淘汰（内存热点数小于容量）"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = LLMCache(max_size=3, cache_file=Path(tmpdir) / "cache.sqlite3", memory_size=1)
+
+            cache.set("s1", "u1", "r1")
+            cache.set("s2", "u2", "r2")
+            cache.set("s3", "u3", "r3")
+            cache.get("s1", "u1")  # s1 变为最近使用
+            cache.set("s4", "u4", "r4")  # 淘汰 s2
+
+            assert cache.stats()["size"] == 3
+            assert cache.get("s2", "u2") is None
+            assert cache.get("s1", "u1") == "r1"
+            assert cache.get("s4", "u4") == "r4"
+
+    def test_compaction_removes_expired(self):
+        """测试定期清理过期条目"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = LLMCache(max_size=10, ttl_seconds=1, cache_file=Path(tmpdir) / "cache.sqlite3",
+                             compact_every=3)
+            cache.set("s1", "u1", "r1")
+            cache.set("s2", "u2", "r2")
+            time.sleep(1.5)
+
+            cache.set("s3", "u3", "r3")  # 第 3 次写入触发清理
+
+            assert cache.stats()["size"] == 1
+            assert cache.get("s3", "u3") == "r3"
+
+    def test_legacy_json_migration(self):
+        """测试导入旧版 JSON 缓存文件"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            legacy_file = Path(tmpdir) / "llm_cache.json"
+            key = LLMCache()._generate_key("system", "user")
+            legacy_file.write_text(json.dumps({
+                "version": "1.0",
+                "entries": {
+                    key: {"response": "old", "timestamp": time.time(), "hit_count": 2,
+                          "model_name": "m"},
+                },
+            }))
+
+            cache = LLMCache(cache_file=Path(tmpdir) / "llm_cache.sqlite3", legacy_json_file=legacy_file)
+
+            assert cache.get("system", "user") == "old"
+            assert not legacy_file.exists()
+            assert (Path(tmpdir) / "llm_cache.json.migrated").exists()
+
+
 class TestGlobalCache:
     """测试全局缓存单例"""
 
@@ -544,5 +544,43 @@ class TestUtilityMethods:
             assert "3. 标准3" in formatted
 
 
+@pytest.mark.asyncio
+class TestTopLevelImport:
+    """测试按应用的方式导入（api/swarm_routes.py 以顶层包 orchestration 导入）"""
+
+    async def test_code_generation_top_level_package(self, monkeypatch):
+        """测试以顶层包导入时 code() 可以运行（节点内不能有越过顶层包的相对导入）"""
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-api-key")
+        from orchestration.nodes.coder import CoderNode as AppCoderNode
+        from orchestration.state import create_initial_state as app_initial_state
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_response = MagicMock()
+            mock_response.content = "```python\nprint('hi')\n```"
+
+            with patch('langchain_anthropic.ChatAnthropic.ainvoke', new_callable=AsyncMock) as mock_ainvoke:
+                mock_ainvoke.return_value = mock_response
+
+                coder = AppCoderNode(Path(tmpdir))
+                state = app_initial_state("写一个 Hello World 程序")
+                state["plan"] = {
+                    "subtasks": [
+                        {
+                            "id": "task-1",
+                            "type": "code",
+                            "description": "编写 Hello World",
+                            "dependencies": [],
+                            "acceptance_criteria": ["打印 Hello, World!"]
+                        }
+                    ],
+                    "overall_acceptance": ["程序能运行"]
+                }
+                state["current_subtask_index"] = 0
+
+                result_state = await coder.code(state)
+
+                assert "print('hi')" in result_state["current_code"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
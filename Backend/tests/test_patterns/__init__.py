@@ -0,0 +1,3 @@
+"""
+MacCortex Pattern Tests
+"""
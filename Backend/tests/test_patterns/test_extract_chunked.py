@@ -0,0 +1,73 @@
+"""
+MacCortex ExtractPattern 长文档模式测试
+
+测试重叠分块、分块并发提取与跨块合并去重、JSON 约束输出解析
+"""
+
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from patterns.extract import ExtractPattern, split_overlapping
+from utils.config import settings
+
+
+class TestSplitOverlapping:
+    """测试重叠分块"""
+
+    def test_short_text_single_chunk(self):
+        assert split_overlapping("hello world", 100, 10) == [(0, "hello world")]
+
+    def test_chunks_cover_text_with_overlap(self):
+        text = " ".join(f"word{i}" for i in range(500))
+        chunks = split_overlapping(text, 200, 40)
+
+        assert len(chunks) > 1
+        for start, chunk in chunks:
+            assert text[start:start + len(chunk)] == chunk
+            assert len(chunk) <= 200
+        for (prev_start, prev), (start, _) in zip(chunks, chunks[1:]):
+            assert start < prev_start + len(prev)  # 相邻块重叠
+        last_start, last = chunks[-1]
+        assert last_start + len(last) == len(text)
+
+
+class TestChunkedExtraction:
+    """测试长文档分块提取"""
+
+    @pytest.mark.asyncio
+    async def test_entities_merged_across_chunks(self, monkeypatch):
+        monkeypatch.setattr(settings, "extract_chunk_chars", 400)
+        monkeypatch.setattr(settings, "extract_chunk_overlap", 50)
+
+        text = ("Alice met Bob. " + "filler " * 60 + "\n") * 3 + "Carol joined Alice."
+
+        async def fake_generate(model, prompt, format=None, options=None):
+            assert format == "json"
+            names = [n for n in ("Alice", "Bob", "Carol") if n in prompt]
+            return {"response": json.dumps({"entities": {"person": names}, "keywords": ["meeting"]})}
+
+        pattern = ExtractPattern()
+        pattern._mode = "ollama"
+        pattern._ollama_client = AsyncMock()
+        pattern._ollama_client.generate.side_effect = fake_generate
+
+        result = await pattern.execute(
+            text,
+            {"entity_types": ["person"], "extract_contacts": False, "extract_dates": False},
+        )
+
+        output = json.loads(result["output"])
+        metadata = result["metadata"]
+        assert metadata["chunks"] > 1
+        assert pattern._ollama_client.generate.call_count == metadata["chunks"]
+        assert output["entities"]["person"] == ["Alice", "Bob", "Carol"]
+        assert output["keywords"] == ["meeting"]
+        assert metadata["entity_offsets"]["person"]["Alice"] == text.index("Alice")
+        assert metadata["entity_offsets"]["person"]["Carol"] == text.index("Carol")
+
+    def test_parse_json_output_falls_back_to_regex(self):
+        pattern = ExtractPattern()
+        assert pattern._parse_json_output('{"keywords": ["a"]}') == {"keywords": ["a"]}
+        assert pattern._parse_json_output('Result: {"keywords": ["b"]}') == {"keywords": ["b"]}
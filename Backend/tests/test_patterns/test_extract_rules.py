@@ -0,0 +1,95 @@
+"""
+MacCortex ExtractPattern 规则快速路径测试
+
+测试结构化实体扫描器，以及仅请求结构化类型时不调用模型
+"""
+
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from patterns.entity_scanner import scan_entities
+from patterns.extract import ExtractPattern
+
+
+SAMPLE = (
+    "联系 Alice (alice@example.com) 或致电 13800138000 / +1 415-555-0100，"
+    "官网 https://example.com/docs. 会议 2026-01-21，截止 2026年3月5日，预算 $1,200.50。"
+)
+
+
+class TestEntityScanner:
+    """测试确定性实体扫描"""
+
+    def test_scan_all_types(self):
+        result = scan_entities(SAMPLE)
+
+        assert result["email"] == ["alice@example.com"]
+        assert result["url"] == ["https://example.com/docs"]
+        assert result["phone"] == ["13800138000", "+1 415-555-0100"]
+        assert result["date"] == ["2026-01-21", "2026年3月5日"]
+        assert result["amount"] == ["$1,200.50"]
+
+    def test_scan_subset_only(self):
+        result = scan_entities(SAMPLE, ["email"])
+        assert result == {"email": ["alice@example.com"]}
+
+    def test_deduplicates_in_order(self):
+        result = scan_entities("a@x.io b@y.io a@x.io", ["email"])
+        assert result["email"] == ["a@x.io", "b@y.io"]
+
+    def test_date_is_not_phone(self):
+        result = scan_entities("Deadline 2026-01-21", ["phone", "date"])
+        assert result["phone"] == []
+        assert result["date"] == ["2026-01-21"]
+
+    def test_version_numbers_ignored(self):
+        result = scan_entities("release v1.2.3 on host 10.0.0.1")
+        assert all(not values for values in result.values())
+
+
+class TestExtractFastPath:
+    """测试 ExtractPattern 混合提取"""
+
+    @pytest.mark.asyncio
+    async def test_structured_only_skips_model(self):
+        pattern = ExtractPattern()
+        pattern._mode = "ollama"
+        pattern._ollama_client = AsyncMock()
+
+        result = await pattern.execute(
+            SAMPLE,
+            {
+                "entity_types": ["email", "url", "amount"],
+                "extract_keywords": False,
+                "extract_contacts": False,
+                "extract_dates": False,
+            },
+        )
+
+        pattern._ollama_client.generate.assert_not_called()
+        output = json.loads(result["output"])
+        assert output["entities"]["email"] == ["alice@example.com"]
+        assert output["entities"]["amount"] == ["$1,200.50"]
+        assert result["metadata"]["mode"] == "rules"
+        assert result["metadata"]["llm_used"] is False
+
+    @pytest.mark.asyncio
+    async def test_fuzzy_types_merged_with_rules(self):
+        pattern = ExtractPattern()
+        pattern._mode = "ollama"
+        pattern._ollama_client = AsyncMock()
+        pattern._ollama_client.generate.return_value = {
+            "response": '{"entities": {"person": ["Alice"]}, "keywords": ["meeting"]}'
+        }
+
+        result = await pattern.execute(SAMPLE, {"entity_types": ["person", "date"]})
+
+        pattern._ollama_client.generate.assert_called_once()
+        output = json.loads(result["output"])
+        assert output["entities"]["person"] == ["Alice"]
+        assert output["entities"]["date"] == ["2026-01-21", "2026年3月5日"]
+        assert output["contacts"]["email"] == ["alice@example.com"]
+        assert output["dates"] == ["2026-01-21", "2026年3月5日"]
+        assert result["metadata"]["llm_used"] is True
@@ -0,0 +1,210 @@
+"""
+MacCortex FormatPattern 确定性转换矩阵测试
+
+测试各格式读取器/写出器的往返转换、格式嗅探，
+以及 FormatPattern 在 from_format 缺省或错误时仍走确定性路径
+"""
+
+import json
+
+import pytest
+import yaml
+
+from patterns.format import FormatPattern
+from patterns.format_converters import READERS, WRITERS, convert, sniff_format
+
+try:
+    import tomllib
+except ImportError:  # Python 3.10
+    import tomli as tomllib
+
+
+ROWS = [
+    {"name": "Alice", "city": "北京", "note": "a|b"},
+    {"name": "Bob", "city": "Paris", "note": "x, y"},
+]
+
+
+class TestConverters:
+    """测试转换矩阵"""
+
+    def test_xml_to_json(self):
+        text = '<users><user id="1"><name>Alice</name></user><user id="2"><name>Bob</name></user></users>'
+
+        data = json.loads(convert(text, "xml", "json"))
+
+        assert data == {
+            "users": {"user": [{"@id": "1", "name": "Alice"}, {"@id": "2", "name": "Bob"}]}
+        }
+
+    def test_json_xml_round_trip(self):
+        data = {"config": {"@version": "2", "name": "demo", "tags": {"tag": ["a", "b"]}}}
+
+        xml_text = convert(json.dumps(data), "json", "xml")
+
+        assert xml_text.startswith("<?xml")
+        assert json.loads(convert(xml_text, "xml", "json")) == data
+
+    def test_json_to_toml_round_trip(self):
+        data = {
+            "title": "demo",
+            "owner": {"name": "Tom", "active": True},
+            "servers": [{"ip": "10.0.0.1", "port": 80}, {"ip": "10.0.0.2", "port": 8080}],
+            "weights": [1.5, 2.0],
+            "key with space": "ok",
+        }
+
+        toml_text = convert(json.dumps(data), "json", "toml")
+
+        assert tomllib.loads(toml_text) == data
+
+    def test_toml_to_yaml(self):
+        text = 'title = "demo"\n\n[db]\nport = 5432\n'
+
+        assert yaml.safe_load(convert(text, "toml", "yaml")) == {"title": "demo", "db": {"port": 5432}}
+
+    def test_yaml_to_csv(self):
+        text = yaml.safe_dump(ROWS, allow_unicode=True, sort_keys=False)
+
+        csv_text = convert(text, "yaml", "csv")
+
+        assert csv_text.splitlines()[0] == "name,city,note"
+        assert convert(csv_text, "csv", "json", prettify=False) == json.dumps(ROWS, ensure_ascii=False)
+
+    def test_markdown_table_csv_round_trip(self):
+        markdown_text = convert(json.dumps(ROWS), "json", "markdown")
+
+        assert "a\\|b" in markdown_text
+        assert json.loads(convert(markdown_text, "markdown", "json")) == ROWS
+
+    def test_html_table_to_json(self):
+        text = (
+            "<p>intro</p><table><thead><tr><th>name</th><th>city</th></tr></thead>"
+            "<tbody><tr><td>Alice</td><td>北京</td></tr><tr><td>Bob &amp; Co</td><td>Paris</td></tr>"
+            "</tbody></table>"
+        )
+
+        assert json.loads(convert(text, "html", "json")) == [
+            {"name": "Alice", "city": "北京"},
+            {"name": "Bob & Co", "city": "Paris"},
+        ]
+
+    def test_html_table_round_trip(self):
+        html_text = convert(json.dumps(ROWS), "json", "html")
+
+        assert json.loads(convert(html_text, "html", "json")) == ROWS
+
+    def test_jsonl(self):
+        jsonl_text = convert(json.dumps(ROWS), "json", "jsonl")
+
+        assert len(jsonl_text.splitlines()) == 2
+        assert json.loads(convert(jsonl_text, "jsonl", "json")) == ROWS
+
+    def test_invalid_input_raises_value_error(self):
+        with pytest.raises(ValueError):
+            convert("<a><b></a>", "xml", "json")
+        with pytest.raises(ValueError):
+            convert("no table here", "markdown", "csv")
+
+    def test_every_pair_is_supported(self):
+        # 所有读取器都能写出到所有目标格式
+        for from_format in READERS:
+            for to_format in WRITERS:
+                assert convert(
+                    convert(json.dumps(ROWS), "json", from_format), from_format, to_format
+                ) is not None
+
+
+class TestSniffFormat:
+    """测试格式嗅探"""
+
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ('{"a": 1}', "json"),
+            ('{"a": 1}\n{"a": 2}\n', "jsonl"),
+            ('<?xml version="1.0"?><a><b>1</b></a>', "xml"),
+            ("<a><b>1</b></a>", "xml"),
+            ("<table><tr><td>1</td></tr></table>", "html"),
+            ("| a | b |\n| --- | --- |\n| 1 | 2 |", "markdown"),
+            ('title = "x"\n\n[db]\nport = 1', "toml"),
+            ("name: demo\nitems:\n  - a\n  - b\n", "yaml"),
+            ("a,b\n1,2\n3,4\n", "csv"),
+            ("# Title\n\nSome prose.", "markdown"),
+        ],
+    )
+    def test_sniff(self, text, expected):
+        assert sniff_format(text) == expected
+
+    def test_empty(self):
+        assert sniff_format("  \n") is None
+
+
+class TestFormatPatternMatrix:
+    """测试 FormatPattern 使用确定性转换矩阵"""
+
+    @pytest.mark.asyncio
+    async def test_xml_to_json_without_llm(self):
+        pattern = FormatPattern()
+
+        result = await pattern.execute("<a><b>1</b></a>", {"from_format": "xml", "to_format": "json"})
+
+        assert json.loads(result["output"]) == {"a": {"b": "1"}}
+        assert result["metadata"]["converter"] == "deterministic"
+        assert result["metadata"]["llm_fallback"] is False
+
+    @pytest.mark.asyncio
+    async def test_auto_detects_format(self):
+        pattern = FormatPattern()
+
+        result = await pattern.execute('title = "x"\nport = 1\n', {"to_format": "json"})
+
+        assert json.loads(result["output"]) == {"title": "x", "port": 1}
+        assert result["metadata"]["from_format"] == "toml"
+        assert result["metadata"]["detected_format"] == "toml"
+
+    @pytest.mark.asyncio
+    async def test_wrong_from_format_uses_sniffed_format(self):
+        pattern = FormatPattern()
+
+        result = await pattern.execute("<a><b>1</b></a>", {"from_format": "json", "to_format": "yaml"})
+
+        assert yaml.safe_load(result["output"]) == {"a": {"b": "1"}}
+        assert result["metadata"]["detected_format"] == "xml"
+
+    @pytest.mark.asyncio
+    async def test_unsupported_pair_without_llm_raises(self):
+        pattern = FormatPattern()
+        pattern._mode = "mock"
+
+        with pytest.raises(ValueError):
+            await pattern.execute("hello", {"from_format": "json", "to_format": "rst"})
+
+    @pytest.mark.asyncio
+    async def test_prose_markdown_falls_back_to_llm(self):
+        pattern = FormatPattern()
+        pattern._mode = "ollama"
+        calls = []
+
+        async def convert_with_llm(text, from_format, to_format):
+            calls.append((from_format, to_format))
+            return '{"title": "Notes"}'
+
+        pattern._convert_with_llm_ollama = convert_with_llm
+
+        result = await pattern.execute(
+            "# Notes\n\nJust prose, no table.", {"from_format": "markdown", "to_format": "json"}
+        )
+
+        assert calls == [("markdown", "json")]
+        assert result["output"] == '{"title": "Notes"}'
+        assert result["metadata"]["converter"] == "llm"
+        assert result["metadata"]["llm_fallback"] is True
+
+    @pytest.mark.asyncio
+    async def test_prose_markdown_without_llm_raises(self):
+        pattern = FormatPattern()
+        pattern._mode = "mock"
+
+        with pytest.raises(ValueError, match="未找到 Markdown 表格"):
+            await pattern.execute("# Notes\n\nJust prose.", {"to_format": "json"})
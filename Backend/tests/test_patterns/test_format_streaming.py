@@ -0,0 +1,137 @@
+"""
+MacCortex FormatPattern 流式转换测试
+
+测试 CSV ↔ JSON 流式转换器（与旧实现输出一致、跨块边界、惰性消费输入）
+以及 execute_stream 的 SSE 输出
+"""
+
+import csv
+import io
+import json
+
+import pytest
+
+from patterns.format import FormatPattern
+from patterns.format_streaming import (
+    iter_csv_to_json,
+    iter_json_array,
+    iter_json_to_csv,
+    iter_text_chunks,
+)
+
+
+def _sample_csv(rows: int = 200) -> str:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=["id", "note", "city"])
+    writer.writeheader()
+    for i in range(rows):
+        writer.writerow({"id": i, "note": f'line "{i}",\nsecond', "city": "北京"})
+    return out.getvalue()
+
+
+class TestCsvToJson:
+    """测试 CSV → JSON"""
+
+    @pytest.mark.parametrize("chunk_chars", [5, 97, 65536])
+    def test_matches_dictreader_output(self, chunk_chars):
+        text = _sample_csv()
+        expected = json.dumps(list(csv.DictReader(io.StringIO(text))), ensure_ascii=False, indent=2)
+
+        assert "".join(iter_csv_to_json(iter_text_chunks(text, chunk_chars))) == expected
+
+    def test_compact_output(self):
+        result = "".join(iter_csv_to_json(["a,b\n1,2\n"], indent=None))
+        assert result == '[{"a":"1","b":"2"}]'
+
+    def test_header_only(self):
+        assert "".join(iter_csv_to_json(["a,b\n"])) == "[]"
+
+
+class TestJsonToCsv:
+    """测试 JSON → CSV"""
+
+    def test_array_elements_parsed_across_chunks(self):
+        text = '[1, 22, 333, {"k": [1, 2]}, "s]"]'
+        for size in (1, 3, 64):
+            assert list(iter_json_array(iter_text_chunks(text, size))) == [1, 22, 333, {"k": [1, 2]}, "s]"]
+
+    def test_incomplete_array_raises(self):
+        with pytest.raises(ValueError):
+            list(iter_json_array(['[{"a": 1}, ']))
+
+    def test_schema_inferred_from_first_rows(self):
+        data = [{"a": 1}, {"a": 2, "b": 3}, {"a": 4, "c": 5}]
+        result = "".join(iter_json_to_csv([json.dumps(data)], sample_rows=2))
+
+        assert result.splitlines() == ["a,b", "1,", "2,3", "4,"]
+
+    def test_single_object(self):
+        assert "".join(iter_json_to_csv(['{"a": 1, "b": 2}'])).splitlines() == ["a,b", "1,2"]
+
+    def test_consumes_input_lazily(self):
+        consumed = []
+
+        def chunks():
+            yield "["
+            for i in range(20000):
+                consumed.append(i)
+                yield json.dumps({"id": i, "payload": "x" * 20}) + ","
+            yield '{"id": -1, "payload": ""}]'
+
+        converter = iter_json_to_csv(chunks())
+        first = next(converter)
+
+        assert first.startswith("id,payload")
+        assert len(consumed) < 20000
+
+
+class TestFormatPatternStreaming:
+    """测试 FormatPattern 流式接口"""
+
+    @pytest.mark.asyncio
+    async def test_execute_csv_to_json_unchanged(self):
+        pattern = FormatPattern()
+        text = _sample_csv(10)
+
+        result = await pattern.execute(text, {"from_format": "csv", "to_format": "json"})
+
+        assert json.loads(result["output"]) == list(csv.DictReader(io.StringIO(text)))
+
+    @pytest.mark.asyncio
+    async def test_execute_stream_emits_sse_chunks(self):
+        pattern = FormatPattern()
+        data = [{"a": i, "b": "x"} for i in range(50)]
+
+        response = await pattern.execute_stream(
+            json.dumps(data), {"from_format": "json", "to_format": "csv"}
+        )
+        body = "".join([part async for part in response.body_iterator])
+
+        events = [block for block in body.split("\n\n") if block]
+        payloads = [json.loads(block.split("data: ", 1)[1]) for block in events]
+        csv_text = "".join(p["text"] for p in payloads if "text" in p)
+
+        assert events[0].startswith("event: start")
+        assert events[-1].startswith("event: done")
+        assert payloads[-1]["metadata"]["streamed"] is True
+        assert csv_text.splitlines()[0] == "a,b"
+        assert len(csv_text.splitlines()) == 51
+
+    @pytest.mark.asyncio
+    async def test_large_input_converted_off_event_loop(self, monkeypatch):
+        from patterns import format as format_module
+        from security.input_validator import InputValidator
+
+        offloaded = []
+
+        async def to_thread(func, *args):
+            offloaded.append(func)
+            return func(*args)
+
+        monkeypatch.setattr(format_module.asyncio, "to_thread", to_thread)
+        text = _sample_csv(1500)
+        assert format_module._THREAD_THRESHOLD_CHARS < len(text) < InputValidator.MAX_TEXT_LENGTH
+
+        await FormatPattern().execute(text, {"from_format": "csv", "to_format": "json"})
+
+        assert offloaded
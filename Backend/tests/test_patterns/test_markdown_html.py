@@ -0,0 +1,143 @@
+"""
+MacCortex FormatPattern Markdown ↔ HTML 转换测试
+
+测试单遍转换器对嵌套强调、列表、代码围栏、表格、引用的处理，
+以及 FormatPattern 在未安装 markdown / html2text 时使用内置转换器
+"""
+
+import sys
+import time
+
+import pytest
+
+from patterns.format import FormatPattern
+from patterns.markdown_html import html_to_markdown, markdown_to_html
+
+
+class TestMarkdownToHtml:
+    """测试 Markdown → HTML"""
+
+    def test_nested_emphasis_and_inline_code(self):
+        html = markdown_to_html("Some **bold _and em_** and `a*b*c <x>`")
+
+        assert html == "<p>Some <strong>bold <em>and em</em></strong> and <code>a*b*c &lt;x&gt;</code></p>"
+
+    def test_unmatched_delimiters_stay_literal(self):
+        assert markdown_to_html("2 * 3 and **open") == "<p>2 * 3 and **open</p>"
+        assert markdown_to_html("snake_case_name") == "<p>snake_case_name</p>"
+
+    def test_links_with_nested_and_unmatched_parens(self):
+        html = markdown_to_html("[wiki](https://en.wikipedia.org/wiki/A_(b)) and [x](y")
+
+        assert html == '<p><a href="https://en.wikipedia.org/wiki/A_(b)">wiki</a> and [x](y</p>'
+
+    def test_many_unclosed_links_stay_linear(self):
+        text = "[a](b " * 20_000
+
+        start = time.perf_counter()
+        html = markdown_to_html(text)
+        elapsed = time.perf_counter() - start
+
+        assert html.startswith("<p>[a](b [a](b")
+        assert elapsed < 2.0
+
+    @pytest.mark.parametrize(
+        "unit_a, unit_b",
+        [("*a ", "] "), ("[ ", "a* "), ("_a ", "a__ "), ("![ ", "~~a "), ("**a ", "](x) ")],
+    )
+    def test_unmatched_delimiter_mixes_stay_linear(self, unit_a, unit_b):
+        timings = []
+        for n in (25_000, 100_000):
+            text = unit_a * n + unit_b * n
+            start = time.perf_counter()
+            markdown_to_html(text)
+            timings.append(time.perf_counter() - start)
+
+        # 输入增大 4 倍，线性实现耗时约 4 倍（平方级约 16 倍）
+        assert timings[1] < 2.0
+        assert timings[1] < max(timings[0], 0.01) * 10
+
+    def test_nested_lists(self):
+        html = markdown_to_html("- a\n- b\n  - c\n    1. d\n- e")
+
+        assert html == (
+            "<ul>\n<li>a</li>\n<li>b\n<ul>\n<li>c\n<ol>\n<li>d</li>\n</ol></li>\n</ul></li>\n"
+            "<li>e</li>\n</ul>"
+        )
+
+    def test_ordered_list_start_and_loose_items(self):
+        assert markdown_to_html("3. x\n4. y") == '<ol start="3">\n<li>x</li>\n<li>y</li>\n</ol>'
+        assert markdown_to_html("- x\n\n- y") == "<ul>\n<li><p>x</p></li>\n<li><p>y</p></li>\n</ul>"
+
+    def test_code_fence_is_not_parsed(self):
+        html = markdown_to_html("```python\n# not a heading\n    **x** < 1\n```")
+
+        assert html == (
+            '<pre><code class="language-python"># not a heading\n    **x** &lt; 1\n</code></pre>'
+        )
+
+    def test_table_with_alignment(self):
+        html = markdown_to_html("| a | b |\n|:--|--:|\n| *1* | 2 \\| 3 |")
+
+        assert '<th style="text-align: left">a</th>' in html
+        assert '<td style="text-align: right">2 | 3</td>' in html
+        assert "<td style=\"text-align: left\"><em>1</em></td>" in html
+
+    def test_nested_blockquote_and_heading(self):
+        html = markdown_to_html("# T\n\n> q\n> > inner")
+
+        assert html == "<h1>T</h1>\n<blockquote>\n<p>q</p>\n<blockquote>\n<p>inner</p>\n</blockquote>\n</blockquote>"
+
+    def test_raw_html_and_unsafe_links_are_neutralised(self):
+        html = markdown_to_html("<script>x</script> [a](javascript:alert(1)) [b](http://x.com/a_(b))")
+
+        assert "<script>" not in html
+        assert '<a href="#">a</a>' in html
+        assert '<a href="http://x.com/a_(b)">b</a>' in html
+
+
+class TestHtmlToMarkdown:
+    """测试 HTML → Markdown"""
+
+    def test_inline_and_headings(self):
+        md = html_to_markdown("<h2>Title</h2><p>Hi <strong>there</strong>, <a href='/x'>link</a><br>next</p>")
+
+        assert md == "## Title\n\nHi **there**, [link](/x)  \nnext"
+
+    def test_nested_lists(self):
+        md = html_to_markdown("<ul><li>a<ul><li>b</li></ul></li><li>c</li></ul><ol start='2'><li>x</li><li>y</li></ol>")
+
+        assert md == "- a\n  - b\n- c\n\n2. x\n3. y"
+
+    def test_pre_code_keeps_whitespace_and_language(self):
+        md = html_to_markdown('<pre><code class="language-py">def f():\n    return 1 &lt; 2\n</code></pre>')
+
+        assert md == "```py\ndef f():\n    return 1 < 2\n```"
+
+    def test_table_and_skipped_content(self):
+        md = html_to_markdown(
+            "<style>p{}</style><table><tr><th>a</th><th>b</th></tr><tr><td>1|2</td><td>3</td></tr></table>"
+        )
+
+        assert md == "| a | b |\n| --- | --- |\n| 1\\|2 | 3 |"
+
+    def test_round_trip(self):
+        source = "# T\n\n- a\n  - b\n\n```\ncode\n```\n\n> quote"
+
+        assert html_to_markdown(markdown_to_html(source)) == source
+
+
+class TestFormatPatternMarkdownHtml:
+    """测试 FormatPattern 使用内置转换器"""
+
+    @pytest.mark.asyncio
+    async def test_builtin_converter_without_optional_libraries(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "markdown", None)
+        monkeypatch.setitem(sys.modules, "html2text", None)
+        pattern = FormatPattern()
+
+        html = await pattern.execute("- **a**\n- b", {"from_format": "markdown", "to_format": "html"})
+        md = await pattern.execute(html["output"], {"from_format": "html", "to_format": "markdown"})
+
+        assert html["output"] == "<ul>\n<li><strong>a</strong></li>\n<li>b</li>\n</ul>"
+        assert md["output"] == "- **a**\n- b"
@@ -0,0 +1,221 @@
+"""
+MacCortex Pattern 流水线测试
+
+测试服务端串联执行：
+- 上一步输出 / 结构化结果（summary）作为下一步输入
+- 步骤结果缓存
+- 失败步骤上报
+- POST /pipeline 的 JSON 与 SSE 两种响应
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from patterns.base import BasePattern
+from patterns.manifest import BUILTIN_PATTERNS, PatternSpec
+from patterns.pipeline import PipelineError, PipelineRunner, PipelineStep, StepCache
+from patterns.registry import PatternRegistry
+
+
+class ShoutPattern(BasePattern):
+    """转大写，并在 data 中给出首行作为 summary"""
+
+    calls = 0
+
+    def __init__(self):
+        self.enable_security = False
+
+    @property
+    def pattern_id(self) -> str:
+        return "shout"
+
+    @property
+    def name(self) -> str:
+        return "Shout"
+
+    @property
+    def description(self) -> str:
+        return "测试用 Pattern"
+
+    async def execute(self, text, parameters):
+        type(self).calls += 1
+        output = text.upper() + parameters.get("suffix", "")
+        return {
+            "output": output,
+            "metadata": {"length": len(output)},
+            "data": {"summary": output.splitlines()[0]},
+        }
+
+
+class BrokenPattern(ShoutPattern):
+    """总是失败"""
+
+    @property
+    def pattern_id(self) -> str:
+        return "broken"
+
+    async def execute(self, text, parameters):
+        raise RuntimeError("boom")
+
+
+def _spec(pattern_id: str, cls: str) -> PatternSpec:
+    return PatternSpec(
+        pattern_id=pattern_id,
+        name=pattern_id,
+        description="测试用 Pattern",
+        target=f"{__name__}:{cls}",
+        parameters={"suffix": str, "session_id": str},
+        stateful_parameters=("session_id",),
+    )
+
+
+@pytest.fixture
+async def registry():
+    ShoutPattern.calls = 0
+    registry = PatternRegistry([_spec("shout", "ShoutPattern"), _spec("broken", "BrokenPattern")])
+    await registry.initialize()
+    yield registry
+    await registry.cleanup()
+
+
+class TestPipelineRunner:
+    """测试流水线执行器"""
+
+    @pytest.mark.asyncio
+    async def test_output_and_summary_chaining(self, registry):
+        runner = PipelineRunner(registry)
+        steps = [
+            PipelineStep("shout", {"suffix": "!\nmore"}),
+            PipelineStep("shout", {"suffix": "?"}, input="summary"),
+        ]
+
+        results = await runner.run("hello", steps)
+
+        assert [r.output for r in results] == ["HELLO!\nmore", "HELLO!?"]
+        assert [r.cached for r in results] == [False, False]
+
+    @pytest.mark.asyncio
+    async def test_rerun_hits_step_cache(self, registry):
+        cache = StepCache()
+        runner = PipelineRunner(registry, cache)
+        steps = [PipelineStep("shout"), PipelineStep("shout", {"suffix": "!"}, cache=False)]
+
+        await runner.run("hello", steps)
+        results = await runner.run("hello", steps)
+
+        assert [r.cached for r in results] == [True, False]
+        assert ShoutPattern.calls == 3
+        assert cache.stats["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stateful_steps_are_not_cached(self, registry):
+        cache = StepCache()
+        runner = PipelineRunner(registry, cache)
+        steps = [PipelineStep("shout", {"session_id": "s1"})]
+
+        await runner.run("hello", steps)
+        results = await runner.run("hello", steps)
+
+        assert [r.cached for r in results] == [False]
+        assert ShoutPattern.calls == 2
+        assert len(cache) == 0
+
+    def test_incremental_summaries_are_stateful(self):
+        summarize = next(spec for spec in BUILTIN_PATTERNS if spec.pattern_id == "summarize")
+
+        assert summarize.is_cacheable({"length": "short"})
+        assert not summarize.is_cacheable({"session_id": "doc-1"})
+        assert not summarize.is_cacheable({"reset": True})
+
+    @pytest.mark.asyncio
+    async def test_failure_reports_step(self, registry):
+        runner = PipelineRunner(registry)
+        seen = []
+
+        with pytest.raises(PipelineError) as excinfo:
+            async for result in runner.stream("hello", [PipelineStep("shout"), PipelineStep("broken")]):
+                seen.append(result.index)
+
+        assert seen == [0]
+        assert excinfo.value.index == 1
+        assert "boom" in str(excinfo.value)
+
+    @pytest.mark.asyncio
+    async def test_missing_structured_field(self, registry):
+        runner = PipelineRunner(registry)
+
+        with pytest.raises(PipelineError, match="results"):
+            await runner.run("hello", [PipelineStep("shout"), PipelineStep("shout", input="results")])
+
+    def test_check_rejects_structured_first_step(self):
+        with pytest.raises(ValueError, match="第一步"):
+            PipelineRunner.check([PipelineStep("shout", input="summary")])
+
+
+class TestPipelineRoutes:
+    """测试 POST /pipeline"""
+
+    @pytest.fixture
+    def client(self, registry):
+        from api import pipeline_routes
+
+        pipeline_routes._step_cache.clear()
+        app = FastAPI()
+        app.state.registry = registry
+        app.include_router(pipeline_routes.router)
+        return TestClient(app)
+
+    def test_json_response(self, client):
+        response = client.post("/pipeline", json={
+            "text": "hello",
+            "steps": [{"pattern_id": "shout", "parameters": {"suffix": "!"}}, {"pattern_id": "shout"}],
+            "include_intermediate": False,
+        })
+
+        body = response.json()
+        assert response.status_code == 200
+        assert body["success"] is True
+        assert body["output"] == "HELLO!"
+        assert "output" not in body["steps"][0]
+        assert body["steps"][1]["output"] == "HELLO!"
+
+    def test_failed_step(self, client):
+        response = client.post("/pipeline", json={
+            "text": "hello",
+            "steps": [{"pattern_id": "shout"}, {"pattern_id": "broken"}],
+        })
+
+        body = response.json()
+        assert body["success"] is False
+        assert body["failed_step"] == 1
+        assert len(body["steps"]) == 1
+
+    def test_invalid_parameters_rejected_before_execution(self, client):
+        response = client.post("/pipeline", json={
+            "text": "hello",
+            "steps": [{"pattern_id": "shout"}, {"pattern_id": "shout", "parameters": {"suffix": 3}}],
+        })
+
+        assert response.status_code == 400
+        assert ShoutPattern.calls == 0
+
+    def test_sse_progress(self, client):
+        response = client.post("/pipeline", json={
+            "text": "hello",
+            "steps": [{"pattern_id": "shout"}, {"pattern_id": "shout", "input": "summary"}],
+            "stream": True,
+        })
+
+        events = [
+            (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+            for block in response.text.strip().split("\n\n")
+        ]
+        assert [name for name, _ in events] == ["start", "step", "step", "done"]
+        assert events[2][1]["total"] == 2
+        assert events[-1][1]["output"] == "HELLO"
+
+        stats = client.get("/pipeline/cache").json()
+        assert stats["size"] == 2
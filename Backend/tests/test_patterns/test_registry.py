@@ -0,0 +1,185 @@
+"""
+MacCortex Pattern 注册表测试
+
+测试清单发现与按需加载：
+- 元数据无需导入实现
+- 首次执行时才导入 / 初始化（并发调用只加载一次）
+- entry point 插件 Pattern 与参数白名单登记
+"""
+
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from patterns.base import BasePattern
+from patterns.manifest import BUILTIN_PATTERNS, PatternSpec, discover_patterns
+from patterns.registry import PatternRegistry
+from security.input_validator import InputValidator, get_input_validator
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+
+class CountingPattern(BasePattern):
+    """记录初始化次数的测试 Pattern"""
+
+    initialized = 0
+
+    def __init__(self):
+        self.enable_security = False
+
+    @property
+    def pattern_id(self) -> str:
+        return "counting"
+
+    @property
+    def name(self) -> str:
+        return "Counting"
+
+    @property
+    def description(self) -> str:
+        return "测试用 Pattern"
+
+    async def initialize(self):
+        await asyncio.sleep(0.02)
+        type(self).initialized += 1
+
+    async def execute(self, text, parameters):
+        return {"output": text.upper(), "metadata": {"initialized": type(self).initialized}}
+
+
+def _spec(pattern_id: str = "counting", target: str = f"{__name__}:CountingPattern") -> PatternSpec:
+    return PatternSpec(
+        pattern_id=pattern_id,
+        name="Counting",
+        description="测试用 Pattern",
+        target=target,
+        parameters={"mode": ["upper", "lower"], "label": str},
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_counter():
+    CountingPattern.initialized = 0
+
+
+class TestManifest:
+    """测试清单"""
+
+    def test_builtin_metadata_matches_implementations(self):
+        for spec in BUILTIN_PATTERNS:
+            pattern = spec.load()()
+            assert (pattern.pattern_id, pattern.name, pattern.description) == (
+                spec.pattern_id, spec.name, spec.description
+            )
+            assert spec.parameters == InputValidator.ALLOWED_PARAMETERS[spec.pattern_id]
+
+    def test_parameter_schema_is_json_friendly(self):
+        schema = _spec().parameter_schema()
+
+        assert schema == {"mode": {"enum": ["upper", "lower"]}, "label": {"type": "string"}}
+
+    def test_listing_does_not_import_implementations(self):
+        script = (
+            "import asyncio, sys\n"
+            "from patterns.registry import PatternRegistry\n"
+            "registry = PatternRegistry()\n"
+            "asyncio.run(registry.initialize())\n"
+            "ids = [p['id'] for p in registry.list_patterns()]\n"
+            "assert ids[:6] == ['summarize', 'extract', 'translate', 'format', 'search', 'embed'], ids\n"
+            "loaded = [m for m in ('patterns.search', 'patterns.translate', 'patterns.summarize', 'patterns.embed')"
+            " if m in sys.modules]\n"
+            "assert not loaded, loaded\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], cwd=SRC, capture_output=True, text=True, timeout=60
+        )
+
+        assert result.returncode == 0, result.stderr[-2000:]
+
+    def test_entry_point_plugins(self, monkeypatch):
+        class FakeEntryPoint:
+            def __init__(self, name, value):
+                self.name, self.value = name, value
+
+            def load(self):
+                if isinstance(self.value, Exception):
+                    raise self.value
+                return self.value
+
+        plugins = [
+            FakeEntryPoint("counting", _spec()),
+            FakeEntryPoint("clash", _spec("search")),
+            FakeEntryPoint("broken", ImportError("missing")),
+        ]
+        monkeypatch.setattr("patterns.manifest.entry_points", lambda group: plugins)
+
+        ids = [spec.pattern_id for spec in discover_patterns()]
+
+        assert ids == [spec.pattern_id for spec in BUILTIN_PATTERNS] + ["counting"]
+
+
+class TestLazyLoading:
+    """测试按需加载"""
+
+    @pytest.mark.asyncio
+    async def test_first_execute_loads_once(self):
+        registry = PatternRegistry([_spec()])
+        await registry.initialize()
+
+        assert registry.get_pattern("counting") is None
+        assert registry.list_patterns()[0]["loaded"] is False
+
+        results = await asyncio.gather(*(registry.execute("counting", "hi", {}) for _ in range(5)))
+
+        assert CountingPattern.initialized == 1
+        assert all(result["output"] == "HI" for result in results)
+        assert registry.list_patterns()[0]["loaded"] is True
+
+    @pytest.mark.asyncio
+    async def test_unknown_pattern(self):
+        registry = PatternRegistry([_spec()])
+        await registry.initialize()
+
+        with pytest.raises(ValueError, match="Available: counting"):
+            await registry.execute("missing", "hi", {})
+
+    @pytest.mark.asyncio
+    async def test_load_failure_is_reported_and_retried(self):
+        registry = PatternRegistry([_spec(target=f"{__name__}:DoesNotExist")])
+        await registry.initialize()
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="failed to load"):
+                await registry.load("counting")
+
+    @pytest.mark.asyncio
+    async def test_mismatched_pattern_id_is_rejected(self):
+        registry = PatternRegistry([_spec("other")])
+        await registry.initialize()
+
+        with pytest.raises(RuntimeError, match="counting"):
+            await registry.load("other")
+
+    @pytest.mark.asyncio
+    async def test_plugin_parameters_are_whitelisted(self):
+        registry = PatternRegistry([_spec()])
+        await registry.initialize()
+        validator = get_input_validator()
+
+        assert validator.validate_parameters("counting", {"mode": "upper", "label": "x"})[0]
+        assert not validator.validate_parameters("counting", {"mode": "title"})[0]
+        assert "counting" not in InputValidator.ALLOWED_PATTERN_IDS
+
+    @pytest.mark.asyncio
+    async def test_preload_and_cleanup(self, monkeypatch):
+        monkeypatch.setattr("patterns.registry.settings.pattern_preload", ["counting"])
+        registry = PatternRegistry([_spec()])
+
+        await registry.initialize()
+        assert registry.get_pattern("counting") is not None
+
+        await registry.cleanup()
+        assert registry.list_patterns() == []
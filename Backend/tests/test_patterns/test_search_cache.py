@@ -0,0 +1,133 @@
+"""
+MacCortex SearchPattern 搜索缓存测试
+
+测试 SearchResultCache 的条数 / 字节上限与 stale 判定，
+以及 SearchPattern 的 stale-while-revalidate 行为和缓存统计
+"""
+
+import json
+
+import pytest
+
+from patterns.search import SearchPattern
+from utils.cache import SearchResultCache
+from websearch import SearchEngine, SearchRateLimiter, SearchResult, WebSearchService
+
+
+def _results(tag: str, n: int = 2):
+    return [{"title": f"{tag}-{i}", "url": f"https://example.com/{tag}/{i}"} for i in range(n)]
+
+
+class TestSearchResultCache:
+    """测试 SearchResultCache"""
+
+    def test_evicts_least_recently_used_by_entries(self):
+        cache = SearchResultCache(max_entries=2)
+        cache.put("a", _results("a"))
+        cache.put("b", _results("b"))
+        cache.lookup("a")
+        cache.put("c", _results("c"))
+
+        assert cache.lookup("b") == (None, "miss")
+        assert cache.lookup("a")[1] == "hit"
+        assert cache.stats["evictions"] == 1
+
+    def test_evicts_by_bytes(self):
+        size = len(json.dumps(_results("a")).encode("utf-8"))
+        cache = SearchResultCache(max_entries=100, max_bytes=size * 2)
+        for key in ("a", "b", "c"):
+            cache.put(key, _results(key))
+
+        assert len(cache) == 2
+        assert cache.stats["bytes"] <= size * 2
+
+    def test_oversized_entry_is_not_cached(self):
+        cache = SearchResultCache(max_bytes=10)
+        cache.put("a", _results("a"))
+
+        assert len(cache) == 0
+
+    def test_stale_then_expired(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("utils.cache.time.time", lambda: now[0])
+        cache = SearchResultCache(ttl_seconds=10, stale_ttl_seconds=20)
+        cache.put("a", _results("a"))
+
+        now[0] += 15
+        assert cache.lookup("a")[1] == "stale"
+        now[0] += 20
+        assert cache.lookup("a") == (None, "miss")
+        assert cache.stats["stale_hits"] == 1
+
+
+class ScriptedEngine(SearchEngine):
+    """以 duckduckgo 名义注册、由测试提供结果的引擎"""
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+
+    @property
+    def name(self):
+        return "duckduckgo"
+
+    async def search(self, query, num_results, language):
+        return [SearchResult.from_dict({**item, "source": "duckduckgo", "rank": i + 1})
+                for i, item in enumerate(await self.fetch(query, num_results, language))]
+
+
+def _pattern(fetch) -> SearchPattern:
+    service = WebSearchService([ScriptedEngine(fetch)], limiter=SearchRateLimiter(4, 0))
+    return SearchPattern(search_service=service)
+
+
+class TestSearchPatternCache:
+    """测试 SearchPattern stale-while-revalidate（经共享 Web 搜索服务）"""
+
+    @pytest.mark.asyncio
+    async def test_stale_result_served_and_refreshed_in_background(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("utils.cache.time.time", lambda: now[0])
+        calls = []
+
+        async def fake_fetch(query, num_results, language):
+            calls.append(query)
+            return _results(f"v{len(calls)}")
+
+        pattern = _pattern(fake_fetch)
+        pattern._mode = "mock"
+        params = {"search_type": "web", "summarize": False, "num_results": 2}
+
+        first = await pattern.execute("q", params)
+        now[0] += 400  # 超过新鲜期，仍在 stale 期内
+        second = await pattern.execute("q", params)
+        await pattern._web_service.drain()
+        third = await pattern.execute("q", params)
+
+        assert first["metadata"]["cache"]["status"] == "miss"
+        assert second["metadata"]["cache"]["status"] == "stale"
+        assert json.loads(second["output"])["results"][0]["title"] == "v1-0"
+        assert third["metadata"]["cache"]["status"] == "hit"
+        assert json.loads(third["output"])["results"][0]["title"] == "v2-0"
+        assert third["metadata"]["cache"]["refreshes"] == 1
+        assert calls == ["q", "q"]
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_stale_entry(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("utils.cache.time.time", lambda: now[0])
+
+        async def failing_fetch(query, num_results, language):
+            raise RuntimeError("rate limited")
+
+        pattern = _pattern(failing_fetch)
+        service = pattern._web_service
+        key = service.cache_key("duckduckgo", "q", 2, "zh-CN")
+        service.cache.put(key, [{**item, "source": "duckduckgo", "rank": 1} for item in _results("old")])
+        now[0] += 400
+
+        results = await pattern._web_search("q", "duckduckgo", 2, "zh-CN")
+        await service.drain()
+
+        assert results[0]["title"] == "old-0"
+        assert service.cache.stats["refresh_failures"] == 1
+        assert service.cache.lookup(key)[1] == "stale"
@@ -0,0 +1,106 @@
+"""
+MacCortex SearchPattern 混合搜索测试
+
+测试 RRF 融合与去重，以及两路并发、独立超时
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from patterns.search import SearchPattern, reciprocal_rank_fusion
+
+
+def _web(n: int):
+    return [
+        {"title": f"web {i}", "url": f"https://example.com/{i}", "snippet": f"s{i}", "source": "duckduckgo", "rank": i + 1}
+        for i in range(n)
+    ]
+
+
+def _local(n: int):
+    return [
+        {"title": f"doc {i}", "content": f"local content {i}", "source": "chromadb", "rank": i + 1}
+        for i in range(n)
+    ]
+
+
+class TestReciprocalRankFusion:
+    """测试 RRF 融合"""
+
+    def test_interleaves_and_ranks(self):
+        fused = reciprocal_rank_fusion([_web(3), _local(3)], k=60)
+
+        assert [r["title"] for r in fused[:2]] in (["web 0", "doc 0"], ["doc 0", "web 0"])
+        assert [r["rank"] for r in fused] == list(range(1, 7))
+        assert fused[0]["fusion_score"] == pytest.approx(1 / 61, abs=1e-6)
+
+    def test_dedups_by_normalized_url(self):
+        duplicate = {"title": "same", "url": "http://www.Example.com/1/?utm_source=x#top", "source": "chromadb"}
+
+        fused = reciprocal_rank_fusion([_web(3), [duplicate]], k=60)
+
+        assert len(fused) == 3
+        assert fused[0]["url"] == "https://example.com/1"
+        assert fused[0]["sources"] == ["duckduckgo", "chromadb"]
+        assert fused[0]["fusion_score"] == pytest.approx(1 / 62 + 1 / 61, abs=1e-6)
+
+    def test_dedups_by_content(self):
+        a = {"content": "Same  Text", "source": "chromadb"}
+        b = {"content": "same text", "source": "mock_vector_db"}
+
+        assert len(reciprocal_rank_fusion([[a], [b]])) == 1
+
+
+class TestHybridSearch:
+    """测试混合搜索并发与超时"""
+
+    @pytest.mark.asyncio
+    async def test_legs_run_concurrently(self, monkeypatch):
+        pattern = SearchPattern()
+
+        async def slow_web(*args, **kwargs):
+            await asyncio.sleep(0.2)
+            return _web(3)
+
+        async def slow_semantic(*args, **kwargs):
+            await asyncio.sleep(0.2)
+            return _local(3)
+
+        monkeypatch.setattr(pattern, "_web_search", slow_web)
+        monkeypatch.setattr(pattern, "_semantic_search", slow_semantic)
+
+        start = time.perf_counter()
+        result = await pattern.execute("q", {"search_type": "hybrid", "num_results": 4, "summarize": False})
+        elapsed = time.perf_counter() - start
+
+        results = json.loads(result["output"])["results"]
+        assert elapsed < 0.35
+        assert len(results) == 4
+        assert {r["source"] for r in results} == {"duckduckgo", "chromadb"}
+        assert result["metadata"]["fusion"] == "rrf"
+        assert result["metadata"]["legs"]["web"]["status"] == "ok"
+
+    @pytest.mark.asyncio
+    async def test_slow_leg_times_out_independently(self, monkeypatch):
+        pattern = SearchPattern()
+        monkeypatch.setattr("patterns.search.settings.search_semantic_timeout", 0.05)
+
+        async def fast_web(*args, **kwargs):
+            return _web(2)
+
+        async def hanging_semantic(*args, **kwargs):
+            await asyncio.sleep(5)
+            return _local(2)
+
+        monkeypatch.setattr(pattern, "_web_search", fast_web)
+        monkeypatch.setattr(pattern, "_semantic_search", hanging_semantic)
+
+        result = await pattern.execute("q", {"search_type": "hybrid", "num_results": 4, "summarize": False})
+
+        legs = result["metadata"]["legs"]
+        assert legs["semantic"]["status"] == "timeout"
+        assert legs["web"]["count"] == 2
+        assert len(json.loads(result["output"])["results"]) == 2
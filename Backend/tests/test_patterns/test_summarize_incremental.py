@@ -0,0 +1,146 @@
+"""
+MacCortex 增量总结测试
+
+测试 SummarizePattern 的增量总结会话：
+- 文本切块（段落/句子边界）
+- 小增量缓冲、大增量折叠进滚动总结
+- 会话持久化与重置
+"""
+
+import pytest
+
+from patterns.summarize import SummarizePattern
+from patterns.summary_session import SummarySessionStore, split_into_chunks
+from utils.config import settings
+
+
+@pytest.fixture
+def pattern(tmp_path):
+    """Mock 模式的 SummarizePattern（会话存储在临时目录）"""
+    p = SummarizePattern()
+    p._sessions = SummarySessionStore(tmp_path)
+    return p
+
+
+def _paragraphs(n: int, size: int = 300) -> str:
+    return "\n\n".join(f"Paragraph {i}. " + "word " * (size // 5) for i in range(n))
+
+
+class TestSplitIntoChunks:
+    """测试文本切块"""
+
+    def test_short_text_single_chunk(self):
+        assert split_into_chunks("hello world", 100) == ["hello world"]
+
+    def test_splits_on_paragraph_boundary(self):
+        text = _paragraphs(6)
+        chunks = split_into_chunks(text, 1000)
+
+        assert len(chunks) > 1
+        assert all(len(c) <= 1000 for c in chunks)
+        assert all(c.startswith("Paragraph") for c in chunks)
+
+    def test_hard_cut_without_boundaries(self):
+        chunks = split_into_chunks("x" * 250, 100)
+        assert [len(c) for c in chunks] == [100, 100, 50]
+
+
+class TestIncrementalSummarize:
+    """测试增量总结会话"""
+
+    @pytest.mark.asyncio
+    async def test_first_update_produces_summary(self, pattern):
+        result = await pattern.execute("short first message", {"session_id": "s1"})
+
+        session_meta = result["metadata"]["session"]
+        assert result["output"]
+        assert session_meta["new_chunks"] == 1
+        assert session_meta["pending_chars"] == 0
+
+    @pytest.mark.asyncio
+    async def test_small_delta_is_buffered(self, pattern):
+        await pattern.execute("first message", {"session_id": "s1"})
+        result = await pattern.execute("tiny append", {"session_id": "s1"})
+
+        session_meta = result["metadata"]["session"]
+        assert session_meta["new_chunks"] == 0
+        assert session_meta["pending_chars"] == len("tiny append")
+        assert session_meta["chunks_processed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_large_delta_only_processes_delta(self, pattern):
+        await pattern.execute("first message", {"session_id": "s1"})
+
+        delta = _paragraphs(4, size=settings.summary_min_delta_chars)
+        result = await pattern.execute(delta, {"session_id": "s1"})
+
+        session_meta = result["metadata"]["session"]
+        expected = len(split_into_chunks(delta, settings.summary_chunk_chars))
+        assert session_meta["new_chunks"] == expected
+        assert session_meta["chunks_processed"] == 1 + expected
+        assert session_meta["pending_chars"] == 0
+        assert result["metadata"]["original_length"] == len(delta)
+
+    @pytest.mark.asyncio
+    async def test_session_persisted_to_disk(self, pattern, tmp_path):
+        await pattern.execute("first message", {"session_id": "s1"})
+
+        reloaded = SummarySessionStore(tmp_path).get("s1")
+        assert reloaded.running_summary
+        assert reloaded.chunks_processed == 1
+        assert reloaded.total_chars == len("first message")
+
+    @pytest.mark.asyncio
+    async def test_reset_starts_new_session(self, pattern):
+        await pattern.execute("first message", {"session_id": "s1"})
+        await pattern.execute("tiny append", {"session_id": "s1"})
+
+        result = await pattern.execute("restart", {"session_id": "s1", "reset": True})
+
+        session_meta = result["metadata"]["session"]
+        assert session_meta["total_chars"] == len("restart")
+        assert session_meta["chunks_processed"] == 1
+
+    def test_validate_accepts_short_delta_with_session(self, pattern):
+        assert pattern.validate("hi", {"session_id": "s1"}) is True
+        assert pattern.validate("hi", {}) is False
+
+    def test_chunk_summaries_are_compacted(self, tmp_path):
+        store = SummarySessionStore(tmp_path, max_chunk_summaries=3)
+        session = store.get("s1")
+        session.chunk_summaries = [f"s{i}" for i in range(10)]
+        store.save(session)
+
+        assert SummarySessionStore(tmp_path).get("s1").chunk_summaries == ["s7", "s8", "s9"]
+
+    @pytest.mark.asyncio
+    async def test_failed_update_leaves_session_unchanged(self, pattern, monkeypatch):
+        await pattern.execute("first message", {"session_id": "s1"})
+        before = pattern._sessions.get("s1")
+        snapshot = (before.running_summary, before.pending_text, before.total_chars, list(before.chunk_summaries))
+
+        async def failing(*args, **kwargs):
+            raise RuntimeError("model unavailable")
+
+        monkeypatch.setattr(pattern, "_summarize", failing)
+        delta = _paragraphs(4, size=settings.summary_min_delta_chars)
+        for params in ({"session_id": "s1"}, {"session_id": "s1", "reset": True}):
+            with pytest.raises(RuntimeError):
+                await pattern.execute(delta, params)
+
+        for session in (pattern._sessions.get("s1"), SummarySessionStore(pattern._sessions.directory).get("s1")):
+            assert (
+                session.running_summary, session.pending_text, session.total_chars, session.chunk_summaries
+            ) == snapshot
+
+    def test_sessions_and_locks_are_bounded(self, tmp_path):
+        store = SummarySessionStore(tmp_path, max_sessions=2)
+        for i in range(5):
+            store.lock(f"s{i}")
+            session = store.get(f"s{i}")
+            session.running_summary = f"summary {i}"
+            store.save(session)
+
+        assert list(store._sessions) == ["s3", "s4"]
+        assert len(store._locks) <= 3
+        assert store.get("s0").running_summary == "summary 0"  # 淘汰后从磁盘加载
@@ -0,0 +1,3 @@
+"""
+MacCortex Retrieval Tests
+"""
@@ -0,0 +1,170 @@
+"""
+MacCortex 批量嵌入服务测试
+
+测试 float32 紧凑编码、并发请求合并、内容哈希缓存，
+以及 EmbedPattern 与 /embed API
+"""
+
+import asyncio
+import base64
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from patterns.embed import EmbedPattern
+from retrieval import CachedEmbedder, EmbeddingCache, EmbeddingService, HashingEmbedding, decode_vectors, encode_vectors
+from retrieval.embeddings import EmbeddingFunction
+
+
+class CountingEmbedding(EmbeddingFunction):
+    """记录调用批次的嵌入函数"""
+
+    def __init__(self, fail=False):
+        self.inner = HashingEmbedding(32)
+        self.calls = []
+        self.fail = fail
+
+    @property
+    def name(self):
+        return "counting-32"
+
+    @property
+    def dimension(self):
+        return 32
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model down")
+        return self.inner.embed(texts)
+
+
+def _service(tmp_path, function, **kwargs):
+    embedder = CachedEmbedder(function, EmbeddingCache(str(tmp_path)), batch_size=1000)
+    return EmbeddingService(embedder, **kwargs)
+
+
+class TestEncoding:
+    """测试紧凑编码"""
+
+    @pytest.mark.parametrize("encoding", ["base64", "npy", "float"])
+    def test_round_trip(self, encoding):
+        matrix = HashingEmbedding(16).embed(["a", "b", "c"])
+
+        decoded = decode_vectors(encode_vectors(matrix, encoding), encoding, dimension=16)
+
+        assert decoded.shape == (3, 16)
+        assert np.array_equal(decoded, matrix)
+
+    def test_base64_is_raw_little_endian_float32(self):
+        matrix = np.array([[1.0, -2.0]], dtype=np.float32)
+
+        assert base64.b64decode(encode_vectors(matrix)) == b"\x00\x00\x80?\x00\x00\x00\xc0"
+
+    def test_unknown_encoding(self):
+        with pytest.raises(ValueError):
+            encode_vectors(np.zeros((1, 2), dtype=np.float32), "hex")
+
+
+class TestEmbeddingService:
+    """测试请求合并与缓存"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self, tmp_path):
+        function = CountingEmbedding()
+        service = _service(tmp_path, function, max_batch_size=100, max_wait_ms=20)
+
+        results = await asyncio.gather(*(service.embed([f"text {i}", "shared"]) for i in range(10)))
+
+        assert len(function.calls) == 1
+        assert len(function.calls[0]) == 11  # 重复的 "shared" 只嵌入一次
+        assert service.stats["batches"] == 1
+        for i, matrix in enumerate(results):
+            assert matrix.shape == (2, 32)
+            assert np.allclose(matrix[0], HashingEmbedding(32).embed_one(f"text {i}"))
+
+    @pytest.mark.asyncio
+    async def test_batches_respect_max_batch_size(self, tmp_path):
+        function = CountingEmbedding()
+        service = _service(tmp_path, function, max_batch_size=4, max_wait_ms=20)
+
+        await asyncio.gather(*(service.embed([f"a{i}", f"b{i}"]) for i in range(5)))
+
+        assert [len(call) for call in function.calls] == [4, 4, 2]
+
+    @pytest.mark.asyncio
+    async def test_repeats_are_served_from_cache(self, tmp_path):
+        function = CountingEmbedding()
+        service = _service(tmp_path, function, max_wait_ms=0)
+
+        await service.embed(["x", "y"])
+        await service.embed(["y", "x"])
+
+        assert function.calls == [["x", "y"]]
+        assert service.stats["cache"]["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failure_propagates_to_every_waiter(self, tmp_path):
+        service = _service(tmp_path, CountingEmbedding(fail=True), max_wait_ms=10)
+
+        results = await asyncio.gather(service.embed(["a"]), service.embed(["b"]), return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+
+class TestEmbedPattern:
+    """测试 EmbedPattern"""
+
+    @pytest.mark.asyncio
+    async def test_split_lines_and_metadata(self, tmp_path):
+        pattern = EmbedPattern(_service(tmp_path, CountingEmbedding(), max_wait_ms=0))
+        await pattern.initialize()
+
+        result = await pattern.execute("first line\n\nsecond line\n", {"split_lines": True, "encoding": "npy"})
+
+        matrix = decode_vectors(result["output"], "npy")
+        assert matrix.shape == (2, 32)
+        assert result["metadata"]["count"] == 2
+        assert result["metadata"]["model"] == "counting-32"
+        assert result["metadata"]["mode"] == "hashing"
+
+    def test_rejects_unknown_encoding(self, tmp_path):
+        pattern = EmbedPattern(_service(tmp_path, CountingEmbedding()))
+
+        assert not pattern.validate("text", {"encoding": "hex"})
+
+
+class TestEmbedRoutes:
+    """测试 /embed API"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        import api.embed_routes as routes
+
+        service = _service(tmp_path, CountingEmbedding(), max_wait_ms=0)
+        monkeypatch.setattr(routes, "get_embedding_service", lambda: service)
+        app = FastAPI()
+        app.include_router(routes.router)
+        return TestClient(app)
+
+    def test_json_base64(self, client):
+        body = client.post("/embed", json={"texts": ["hello", "world"]}).json()
+
+        assert (body["model"], body["count"], body["dimension"], body["encoding"]) == ("counting-32", 2, 32, "base64")
+        assert decode_vectors(body["data"], "base64", 32).shape == (2, 32)
+
+    def test_octet_stream(self, client):
+        response = client.post(
+            "/embed", json={"texts": ["hello"]}, headers={"Accept": "application/octet-stream"}
+        )
+
+        assert response.headers["x-embedding-dimension"] == "32"
+        assert np.frombuffer(response.content, dtype="<f4").shape == (32,)
+
+    def test_stats_and_validation(self, client):
+        client.post("/embed", json={"texts": ["a"]})
+
+        assert client.get("/embed/stats").json()["requests"] == 1
+        assert client.post("/embed", json={"texts": []}).status_code == 422
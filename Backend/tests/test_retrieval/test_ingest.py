@@ -0,0 +1,237 @@
+"""
+MacCortex 增量文档导入测试
+
+测试按 token 分块、流式遍历、基于 mtime / size / sha256 的增量导入，
+以及 /ingest API（JSON 报告与 SSE 进度）
+"""
+
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from retrieval import HashingEmbedding, Ingestor, VectorStore, chunk_text, estimate_tokens, iter_files
+from retrieval.embeddings import EmbeddingFunction
+
+
+class CountingEmbedding(EmbeddingFunction):
+    """记录嵌入文本数的嵌入函数"""
+
+    def __init__(self):
+        self.inner = HashingEmbedding(64)
+        self.embedded = 0
+
+    @property
+    def name(self):
+        return "counting-64"
+
+    @property
+    def dimension(self):
+        return 64
+
+    def embed(self, texts):
+        self.embedded += len(texts)
+        return self.inner.embed(texts)
+
+
+def _store(tmp_path, function=None):
+    return VectorStore(
+        str(tmp_path / "index"),
+        embedding_function=function or HashingEmbedding(64),
+        backend="numpy",
+        cache_directory=str(tmp_path / "cache"),
+    )
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    _write(root / "a.md", "# Alpha\n\nThe alpha document talks about asyncio event loops.")
+    _write(root / "sub" / "b.txt", "Beta notes about the weather and sunny days.")
+    _write(root / "sub" / "c.html", "<h1>Gamma</h1><p>苹果发布新款 MacBook 笔记本电脑</p>")
+    _write(root / ".hidden" / "d.md", "hidden")
+    _write(root / "image.png", "not text")
+    return root
+
+
+class TestChunking:
+    """测试按 token 分块"""
+
+    def test_estimate_tokens(self):
+        assert estimate_tokens("hello world") == 4
+        assert estimate_tokens("中文，") == 3
+
+    def test_packs_paragraphs_within_budget(self):
+        text = "\n\n".join(f"Paragraph {i} has a handful of words." for i in range(20))
+
+        chunks = chunk_text(text, max_tokens=40, overlap_tokens=0)
+
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= 40 for chunk in chunks)
+        assert "\n\n".join(chunks) == text
+
+    def test_long_paragraph_splits_at_sentences_with_overlap(self):
+        text = " ".join(f"Sentence number {i} ends here." for i in range(30))
+
+        chunks = chunk_text(text, max_tokens=30, overlap_tokens=8)
+
+        assert all(estimate_tokens(chunk) <= 30 for chunk in chunks)
+        assert all(chunk.endswith(".") for chunk in chunks)
+        assert chunks[1].startswith(chunks[0].split(". ")[-1].rstrip("."))
+
+    def test_oversized_sentence_is_hard_split(self):
+        chunks = chunk_text("x " * 100, max_tokens=25, overlap_tokens=0)
+
+        assert [estimate_tokens(chunk) for chunk in chunks] == [25, 25, 25, 25]
+
+
+class TestIterFiles:
+    """测试流式遍历"""
+
+    def test_skips_hidden_and_unlisted_extensions(self, docs):
+        paths = [os.path.relpath(path, docs) for path, _ in iter_files(str(docs))]
+
+        assert sorted(paths) == ["a.md", os.path.join("sub", "b.txt"), os.path.join("sub", "c.html")]
+
+
+class TestIngestor:
+    """测试增量导入"""
+
+    def test_initial_ingest_is_searchable(self, tmp_path, docs):
+        store = _store(tmp_path)
+        report = Ingestor(store, "notes").ingest(str(docs))
+
+        assert (report.scanned, report.added, report.chunks_upserted) == (3, 3, 3)
+        hit = store.query("notes", "MacBook 电脑", n_results=1)[0]
+        assert hit["metadata"]["title"] == "c.html"
+        assert "<h1>" not in hit["document"]
+
+    def test_reingest_only_processes_changes(self, tmp_path, docs):
+        function = CountingEmbedding()
+        store = _store(tmp_path, function)
+        Ingestor(store, "notes").ingest(str(docs))
+        embedded = function.embedded
+
+        _write(docs / "a.md", "# Alpha\n\nRewritten: Python packaging tutorial.")
+        _write(docs / "new.md", "A brand new note")
+        os.remove(docs / "sub" / "b.txt")
+        # mtime 变化但内容不变：只更新清单
+        os.utime(docs / "sub" / "c.html", ns=(1, 1))
+
+        reopened = _store(tmp_path, function)
+        report = Ingestor(reopened, "notes").ingest(str(docs))
+
+        assert (report.added, report.updated, report.removed, report.unchanged) == (1, 1, 1, 1)
+        assert function.embedded - embedded == 2
+        assert reopened.count("notes") == 3
+        assert reopened.query("notes", "packaging tutorial", n_results=1)[0]["metadata"]["title"] == "a.md"
+
+        # 再次导入：全部命中清单，不读取文件
+        again = Ingestor(reopened, "notes").ingest(str(docs))
+        assert (again.unchanged, again.added, again.updated, again.chunks_upserted) == (3, 0, 0, 0)
+
+    def test_shrinking_file_deletes_stale_chunks(self, tmp_path, docs):
+        store = _store(tmp_path)
+        ingestor = Ingestor(store, "notes", chunk_tokens=20, overlap_tokens=0)
+        _write(docs / "long.md", "\n\n".join(f"Paragraph {i} has quite a few words in it." for i in range(10)))
+        first = ingestor.ingest(str(docs))
+
+        _write(docs / "long.md", "Short now.")
+        second = ingestor.ingest(str(docs))
+
+        assert second.chunks_deleted == first.chunks_upserted - 3 - 1
+        assert store.count("notes") == 4
+
+    def test_progress_callback(self, tmp_path, docs):
+        snapshots = []
+
+        Ingestor(_store(tmp_path), "notes").ingest(
+            str(docs), progress=lambda r: snapshots.append((r.scanned, r.done)), progress_every=1
+        )
+
+        assert snapshots == [(1, False), (2, False), (3, False), (3, True)]
+
+    def test_missing_directory(self, tmp_path):
+        with pytest.raises(ValueError):
+            Ingestor(_store(tmp_path), "notes").ingest(str(tmp_path / "missing"))
+
+
+class TestIngestRoutes:
+    """测试 /ingest API"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        import api.ingest_routes as routes
+
+        store = _store(tmp_path)
+        monkeypatch.setattr(routes, "get_vector_store", lambda: store)
+        app = FastAPI()
+        app.include_router(routes.router)
+        return TestClient(app)
+
+    def test_ingest_json_report_and_status(self, client, docs):
+        response = client.post("/ingest", json={"directory": str(docs), "collection": "notes"})
+
+        assert response.status_code == 200
+        assert response.json()["added"] == 3
+        status = client.get("/ingest/notes").json()
+        assert (status["files"], status["chunks"], status["backend"]) == (3, 3, "numpy")
+
+    def test_ingest_streams_progress(self, client, docs):
+        response = client.post("/ingest", json={"directory": str(docs), "collection": "notes", "stream": True})
+
+        events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+        assert events[0] == "start"
+        assert events[-1] == "done"
+        assert '"added": 3' in response.text
+
+    def test_rejects_missing_directory_and_bad_collection(self, client, docs, tmp_path):
+        assert client.post("/ingest", json={"directory": str(tmp_path / "nope")}).status_code == 400
+        assert client.post("/ingest", json={"directory": str(docs), "collection": "../x"}).status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_for_same_collection(self, tmp_path, docs, monkeypatch):
+        import api.ingest_routes as routes
+
+        store = _store(tmp_path)
+        monkeypatch.setattr(routes, "get_vector_store", lambda: store)
+        open_ingestor = routes._open_ingestor
+
+        def slow_open(collection):
+            time.sleep(0.2)  # 打开索引期间第二个请求到达
+            return open_ingestor(collection)
+
+        monkeypatch.setattr(routes, "_open_ingestor", slow_open)
+        app = FastAPI()
+        app.include_router(routes.router)
+        payload = {"directory": str(docs), "collection": "notes"}
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = await asyncio.gather(client.post("/ingest", json=payload), client.post("/ingest", json=payload))
+
+        assert sorted(r.status_code for r in responses) == [200, 409]
+        assert "notes" not in routes._running
+
+    @pytest.mark.asyncio
+    async def test_unread_stream_still_releases_collection(self, tmp_path, docs, monkeypatch):
+        import api.ingest_routes as routes
+
+        store = _store(tmp_path)
+        monkeypatch.setattr(routes, "get_vector_store", lambda: store)
+        request = routes.IngestRequest(directory=str(docs), collection="notes", stream=True)
+
+        # 客户端在读取 SSE 之前断开：响应体从未被迭代
+        await routes.ingest_directory(request)
+        await asyncio.gather(*routes._tasks)
+
+        assert "notes" not in routes._running
+        assert store.count("notes") == 3
@@ -0,0 +1,259 @@
+"""
+MacCortex 本地向量索引测试
+
+测试哈希向量化、磁盘嵌入缓存、NumPy 索引的持久化 / 更新 / 删除，
+以及 SearchPattern 语义搜索使用持久化索引
+"""
+
+import numpy as np
+import pytest
+
+from patterns.search import SearchPattern
+import retrieval.store as store_module
+from retrieval import CachedEmbedder, EmbeddingCache, HashingEmbedding, IncompatibleEmbeddingError, VectorStore
+from retrieval.embeddings import EmbeddingFunction
+
+
+DOCS = {
+    "mac": "苹果发布新款 MacBook Pro 笔记本电脑",
+    "weather": "The weather is sunny and warm today",
+    "python": "Python asyncio event loop tutorial for beginners",
+}
+
+
+class CountingEmbedding(EmbeddingFunction):
+    """记录调用批次的嵌入函数"""
+
+    def __init__(self):
+        self.inner = HashingEmbedding(64)
+        self.calls = []
+
+    @property
+    def name(self):
+        return "counting-64"
+
+    @property
+    def dimension(self):
+        return 64
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return self.inner.embed(texts)
+
+
+class NamedEmbedding(CountingEmbedding):
+    """以指定名称记录在集合上的嵌入函数（模拟 Ollama 建立的集合）"""
+
+    def __init__(self, name):
+        super().__init__()
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+
+def _configured_store(tmp_path, monkeypatch, default):
+    """按配置创建嵌入函数的 VectorStore（embedding_backend=auto 时 Ollama 不可用回退到 default）"""
+    monkeypatch.setattr(store_module, "get_embedding_function", lambda: default)
+    return VectorStore(str(tmp_path / "index"), backend="numpy", cache_directory=str(tmp_path / "cache"))
+
+
+def _store(tmp_path, function=None):
+    return VectorStore(
+        str(tmp_path / "index"),
+        embedding_function=function or HashingEmbedding(),
+        backend="numpy",
+        cache_directory=str(tmp_path / "cache"),
+    )
+
+
+class TestHashingEmbedding:
+    """测试哈希向量化"""
+
+    def test_deterministic_and_normalized(self):
+        embedding = HashingEmbedding(128)
+        a, b = embedding.embed(["hello world", "hello world"])
+
+        assert a.dtype == np.float32
+        assert np.allclose(a, b)
+        assert np.linalg.norm(a) == pytest.approx(1.0, abs=1e-5)
+
+    def test_similar_texts_score_higher(self):
+        vectors = HashingEmbedding().embed(["machine learning models", "learning machine model", "晴天 天气"])
+
+        assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+
+class TestCachedEmbedder:
+    """测试嵌入缓存与分批"""
+
+    def test_unchanged_text_is_never_re_embedded(self, tmp_path):
+        function = CountingEmbedding()
+        embedder = CachedEmbedder(function, EmbeddingCache(str(tmp_path)), batch_size=2)
+
+        first = embedder.embed(["a", "b", "c", "a"])
+        reopened = CachedEmbedder(function, EmbeddingCache(str(tmp_path)), batch_size=2)
+        second = reopened.embed(["c", "a", "d"])
+
+        assert function.calls == [["a", "b"], ["c"], ["d"]]
+        assert np.allclose(first[2], second[0])
+        assert reopened.stats == {"hits": 2, "misses": 1, "batches": 1}
+
+
+class TestVectorStore:
+    """测试 NumPy 向量索引"""
+
+    def test_query_ranks_by_similarity(self, tmp_path):
+        store = _store(tmp_path)
+        store.upsert("notes", list(DOCS), list(DOCS.values()), [{"title": k} for k in DOCS])
+
+        hits = store.query("notes", "asyncio tutorial", n_results=2)
+
+        assert hits[0]["id"] == "python"
+        assert hits[0]["distance"] < hits[1]["distance"]
+
+    def test_persists_across_instances(self, tmp_path):
+        store = _store(tmp_path)
+        store.upsert("notes", list(DOCS), list(DOCS.values()))
+        store.close()
+
+        reopened = _store(tmp_path)
+
+        assert reopened.count("notes") == 3
+        assert reopened.query("notes", "MacBook 电脑", n_results=1)[0]["id"] == "mac"
+
+    def test_upsert_overwrites_and_delete(self, tmp_path):
+        store = _store(tmp_path)
+        store.upsert("notes", list(DOCS), list(DOCS.values()))
+        store.upsert("notes", ["weather"], ["Python packaging tutorial"], [{"v": 2}])
+
+        assert store.count("notes") == 3
+        assert store.delete("notes", ["mac", "missing"]) == 1
+        hits = store.query("notes", "tutorial", n_results=5)
+        assert {hit["id"] for hit in hits} == {"python", "weather"}
+        assert next(hit for hit in hits if hit["id"] == "weather")["metadata"] == {"v": 2}
+
+    def test_where_filter(self, tmp_path):
+        store = _store(tmp_path)
+        store.upsert("notes", list(DOCS), list(DOCS.values()), [{"lang": "zh"}, {"lang": "en"}, {"lang": "en"}])
+
+        hits = store.query("notes", "电脑", n_results=5, where={"lang": "en"})
+
+        assert {hit["id"] for hit in hits} == {"weather", "python"}
+
+    def test_rejects_incompatible_embedding(self, tmp_path):
+        _store(tmp_path).upsert("notes", ["a"], ["text"])
+
+        with pytest.raises(ValueError):
+            _store(tmp_path, CountingEmbedding()).query("notes", "text")
+
+    def test_configured_store_reopens_with_recorded_embedding(self, tmp_path, monkeypatch):
+        _store(tmp_path).upsert("notes", list(DOCS), list(DOCS.values()))  # hashing-384
+        store = _configured_store(tmp_path, monkeypatch, HashingEmbedding(64))
+
+        hits = store.query("notes", "weather today", n_results=1)
+        store.upsert("notes", ["extra"], ["another note about the weather"])
+
+        assert hits[0]["id"] == "weather"
+        assert store.count("notes") == 4
+        assert store.embedder.name == "hashing-64"  # 新集合仍用当前嵌入函数
+
+    def test_unavailable_recorded_embedding_fails_loudly(self, tmp_path, monkeypatch):
+        _store(tmp_path, NamedEmbedding("ollama:nomic-embed-text")).upsert("notes", ["a"], ["text"])
+        store = _configured_store(tmp_path, monkeypatch, HashingEmbedding())
+
+        def unavailable(name):
+            raise ConnectionError("Ollama is not running")
+
+        monkeypatch.setattr(store_module, "embedding_function_for", unavailable)
+
+        with pytest.raises(IncompatibleEmbeddingError, match="ollama:nomic-embed-text.*Ollama"):
+            store.query("notes", "text")
+
+    def test_invalid_collection_name(self, tmp_path):
+        with pytest.raises(ValueError):
+            _store(tmp_path).query("../etc", "x")
+
+    def test_batched_upserts_grow_buffer_geometrically(self, tmp_path):
+        store = _store(tmp_path)
+        buffer, reallocations = None, 0
+        for i in range(500):
+            store.upsert("notes", [f"n{i}"], [f"note number {i}"], persist=False)
+            current = store._collections["notes"]._buffer
+            reallocations += current is not buffer
+            buffer = current
+
+        assert store.count("notes") == 500
+        assert reallocations == 4  # 64 → 128 → 256 → 512 行，而不是每批复制一次
+        assert store.query("notes", "note number 123", n_results=1)[0]["id"] == "n123"
+
+    def test_chroma_reads_do_not_create_collections(self, tmp_path):
+        class FakeCollection:
+            def __init__(self, name, metadata):
+                self.name, self.metadata, self.rows = name, metadata, {}
+
+            def upsert(self, ids, embeddings, documents, metadatas):
+                self.rows.update(zip(ids, documents))
+
+            def count(self):
+                return len(self.rows)
+
+        class FakeChroma:
+            def __init__(self):
+                self.collections = {}
+
+            def list_collections(self):
+                return list(self.collections)
+
+            def get_collection(self, name):
+                return self.collections[name]
+
+            def get_or_create_collection(self, name, metadata):
+                return self.collections.setdefault(name, FakeCollection(name, metadata))
+
+        store = _store(tmp_path)
+        store._chroma = FakeChroma()
+
+        assert store.query("typo", "text") == []
+        assert store.count("typo") == 0
+        assert store.delete("typo", ["a"]) == 0
+        assert store._chroma.collections == {}
+
+        store.upsert("notes", ["a"], ["text"])
+        store._collections.clear()
+        assert store.count("notes") == 1
+        assert store._chroma.collections["notes"].metadata["embedding"] == "hashing-384"
+
+
+class TestSearchPatternSemantic:
+    """测试 SearchPattern 使用持久化索引"""
+
+    @pytest.mark.asyncio
+    async def test_semantic_search_uses_store(self, tmp_path):
+        store = _store(tmp_path)
+        store.upsert("default", list(DOCS), list(DOCS.values()), [{"title": k} for k in DOCS])
+        pattern = SearchPattern()
+        pattern._vector_db = store
+
+        results = await pattern._semantic_search("weather today", "default", 1)
+
+        assert results[0]["title"] == "weather"
+        assert results[0]["source"] == "numpy"
+        assert 0 < results[0]["similarity"] <= 1
+
+    @pytest.mark.asyncio
+    async def test_incompatible_collection_is_not_masked_by_mock(self, tmp_path):
+        _store(tmp_path).upsert("default", ["a"], ["text"])
+        pattern = SearchPattern()
+        pattern._vector_db = _store(tmp_path, CountingEmbedding())
+
+        with pytest.raises(IncompatibleEmbeddingError):
+            await pattern._semantic_search("text", "default", 1)
+
+    @pytest.mark.asyncio
+    async def test_empty_collection_returns_no_results(self, tmp_path):
+        pattern = SearchPattern()
+        pattern._vector_db = _store(tmp_path)
+
+        assert await pattern._semantic_search("anything", "empty", 3) == []
@@ -250,6 +250,19 @@ class TestParameterValidation:
         assert is_valid is False
         assert "to_format" in error
 
+    def test_summarize_session_parameters(self, validator):
+        """测试 summarize Pattern 的增量会话参数"""
+        params = {"session_id": "chat-42", "reset": True}
+        is_valid, error, validated = validator.validate_parameters("summarize", params)
+        assert is_valid is True
+        assert validated == params
+
+    def test_summarize_session_id_type(self, validator):
+        """测试 session_id 必须是字符串"""
+        is_valid, error, validated = validator.validate_parameters("summarize", {"session_id": 42})
+        assert is_valid is False
+        assert "session_id" in error
+
     # --- search Pattern ---
 
     def test_search_valid_parameters(self, validator):
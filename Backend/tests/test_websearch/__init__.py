@@ -0,0 +1,3 @@
+"""
+MacCortex Web Search Tests
+"""
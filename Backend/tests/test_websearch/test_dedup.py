@@ -0,0 +1,114 @@
+"""
+MacCortex 搜索结果近似去重测试
+
+测试 MinHash 相似度估计、阈值、去重统计，以及 SearchPattern / ResearcherNode 总结前去重
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.orchestration.nodes.researcher import ResearcherNode
+from patterns.search import SearchPattern
+from websearch import NearDuplicateFilter, SearchResult, StubEngine, WebSearchService, dedup_results, shingles
+from websearch.service import SearchRateLimiter
+
+ARTICLE = (
+    "Apple today announced macOS Sequoia, the next major release of the Mac operating system. "
+    "The update brings iPhone mirroring, which lets users control their phone from the desktop, "
+    "a new Passwords app that collects saved logins and verification codes in one place, "
+    "and window tiling that snaps apps to the edges of the screen. "
+    "Safari gains highlights that surface useful information on a page, and a redesigned reader view. "
+    "Apple Intelligence features such as writing tools and a more capable Siri arrive later this fall "
+    "for Macs with Apple silicon. A developer beta is available now and a public beta follows next month."
+)
+SYNDICATED = "CUPERTINO (Reuters) - " + ARTICLE.replace("later this fall", "this autumn") + " Read more at Reuters."
+UNRELATED = "The Python asyncio module provides an event loop, tasks, futures and structured cancellation."
+
+
+class TestNearDuplicateFilter:
+    """测试 MinHash 去重"""
+
+    def test_shingles_ignore_case_and_punctuation(self):
+        assert shingles("Hello, World! Foo bar") == shingles("hello world foo   BAR")
+        assert shingles("一二三四") == ["一 二 三", "二 三 四"]
+        assert shingles("短") == ["短"]
+        assert shingles("...") == []
+
+    def test_similarity_estimates_jaccard(self):
+        dedup = NearDuplicateFilter()
+
+        similarity = dedup.similarity_matrix([ARTICLE, SYNDICATED, UNRELATED])
+
+        assert similarity[0, 1] > 0.8
+        assert similarity[0, 2] < 0.1
+        assert (similarity.diagonal() == 1).all()
+
+    def test_keeps_first_copy_in_order(self):
+        keep, duplicates = NearDuplicateFilter(0.8).filter([UNRELATED, ARTICLE, SYNDICATED, ARTICLE])
+
+        assert keep == [0, 1]
+        assert [(item["index"], item["duplicate_of"]) for item in duplicates] == [(2, 1), (3, 1)]
+
+    def test_threshold_controls_removal(self):
+        texts = [ARTICLE, SYNDICATED]
+
+        assert NearDuplicateFilter(0.99).filter(texts)[0] == [0, 1]
+        assert NearDuplicateFilter(1.01).filter([ARTICLE, ARTICLE])[0] == [0, 1]
+
+    def test_empty_texts_are_never_duplicates(self):
+        keep, _ = NearDuplicateFilter().filter(["", "", ARTICLE])
+
+        assert keep == [0, 1, 2]
+
+    def test_dedup_results_reports_tokens_saved(self):
+        results = [
+            {"url": "https://a.com/1", "snippet": ARTICLE},
+            {"url": "https://b.com/1", "snippet": "摘要", "content": SYNDICATED},
+            {"url": "https://c.com/1", "snippet": UNRELATED},
+        ]
+
+        unique, report = dedup_results(results, threshold=0.8)
+
+        assert [result["url"] for result in unique] == ["https://a.com/1", "https://c.com/1"]
+        assert report["removed"] == 1
+        assert report["tokens_saved"] > 50
+        assert report["duplicates"][0]["url"] == "https://b.com/1"
+
+
+class TestSummaryDedup:
+    """测试总结前去重"""
+
+    def _service(self):
+        results = [
+            SearchResult(title=f"结果 {i}", url=f"https://site{i}.com/a", snippet=text, source="duckduckgo", rank=i)
+            for i, text in enumerate([ARTICLE, SYNDICATED, UNRELATED], start=1)
+        ]
+        engine = StubEngine(name="duckduckgo", results={"macOS": results})
+        return WebSearchService([engine], limiter=SearchRateLimiter(4, 0.0))
+
+    @pytest.mark.asyncio
+    async def test_search_pattern_reports_dedup(self):
+        pattern = SearchPattern(search_service=self._service())
+        pattern._mode = "mock"
+        pattern._summarize_results = AsyncMock(return_value="总结")
+
+        result = await pattern.execute("macOS", {"num_results": 3})
+
+        summarized = pattern._summarize_results.call_args[0][1]
+        assert [item["url"] for item in summarized] == ["https://site1.com/a", "https://site3.com/a"]
+        assert result["metadata"]["dedup"]["removed"] == 1
+        assert result["metadata"]["total_found"] == 3
+
+    @pytest.mark.asyncio
+    async def test_researcher_drops_duplicates_before_llm(self, tmp_path):
+        llm = AsyncMock()
+        llm.ainvoke = AsyncMock(return_value=Mock(content="总结"))
+        researcher = ResearcherNode(tmp_path, llm=llm, search=self._service(), max_search_results=3)
+
+        await researcher._web_search("macOS")
+
+        prompt = llm.ainvoke.call_args[0][0][1].content
+        assert "https://site2.com/a" not in prompt and "https://site3.com/a" in prompt
+        assert researcher.last_dedup["removed"] == 1
+        assert researcher.last_dedup["tokens_saved"] > 0
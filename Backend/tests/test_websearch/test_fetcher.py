@@ -0,0 +1,359 @@
+"""
+MacCortex 网页抓取与正文提取测试
+
+使用本地 HTTP 替身服务器测试并发、单站并发上限、大小 / 时间上限、
+ETag / Last-Modified 重新验证，以及 SearchPattern / ResearcherNode 集成
+"""
+
+import asyncio
+import socket
+import time
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+import pytest
+
+from src.orchestration.nodes.researcher import ResearcherNode
+from patterns.search import SearchPattern
+from websearch import (
+    BlockedURLError,
+    PageCache,
+    PageFetcher,
+    SearchResult,
+    StubEngine,
+    WebSearchService,
+    extract_main_content,
+)
+from websearch.fetcher import ensure_public_url
+from websearch.service import SearchRateLimiter
+from websearch.testing import LocalHTTPServer
+
+ARTICLE = """<html><head><title>MacCortex 简介</title><script>var x = 1;</script></head>
+<body>
+  <nav><a href="/">首页</a> <a href="/docs">文档</a></nav>
+  <header><h1>站点标题</h1></header>
+  <article>
+    <h1>MacCortex</h1>
+    <p>MacCortex 是下一代 macOS 个人智能基础设施。</p>
+    <p>相关：<a href="/a">链接一</a> <a href="/b">链接二</a></p>
+    <ul><li>本地优先</li><li>隐私保护</li></ul>
+  </article>
+  <footer>版权所有</footer>
+</body></html>"""
+
+
+@pytest.fixture
+def server():
+    with LocalHTTPServer() as server:
+        yield server
+
+
+def _fetcher(**kwargs):
+    kwargs.setdefault("extract_workers", 0)
+    kwargs.setdefault("cache", PageCache(max_entries=64, ttl_seconds=600))
+    kwargs.setdefault("allow_private_hosts", True)  # 替身服务器在回环地址上
+    return PageFetcher(**kwargs)
+
+
+class TestExtractMainContent:
+    """测试正文提取"""
+
+    def test_keeps_article_and_drops_boilerplate(self):
+        title, text = extract_main_content(ARTICLE)
+
+        assert title == "MacCortex 简介"
+        assert text.startswith("# MacCortex")
+        assert "下一代 macOS 个人智能基础设施" in text
+        assert "- 本地优先" in text
+        for noise in ("var x", "首页", "站点标题", "版权所有", "链接一"):
+            assert noise not in text
+
+    def test_implicitly_closed_tags_inside_skipped_region(self):
+        html = "<title>T</title><nav><ul><li>Home<li>About</ul></nav><p>正文内容</p>"
+
+        assert extract_main_content(html) == ("T", "正文内容")
+
+    def test_skipped_region_ends_at_its_own_end_tag(self):
+        _, text = extract_main_content("<header><p>Site</header><p>Body</p>")
+
+        assert text == "Body"
+
+    def test_nested_skip_tags(self):
+        _, text = extract_main_content("<aside><aside>内层</aside>外层</aside><p>Body</p>")
+
+        assert text == "Body"
+
+    def test_max_chars_cuts_at_block_boundary(self):
+        html = "<body>" + "".join(f"<p>段落 {i} " + "内容" * 20 + "</p>" for i in range(50)) + "</body>"
+
+        _, text = extract_main_content(html, max_chars=200)
+
+        assert 0 < len(text) <= 200
+        assert text.endswith("内容")
+
+
+class TestPublicTargets:
+    """测试拒绝非公网抓取目标"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("url", [
+        "http://127.0.0.1/",
+        "http://10.0.0.8/admin",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://[::1]/",
+        "http://[::ffff:192.168.1.1]/",
+        "http://localhost:8000/",
+        "file:///etc/passwd",
+    ])
+    async def test_rejects_non_public_targets(self, url):
+        with pytest.raises(BlockedURLError):
+            await ensure_public_url(url)
+
+    @pytest.mark.asyncio
+    async def test_accepts_public_address(self):
+        await ensure_public_url("https://93.184.216.34/page")
+
+    @pytest.mark.asyncio
+    async def test_loopback_result_is_not_fetched_by_default(self, server):
+        url = server.add_page("/a", ARTICLE)
+        fetcher = PageFetcher(extract_workers=0, cache=PageCache())
+
+        page = await fetcher.fetch(url)
+
+        assert "BlockedURLError" in page.error
+        assert server.count("/a") == 0
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_redirect_to_private_address_is_blocked(self):
+        requested = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested.append(str(request.url))
+            if request.url.host == "93.184.216.34":
+                return httpx.Response(302, headers={"Location": "http://127.0.0.1:8000/admin"})
+            return httpx.Response(200, text="<p>secret</p>", headers={"Content-Type": "text/html"})
+
+        fetcher = PageFetcher(extract_workers=0, cache=PageCache(), transport=httpx.MockTransport(handler))
+
+        page = await fetcher.fetch("http://93.184.216.34/result")
+
+        assert "BlockedURLError" in page.error
+        assert requested == ["http://93.184.216.34/result"]
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_public_redirects_are_followed(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/old":
+                return httpx.Response(301, headers={"Location": "/new"})
+            return httpx.Response(200, text="<p>moved here</p>", headers={"Content-Type": "text/html"})
+
+        fetcher = PageFetcher(extract_workers=0, cache=PageCache(), transport=httpx.MockTransport(handler))
+
+        page = await fetcher.fetch("http://93.184.216.34/old")
+
+        assert page.text == "moved here"
+        await fetcher.aclose()
+
+
+    @pytest.mark.asyncio
+    async def test_request_is_pinned_to_validated_address(self, monkeypatch):
+        resolved = []
+
+        async def getaddrinfo(host, port, **kwargs):
+            resolved.append(host)
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", port))]
+
+        monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+        requested = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested.append((
+                request.url.host, request.headers["host"],
+                request.extensions.get("sni_hostname"), request.url.path,
+            ))
+            if request.url.path == "/old":
+                return httpx.Response(301, headers={"Location": "/new"})
+            return httpx.Response(200, text="<p>moved here</p>", headers={"Content-Type": "text/html"})
+
+        fetcher = PageFetcher(extract_workers=0, cache=PageCache(), transport=httpx.MockTransport(handler))
+
+        page = await fetcher.fetch("https://news.example/old")
+
+        assert page.text == "moved here"
+        assert resolved == ["news.example", "news.example"]  # 每一跳只解析一次（校验时）
+        assert requested == [
+            ("93.184.216.34", "news.example", "news.example", "/old"),
+            ("93.184.216.34", "news.example", "news.example", "/new"),
+        ]
+        await fetcher.aclose()
+
+
+class TestPageFetcher:
+    """测试抓取、上限与缓存"""
+
+    @pytest.mark.asyncio
+    async def test_fetches_concurrently_and_preserves_order(self, server):
+        urls = [server.add_page(f"/p{i}", f"<p>页面 {i}</p>", delay=0.2) for i in range(4)]
+        fetcher = _fetcher(per_host=4)
+
+        start = time.monotonic()
+        pages = await fetcher.fetch_many(urls)
+        elapsed = time.monotonic() - start
+
+        assert [page.text for page in pages] == [f"页面 {i}" for i in range(4)]
+        assert elapsed < 0.6
+        assert server.peak_active == 4
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_per_host_limit(self, server):
+        urls = [server.add_page(f"/p{i}", "<p>x</p>", delay=0.05) for i in range(6)]
+        fetcher = _fetcher(per_host=2)
+
+        await fetcher.fetch_many(urls)
+
+        assert server.peak_active == 2
+        assert fetcher._host_slots == {}  # 空闲站点的信号量不会一直保留
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_size_cap_truncates_download(self, server):
+        url = server.add_page("/big", "<p>" + "a" * 500_000 + "</p>")
+        fetcher = _fetcher(max_bytes=10_000)
+
+        page = await fetcher.fetch(url)
+
+        assert page.ok and page.truncated
+        assert page.bytes == 10_000
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_timeout_is_reported_not_raised(self, server):
+        slow = server.add_page("/slow", "<p>慢</p>", delay=1.0)
+        fast = server.add_page("/fast", "<p>快</p>")
+        fetcher = _fetcher(timeout=0.2)
+
+        start = time.monotonic()
+        pages = await fetcher.fetch_many([slow, fast])
+
+        assert time.monotonic() - start < 0.8
+        assert pages[0].error.startswith("timeout") and not pages[0].ok
+        assert pages[1].text == "快"
+        assert fetcher.stats["failed"] == 1
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_http_errors_and_unsupported_types(self, server):
+        image = server.add_page("/img", b"\x89PNG", content_type="image/png")
+        fetcher = _fetcher()
+
+        missing, binary = await fetcher.fetch_many([server.url("/missing"), image])
+
+        assert "404" in missing.error
+        assert "unsupported content type" in binary.error
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_fresh_cache_skips_request(self, server):
+        url = server.add_page("/a", ARTICLE)
+        fetcher = _fetcher()
+
+        first = await fetcher.fetch(url)
+        second = await fetcher.fetch(url)
+
+        assert second.from_cache and second.text == first.text
+        assert server.count("/a") == 1
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("validator", [{"etag": '"v1"'}, {"last_modified": 1_700_000_000}])
+    async def test_stale_entry_is_revalidated(self, server, validator):
+        url = server.add_page("/a", ARTICLE, **validator)
+        fetcher = _fetcher(cache=PageCache(ttl_seconds=0))
+
+        first = await fetcher.fetch(url)
+        second = await fetcher.fetch(url)
+
+        assert second.revalidated and second.status == 304
+        assert second.text == first.text
+        assert server.not_modified == 1
+        assert fetcher.cache.stats["revalidations"] == 1
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_changed_page_replaces_cached_text(self, server):
+        url = server.add_page("/a", "<p>旧版本</p>", etag='"v1"')
+        fetcher = _fetcher(cache=PageCache(ttl_seconds=0))
+        await fetcher.fetch(url)
+
+        server.add_page("/a", "<p>新版本</p>", etag='"v2"')
+        page = await fetcher.fetch(url)
+
+        assert not page.revalidated and page.text == "新版本"
+        assert server.requests[-1][1]["if-none-match"] == '"v1"'
+        await fetcher.aclose()
+
+    @pytest.mark.asyncio
+    async def test_process_pool_extraction(self, server):
+        url = server.add_page("/a", ARTICLE)
+        fetcher = _fetcher(extract_workers=1)
+
+        page = await fetcher.fetch(url)
+
+        assert "下一代 macOS 个人智能基础设施" in page.text
+        await fetcher.aclose()
+
+
+class TestFetchIntegration:
+    """测试 SearchPattern 与 ResearcherNode 使用抓取的正文"""
+
+    def _service(self, server):
+        results = [
+            SearchResult(title=f"结果 {i}", url=server.url(f"/r{i}"), snippet=f"摘要 {i}", source="duckduckgo", rank=i)
+            for i in (1, 2)
+        ]
+        engine = StubEngine(name="duckduckgo", results={"macOS": results})
+        return WebSearchService([engine], limiter=SearchRateLimiter(4, 0.0))
+
+    @pytest.mark.asyncio
+    async def test_search_pattern_attaches_content(self, server):
+        server.add_page("/r1", "<p>第一篇正文</p>")
+        pattern = SearchPattern(search_service=self._service(server), page_fetcher=_fetcher())
+        pattern._mode = "mock"
+
+        result = await pattern.execute("macOS", {"fetch_pages": True, "num_results": 2})
+
+        fetch = result["metadata"]["fetch"]
+        assert fetch["requested"] == 2 and fetch["fetched"] == 1 and fetch["failed"] == 1
+        assert '"content": "第一篇正文"' in result["output"]
+
+    @pytest.mark.asyncio
+    async def test_summary_prompt_prefers_fetched_content(self):
+        pattern = SearchPattern()
+        pattern._mode = "ollama"
+        pattern._ollama_client = AsyncMock()
+        pattern._ollama_client.generate = AsyncMock(return_value={"response": "总结"})
+
+        await pattern._summarize_results("q", [{"title": "t", "snippet": "摘要", "content": "正文"}])
+
+        prompt = pattern._ollama_client.generate.call_args.kwargs["prompt"]
+        assert "正文" in prompt and "摘要" not in prompt
+
+    @pytest.mark.asyncio
+    async def test_researcher_summarizes_fetched_content(self, server, tmp_path):
+        server.add_page("/r1", "<p>第一篇正文</p>")
+        server.add_page("/r2", "<p>第二篇正文</p>")
+        llm = AsyncMock()
+        llm.ainvoke = AsyncMock(return_value=Mock(content="总结"))
+        researcher = ResearcherNode(
+            tmp_path, llm=llm, search=self._service(server), fetch_pages=True, page_fetcher=_fetcher()
+        )
+        researcher.max_search_results = 2
+
+        await researcher._web_search("macOS")
+
+        prompt = llm.ainvoke.call_args[0][0][1].content
+        assert "第一篇正文" in prompt and "第二篇正文" in prompt
+        assert "摘要 1" not in prompt
@@ -0,0 +1,159 @@
+"""
+MacCortex 共享 Web 搜索服务测试
+
+测试结果缓存、并发请求合并、全局限流、引擎注册，
+以及 SearchPattern 与 ResearcherNode 共用同一服务
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.orchestration.nodes.researcher import ResearcherNode
+from patterns.search import SearchPattern
+from websearch import (
+    SearchRateLimiter,
+    SearchResult,
+    StubEngine,
+    WebSearchService,
+    close_search_service,
+    get_search_service,
+)
+
+
+def _service(engine=None, max_concurrency=4, min_interval=0.0):
+    return WebSearchService([engine or StubEngine()], limiter=SearchRateLimiter(max_concurrency, min_interval))
+
+
+class TestWebSearchService:
+    """测试缓存与请求合并"""
+
+    @pytest.mark.asyncio
+    async def test_results_are_consistent_objects_and_cached(self):
+        engine = StubEngine()
+        service = _service(engine)
+        info = {}
+
+        first = await service.search("macOS", 3, engine="stub")
+        second = await service.search("macOS", 3, engine="stub", cache_info=info)
+
+        assert all(isinstance(result, SearchResult) for result in first)
+        assert [result.rank for result in first] == [1, 2, 3]
+        assert first == second
+        assert info["status"] == "hit"
+        assert engine.calls == ["macOS"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_queries_are_coalesced(self):
+        engine = StubEngine(delay=0.05)
+        service = _service(engine)
+
+        results = await asyncio.gather(*(service.search("same", 2, engine="stub") for _ in range(5)))
+
+        assert engine.calls == ["same"]
+        assert all(result == results[0] for result in results)
+        assert service.stats["coalesced"] == 4
+        assert service.stats["inflight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failure_reaches_all_waiters_and_is_not_cached(self):
+        class FailingEngine(StubEngine):
+            async def search(self, query, num_results, language):
+                self.calls.append(query)
+                await asyncio.sleep(0.01)
+                raise RuntimeError("throttled")
+
+        engine = FailingEngine()
+        service = _service(engine)
+
+        results = await asyncio.gather(*(service.search("q", engine="stub") for _ in range(3)), return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await service.search("q", engine="stub")
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert engine.calls == ["q", "q"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            await _service().search("q", engine="altavista")
+
+
+class TestSearchRateLimiter:
+    """测试全局限流"""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrency(self):
+        engine = StubEngine(delay=0.03)
+        service = _service(engine, max_concurrency=2)
+        active, peak = 0, 0
+        original = engine.search
+
+        async def tracking(query, num_results, language):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            try:
+                return await original(query, num_results, language)
+            finally:
+                active -= 1
+
+        engine.search = tracking
+        await asyncio.gather(*(service.search(f"q{i}", engine="stub") for i in range(6)))
+
+        assert peak == 2
+        assert service.limiter.stats["acquired"] == 6
+
+    @pytest.mark.asyncio
+    async def test_spaces_request_starts(self):
+        service = _service(min_interval=0.05)
+
+        start = time.monotonic()
+        await asyncio.gather(*(service.search(f"q{i}", engine="stub") for i in range(3)))
+
+        assert time.monotonic() - start >= 0.1
+        assert service.limiter.stats["throttled"] == 2
+
+
+class TestSharedService:
+    """测试 SearchPattern 与 ResearcherNode 共用服务"""
+
+    @pytest.mark.asyncio
+    async def test_pattern_and_researcher_share_cache(self, tmp_path):
+        engine = StubEngine(name="duckduckgo")
+        service = _service(engine)
+        llm = AsyncMock()
+        llm.ainvoke = AsyncMock(return_value=Mock(content="总结"))
+        researcher = ResearcherNode(tmp_path, llm=llm, search=service, max_search_results=5)
+        pattern = SearchPattern(search_service=service)
+
+        summary = await researcher._web_search("Python asyncio")
+        result = await pattern.execute("Python asyncio", {"summarize": False})
+
+        assert summary == "总结"
+        assert "https://example.com/duckduckgo/1" in llm.ainvoke.call_args[0][0][1].content
+        assert result["data"]["results"][0]["source"] == "duckduckgo"
+        assert result["metadata"]["cache"]["status"] == "hit"
+        assert engine.calls == ["Python asyncio"]
+
+    def test_shared_service_has_no_stub_engine(self):
+        close_search_service()
+        try:
+            service = get_search_service()
+            assert service.engines == ["duckduckgo"]
+        finally:
+            close_search_service()
+
+    @pytest.mark.asyncio
+    async def test_pattern_falls_back_to_mock_when_engine_fails(self):
+        class BrokenEngine(StubEngine):
+            async def search(self, query, num_results, language):
+                raise ImportError("duckduckgo_search")
+
+        pattern = SearchPattern(search_service=_service(BrokenEngine(name="duckduckgo")))
+
+        results = await pattern._web_search("q", "duckduckgo", 2, "zh-CN")
+
+        assert [result["source"] for result in results] == ["mock", "mock"]